@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+llama.cpp 스레드/배치 파라미터 자동 튜닝
+
+실제 GGUF로 짧은 prefill(프롬프트 평가)/decode(토큰 생성) 벤치마크를 후보 조합마다 실행하여
+n_threads(디코드), n_threads_batch(prefill), n_batch, n_ubatch의 최적값을 찾고
+호스트/모델별 프로파일 파일(AUTOTUNE_PROFILE_PATH)에 저장합니다.
+이후 서버 시작 시 모델 로딩(get_llm_instance, 추론 풀)이 이 프로파일을 읽어 적용합니다.
+
+사용법:
+    python autotune.py                       # 튜닝 후 프로파일 저장
+    python gemma_summarizer_multi.py --autotune
+"""
+
+import glob
+import json
+import os
+import socket
+import sys
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from config import get_config, get_model_path
+
+
+class AutotuneResult(NamedTuple):
+    """후보 하나의 측정 결과 (prefill 후보는 decode_tps가 0, decode 후보는 prefill_tps가 0)"""
+    n_threads: int
+    n_threads_batch: int
+    n_batch: int
+    n_ubatch: int
+    prefill_tps: float
+    decode_tps: float
+
+
+# (n_batch, n_ubatch) 후보 - n_ubatch는 한 번에 계산하는 물리 배치, n_batch는 논리 배치
+BATCH_CANDIDATES = [(256, 256), (512, 256), (512, 512), (1024, 512), (2048, 512)]
+
+
+def thread_candidates(max_threads: int) -> List[int]:
+    """스레드 수 후보 (최대값, 3/4, 1/2, 1/4 - 메모리 대역폭이 먼저 포화되면 적은 스레드가 빠름)"""
+    values = {max_threads, max_threads * 3 // 4, max_threads // 2, max_threads // 4}
+    return sorted((value for value in values if value >= 1), reverse=True)
+
+
+def profile_key(model_path: str) -> str:
+    """프로파일 키: 호스트 + 모델 파일(경로, 크기, 수정 시각) - 모델을 교체하면 다시 튜닝"""
+    path = os.path.realpath(model_path)
+    try:
+        stat = os.stat(path)
+        fingerprint = f"{stat.st_size}:{int(stat.st_mtime)}"
+    except OSError:
+        fingerprint = 'missing'
+    return f"{socket.gethostname()}|{path}|{fingerprint}"
+
+
+def _profile_path(config: Dict[str, Any]) -> str:
+    path = config.get('AUTOTUNE_PROFILE_PATH', 'autotune_profile.json')
+    if not os.path.isabs(path):
+        path = os.path.join(config.get('WORKSPACE_DIR', '.'), path)
+    return path
+
+
+def load_profiles(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_profile(model_path: str, profile: Dict[str, Any], config: Optional[Dict[str, Any]] = None) -> str:
+    """프로파일 파일에 이 호스트/모델의 튜닝 결과 저장 (다른 호스트/모델 항목은 유지)"""
+    config = config or get_config()
+    path = _profile_path(config)
+    profiles = load_profiles(path)
+    profiles[profile_key(model_path)] = profile
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(profiles, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
+    return path
+
+
+def load_tuned_profile(model_path: str, config: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """이 호스트/모델의 튜닝 결과 (AUTOTUNE_PROFILE_ENABLED=false이거나 없으면 None)"""
+    config = config or get_config()
+    if not config.get('AUTOTUNE_PROFILE_ENABLED', True):
+        return None
+    return load_profiles(_profile_path(config)).get(profile_key(model_path))
+
+
+def apply_tuned_profile(profile: Optional[Dict[str, Any]], n_threads: int) -> Dict[str, int]:
+    """
+    튜닝 결과를 Llama 생성 인자로 변환
+
+    스레드 수는 CPU 계획의 인스턴스 예산(n_threads)을 넘지 않게 제한한다 (여러 인스턴스가 나눠 쓰는 경우).
+    """
+    if not profile:
+        return {'n_threads': n_threads, 'n_threads_batch': n_threads}
+    return {
+        'n_threads': max(1, min(int(profile['n_threads']), n_threads)),
+        'n_threads_batch': max(1, min(int(profile['n_threads_batch']), n_threads)),
+        'n_batch': int(profile['n_batch']),
+        'n_ubatch': int(profile['n_ubatch']),
+    }
+
+
+class LlamaBench:
+    """벤치마크용 Llama 래퍼 (배치 크기별로 컨텍스트를 새로 만들고 스레드 수는 실행 중에 변경)"""
+
+    def __init__(self, model_path: str, n_ctx: int, n_batch: int, n_ubatch: int, n_threads: int):
+        from llama_cpp import Llama
+
+        self.llm = Llama(model_path=model_path, n_ctx=n_ctx, n_batch=n_batch, n_ubatch=n_ubatch,
+                         n_threads=n_threads, n_threads_batch=n_threads, use_mmap=True, verbose=False)
+
+    def tokenize(self, text: str) -> List[int]:
+        return self.llm.tokenize(text.encode('utf-8'), add_bos=True)
+
+    def set_threads(self, n_threads: int, n_threads_batch: int):
+        self.llm._ctx.set_n_threads(n_threads, n_threads_batch)
+
+    def reset(self):
+        self.llm.reset()
+        self.llm._ctx.kv_cache_clear()
+
+    def eval(self, tokens: List[int]):
+        self.llm.eval(tokens)
+
+    def close(self):
+        self.llm.close()
+
+
+def _sample_prompt() -> str:
+    """prefill 벤치마크용 실제 요약 프롬프트 (샘플 요청이 없으면 지시문만)"""
+    from gemma_summarizer import build_summary_prompt
+    from preprocessor import preprocess_request_data
+
+    texts = []
+    for path in sorted(glob.glob('sample/sample_request_*.json')):
+        with open(path, 'r', encoding='utf-8') as f:
+            texts.append(preprocess_request_data(json.load(f)).get('text', ''))
+    return build_summary_prompt(max(texts, key=len) if texts else '')
+
+
+def autotune(max_threads: int, open_bench: Callable[[int, int, int], Any], prompt: str,
+             prefill_tokens: int = 512, decode_tokens: int = 32,
+             clock: Callable[[], float] = time.perf_counter) -> Dict[str, Any]:
+    """
+    후보 조합을 측정하여 최적 설정 선택
+
+    prefill 속도는 n_threads_batch/n_batch/n_ubatch에, decode 속도는 n_threads에만 영향을 받으므로 따로 측정한다.
+    1. (n_batch, n_ubatch) x n_threads_batch 마다 prefill_tokens개 프롬프트 평가 → prefill tokens/s
+    2. 가장 빠른 배치 설정으로 n_threads 마다 decode_tokens개를 한 토큰씩 평가 → decode tokens/s
+
+    Args:
+        open_bench (callable): (n_batch, n_ubatch, n_threads) → LlamaBench와 같은 인터페이스의 객체
+
+    Returns:
+        dict: 최적 설정(n_threads, n_threads_batch, n_batch, n_ubatch, prefill_tps, decode_tps)과 후보별 결과(results)
+    """
+    threads = thread_candidates(max_threads)
+    results: List[AutotuneResult] = []
+    best_prefill: Optional[AutotuneResult] = None
+
+    for n_batch, n_ubatch in BATCH_CANDIDATES:
+        bench = open_bench(n_batch, n_ubatch, max_threads)
+        try:
+            # 프롬프트가 짧으면 반복하여 prefill_tokens개를 채움
+            prompt_tokens = bench.tokenize(prompt) or [0]
+            tokens = (prompt_tokens * (prefill_tokens // len(prompt_tokens) + 1))[:prefill_tokens]
+            for n_threads_batch in threads:
+                bench.set_threads(max_threads, n_threads_batch)
+                bench.reset()
+                start = clock()
+                bench.eval(tokens)
+                elapsed = max(clock() - start, 1e-9)
+                result = AutotuneResult(max_threads, n_threads_batch, n_batch, n_ubatch, len(tokens) / elapsed, 0.0)
+                results.append(result)
+                print(f"prefill n_batch={n_batch} n_ubatch={n_ubatch} n_threads_batch={n_threads_batch}: "
+                      f"{result.prefill_tps:.1f} tokens/s")
+                if best_prefill is None or result.prefill_tps > best_prefill.prefill_tps:
+                    best_prefill = result
+        finally:
+            bench.close()
+
+    best_decode: Optional[AutotuneResult] = None
+    bench = open_bench(best_prefill.n_batch, best_prefill.n_ubatch, max_threads)
+    try:
+        tokens = bench.tokenize(prompt)[:64]
+        for n_threads in threads:
+            bench.set_threads(n_threads, best_prefill.n_threads_batch)
+            bench.reset()
+            bench.eval(tokens)
+            start = clock()
+            for _ in range(decode_tokens):
+                bench.eval(tokens[-1:])
+            elapsed = max(clock() - start, 1e-9)
+            result = AutotuneResult(n_threads, best_prefill.n_threads_batch, best_prefill.n_batch,
+                                    best_prefill.n_ubatch, 0.0, decode_tokens / elapsed)
+            results.append(result)
+            print(f"decode n_threads={n_threads}: {result.decode_tps:.1f} tokens/s")
+            if best_decode is None or result.decode_tps > best_decode.decode_tps:
+                best_decode = result
+    finally:
+        bench.close()
+
+    return {
+        'n_threads': best_decode.n_threads,
+        'n_threads_batch': best_prefill.n_threads_batch,
+        'n_batch': best_prefill.n_batch,
+        'n_ubatch': best_prefill.n_ubatch,
+        'prefill_tps': best_prefill.prefill_tps,
+        'decode_tps': best_decode.decode_tps,
+        'results': [result._asdict() for result in results],
+    }
+
+
+def run_autotune(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """설정의 모델로 튜닝하고 프로파일 저장 (스레드 후보의 최대값은 CPU 계획의 추론 스레드 수)"""
+    from model_registry import resolve_thread_count
+
+    config = config or get_config()
+    model_path = get_model_path()
+    max_threads = int(resolve_thread_count(config))
+    n_ctx = int(config.get('AUTOTUNE_CONTEXT_SIZE', 2048))
+    prefill_tokens = min(int(config.get('AUTOTUNE_PREFILL_TOKENS', 512)), n_ctx - 128)
+    print(f"자동 튜닝 시작: {model_path} (최대 스레드 {max_threads}, prefill {prefill_tokens}토큰)")
+
+    profile = autotune(
+        max_threads,
+        lambda n_batch, n_ubatch, n_threads: LlamaBench(model_path, n_ctx, n_batch, n_ubatch, n_threads),
+        _sample_prompt(),
+        prefill_tokens=prefill_tokens,
+        decode_tokens=int(config.get('AUTOTUNE_DECODE_TOKENS', 32)),
+    )
+    profile['max_threads'] = max_threads
+    profile['tuned_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
+    path = save_profile(model_path, profile, config)
+    print(f"자동 튜닝 완료: n_threads={profile['n_threads']}, n_threads_batch={profile['n_threads_batch']}, "
+          f"n_batch={profile['n_batch']}, n_ubatch={profile['n_ubatch']} "
+          f"(prefill {profile['prefill_tps']:.1f} tokens/s, decode {profile['decode_tps']:.1f} tokens/s) → {path}")
+    return profile
+
+
+def main():
+    run_autotune()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
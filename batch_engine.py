@@ -0,0 +1,484 @@
+import codecs
+import ctypes
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from inference_watchdog import apply_deadline
+from metrics import metrics
+from summarizer_backend import SummarizerBackend
+
+# 공유 접두부(지시문) KV를 보관하는 시퀀스 - 요청 시퀀스는 1번부터 사용
+PREFIX_SEQ_ID = 0
+
+# 배치 항목: (토큰, 위치, 시퀀스 ID, 로짓 필요 여부)
+BatchEntry = Tuple[int, int, int, bool]
+
+
+def _common_prefix_length(a: Sequence[int], b: Sequence[int]) -> int:
+    length = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        length += 1
+    return length
+
+
+class LlamaBatchRuntime:
+    """
+    llama.cpp 저수준 배치 API 래퍼
+
+    가중치만 로드한 llama_model(_internals.LlamaModel)로 n_seq_max 시퀀스를 담는 컨텍스트 하나를 만든다
+    (Llama를 거치지 않으므로 쓰지 않는 MODEL_CONTEXT_SIZE KV 캐시를 따로 할당하지 않음).
+
+    llama-cpp-python 0.3.16+는 기본으로 시퀀스마다 KV 캐시를 n_ctx/n_seq_max 크기로 나누므로
+    kv_unified를 켜서 n_ctx 전체를 시퀀스들이 함께 쓰는 하나의 풀로 유지한다
+    (필드가 없는 이전 버전은 항상 단일 풀). 실제 적용 여부는 kv_unified 속성으로 노출한다.
+    """
+
+    def __init__(self, model, n_ctx: int, n_seq_max: int, n_batch: int, n_threads: int,
+                 kv_params: Optional[Dict[str, Any]] = None):
+        import llama_cpp
+        from llama_cpp import _internals
+
+        self._llama_cpp = llama_cpp
+        self._internals = _internals
+        self._model = model
+
+        params = llama_cpp.llama_context_default_params()
+        params.n_ctx = n_ctx
+        params.n_batch = n_batch
+        params.n_ubatch = min(n_batch, 512)
+        params.n_seq_max = n_seq_max
+        params.n_threads = n_threads
+        params.n_threads_batch = n_threads
+        if hasattr(params, 'kv_unified'):
+            params.kv_unified = True
+        # KV 캐시 타입/flash attention (MODEL_KV_CACHE_TYPE_K/V, resolve_kv_cache_params 결과)
+        for name, value in (kv_params or {}).items():
+            setattr(params, name, value)
+        self.kv_unified = bool(getattr(params, 'kv_unified', True))
+        self._ctx = _internals.LlamaContext(model=self._model, params=params, verbose=False)
+        self._batch = _internals.LlamaBatch(n_tokens=n_batch, embd=0, n_seq_max=1, verbose=False)
+        self._piece_buffer = ctypes.create_string_buffer(64)
+
+    def n_ctx(self) -> int:
+        return self._ctx.n_ctx()
+
+    def tokenize(self, text: str) -> List[int]:
+        # Llama.create_completion과 같은 방식 (BOS 추가, 특수 토큰 허용)
+        return self._model.tokenize(text.encode('utf-8'), add_bos=True, special=True)
+
+    def decode(self, entries: List[BatchEntry]):
+        batch = self._batch.batch
+        batch.n_tokens = len(entries)
+        for i, (token, pos, seq_id, logits) in enumerate(entries):
+            batch.token[i] = token
+            batch.pos[i] = pos
+            batch.seq_id[i][0] = seq_id
+            batch.n_seq_id[i] = 1
+            batch.logits[i] = logits
+        self._ctx.decode(self._batch)
+
+    def new_sampler(self, params: Dict[str, Any]):
+        sampler = self._internals.LlamaSampler()
+        sampler.add_penalties(64, float(params.get('repeat_penalty', 1.0)), 0.0, 0.0)
+        temperature = float(params.get('temperature', 0.8))
+        if temperature <= 0:
+            sampler.add_greedy()
+        else:
+            sampler.add_top_k(int(params.get('top_k', 40)))
+            sampler.add_top_p(float(params.get('top_p', 0.95)), 1)
+            sampler.add_min_p(float(params.get('min_p', 0.05)), 1)
+            sampler.add_temp(temperature)
+            sampler.add_dist(int(params.get('seed', self._llama_cpp.LLAMA_DEFAULT_SEED)))
+        return sampler
+
+    def sample(self, sampler, batch_index: int) -> int:
+        # llama_sampler_sample은 선택한 토큰을 sampler에 accept까지 수행
+        return self._llama_cpp.llama_sampler_sample(sampler.sampler, self._ctx.ctx, batch_index)
+
+    def free_sampler(self, sampler):
+        sampler.close()
+
+    def seq_cp(self, src: int, dst: int, p0: int, p1: int):
+        self._ctx.kv_cache_seq_cp(src, dst, p0, p1)
+
+    def seq_rm(self, seq_id: int, p0: int = 0, p1: int = -1):
+        self._ctx.kv_cache_seq_rm(seq_id, p0, p1)
+
+    def is_eog(self, token: int) -> bool:
+        return bool(self._llama_cpp.llama_vocab_is_eog(self._model.vocab, token))
+
+    def token_to_piece(self, token: int) -> bytes:
+        size = self._llama_cpp.llama_token_to_piece(
+            self._model.vocab, token, self._piece_buffer, len(self._piece_buffer), 0, False
+        )
+        return self._piece_buffer.raw[:max(0, size)]
+
+
+class BatchRequest:
+    """배치 엔진에서 생성 중인 요청 하나 (시퀀스 하나)"""
+
+    def __init__(self, prompt_tokens: List[int], max_tokens: int, params: Dict[str, Any]):
+        self.prompt_tokens = prompt_tokens
+        self.max_tokens = max(1, int(max_tokens))
+        self.params = params
+        self.seq_id: Optional[int] = None
+        self.sampler = None
+        self.prefill_pos = 0          # 다음에 평가할 프롬프트 토큰 위치
+        self.shared_tokens = 0        # 공유 접두부에서 복사한 토큰 수
+        self.n_past = 0               # KV에 들어간 토큰 수
+        self.pending_token: Optional[int] = None
+        self.output_tokens: List[int] = []
+        self.text_parts: List[str] = []
+        self.finish_reason: Optional[str] = None
+        self.error: Optional[str] = None
+        self.cancelled = False
+        self.chunks: "queue.Queue[Optional[str]]" = queue.Queue()
+        self.done = threading.Event()
+        self.submitted_at = time.time()
+        self.first_token_at: Optional[float] = None
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    @property
+    def prefilling(self) -> bool:
+        return self.prefill_pos < len(self.prompt_tokens)
+
+    def reserved_tokens(self) -> int:
+        """KV 캐시에서 이 요청이 최대로 차지할 셀 수 (공유 접두부 제외)"""
+        return len(self.prompt_tokens) - self.shared_tokens + self.max_tokens
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self.done.wait(timeout)
+
+    def to_completion(self) -> Dict[str, Any]:
+        """llama_cpp completion 응답 형식"""
+        if self.error:
+            raise RuntimeError(self.error)
+        return {
+            'choices': [{'text': ''.join(self.text_parts), 'index': 0, 'finish_reason': self.finish_reason}],
+            'usage': {
+                'prompt_tokens': len(self.prompt_tokens),
+                'completion_tokens': len(self.output_tokens),
+                'total_tokens': len(self.prompt_tokens) + len(self.output_tokens),
+            },
+        }
+
+
+class ContinuousBatchEngine:
+    """
+    여러 요청을 하나의 llama 컨텍스트에서 연속 배칭(continuous batching)으로 처리
+
+    - 요청마다 시퀀스 ID를 배정하고, 매 스텝마다 생성 중인 시퀀스의 디코드 토큰과
+      새 요청의 프롬프트 prefill 조각을 한 배치(n_batch 이내)에 섞어서 평가
+    - 지시문 접두부는 PREFIX_SEQ_ID 시퀀스에 한 번만 평가해 두고 seq_cp로 공유
+    - KV 셀 예약량(프롬프트 + max_tokens)이 n_ctx를 넘지 않도록 입장 제어
+      (런타임 KV 캐시가 시퀀스별로 나뉘어 있으면(kv_unified=False) 시퀀스마다 n_ctx/n_seq_max 기준)
+    """
+
+    def __init__(self, runtime, n_seq_max: int, n_batch: int = 512, min_shared_prefix: int = 16):
+        if n_seq_max < 2:
+            raise ValueError("n_seq_max는 공유 접두부 시퀀스를 포함해 2 이상이어야 합니다")
+        self.runtime = runtime
+        self.n_batch = n_batch
+        self.n_ctx = runtime.n_ctx()
+        self.kv_unified = bool(getattr(runtime, 'kv_unified', True))
+        # 시퀀스 하나가 쓸 수 있는 KV 셀 수 (단일 풀이면 n_ctx 전체를 다른 시퀀스와 나눠 씀)
+        self.seq_ctx = self.n_ctx if self.kv_unified else self.n_ctx // n_seq_max
+        self.min_shared_prefix = min_shared_prefix
+        self.prefix_tokens: List[int] = []
+        self._free_seq_ids = list(range(n_seq_max - 1, 0, -1))
+        self._waiting: "deque[BatchRequest]" = deque()
+        self._active: List[BatchRequest] = []
+        self._cv = threading.Condition()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    # --- 공유 접두부 ---
+
+    def set_shared_prefix(self, text: str):
+        """지시문 접두부를 PREFIX_SEQ_ID에 미리 평가 (엔진 시작 전에 호출)"""
+        tokens = self.runtime.tokenize(text)
+        self.runtime.seq_rm(PREFIX_SEQ_ID)
+        if len(tokens) >= self.seq_ctx:
+            print(f"배치 엔진: 공유 접두부 {len(tokens)}토큰이 시퀀스 컨텍스트({self.seq_ctx})보다 길어 공유하지 않음")
+            self.prefix_tokens = []
+            return
+        for start in range(0, len(tokens), self.n_batch):
+            chunk = tokens[start:start + self.n_batch]
+            self.runtime.decode([(token, start + i, PREFIX_SEQ_ID, False) for i, token in enumerate(chunk)])
+        self.prefix_tokens = tokens
+        metrics.set_gauge('batch.shared_prefix_tokens', len(tokens))
+        print(f"배치 엔진: 공유 접두부 {len(tokens)}토큰 평가 완료")
+
+    # --- 요청 제출/취소 ---
+
+    def submit(self, prompt: str, max_tokens: int = 256, **params) -> BatchRequest:
+        request = BatchRequest(self.runtime.tokenize(prompt), max_tokens, params)
+        with self._cv:
+            self._waiting.append(request)
+            metrics.set_gauge('batch.waiting_requests', len(self._waiting))
+            self._cv.notify()
+        return request
+
+    def cancel(self, request: BatchRequest):
+        """생성 중단 요청 (다음 스텝에서 시퀀스를 정리)"""
+        request.cancelled = True
+        with self._cv:
+            self._cv.notify()
+
+    # --- 실행 루프 ---
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name='batch-engine', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cv:
+            self._running = False
+            self._cv.notify_all()
+        if self._thread:
+            self._thread.join(timeout=5.0)
+
+    def _loop(self):
+        while self._running:
+            with self._cv:
+                while self._running and not self._waiting and not self._active:
+                    self._cv.wait(0.5)
+            if not self._running:
+                break
+            try:
+                self.step()
+            except Exception as e:
+                print(f"배치 엔진 오류: {e}")
+                for request in list(self._active):
+                    self._finish(request, 'error', error=str(e))
+
+    def step(self) -> bool:
+        """
+        배치 한 스텝 실행 (입장 → 배치 구성 → decode → 샘플링)
+
+        Returns:
+            bool: 평가한 토큰이 있으면 True
+        """
+        for request in [r for r in self._active if r.cancelled]:
+            self._finish(request, 'cancelled')
+        self._admit()
+
+        entries: List[BatchEntry] = []
+        samplers: List[Tuple[int, BatchRequest]] = []
+
+        # 1) 생성 중인 시퀀스의 디코드 토큰 (시퀀스당 1개)
+        for request in self._active:
+            if not request.prefilling and request.pending_token is not None:
+                samplers.append((len(entries), request))
+                entries.append((request.pending_token, request.n_past, request.seq_id, True))
+
+        # 2) 남은 예산으로 새 요청의 prefill 조각
+        budget = self.n_batch - len(entries)
+        for request in self._active:
+            if budget <= 0:
+                break
+            if not request.prefilling:
+                continue
+            chunk = request.prompt_tokens[request.prefill_pos:request.prefill_pos + budget]
+            last_index = request.prefill_pos + len(chunk) - 1
+            for i, token in enumerate(chunk):
+                position = request.prefill_pos + i
+                is_last = position == len(request.prompt_tokens) - 1
+                if is_last:
+                    samplers.append((len(entries), request))
+                entries.append((token, position, request.seq_id, is_last))
+            request.prefill_pos = last_index + 1
+            budget -= len(chunk)
+
+        if not entries:
+            return False
+
+        step_start = time.time()
+        self.runtime.decode(entries)
+        decode_tokens = 0
+        for index, request in samplers:
+            if request.pending_token is not None:
+                decode_tokens += 1
+            request.n_past = request.prefill_pos + len(request.output_tokens)
+            token = self.runtime.sample(request.sampler, index)
+            self._accept(request, token)
+        elapsed = time.time() - step_start
+
+        metrics.increment('batch.steps')
+        metrics.increment('batch.generated_tokens', len(samplers))
+        metrics.observe('batch.step_tokens', len(entries))
+        metrics.observe('batch.decode_sequences', decode_tokens)
+        if elapsed > 0:
+            metrics.observe('batch.tokens_per_second', len(samplers) / elapsed)
+        metrics.set_gauge('batch.active_sequences', len(self._active))
+        return True
+
+    def _admit(self):
+        """빈 시퀀스와 KV 여유가 있으면 대기 요청을 입장시킴"""
+        with self._cv:
+            while self._waiting and self._free_seq_ids:
+                request = self._waiting[0]
+                if request.cancelled:
+                    self._waiting.popleft()
+                    self._finish(request, 'cancelled')
+                    continue
+                shared = 0
+                if self.prefix_tokens:
+                    shared = min(_common_prefix_length(self.prefix_tokens, request.prompt_tokens),
+                                 len(request.prompt_tokens) - 1)
+                    if shared < self.min_shared_prefix:
+                        shared = 0
+                request.shared_tokens = shared
+                if not self._fits(request):
+                    break
+                self._waiting.popleft()
+                request.seq_id = self._free_seq_ids.pop()
+                if shared:
+                    # 시퀀스별 KV 캐시에서는 부분 복사가 안 되므로(llama.cpp assert) 접두부 전체를 복사한 뒤 뒤를 잘라냄
+                    self.runtime.seq_cp(PREFIX_SEQ_ID, request.seq_id, -1, -1)
+                    if shared < len(self.prefix_tokens):
+                        self.runtime.seq_rm(request.seq_id, shared, -1)
+                    metrics.increment('batch.shared_prefix_hits')
+                    metrics.increment('batch.shared_prefix_reused_tokens', shared)
+                request.prefill_pos = shared
+                request.sampler = self.runtime.new_sampler(request.params)
+                self._active.append(request)
+                metrics.observe('batch.queue_wait_seconds', time.time() - request.submitted_at)
+            metrics.set_gauge('batch.waiting_requests', len(self._waiting))
+
+    def _fits(self, request: BatchRequest) -> bool:
+        if not self.kv_unified:
+            # 시퀀스별 KV 캐시: 다른 시퀀스와 셀을 나누지 않고, 복사한 접두부도 자기 캐시에 들어감
+            if len(request.prompt_tokens) + request.max_tokens <= self.seq_ctx:
+                return True
+            room = self.seq_ctx - len(request.prompt_tokens)
+        else:
+            reserved = len(self.prefix_tokens) + sum(r.reserved_tokens() for r in self._active)
+            available = self.n_ctx - reserved
+            if request.reserved_tokens() <= available:
+                return True
+            if self._active:
+                return False
+            room = self.n_ctx - len(self.prefix_tokens) - (len(request.prompt_tokens) - request.shared_tokens)
+        # 단독으로도 넘치면 생성 길이를 줄여서라도 처리
+        if room > 0:
+            request.max_tokens = room
+            return True
+        request.error = f"프롬프트가 배치 컨텍스트({self.seq_ctx})보다 깁니다"
+        self._waiting.popleft()
+        self._finish(request, 'error', error=request.error)
+        return False
+
+    def _accept(self, request: BatchRequest, token: int):
+        if request.first_token_at is None:
+            request.first_token_at = time.time()
+            metrics.observe('batch.time_to_first_token', request.first_token_at - request.submitted_at)
+        if self.runtime.is_eog(token):
+            self._finish(request, 'stop')
+            return
+        request.output_tokens.append(token)
+        request.pending_token = token
+        text = request._decoder.decode(self.runtime.token_to_piece(token))
+        if text:
+            request.text_parts.append(text)
+            request.chunks.put(text)
+        criteria = request.params.get('stopping_criteria')
+        if request.cancelled:
+            self._finish(request, 'cancelled')
+        elif len(request.output_tokens) >= request.max_tokens:
+            self._finish(request, 'length')
+        elif criteria is not None and criteria(request.output_tokens, None):
+            # llama_cpp와 같이 stopping_criteria(추론 마감 등)가 True면 중단
+            self._finish(request, 'stop')
+
+    def _finish(self, request: BatchRequest, reason: str, error: Optional[str] = None):
+        if request.done.is_set():
+            return
+        tail = request._decoder.decode(b'', final=True)
+        if tail:
+            request.text_parts.append(tail)
+            request.chunks.put(tail)
+        request.finish_reason = reason
+        request.error = error or request.error
+        if request.seq_id is not None:
+            self.runtime.seq_rm(request.seq_id)
+            self._free_seq_ids.append(request.seq_id)
+        if request.sampler is not None:
+            self.runtime.free_sampler(request.sampler)
+            request.sampler = None
+        if request in self._active:
+            self._active.remove(request)
+        request.chunks.put(None)
+        request.done.set()
+        metrics.increment(f'batch.finished.{reason}')
+
+
+class BatchedBackend(SummarizerBackend):
+    """
+    연속 배칭 엔진 백엔드 - 여러 워커 스레드가 동시에 호출해도 안전
+
+    각 호출은 엔진에 요청으로 제출되어 다른 요청과 같은 배치로 생성된다.
+    """
+
+    name = 'batched'
+
+    def __init__(self, engine: ContinuousBatchEngine):
+        self.engine = engine
+
+    def complete(self, prompt: str, max_tokens: int = 256, **params) -> Dict[str, Any]:
+        request = self.engine.submit(prompt, max_tokens=max_tokens, **apply_deadline(params))
+        request.wait()
+        return request.to_completion()
+
+    def stream(self, prompt: str, max_tokens: int = 256, **params) -> Iterator[Dict[str, Any]]:
+        request = self.engine.submit(prompt, max_tokens=max_tokens, **apply_deadline(params))
+        try:
+            while True:
+                text = request.chunks.get()
+                if text is None:
+                    break
+                yield {'choices': [{'text': text, 'index': 0, 'finish_reason': None}]}
+            if request.error:
+                raise RuntimeError(request.error)
+            yield {'choices': [{'text': '', 'index': 0, 'finish_reason': request.finish_reason}]}
+        finally:
+            # 소비자가 중간에 멈추면(조기 종료) 시퀀스를 바로 반납
+            if not request.done.is_set():
+                self.engine.cancel(request)
+
+    def tokenize(self, text, add_bos: bool = False) -> List[int]:
+        if isinstance(text, bytes):
+            text = text.decode('utf-8', errors='ignore')
+        tokens = self.engine.runtime.tokenize(text)
+        return tokens if add_bos else tokens[1:] if tokens else tokens
+
+
+def create_batched_backend(config: Dict[str, Any], model, n_threads: int, shared_prefix: str = '') -> BatchedBackend:
+    """
+    설정(BATCH_*)으로 연속 배칭 엔진을 만들고 시작
+
+    Args:
+        config (dict): get_config() 결과
+        model: 가중치만 로드한 llama_model (model_registry.get_model_weights)
+        n_threads (int): 배치 컨텍스트 추론 스레드 수
+        shared_prefix (str): 모든 요청이 공유하는 지시문 접두부
+    """
+    from kv_cache_planner import resolve_kv_cache_params
+
+    max_sequences = max(1, int(config.get('BATCH_MAX_SEQUENCES', 4)))
+    n_batch = int(config.get('BATCH_SIZE', 512))
+    n_ctx = int(config.get('BATCH_CONTEXT_SIZE', 0)) or config['MODEL_CONTEXT_SIZE'] * max_sequences
+    runtime = LlamaBatchRuntime(model, n_ctx=n_ctx, n_seq_max=max_sequences + 1, n_batch=n_batch, n_threads=n_threads,
+                                kv_params=resolve_kv_cache_params(config))
+    engine = ContinuousBatchEngine(runtime, n_seq_max=max_sequences + 1, n_batch=n_batch)
+    if shared_prefix:
+        engine.set_shared_prefix(shared_prefix)
+    engine.start()
+    print(f"배치 엔진 시작: 동시 시퀀스 {max_sequences}개, n_ctx={n_ctx}, n_batch={n_batch}")
+    return BatchedBackend(engine)
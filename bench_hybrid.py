@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+하이브리드 추출(로컬 keyword/sentiment) 품질과 출력 길이 비교 벤치마크 (모델 불필요)
+
+sample/sample_request_*.json 통화(대화 없는 요청 제외)를 녹화된 결과 파일과 순서대로 짝지어
+- keyword: 결과 키워드 상위 3개 중 기준 키워드와 겹치는 비율 (부분 문자열 포함)
+- sentiment: 기준과 같은 비율 / 한 단계 이내 비율 (문단 수는 기준 결과를 따름)
+- 출력 길이: 전체 JSON 대비 요약 문장만 담은 JSON의 글자 수
+를 로컬 추출과 각 모델 결과에 대해 출력합니다.
+
+사용법:
+    python bench_hybrid.py                                         # 기준: 수기 요약
+    python bench_hybrid.py "sample/claude4결과.txt"                 # 기준 결과 파일 지정
+"""
+
+import glob
+import json
+import os
+import sys
+
+from extractive_summarizer import split_turns
+from local_extraction import extract_keywords, load_idf_table, paragraph_blocks, score_sentiment
+from preprocessor import preprocess_request_data
+from summarizer_backend import load_recorded_outputs
+
+SENTIMENT_LEVELS = ('강한부정', '약한부정', '보통', '약한긍정', '강한긍정')
+
+
+def load_sample_texts(pattern: str = 'sample/sample_request_*.json'):
+    """샘플 요청을 번호 순으로 전처리하여 대화 텍스트 목록으로 반환 (대화 없는 요청 제외)"""
+    texts = []
+    for path in sorted(glob.glob(pattern), key=lambda p: int(''.join(filter(str.isdigit, os.path.basename(p))) or 0)):
+        with open(path, 'r', encoding='utf-8') as f:
+            text = preprocess_request_data(json.load(f))['text']
+        if ' > ' in text:
+            texts.append(text)
+    return texts
+
+
+def _keywords(value) -> list:
+    return [word.strip().replace(' ', '') for word in str(value or '').split(',') if word.strip()]
+
+
+def compare(outputs, references):
+    """(키워드 일치 수, 키워드 수, 감정 일치 수, 감정 한 단계 이내 수, 문단 수)"""
+    keyword_hits = keyword_total = exact = near = paragraph_total = 0
+    for output, reference in zip(outputs, references):
+        reference_keywords = _keywords(reference.get('keyword'))
+        for word in _keywords(output.get('keyword'))[:3]:
+            keyword_total += 1
+            keyword_hits += any(word in ref or ref in word for ref in reference_keywords)
+        for paragraph, ref in zip(output.get('paragraphs') or [], reference.get('paragraphs') or []):
+            if paragraph.get('sentiment') not in SENTIMENT_LEVELS or ref.get('sentiment') not in SENTIMENT_LEVELS:
+                continue
+            distance = abs(SENTIMENT_LEVELS.index(paragraph['sentiment']) - SENTIMENT_LEVELS.index(ref['sentiment']))
+            paragraph_total += 1
+            exact += distance == 0
+            near += distance <= 1
+    return keyword_hits, keyword_total, exact, near, paragraph_total
+
+
+def local_outputs(texts, references):
+    """로컬 추출 결과 (문단 수는 기준 결과와 같게)"""
+    idf_table = load_idf_table()
+    outputs = []
+    for text, reference in zip(texts, references):
+        utterances = [utterance for _, utterance in split_turns(text)]
+        blocks = paragraph_blocks(utterances, len(reference.get('paragraphs') or []) or 1)
+        outputs.append({
+            'keyword': ', '.join(extract_keywords(text, idf_table=idf_table)),
+            'paragraphs': [{'sentiment': score_sentiment(utterances[start:end])} for start, end in blocks],
+        })
+    return outputs
+
+
+def slim_output(output) -> dict:
+    """요약 문장만 남긴 결과 (하이브리드 프롬프트의 응답 형식)"""
+    return {'summary': output.get('summary', ''),
+            'paragraphs': [{'summary': paragraph.get('summary', '')} for paragraph in output.get('paragraphs') or []]}
+
+
+def main():
+    reference_path = sys.argv[1] if len(sys.argv) > 1 else 'sample/manual_summary_결과_수기요약.txt'
+    texts = load_sample_texts()
+    references = load_recorded_outputs(reference_path)
+    print(f"샘플 통화 {len(texts)}건, 기준 결과 {len(references)}건 ({reference_path})\n")
+
+    candidates = [('로컬 추출', local_outputs(texts, references))]
+    for path in sorted(glob.glob('sample/*결과*.txt')):
+        if os.path.abspath(path) != os.path.abspath(reference_path):
+            candidates.append((os.path.basename(path), load_recorded_outputs(path)))
+
+    for name, outputs in candidates:
+        keyword_hits, keyword_total, exact, near, paragraph_total = compare(outputs, references)
+        print(f"{name}: 키워드 일치 {keyword_hits}/{keyword_total}, "
+              f"감정 일치 {exact}/{paragraph_total}, 한 단계 이내 {near}/{paragraph_total}")
+
+    full = sum(len(json.dumps(output, ensure_ascii=False)) for output in references)
+    slim = sum(len(json.dumps(slim_output(output), ensure_ascii=False)) for output in references)
+    print(f"\n출력 JSON 길이: 전체 {full}자 → 요약 문장만 {slim}자 ({(1 - slim / full) * 100 if full else 0:.1f}% 감소)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
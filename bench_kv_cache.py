@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+KV 캐시 타입별 속도/품질 비교 벤치마크
+
+sample/sample_request_*.json 요청을 KV 캐시 타입(f16/q8_0/q4_0)마다 greedy(temperature=0)로 생성하여
+요청당 시간, tokens/s, 인스턴스당 KV 캐시 크기와 최대 동시 컨텍스트 수를 비교하고,
+첫 번째 타입의 출력 대비 품질(출력 동일 건수, 요약 문장 유사도, JSON 파싱 성공률)을 출력합니다.
+
+사용법:
+    python bench_kv_cache.py                    # f16 vs q8_0 vs q4_0
+    python bench_kv_cache.py f16 q8_0           # 비교할 타입 지정
+    MODEL_FLASH_ATTN=true python bench_kv_cache.py
+"""
+
+import difflib
+import json
+import os
+import sys
+import time
+
+import gemma_summarizer
+from bench_speculative import load_sample_prompts
+from config import get_config
+from json_repair import extract_json_from_markdown
+from kv_cache_planner import KV_CACHE_TYPES, describe_capacity, plan_capacity
+from model_registry import model_registry
+
+
+def _summary_text(output: str) -> str:
+    """생성 결과의 summary 필드 (JSON을 복구할 수 없으면 빈 문자열)"""
+    try:
+        parsed = json.loads(extract_json_from_markdown(output) or output)
+    except json.JSONDecodeError:
+        return ''
+    return str(parsed.get('summary', '')) if isinstance(parsed, dict) else ''
+
+
+def run_kv_type(kv_type: str, prompts, max_tokens: int):
+    """지정한 KV 캐시 타입으로 모델을 새로 로딩하여 모든 프롬프트를 greedy 생성"""
+    os.environ['MODEL_KV_CACHE_TYPE_K'] = kv_type
+    os.environ['MODEL_KV_CACHE_TYPE_V'] = kv_type
+    model_registry.unload_all()  # 컨텍스트 KV 캐시 타입이 달라지므로 모델을 다시 로딩
+    llm = gemma_summarizer.get_llm_instance()
+
+    outputs = {}
+    total_tokens = 0
+    total_seconds = 0.0
+    for name, prompt in prompts:
+        llm.reset()  # 이전 요청의 KV 캐시 재사용으로 인한 편차 제거
+        start = time.time()
+        output = llm(prompt, max_tokens=max_tokens, temperature=0.0, top_k=1, repeat_penalty=1.0, echo=False)
+        elapsed = time.time() - start
+        tokens = output['usage']['completion_tokens']
+        total_tokens += tokens
+        total_seconds += elapsed
+        outputs[name] = output['choices'][0]['text']
+        print(f"[{kv_type}] {name}: {elapsed:.2f}초, 프롬프트 {output['usage']['prompt_tokens']}토큰, "
+              f"{tokens / elapsed if elapsed else 0.0:.2f} tokens/s")
+
+    stats = {
+        'total_seconds': total_seconds,
+        'overall_tokens_per_second': total_tokens / total_seconds if total_seconds else 0.0,
+        'capacity': plan_capacity(get_config(), type_k=kv_type, type_v=kv_type),
+    }
+    return outputs, stats
+
+
+def main():
+    kv_types = sys.argv[1:] or ['f16', 'q8_0', 'q4_0']
+    for kv_type in kv_types:
+        if kv_type not in KV_CACHE_TYPES:
+            print(f"알 수 없는 KV 캐시 타입: {kv_type} (가능: {', '.join(KV_CACHE_TYPES)})")
+            return 1
+
+    prompts = load_sample_prompts()
+    max_tokens = get_config()['DEFAULT_MAX_TOKENS']
+    print(f"샘플 요청 {len(prompts)}건, max_tokens={max_tokens}")
+
+    results = {}
+    for kv_type in kv_types:
+        results[kv_type] = run_kv_type(kv_type, prompts, max_tokens)
+
+    baseline_type = kv_types[0]
+    baseline_outputs, baseline_stats = results[baseline_type]
+    print("\n=== 결과 요약 ===")
+    for kv_type, (outputs, stats) in results.items():
+        identical = sum(1 for name in outputs if outputs[name] == baseline_outputs.get(name))
+        parsed = sum(1 for output in outputs.values() if _summary_text(output))
+        similarity = [
+            difflib.SequenceMatcher(None, _summary_text(outputs[name]), _summary_text(baseline_outputs[name])).ratio()
+            for name in outputs if name in baseline_outputs
+        ]
+        speedup = (stats['overall_tokens_per_second'] / baseline_stats['overall_tokens_per_second']
+                   if baseline_stats['overall_tokens_per_second'] else 0.0)
+        print(f"{kv_type}: {stats['overall_tokens_per_second']:.2f} tokens/s (x{speedup:.2f}), "
+              f"출력 동일 {identical}/{len(outputs)}, 요약 유사도 {sum(similarity) / max(1, len(similarity)):.3f}, "
+              f"JSON 성공 {parsed}/{len(outputs)}")
+        print(f"  {describe_capacity(stats['capacity'])}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
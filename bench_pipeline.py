@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+요약 파이프라인 처리량 측정 (기본: FakeBackend, 모델 파일 불필요)
+
+sample/sample_request_*.json 요청을 전처리 → 요약 → 후처리까지 반복 처리하여
+요청당 지연 시간과 처리량을 출력합니다. 지연 모델은 FAKE_BACKEND_* 설정을 따릅니다.
+워커 수를 지정하면 추론 풀(IPC_WORKER_THREADS)을 만들고 인스턴스당 워커 1개로 동시에 처리합니다.
+PACKING_ENABLED=true이면 워커와 같은 방식으로 짧은 요청을 묶어서 처리합니다.
+PIPELINE_ENABLED=true이면 단계별 파이프라인(전처리 → 추론 → 후처리)으로 처리하고 단계별 점유율을 출력합니다.
+
+사용법:
+    python bench_pipeline.py [반복 횟수] [워커 수] [short]   # short: PACKING_MAX_CHARS 이하 요청만 사용
+    FAKE_BACKEND_TIME_SCALE=0 python bench_pipeline.py 10   # 모델 지연 없이 파이프라인 오버헤드만 측정
+    MODEL_BACKEND=llama_cpp python bench_pipeline.py 1 4    # 실제 모델 4개 컨텍스트 처리량 측정
+    PACKING_ENABLED=true python bench_pipeline.py 3         # 짧은 통화 묶음 처리 처리량 측정
+    PIPELINE_ENABLED=true python bench_pipeline.py 3 2      # 단계별 파이프라인 처리량/단계 점유율 측정
+"""
+
+import glob
+import json
+import os
+import sys
+import threading
+import time
+
+os.environ.setdefault('MODEL_BACKEND', 'fake')
+# 반복 요청이 결과 캐시에 적중하지 않도록 기본 비활성화
+os.environ.setdefault('RESULT_CACHE_ENABLED', 'false')
+
+from call_packing import is_short_call, process_with_packing
+from config import get_config
+from gemma_summarizer import set_thread_backend
+from inference_pool import create_inference_pool
+from ipc_queue_manager import QueueManager
+from metrics import get_metrics_snapshot
+from preprocessor import preprocess_request_data
+from staged_pipeline import create_summary_pipeline
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    short_only = len(sys.argv) > 3 and sys.argv[3] == 'short'
+    os.environ['IPC_WORKER_THREADS'] = str(workers)
+
+    requests = []
+    for path in sorted(glob.glob('sample/sample_request_*.json')):
+        with open(path, 'r', encoding='utf-8') as f:
+            requests.append(json.load(f))
+    if short_only:
+        max_chars = get_config()['PACKING_MAX_CHARS']
+        requests = [data for data in requests if is_short_call(preprocess_request_data(data).get('text', ''), max_chars)]
+    print(f"샘플 요청 {len(requests)}건 x {repeats}회, 워커 {workers}개 (백엔드: {os.environ['MODEL_BACKEND']})")
+
+    pool = create_inference_pool()
+    jobs = QueueManager()
+    for _ in range(repeats):
+        for index, data in enumerate(requests):
+            jobs.put_request(index, data)
+
+    latencies = []
+    latencies_lock = threading.Lock()
+
+    def run_worker(worker_id):
+        set_thread_backend(pool.backend(worker_id))
+        pool.pin_worker(worker_id)
+        while True:
+            item = jobs.get_request(timeout=0.01)
+            if not item:
+                return
+            start = time.time()
+
+            def respond(slot_id, response):
+                with latencies_lock:
+                    latencies.append(time.time() - start)
+                if response.get('response', {}).get('result') != '0':
+                    print(f"⚠️ 실패 응답: {response.get('response', {}).get('failReason')}")
+
+            process_with_packing(jobs, item, preprocess_request_data, respond)
+
+    pipeline = None
+    bench_start = time.time()
+    if get_config()['PIPELINE_ENABLED']:
+        def respond_from_pipeline(slot_id, response):
+            with latencies_lock:
+                latencies.append(time.time() - bench_start)
+            if response.get('response', {}).get('result') != '0':
+                print(f"⚠️ 실패 응답: {response.get('response', {}).get('failReason')}")
+
+        # 모든 요청을 시작 시점에 제출하므로 지연 시간은 시작 시점 기준 완료 시간
+        pipeline = create_summary_pipeline(pool, lambda slot_id, data: preprocess_request_data(data),
+                                           respond_from_pipeline)
+        pipeline.start()
+        while True:
+            item = jobs.get_request(timeout=0.01)
+            if not item:
+                break
+            pipeline.submit(item)
+        pipeline.stop(timeout=600.0)
+    else:
+        threads = [threading.Thread(target=run_worker, args=(i,)) for i in range(pool.size)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    total = time.time() - bench_start
+
+    latencies.sort()
+    print("\n=== 결과 ===")
+    print(f"요청 수: {len(latencies)}, 총 소요시간: {total:.2f}초, 처리량: {len(latencies) / total:.2f} req/s")
+    print(f"지연 시간 평균 {sum(latencies) / len(latencies):.3f}초, "
+          f"p50 {latencies[len(latencies) // 2]:.3f}초, p95 {latencies[int(len(latencies) * 0.95) - 1]:.3f}초")
+    print(f"추론 풀: {pool.get_stats()}")
+    if pipeline is not None:
+        for name, stats in pipeline.get_stats().items():
+            print(f"단계 {name}: 워커 {stats['workers']}개, 점유율 {stats['occupancy']:.0%}, "
+                  f"처리 {stats['processed']}건, 다음 단계 대기 {stats['blocked_seconds']:.2f}초")
+    print(json.dumps(get_metrics_snapshot(), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
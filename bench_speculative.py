@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+추측 디코딩(prompt lookup / draft model) 생성 속도 비교 벤치마크
+
+sample/sample_request_*.json 요청을 greedy(temperature=0)로 생성하여
+모드별 tokens/s, 수락률을 비교하고 출력이 동일한지 확인합니다.
+
+사용법:
+    python bench_speculative.py                      # off vs prompt_lookup
+    python bench_speculative.py off draft_model      # 비교할 모드 지정
+"""
+
+import glob
+import json
+import os
+import sys
+import time
+
+import gemma_summarizer
+from config import get_config
+from metrics import metrics
+from model_registry import model_registry
+from preprocessor import preprocess_request_data
+from speculative_decoding import SPECULATIVE_MODES, get_speculative_stats, record_generation_speed
+
+
+def load_sample_prompts(pattern: str = 'sample/sample_request_*.json'):
+    """샘플 요청을 전처리하여 (파일명, 프롬프트) 목록으로 반환"""
+    prompts = []
+    for path in sorted(glob.glob(pattern), key=lambda p: int(''.join(filter(str.isdigit, os.path.basename(p))) or 0)):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        text = preprocess_request_data(data)['text']
+        prompts.append((os.path.basename(path), gemma_summarizer.build_summary_prompt(text)))
+    return prompts
+
+
+def run_mode(mode: str, prompts, max_tokens: int):
+    """지정한 모드로 모델을 새로 로딩하여 모든 프롬프트를 greedy 생성"""
+    os.environ['SPECULATIVE_MODE'] = mode
+    model_registry.unload_all()  # logits_all 설정이 달라지므로 모델을 다시 로딩
+    metrics.reset()
+    llm = gemma_summarizer.get_llm_instance()
+
+    outputs = {}
+    total_tokens = 0
+    total_seconds = 0.0
+    for name, prompt in prompts:
+        llm.reset()  # 이전 요청의 KV 캐시 재사용으로 인한 편차 제거
+        start = time.time()
+        output = llm(prompt, max_tokens=max_tokens, temperature=0.0, top_k=1, repeat_penalty=1.0, echo=False)
+        elapsed = time.time() - start
+        tokens_per_second = record_generation_speed(output, elapsed, process_name=mode)
+        total_tokens += output['usage']['completion_tokens']
+        total_seconds += elapsed
+        outputs[name] = output['choices'][0]['text']
+        print(f"[{mode}] {name}: {elapsed:.2f}초, {tokens_per_second:.2f} tokens/s")
+
+    stats = get_speculative_stats()
+    stats['total_seconds'] = total_seconds
+    stats['overall_tokens_per_second'] = total_tokens / total_seconds if total_seconds else 0.0
+    return outputs, stats
+
+
+def main():
+    modes = sys.argv[1:] or ['off', 'prompt_lookup']
+    for mode in modes:
+        if mode not in SPECULATIVE_MODES:
+            print(f"알 수 없는 모드: {mode} (가능: {', '.join(SPECULATIVE_MODES)})")
+            return 1
+
+    prompts = load_sample_prompts()
+    max_tokens = get_config()['DEFAULT_MAX_TOKENS']
+    print(f"샘플 요청 {len(prompts)}건, max_tokens={max_tokens}")
+
+    results = {}
+    for mode in modes:
+        results[mode] = run_mode(mode, prompts, max_tokens)
+
+    baseline_mode = modes[0]
+    baseline_outputs, baseline_stats = results[baseline_mode]
+    print("\n=== 결과 요약 ===")
+    for mode, (outputs, stats) in results.items():
+        identical = sum(1 for name in outputs if outputs[name] == baseline_outputs.get(name))
+        speedup = (stats['overall_tokens_per_second'] / baseline_stats['overall_tokens_per_second']
+                   if baseline_stats['overall_tokens_per_second'] else 0.0)
+        print(f"{mode}: {stats['overall_tokens_per_second']:.2f} tokens/s (x{speedup:.2f}), "
+              f"수락률 {stats['acceptance_rate']:.1%}, 출력 동일 {identical}/{len(outputs)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,256 @@
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import get_config
+from extractive_summarizer import build_extractive_summary, fallback_enabled
+from gemma_summarizer import SUMMARY_SAMPLING_PARAMS, get_backend, process_request
+from inference_watchdog import begin_deadline, current_deadline, end_deadline
+from logger import log_gemma_query, log_gemma_response
+from metrics import metrics
+from postprocessor import ResponsePostprocessor
+from preprocessor import STTPreprocessor
+
+# 여러 짧은 통화를 한 번에 요약하는 프롬프트 (지시문은 통화 수와 무관하게 한 번만 평가)
+PACKED_PROMPT_PREFIX = (
+    "당신은 여러 건의 짧은 통화 내용을 각각 분석하고 지정된 JSON 형식으로 요약하는 전문가입니다.\n"
+    "오타나 유사어는 문맥에 맞게 적절하게 수정 후 요약해야 하며 가상정보나 추정정보 없이 반드시 각 통화의 '대화내용' 범위에서만 요약을 수행해야 한다.\n"
+    "통화끼리 내용을 섞지 말고 [통화 N]마다 독립적으로 분석하세요.\n\n"
+    "--- [분석 규칙] ---\n"
+    "index: 통화 번호 N\n"
+    "summary: 통화의 핵심 내용을 25자 이내의 주어를 제외한 매우 짧은 한 문장으로 요약하세요. 문장의 끝은 '명사형' 으로 끝내야 합니다.\n"
+    "keyword: 가장 중요한 키워드를 3개 추출하여 쉼표로 구분하세요.\n"
+    "paragraphs: 통화 내용을 1-2개의 논리적 단위로 나누어 각각 분석하세요.\n"
+    "  - 각 paragraph는 summary(25자 이내), keyword(3개, 쉼표 구분), sentiment('강한긍정', '약한긍정', '보통', '약한부정', '강한부정' 중 하나)를 포함해야 합니다.\n\n"
+    "--- [응답 형식] ---\n"
+    "반드시 통화마다 원소 하나씩, 이 형식의 JSON 배열로만 응답하세요:\n"
+    "```json\n"
+    "[\n"
+    "{\n"
+    "\"index\": 1,\n"
+    "\"summary\": \"통화 핵심 요약\",\n"
+    "\"keyword\": \"\",\n"
+    "\"paragraphs\": [\n"
+    "{\n"
+    "\"summary\": \"\",\n"
+    "\"keyword\": \"\",\n"
+    "\"sentiment\": \"\"\n"
+    "}\n"
+    "]\n"
+    "}\n"
+    "]\n"
+    "```\n\n"
+)
+
+PACKED_PROMPT_SUFFIX = "\n위 {count}개 통화를 각각 분석하여 index 1부터 {count}까지 {count}개 원소를 가진 JSON 배열로 응답하세요."
+
+_WHITESPACE = ' \t\r\n,'
+
+
+def is_short_call(text: str, max_chars: int) -> bool:
+    """묶음 처리 대상인 짧은 통화인지 (빈 텍스트는 제외)"""
+    stripped = (text or '').strip()
+    return 0 < len(stripped) <= max_chars
+
+
+def build_packed_prompt(texts: List[str]) -> str:
+    """통화 목록을 [통화 N] 블록으로 이어 붙인 묶음 프롬프트 생성"""
+    blocks = [f"[통화 {index}]\n{text.strip()}\n" for index, text in enumerate(texts, start=1)]
+    return PACKED_PROMPT_PREFIX + "\n".join(blocks) + PACKED_PROMPT_SUFFIX.format(count=len(texts))
+
+
+def parse_packed_output(result: str, count: int) -> Dict[int, Dict[str, Any]]:
+    """
+    묶음 응답의 JSON 배열에서 통화별 결과를 index로 분리
+
+    배열이 중간에 잘려도 완성된 원소까지는 사용한다. index가 없으면 배열 순서를 따른다.
+
+    Returns:
+        dict: {통화 번호(1부터): 결과 딕셔너리} - 누락/불량 원소는 포함하지 않음
+    """
+    start = result.find('[')
+    if start == -1:
+        return {}
+    decoder = json.JSONDecoder(strict=False)
+    items = []
+    position = start + 1
+    while position < len(result):
+        while position < len(result) and result[position] in _WHITESPACE:
+            position += 1
+        if position >= len(result) or result[position] == ']':
+            break
+        try:
+            item, position = decoder.raw_decode(result, position)
+        except ValueError:
+            break
+        items.append(item)
+
+    parsed: Dict[int, Dict[str, Any]] = {}
+    for order, item in enumerate(items, start=1):
+        if not isinstance(item, dict):
+            continue
+        try:
+            index = int(item.get('index', order))
+        except (TypeError, ValueError):
+            index = order
+        summary = item.get('summary')
+        if 1 <= index <= count and index not in parsed and isinstance(summary, str) and summary.strip():
+            parsed[index] = item
+    return parsed
+
+
+def summarize_packed(texts: List[str], max_tokens_per_call: int = 400) -> List[Optional[str]]:
+    """
+    짧은 통화 여러 건을 한 번의 생성으로 요약
+
+    MODEL_TIMEOUT이 지나 생성을 중단하면 결과를 얻지 못한 통화는 단일 처리(새 추론) 대신
+    추출 요약으로 채워 묶음 전체의 처리 시간을 MODEL_TIMEOUT 안으로 제한한다.
+
+    Returns:
+        List[Optional[str]]: 통화별 후처리된 JSON 문자열 (해당 통화 결과를 얻지 못하면 None)
+    """
+    cleaned = ['\n'.join(STTPreprocessor.remove_duplicates(text.strip().split('\n'))) for text in texts]
+    prompt = build_packed_prompt(cleaned)
+    log_gemma_query(prompt, "packed_summary")
+
+    start = time.time()
+    previous_deadline = begin_deadline(float(get_config().get('MODEL_TIMEOUT', 180.0)))
+    try:
+        llm = get_backend()
+        output = llm(prompt, max_tokens=max_tokens_per_call * len(texts), echo=False, **SUMMARY_SAMPLING_PARAMS)
+        result = output['choices'][0]['text'].strip() if isinstance(output, dict) else str(output).strip()
+        timed_out = current_deadline() is not None and current_deadline().triggered
+    except Exception as e:
+        print(f"묶음 요약 생성 실패: {e}")
+        return [None] * len(texts)
+    finally:
+        end_deadline(previous_deadline)
+    elapsed = time.time() - start
+    log_gemma_response(result, "packed_summary")
+    print(f"[묶음 요약 소요시간] {elapsed:.2f}초 ({len(texts)}건)")
+    metrics.observe('packing.generation_seconds', elapsed)
+
+    parsed = parse_packed_output(result, len(texts))
+    results: List[Optional[str]] = []
+    for index in range(1, len(texts) + 1):
+        item = parsed.get(index)
+        if item is None:
+            # 시간 초과로 잘린 통화는 추출 요약 (EXTRACTIVE_FALLBACK_ENABLED가 꺼져 있으면 단일 처리)
+            results.append(build_extractive_summary(texts[index - 1], 'timeout')
+                           if timed_out and fallback_enabled() else None)
+            continue
+        fields = {key: item[key] for key in ('summary', 'keyword', 'paragraphs') if key in item}
+        fields.setdefault('paragraphs', [])
+        processed = ResponsePostprocessor.process_response(fields)
+        results.append(json.dumps(processed, ensure_ascii=False, indent=2))
+    return results
+
+
+def collect_short_requests(queue_manager, first_item: Tuple[int, Dict[str, Any]],
+                           prepare: Callable[[int, Dict[str, Any]], Optional[Dict[str, Any]]],
+                           config: Optional[Dict[str, Any]] = None):
+    """
+    첫 요청이 짧으면 PACKING_WINDOW_MS 동안 도착하는 짧은 요청을 더 모음
+
+    긴 요청이 들어오면 기다리게 하지 않도록 모으기를 멈추고 따로 돌려준다.
+
+    Args:
+        queue_manager: get_request(timeout)을 제공하는 요청 큐
+        first_item: (slot_id, 전처리된 data)
+        prepare: (slot_id, 큐에서 꺼낸 원본 data) → 전처리된 data, 이미 응답한 요청이면 None
+
+    Returns:
+        (packed, deferred): 묶음 처리할 항목 목록, 개별 처리할 항목 목록
+    """
+    config = config or get_config()
+    max_chars = int(config.get('PACKING_MAX_CHARS', 800))
+    max_calls = int(config.get('PACKING_MAX_CALLS', 4))
+    max_total = int(config.get('PACKING_MAX_TOTAL_CHARS', 2400))
+    window = float(config.get('PACKING_WINDOW_MS', 200)) / 1000.0
+
+    first_text = first_item[1].get('text', '')
+    if not config.get('PACKING_ENABLED', False) or not is_short_call(first_text, max_chars):
+        return [], [first_item]
+
+    packed = [first_item]
+    deferred = []
+    total_chars = len(first_text)
+    deadline = time.time() + window
+    while len(packed) < max_calls:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            break
+        item = queue_manager.get_request(timeout=remaining)
+        if not item:
+            break
+        slot_id, data = item
+        data = prepare(slot_id, data)
+        if data is None:
+            # 캐시/템플릿 응답 또는 진행 중인 같은 요청에 합류 (추론 불필요)
+            continue
+        text = data.get('text', '')
+        if is_short_call(text, max_chars) and total_chars + len(text) <= max_total:
+            packed.append((slot_id, data))
+            total_chars += len(text)
+        else:
+            deferred.append((slot_id, data))
+            break
+    metrics.observe('packing.window_wait_seconds', window - max(0.0, deadline - time.time()))
+    if len(packed) == 1:
+        # 같이 묶을 요청이 없으면 단일 처리
+        return [], packed + deferred
+    return packed, deferred
+
+
+def process_packed_requests(items: List[Tuple[int, Dict[str, Any]]],
+                            config: Optional[Dict[str, Any]] = None) -> List[Tuple[int, Dict[str, Any]]]:
+    """
+    묶음 요약 후 통화별 응답을 만들고, 결과를 얻지 못한 통화는 단일 처리로 대체
+
+    Returns:
+        List[(slot_id, response_data)]: 입력 순서대로의 슬롯별 응답
+    """
+    config = config or get_config()
+    results = summarize_packed([data.get('text', '') for _, data in items],
+                               max_tokens_per_call=int(config.get('PACKING_TOKENS_PER_CALL', 400)))
+    metrics.increment('packing.packs')
+    metrics.increment('packing.packed_calls', len(items))
+    metrics.observe('packing.pack_size', len(items))
+
+    responses = []
+    for (slot_id, data), summary_json in zip(items, results):
+        if summary_json is None:
+            print(f"묶음 결과 누락 - 슬롯 {slot_id} 단일 처리로 대체")
+            metrics.increment('packing.fallback')
+            responses.append((slot_id, process_request(data)))
+        else:
+            responses.append((slot_id, process_request(data, summary_json=summary_json)))
+    return responses
+
+
+def process_with_packing(queue_manager, first_item: Tuple[int, Dict[str, Any]],
+                         prepare: Callable[[int, Dict[str, Any]], Optional[Dict[str, Any]]],
+                         respond: Callable[[int, Dict[str, Any]], None],
+                         config: Optional[Dict[str, Any]] = None) -> int:
+    """
+    워커 처리 단위: 짧은 요청은 모아서 묶음 처리, 나머지는 단일 처리
+
+    Args:
+        first_item: 큐에서 꺼낸 (slot_id, 원본 data)
+        prepare: (slot_id, 원본 data) → 전처리된 data, 추론 없이 이미 응답한 요청이면 None
+        respond: 응답이 준비될 때마다 호출 (slot_id, response_data)
+
+    Returns:
+        int: 처리한 요청 수
+    """
+    slot_id, data = first_item
+    data = prepare(slot_id, data)
+    if data is None:
+        return 0
+    packed, deferred = collect_short_requests(queue_manager, (slot_id, data), prepare, config)
+    if packed:
+        for packed_slot_id, response_data in process_packed_requests(packed, config):
+            respond(packed_slot_id, response_data)
+    for deferred_slot_id, deferred_data in deferred:
+        respond(deferred_slot_id, process_request(deferred_data))
+    return len(packed) + len(deferred)
@@ -32,7 +32,7 @@ DEFAULT_CONFIG = {
     #'MODEL_PATH': 'models/gemma-3-4b-it-q4_0.gguf',
     #믿음2.0 Q4_K_M 설정일경우
     'MODEL_PATH': 'models/Midm-2.0-Mini-Instruct-Q4_K_M.gguf',
-    'MODEL_CONTEXT_SIZE': 8192,  # 8192 → 16384로 확장 (긴 파일 처리용)
+    'MODEL_CONTEXT_SIZE': 8192,  # 8192 → 16384로 확장 (긴 파일 처리용, 인스턴스당 KV 캐시가 비례해 커짐 - kv_cache_planner.py로 확인)
     
     # 요약 설정
     'DEFAULT_MAX_TOKENS': 500,
@@ -48,7 +48,9 @@ DEFAULT_CONFIG = {
     
     # 성능 설정
     'ENABLE_GPU': False,
-    'CPU_LIMIT_PERCENT': 20,  # CPU 사용량 제한 (기본값 20%)
+    'CPU_LIMIT_PERCENT': 20,  # CPU 사용량 제한 (기본값 20%, affinity 마스크/cgroup cpu.max 할당량 기준)
+    'CPU_USE_SMT': False,  # False면 추론 스레드를 물리 코어당 1개로 제한 (하이퍼스레드 형제 제외)
+    'CPU_PIN_THREADS': True,  # 추론 인스턴스마다 겹치지 않는 CPU 집합에 워커 스레드 고정 (Linux)
     
     # 파일 경로 설정
     'WORKSPACE_DIR': str(Path.cwd()),
@@ -65,11 +67,140 @@ DEFAULT_CONFIG = {
     # 멀티슬롯 IPC 설정
     'IPC_SLOT_COUNT': 5,  # 슬롯 개수
     'IPC_SLOT_SIZE': 262144,  # 슬롯당 크기 (bytes) - 256KB로 증가
-    'IPC_WORKER_THREADS': 1,  # 워커 스레드 개수
+    'IPC_WORKER_THREADS': 1,  # 워커 스레드 개수 (= 추론 풀 모델 인스턴스 수, 인스턴스당 워커 1개)
+    'MODEL_THREADS_PER_INSTANCE': 0,  # 인스턴스당 추론 스레드 수 (0이면 CPU 제한 스레드를 인스턴스 수로 균등 분할)
     'IPC_RESPONSE_WRITER_THREADS': 1,  # 응답 쓰기 스레드 개수
     
     # 성능 최적화 설정
-    'MODEL_TIMEOUT': 180.0,  # 모델 추론 타임아웃 (3분)
+    'MODEL_TIMEOUT': 180.0,  # 모델 추론 타임아웃 (3분, 지나면 생성 중단 후 부분 결과 응답, 0이면 무제한)
+    'RESPONSE_TIMING_ENABLED': False,  # 응답에 처리 시간 분석(response.timing: 대기/prefill/decode/JSON 복구/재질의 ms) 포함
+    
+    # 요약 압축 설정 ([재질의 필요] 시 LLM 재질의 전에 규칙 기반 압축 시도)
+    'SUMMARY_COMPRESS_ENABLED': True,
+    'SUMMARY_COMPRESS_MAX_CHARS': 25,  # 압축 목표 글자 수 (프롬프트의 25자 규칙과 동일)
+    'REQUERY_ESTIMATED_SECONDS': 5.0,  # 재질의 1회 예상 소요시간 (실측값이 없을 때 절약 시간 계산용)
+    
+    # 긴 통화 map-reduce 요약 설정 (프롬프트가 Context Window에 들어가지 않는 경우)
+    'LONG_CALL_ENABLED': True,
+    'LONG_CALL_MIN_OUTPUT_TOKENS': 1000,  # 응답에 남는 토큰이 이보다 적으면 map-reduce 모드 사용
+    'LONG_CALL_WINDOW_TOKENS': 3000,  # 구간당 최대 대화 토큰 수
+    'LONG_CALL_MAX_WINDOWS': 8,  # 구간 수 기준 (초과 시 추임새 발화 제거 후 재분할, 구간당 문단 후보 1개로 축소)
+    'LONG_CALL_MAP_MAX_TOKENS': 400,  # 구간 요약 최대 생성 토큰
+    'LONG_CALL_REDUCE_INPUT_TOKENS': 2000,  # reduce 프롬프트에 넣을 후보 목록 최대 토큰 (초과 시 계층적 병합)
+    'LONG_CALL_REDUCE_MAX_TOKENS': 600,  # 병합 요약 최대 생성 토큰
+    
+    # 추측 디코딩 설정 (출력이 입력 문구를 많이 재사용하므로 prompt lookup이 유리)
+    'SPECULATIVE_MODE': 'off',  # 'off' | 'prompt_lookup' | 'draft_model' (logits_all 사용으로 메모리 증가)
+    'SPECULATIVE_NUM_PRED_TOKENS': 10,  # 한 번에 제안할 드래프트 토큰 수
+    'SPECULATIVE_MAX_NGRAM_SIZE': 2,  # prompt lookup에서 매칭할 최대 n-gram 크기
+    'SPECULATIVE_DRAFT_MODEL_PATH': 'models/gemma-3-1b-it-Q8_0.gguf',  # draft_model 모드의 드래프트 모델 (토크나이저가 다르면 prompt_lookup으로 대체)
+    
+    # 모델 레지스트리 설정 (같은 GGUF는 프로세스당 한 번만 로딩)
+    'MODEL_MEMORY_BUDGET_MB': 0,  # 로딩된 모델 합계 메모리 예산 (0이면 제한 없음)
+    'MODEL_LRU_UNLOAD': True,  # 예산 초과 시 참조가 없는 모델을 오래된 순으로 언로딩
+    'MODEL_PREFETCH_ENABLED': True,  # 서버 시작 시 GGUF 파일을 백그라운드로 페이지 캐시에 미리 읽기
+    'MODEL_USE_MLOCK': False,  # 모델 가중치를 메모리에 고정 (RLIMIT_MEMLOCK/권한 필요)
+    
+    # KV 캐시 설정 ('f16' | 'q8_0' | 'q4_0', q8_0은 f16의 약 53%, q4_0은 약 28% 메모리)
+    'MODEL_KV_CACHE_TYPE_K': 'f16',  # K 캐시 타입
+    'MODEL_KV_CACHE_TYPE_V': 'f16',  # V 캐시 타입 (양자화하면 flash attention 자동 활성화)
+    'MODEL_FLASH_ATTN': False,  # flash attention 사용
+    'MODEL_OFFLOAD_KQV': True,  # GPU 사용 시 KV 캐시와 어텐션 계산을 GPU에 둠
+    'MODEL_SWA_FULL': True,  # 슬라이딩 윈도우 레이어(gemma3 등)도 n_ctx 크기 KV 캐시 사용 (False면 윈도우 + n_ubatch 칸만, 접두사 KV 재사용 불가)
+    'MODEL_COMPUTE_BUFFER_MB': 256,  # 용량 계획용 인스턴스당 계산 버퍼 추정치
+    'KV_PLANNER_MEMORY_MB': 0,  # 용량 계획용 메모리 (0이면 물리 메모리와 cgroup memory.max 중 작은 값)
+    'KV_PLANNER_RESERVE_MB': 1024,  # 용량 계획에서 제외할 메모리 (OS, 파이썬, 공유 메모리 등)
+    
+    # 자동 튜닝 설정 (python autotune.py 또는 gemma_summarizer_multi.py --autotune)
+    'AUTOTUNE_PROFILE_ENABLED': True,  # 모델 로딩 시 이 호스트/모델의 튜닝 결과(스레드/배치 크기) 적용
+    'AUTOTUNE_PROFILE_PATH': 'autotune_profile.json',  # 튜닝 결과 파일 (상대 경로는 WORKSPACE_DIR 기준)
+    'AUTOTUNE_CONTEXT_SIZE': 2048,  # 벤치마크용 컨텍스트 크기
+    'AUTOTUNE_PREFILL_TOKENS': 512,  # 후보마다 평가할 프롬프트 토큰 수
+    'AUTOTUNE_DECODE_TOKENS': 32,  # 후보마다 생성할 토큰 수
+    
+    # 모델 라우터 설정 (요청마다 통화 길이/대기열/지연 목표로 큰 모델과 작은 모델 중 선택)
+    'MODEL_ROUTER_ENABLED': False,  # True면 추론 인스턴스마다 작은 모델 컨텍스트를 함께 로딩
+    'MODEL_ROUTER_SMALL_MODEL_PATH': 'models/gemma-3-1b-it-Q8_0.gguf',  # 짧은 통화용 작은 모델 (큰 모델은 MODEL_PATH)
+    'MODEL_ROUTER_SHORT_PROMPT_TOKENS': 1200,  # 이 프롬프트 토큰 수 이하는 작은 모델
+    'MODEL_ROUTER_SMALL_MAX_PROMPT_TOKENS': 4000,  # 이 토큰 수를 넘으면 지연 목표와 관계없이 큰 모델
+    'MODEL_ROUTER_LATENCY_SLO_SECONDS': 30.0,  # 큰 모델 예상 지연(대기 + 처리)이 이를 넘으면 작은 모델
+    'MODEL_ROUTER_LARGE_MS_PER_TOKEN': 10.0,  # 큰 모델 프롬프트 토큰당 처리 시간 초기 추정치 (처리 결과로 갱신)
+    'MODEL_ROUTER_SMALL_MS_PER_TOKEN': 3.0,  # 작은 모델 프롬프트 토큰당 처리 시간 초기 추정치
+    'MODEL_ROUTER_IMPORTANT_SVC_KEYS': '',  # 항상 큰 모델을 쓰는 서비스 키 (쉼표 구분)
+    
+    # 추출 요약 대체 설정 (시간 초과/모델 오류/처리 오류 시 오류 응답 대신 LLM 없는 추출 요약)
+    'EXTRACTIVE_FALLBACK_ENABLED': True,
+    'EXTRACTIVE_MAX_CANDIDATES': 300,  # TextRank에 넣는 최대 발화 수 (넘으면 문장 적합도 상위만, 0이면 제한 없음)
+    
+    # 하이브리드 추출 설정 (모델은 요약 문장만 생성하고 keyword/sentiment는 로컬에서 계산)
+    'HYBRID_EXTRACTION_ENABLED': False,  # True면 요약 문장만 요청하는 짧은 프롬프트 사용 (결과 캐시 키도 바뀜)
+    'LOCAL_IDF_TABLE_PATH': 'idf_table.json',  # 키워드 TF-IDF용 IDF 표 (python local_extraction.py로 생성, 상대 경로는 WORKSPACE_DIR 기준)
+    
+    # 주제 구간 나누기 설정 (TextTiling 어휘 응집도 + startTime 침묵으로 대화를 2~3개 구간으로 나눔)
+    'TOPIC_SEGMENTATION_ENABLED': False,  # True면 프롬프트 대화 내용에 [구간 N]을 표시하고 구간마다 paragraph 하나를 요청
+    'TOPIC_SEGMENT_MIN_TURNS': 3,  # 구간 하나의 최소 발화 수 (통화 발화 수의 20%보다 작으면 20% 사용)
+    'TOPIC_SEGMENT_WINDOW': 5,  # 경계 양쪽에서 어휘 응집도를 비교할 발화 수 (맞장구 제외)
+    'TOPIC_SEGMENT_PAUSE_SECONDS': 5.0,  # 발화 사이 침묵(시작 시각 차이 - 추정 발화 시간)이 이 이상이면 경계 점수 최대 가산
+    
+    # 과부하 성능 저하 설정 (대기가 길어지면 재질의 생략 → 토큰 제한 → 작은 모델 → 추출 요약 순으로 단계 상승)
+    'DEGRADE_ENABLED': False,
+    'DEGRADE_LEVEL_SECONDS': '30,60,90,120',  # 단계 1~4 진입 기준 부하 (요청 대기 시간 또는 대기열 x 최근 처리 시간, 초)
+    'DEGRADE_RECOVERY_RATIO': 0.5,  # 부하가 현재 단계 진입 기준 x 이 비율 아래로 내려가면 한 단계 하강
+    'DEGRADE_STEP_UP_SECONDS': 5.0,  # 단계 상승 사이 최소 간격
+    'DEGRADE_STEP_DOWN_SECONDS': 30.0,  # 단계 하강 사이 최소 간격 (단계가 오르내리며 흔들리지 않도록)
+    'DEGRADE_MAX_TOKENS': 512,  # 토큰 제한 단계의 생성 토큰 수 상한
+    
+    # 모델 백엔드 설정 ('llama_cpp' | 'fake': 모델 파일 없이 녹화된 결과를 재생)
+    'MODEL_BACKEND': 'llama_cpp',
+    'FAKE_BACKEND_RESULTS': 'sample/*결과.txt',  # 재생할 결과 파일 glob 패턴
+    'FAKE_BACKEND_TOKENS_PER_SECOND': 20.0,  # 생성 속도 모델
+    'FAKE_BACKEND_PROMPT_TOKENS_PER_SECOND': 200.0,  # 프롬프트 평가 속도 모델 (공통 접두사는 재평가하지 않음)
+    'FAKE_BACKEND_TIME_SCALE': 1.0,  # 지연 시간 배율 (0이면 지연 없음)
+    'FAKE_BACKEND_CHARS_PER_TOKEN': 2,  # 토큰 하나에 해당하는 글자 수
+    
+    # 스트리밍 JSON 파싱 설정 (최상위 객체가 닫히면 생성 중단)
+    'STREAM_JSON_ENABLED': True,
+    'STREAM_FIELD_RETRY_MAX': 1,  # 잘못 생성된 필드별 재생성 최대 횟수
+
+    # 연속 배칭 엔진 설정 (llama.cpp 배치 API, 컨텍스트 하나에 여러 시퀀스)
+    'BATCH_ENGINE_ENABLED': False,  # True면 워커들이 배치 엔진 하나를 공유 (추론 풀 대신)
+    'BATCH_MAX_SEQUENCES': 4,  # 동시에 생성하는 시퀀스 수 (= 워커 수)
+    'BATCH_SIZE': 512,  # 스텝당 최대 평가 토큰 수 (디코드 + prefill 조각, n_batch)
+    'BATCH_CONTEXT_SIZE': 0,  # 배치 컨텍스트 KV 크기 (0이면 MODEL_CONTEXT_SIZE x BATCH_MAX_SEQUENCES)
+
+    # 짧은 통화 묶음 처리 설정 (여러 통화를 한 프롬프트로 요약 후 index로 분리)
+    'PACKING_ENABLED': False,
+    'PACKING_MAX_CHARS': 800,  # 묶음 대상 통화의 최대 전처리 텍스트 길이 (글자)
+    'PACKING_MAX_CALLS': 4,  # 한 묶음의 최대 통화 수
+    'PACKING_MAX_TOTAL_CHARS': 2400,  # 한 묶음의 텍스트 길이 합 상한
+    'PACKING_WINDOW_MS': 200,  # 첫 짧은 요청 이후 다른 짧은 요청을 기다리는 시간
+    'PACKING_TOKENS_PER_CALL': 400,  # 통화당 생성 토큰 예산 (max_tokens = 통화 수 x 예산)
+
+    # 내용 없는 통화 판정 설정 (인사/맞장구만 있는 통화는 LLM 없이 템플릿 응답)
+    'TRIVIAL_CALL_ENABLED': True,
+    'TRIVIAL_MAX_CONTENT_WORDS': 1,  # 서로 다른 내용어가 이 개수 이하면 내용 없는 통화
+    'TRIVIAL_MAX_TURNS': 4,  # 이 발화 수 이하의 짧은 통화는 TRIVIAL_SHORT_MAX_CONTENT_WORDS 기준 적용
+    'TRIVIAL_SHORT_MAX_CONTENT_WORDS': 2,  # 짧은 통화/추임새 위주 통화의 내용어 상한
+    'TRIVIAL_SHORT_MIN_EMPTY_TURN_RATIO': 0.6,  # 짧은 통화로 판정할 내용어 없는 발화(인사/맞장구) 비율 하한
+    'TRIVIAL_MIN_FILLER_RATIO': 0.7,  # 추임새(네, 예, 여보세요 등) 비율 하한
+
+    # 결과 캐시 설정 (전처리된 대화 + 모델 + 프롬프트 템플릿 해시가 같으면 재사용)
+    'RESULT_CACHE_ENABLED': True,
+    'RESULT_CACHE_MAX_ENTRIES': 1000,  # 메모리 LRU 최대 항목 수
+    'RESULT_CACHE_TTL_SECONDS': 86400.0,  # 항목 유효 시간 (0이면 무제한)
+    'RESULT_CACHE_DB_PATH': '',  # SQLite 디스크 계층 경로 (빈 값이면 메모리만 사용, 예: cache/result_cache.sqlite3)
+    'RESULT_CACHE_DB_MAX_ENTRIES': 100000,  # 디스크 계층 최대 항목 수 (오래 사용하지 않은 것부터 삭제)
+
+    # 단계별 파이프라인 설정 (전처리/토큰화 → 추론 → 후처리를 각자의 스레드에서 겹쳐서 처리)
+    'PIPELINE_ENABLED': False,  # True면 워커 스레드 대신 파이프라인 사용 (짧은 통화 묶음 처리는 적용 안 됨)
+    'PIPELINE_QUEUE_SIZE': 8,  # 단계 사이 큐 크기 (가득 차면 앞 단계가 대기)
+    'PIPELINE_PREPARE_WORKERS': 2,  # 전처리/캐시 조회/프롬프트 토큰화 스레드 수
+    'PIPELINE_FINALIZE_WORKERS': 2,  # JSON 복구/후처리/재질의/응답 스레드 수
+
+    # 시작 워밍업 설정 (모델 로딩 + 워밍업 후 공유 메모리 헤더에 READY 표시)
+    'WARMUP_ENABLED': True,
+    'WARMUP_TEXT': '나 > 여보세요 카드 발급 문의드립니다\n상대방 > 네 고객님 카드 발급 도와드리겠습니다',  # 워밍업 대화 (요약 프롬프트로 감쌈)
+    'WARMUP_MAX_TOKENS': 8,  # 워밍업 생성 토큰 수 (프롬프트 평가가 주 목적이므로 짧게)
 }
 
 def get_config():
@@ -85,6 +216,8 @@ def get_config():
                 config[key] = env_value.lower() in ('true', '1', 'yes', 'on')
             elif isinstance(default_value, int):
                 config[key] = int(env_value)
+            elif isinstance(default_value, float):
+                config[key] = float(env_value)
             else:
                 config[key] = env_value
         else:
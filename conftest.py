@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+pytest 공통 설정: 테스트가 남기는 요청 로그를 저장소의 logs/ 대신 임시 디렉토리에 기록
+"""
+
+import pytest
+
+from logger import request_logger
+
+
+@pytest.fixture(autouse=True)
+def isolated_log_dir(tmp_path, monkeypatch):
+    """모든 테스트에서 로그 디렉토리를 tmp_path 아래로 돌립니다."""
+    log_dir = tmp_path / 'logs'
+    log_dir.mkdir()
+    monkeypatch.setattr(request_logger, 'log_dir', log_dir)
+    return log_dir
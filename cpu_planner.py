@@ -0,0 +1,245 @@
+import os
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from config import get_config
+
+CGROUP_ROOT = '/sys/fs/cgroup'
+CPU_SYSFS_ROOT = '/sys/devices/system/cpu'
+NODE_SYSFS_ROOT = '/sys/devices/system/node'
+
+
+class CpuCore(NamedTuple):
+    """물리 코어 하나 (SMT 형제 논리 CPU 목록 포함)"""
+    numa_node: int
+    package: int
+    core: int
+    cpus: List[int]
+
+
+class CpuPlan(NamedTuple):
+    """
+    추론 스레드 배치 계획
+
+    instance_cpus[i]는 인스턴스 i가 사용할 논리 CPU 집합이며 인스턴스끼리 겹치지 않는다
+    (물리 코어가 인스턴스 수보다 적을 때만 겹칠 수 있음).
+    """
+    total_threads: int
+    instance_threads: List[int]
+    instance_cpus: List[List[int]]
+    allowed_cpus: List[int]
+    cgroup_cpus: Optional[float]
+    physical_cores: int
+
+    @property
+    def process_cpus(self) -> List[int]:
+        return sorted({cpu for cpus in self.instance_cpus for cpu in cpus})
+
+
+def plan_thread_slices(total_threads: int, pool_size: int) -> List[int]:
+    """
+    전체 추론 스레드를 인스턴스별로 나눔 (나머지는 앞 인스턴스부터 1개씩)
+
+    예: 32스레드, 4개 인스턴스 → [8, 8, 8, 8]
+    """
+    pool_size = max(1, pool_size)
+    total_threads = max(pool_size, total_threads)
+    base, remainder = divmod(total_threads, pool_size)
+    return [base + (1 if i < remainder else 0) for i in range(pool_size)]
+
+
+def parse_cpu_list(text: str) -> List[int]:
+    """'0-3,8,10-11' 형식의 CPU 목록을 정수 리스트로 변환"""
+    cpus = []
+    for part in (text or '').strip().split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = part.split('-', 1)
+            cpus.extend(range(int(start), int(end) + 1))
+        else:
+            cpus.append(int(part))
+    return cpus
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _own_cgroup_dir(root: str, proc_cgroup: str) -> str:
+    """/proc/self/cgroup의 cgroup v2 경로('0::/...')에 해당하는 디렉토리 (없으면 root)"""
+    content = _read(proc_cgroup) or ''
+    for line in content.splitlines():
+        if line.startswith('0::'):
+            return os.path.join(root, line[3:].lstrip('/'))
+    return root
+
+
+def read_cgroup_cpu_limit(root: str = CGROUP_ROOT, proc_cgroup: str = '/proc/self/cgroup') -> Optional[float]:
+    """
+    컨테이너 CPU 할당량 (CPU 개수 단위, 제한이 없으면 None)
+
+    cgroup v2 cpu.max('quota period' 또는 'max period')를 자신의 cgroup부터 root까지 확인하여 가장 작은 값을 사용하고,
+    v2가 없으면 cgroup v1 cpu.cfs_quota_us/cpu.cfs_period_us를 사용한다.
+    """
+    limits = []
+    directory = _own_cgroup_dir(root, proc_cgroup)
+    root = os.path.normpath(root)
+    while True:
+        content = _read(os.path.join(directory, 'cpu.max'))
+        if content:
+            quota, _, period = content.partition(' ')
+            if quota != 'max' and period:
+                limits.append(int(quota) / int(period))
+        if os.path.normpath(directory) == root or len(directory) <= len(root):
+            break
+        directory = os.path.dirname(directory)
+    if limits:
+        return min(limits)
+
+    quota = _read(os.path.join(root, 'cpu', 'cpu.cfs_quota_us')) or _read(os.path.join(root, 'cpu.cfs_quota_us'))
+    period = _read(os.path.join(root, 'cpu', 'cpu.cfs_period_us')) or _read(os.path.join(root, 'cpu.cfs_period_us'))
+    if quota and period and int(quota) > 0 and int(period) > 0:
+        return int(quota) / int(period)
+    return None
+
+
+def read_cgroup_memory_limit(root: str = CGROUP_ROOT, proc_cgroup: str = '/proc/self/cgroup') -> Optional[int]:
+    """
+    컨테이너 메모리 제한 (바이트, 제한이 없으면 None)
+
+    cgroup v2 memory.max를 자신의 cgroup부터 root까지 확인하여 가장 작은 값을 사용하고,
+    v2가 없으면 cgroup v1 memory.limit_in_bytes를 사용한다 (v1의 '제한 없음'은 매우 큰 값).
+    """
+    limits = []
+    directory = _own_cgroup_dir(root, proc_cgroup)
+    root = os.path.normpath(root)
+    while True:
+        content = _read(os.path.join(directory, 'memory.max'))
+        if content and content != 'max':
+            limits.append(int(content))
+        if os.path.normpath(directory) == root or len(directory) <= len(root):
+            break
+        directory = os.path.dirname(directory)
+    if limits:
+        return min(limits)
+
+    content = _read(os.path.join(root, 'memory', 'memory.limit_in_bytes')) or _read(os.path.join(root, 'memory.limit_in_bytes'))
+    if content and 0 < int(content) < 1 << 60:
+        return int(content)
+    return None
+
+
+def read_allowed_cpus() -> List[int]:
+    """현재 프로세스가 사용할 수 있는 논리 CPU (affinity 마스크, 지원하지 않는 OS는 전체)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def read_cpu_topology(cpus: List[int], cpu_root: str = CPU_SYSFS_ROOT, node_root: str = NODE_SYSFS_ROOT) -> List[CpuCore]:
+    """
+    논리 CPU를 물리 코어 단위로 묶음 (/sys topology, 읽을 수 없으면 CPU 하나를 코어 하나로 취급)
+
+    Returns:
+        List[CpuCore]: (NUMA 노드, 패키지, 코어) 순으로 정렬된 물리 코어 목록
+    """
+    numa_of = {}
+    for name in sorted(os.listdir(node_root)) if os.path.isdir(node_root) else []:
+        if name.startswith('node') and name[4:].isdigit():
+            for cpu in parse_cpu_list(_read(os.path.join(node_root, name, 'cpulist')) or ''):
+                numa_of[cpu] = int(name[4:])
+
+    cores: Dict[tuple, List[int]] = {}
+    for cpu in cpus:
+        topology = os.path.join(cpu_root, f'cpu{cpu}', 'topology')
+        package = _read(os.path.join(topology, 'physical_package_id'))
+        core = _read(os.path.join(topology, 'core_id'))
+        if package is None or core is None:
+            key = (numa_of.get(cpu, 0), 0, cpu)
+        else:
+            key = (numa_of.get(cpu, 0), int(package), int(core))
+        cores.setdefault(key, []).append(cpu)
+    return [CpuCore(key[0], key[1], key[2], sorted(siblings)) for key, siblings in sorted(cores.items())]
+
+
+def plan_cpus(instances: int = 1, config: Optional[Dict[str, Any]] = None, allowed: Optional[List[int]] = None,
+              topology: Optional[List[CpuCore]] = None, cgroup_cpus: Optional[float] = -1.0) -> CpuPlan:
+    """
+    인스턴스별 추론 스레드 수와 CPU 집합 계획
+
+    1. 사용 가능한 CPU = affinity 마스크의 CPU 수와 cgroup CPU 할당량(cpu.max) 중 작은 값
+    2. CPU_LIMIT_PERCENT 적용 (MAX_CPU_THREADS가 있으면 그 값)
+    3. CPU_USE_SMT=false면 물리 코어 수를 넘지 않음 (llama.cpp 디코딩은 메모리 대역폭 제한이라 SMT 이득이 작음)
+    4. 같은 NUMA 노드의 연속된 코어를 인스턴스별로 겹치지 않게 배분 (코어당 논리 CPU 하나)
+
+    Args:
+        allowed/topology/cgroup_cpus: 테스트용 주입 값 (기본은 시스템에서 읽음, cgroup_cpus=None은 제한 없음)
+    """
+    config = config or get_config()
+    instances = max(1, int(instances))
+    allowed = allowed if allowed is not None else read_allowed_cpus()
+    topology = topology if topology is not None else read_cpu_topology(allowed)
+    if cgroup_cpus is not None and cgroup_cpus < 0:
+        cgroup_cpus = read_cgroup_cpu_limit()
+
+    use_smt = bool(config.get('CPU_USE_SMT', False))
+    available = len(allowed)
+    if cgroup_cpus is not None:
+        # 할당량보다 많은 스레드는 스로틀링으로 오히려 느려짐
+        available = min(available, max(1, int(cgroup_cpus)))
+
+    force_threads = config.get('MAX_CPU_THREADS')
+    if force_threads:
+        total = int(force_threads)
+    else:
+        total = max(1, int(available * int(config.get('CPU_LIMIT_PERCENT', 20)) / 100))
+        if not use_smt:
+            total = min(total, len(topology))
+    total = max(instances, total)
+
+    instance_threads = plan_thread_slices(total, instances)
+
+    # 코어 순서: NUMA 노드별로 모아 두어 인스턴스가 노드 경계를 덜 넘도록 함
+    if use_smt:
+        slots = [[cpu] for core in topology for cpu in core.cpus]
+    else:
+        slots = [core.cpus[:1] for core in topology]
+    instance_cpus = []
+    position = 0
+    for threads in instance_threads:
+        cpus = []
+        for _ in range(threads):
+            if slots:
+                cpus.extend(slots[position % len(slots)])
+                position += 1
+        instance_cpus.append(sorted(set(cpus)))
+
+    return CpuPlan(total, instance_threads, instance_cpus, list(allowed), cgroup_cpus, len(topology))
+
+
+def pin_current_thread(cpus: List[int]) -> bool:
+    """
+    현재 스레드를 CPU 집합에 고정 (Linux만, 이후 이 스레드가 만드는 ggml 작업 스레드도 상속)
+
+    Returns:
+        bool: 고정했으면 True
+    """
+    if not cpus or not hasattr(os, 'sched_setaffinity'):
+        return False
+    try:
+        os.sched_setaffinity(0, cpus)
+        return True
+    except OSError as e:
+        print(f"CPU 고정 실패 ({cpus}): {e}")
+        return False
+
+
+def describe_plan(plan: CpuPlan) -> str:
+    quota = f"{plan.cgroup_cpus:.2f}" if plan.cgroup_cpus is not None else '없음'
+    return (f"허용 CPU {len(plan.allowed_cpus)}개, 물리 코어 {plan.physical_cores}개, cgroup 할당량 {quota} → "
+            f"추론 스레드 {plan.total_threads}개, 인스턴스별 {plan.instance_threads}, CPU {plan.instance_cpus}")
@@ -0,0 +1,235 @@
+import json
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import get_config
+from korean_text import content_words, truncate_to_bytes
+from metrics import metrics
+from postprocessor import ResponsePostprocessor
+from summary_compressor import compress_summary_with_keywords
+from topic_segmentation import segment_turns
+
+# 요약 JSON에 추출 요약 대체 사유를 표시하는 키 (process_request가 꺼내어 응답 fallback 필드로 옮김)
+FALLBACK_FLAG_KEY = '_fallback'
+
+# summarize_with_gemma가 모델 오류 시 돌려주는 요약 (추출 요약으로 대체할 대상)
+MODEL_FAILURE_SUMMARY = '요약을 생성할 수 없습니다.'
+
+# 대체 사유
+FALLBACK_REASONS = ('overload', 'timeout', 'model_failure', 'error')
+
+# 발화 순위 = TextRank 점수 + 문장 적합도 점수(select_best_sentence 기준) x 가중치 (둘 다 0~1로 정규화)
+SENTENCE_SCORE_WEIGHT = 0.5
+
+# 요약 후보로 쓰는 발화의 최소 내용어 수 (맞장구/짧은 대답 제외)
+MIN_CONTENT_WORDS = 2
+
+
+def split_turns(text: str) -> List[Tuple[str, str]]:
+    """'화자 > 발화' 형식의 줄을 (화자, 발화) 목록으로 변환 (빈 발화 제외)"""
+    turns = []
+    for line in (text or '').split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        speaker, utterance = '', line
+        if ' > ' in line:
+            speaker, utterance = line.split(' > ', 1)
+        utterance = utterance.strip()
+        if utterance:
+            turns.append((speaker.strip(), utterance))
+    return turns
+
+
+def _similarity(words_a: set, words_b: set) -> float:
+    """TextRank 문장 유사도: 공통 내용어 수 / (log|A| + log|B|)"""
+    overlap = len(words_a & words_b)
+    if not overlap:
+        return 0.0
+    norm = math.log(len(words_a) + 1) + math.log(len(words_b) + 1)
+    return overlap / norm if norm > 0 else 0.0
+
+
+def textrank(word_sets: List[set], damping: float = 0.85, iterations: int = 50,
+             tolerance: float = 1e-6) -> List[float]:
+    """
+    발화 그래프의 TextRank 점수
+
+    발화를 노드로, 내용어 겹침 유사도를 가중치 간선으로 두고 가중 PageRank를 반복 계산한다.
+    다른 발화와 공유하는 내용어가 많을수록(대화의 중심 화제일수록) 점수가 높다.
+    내용어가 겹치는 발화 쌍만 간선으로 두어 반복마다 간선 수만큼만 계산한다.
+    """
+    count = len(word_sets)
+    if count == 0:
+        return []
+    # 내용어 → 발화 역색인으로 겹치는 발화 쌍만 간선으로 만듦 (유사도는 대칭이므로 이웃 목록 하나로 충분)
+    postings: Dict[str, List[int]] = {}
+    for index, words in enumerate(word_sets):
+        for word in words:
+            postings.setdefault(word, []).append(index)
+    linked = [set() for _ in range(count)]
+    for indexes in postings.values():
+        for index in indexes:
+            linked[index].update(indexes)
+    neighbors = [[(j, _similarity(word_sets[i], word_sets[j])) for j in sorted(linked[i]) if j != i]
+                 for i in range(count)]
+    out_sums = [sum(weight for _, weight in edges) for edges in neighbors]
+    scores = [1.0 / count] * count
+    for _ in range(iterations):
+        updated = []
+        for i in range(count):
+            rank = sum(weight / out_sums[j] * scores[j] for j, weight in neighbors[i] if weight > 0)
+            updated.append((1 - damping) / count + damping * rank)
+        converged = sum(abs(a - b) for a, b in zip(updated, scores)) < tolerance
+        scores = updated
+        if converged:
+            break
+    return scores
+
+
+def _normalize(values: List[float]) -> List[float]:
+    low, high = min(values), max(values)
+    if high - low <= 0:
+        return [1.0] * len(values)
+    return [(value - low) / (high - low) for value in values]
+
+
+def rank_turns(utterances: List[str], max_candidates: Optional[int] = None) -> List[float]:
+    """
+    발화별 요약 적합도 순위 점수 (0~1.5)
+
+    TextRank 점수와 ResponsePostprocessor.score_sentence 점수를 정규화하여 더한다.
+    내용어가 MIN_CONTENT_WORDS개 미만인 발화(맞장구, 짧은 대답)는 0점.
+    후보가 max_candidates(기본 EXTRACTIVE_MAX_CANDIDATES, 0이면 제한 없음)개를 넘으면
+    score_sentence 상위 발화만 TextRank에 넣고 나머지는 0점 (긴 통화에서 그래프 크기 제한).
+    """
+    if not utterances:
+        return []
+    if max_candidates is None:
+        max_candidates = int(get_config().get('EXTRACTIVE_MAX_CANDIDATES', 300))
+    word_sets = [set(content_words(utterance)) for utterance in utterances]
+    candidates = [index for index, words in enumerate(word_sets) if len(words) >= MIN_CONTENT_WORDS]
+    if not candidates:
+        return [0.0] * len(utterances)
+    sentence_scores = {index: ResponsePostprocessor.score_sentence(utterances[index]) for index in candidates}
+    if 0 < max_candidates < len(candidates):
+        top = sorted(candidates, key=lambda index: (-sentence_scores[index], index))[:max_candidates]
+        candidates = sorted(top)
+    central = _normalize(textrank([word_sets[index] for index in candidates]))
+    suitable = _normalize([sentence_scores[index] for index in candidates])
+    scores = [0.0] * len(utterances)
+    for position, index in enumerate(candidates):
+        scores[index] = central[position] + SENTENCE_SCORE_WEIGHT * suitable[position]
+    return scores
+
+
+def rank_keywords(utterances: List[str], scores: List[float], top_n: int = 3) -> List[str]:
+    """발화 순위 점수를 내용어에 나누어 합산한 키워드 순위 (동률이면 먼저 등장한 단어 우선)"""
+    totals: Dict[str, float] = {}
+    first_seen: Dict[str, int] = {}
+    for utterance, score in zip(utterances, scores):
+        for word in content_words(utterance):
+            totals[word] = totals.get(word, 0.0) + score + 1e-3
+            first_seen.setdefault(word, len(first_seen))
+    ranked = sorted(totals, key=lambda word: (-totals[word], first_seen[word]))
+    return ranked[:top_n]
+
+
+def _sentence_summary(utterance: str, keywords: List[str], max_bytes: int) -> str:
+    """발화를 명사형 요약 문장으로 변환 (조사/부사/서술어 어미 제거, 바이트 예산 이내)"""
+    summary = compress_summary_with_keywords(utterance, keywords, max_bytes=max_bytes) or utterance
+    summary = ResponsePostprocessor.convert_to_noun_form(summary)
+    return truncate_to_bytes(summary, max_bytes)
+
+
+def extractive_summary(text: str) -> Dict[str, Any]:
+    """
+    LLM 없이 전처리된 대화에서 요약 생성 (응답 스키마 {summary, keyword, paragraphs})
+
+    - summary: 순위가 가장 높은 발화를 명사형으로 압축 (SUMMARY_MAX_BYTES 이내)
+    - keyword: 발화 순위 점수를 합산한 상위 내용어 3개
+    - paragraphs: 대화를 주제 구간(topic_segmentation, 2~3개)으로 나눠 구간별 최고 발화와 키워드
+    """
+    max_bytes = ResponsePostprocessor.SUMMARY_MAX_BYTES
+    utterances = [utterance for _, utterance in split_turns(text)]
+    scores = rank_turns(utterances)
+    keywords = rank_keywords(utterances, scores)
+    keyword = ', '.join(keywords) or '통화'
+
+    if not utterances or max(scores) <= 0:
+        summary = '통화 내용 요약 불가'
+        return {'summary': summary, 'keyword': keyword,
+                'paragraphs': [{'summary': summary, 'keyword': keyword, 'sentiment': '보통'}]}
+
+    best = max(range(len(utterances)), key=lambda index: scores[index])
+    summary = _sentence_summary(utterances[best], keywords, max_bytes)
+
+    paragraphs = []
+    for start, end in segment_turns(utterances):
+        block_scores = scores[start:end]
+        if max(block_scores) <= 0:
+            continue
+        block_best = start + max(range(end - start), key=lambda index: block_scores[index])
+        block_keywords = rank_keywords(utterances[start:end], block_scores, top_n=2)
+        paragraphs.append({
+            'summary': _sentence_summary(utterances[block_best], block_keywords, max_bytes),
+            'keyword': ', '.join(block_keywords),
+            'sentiment': '보통',
+        })
+    if not paragraphs:
+        paragraphs = [{'summary': summary, 'keyword': keyword, 'sentiment': '보통'}]
+    return {'summary': summary, 'keyword': keyword, 'paragraphs': paragraphs}
+
+
+def build_extractive_summary(text: str, reason: str) -> str:
+    """
+    추출 요약 JSON (summarize_with_gemma 결과와 같은 형식, FALLBACK_FLAG_KEY에 대체 사유)
+
+    Args:
+        reason (str): 대체 사유 (overload, timeout, model_failure, error)
+    """
+    result = extractive_summary(text)
+    result[FALLBACK_FLAG_KEY] = reason
+    metrics.increment(f'fallback.extractive.{reason}')
+    print(f"추출 요약으로 대체 ({reason}): {result['summary']}")
+    return json.dumps(result, ensure_ascii=False)
+
+
+def is_unusable_summary(result: Dict[str, Any]) -> bool:
+    """모델 결과를 응답으로 쓸 수 없는지 (summary가 비었거나 모델 오류 문구)"""
+    summary = result.get('summary') if isinstance(result, dict) else None
+    return not isinstance(summary, str) or not summary.strip() or summary.strip() == MODEL_FAILURE_SUMMARY
+
+
+def fallback_enabled(config: Optional[Dict[str, Any]] = None) -> bool:
+    config = config or get_config()
+    return bool(config.get('EXTRACTIVE_FALLBACK_ENABLED', True))
+
+
+def build_fallback_response(data: Dict[str, Any], reason: str) -> Optional[Dict[str, Any]]:
+    """
+    처리 중 오류가 난 요청의 추출 요약 응답 (EXTRACTIVE_FALLBACK_ENABLED가 아니거나 대화가 없으면 None)
+
+    process_request 성공 응답과 같은 형식이며 response.fallback에 방식과 사유를 표시한다.
+    """
+    text = data.get('text') or ''
+    if not fallback_enabled() or not text.strip():
+        return None
+    try:
+        summary = json.loads(build_extractive_summary(text, reason))
+    except Exception as e:
+        print(f"추출 요약 실패: {e}")
+        return None
+    summary.pop(FALLBACK_FLAG_KEY, None)
+    return {
+        "transactionid": data.get("transactionid", ""),
+        "sequenceno": data.get("sequenceno", "0"),
+        "returncode": "1",
+        "returndescription": "Success",
+        "response": {
+            "result": "0",
+            "failReason": "",
+            "summary": summary,
+            "fallback": {"method": "extractive", "reason": reason},
+        }
+    }
@@ -12,15 +12,39 @@ from logger import log_gemma_query, log_gemma_response
 from preprocessor import STTPreprocessor
 from postprocessor import ResponsePostprocessor
 from llm_utils import correct_conversation_with_gemma
+from metrics import metrics
+from long_call_summarizer import count_tokens, summarize_long_conversation
+from speculative_decoding import record_generation_speed, get_speculative_stats
+from model_registry import get_default_model
+from streaming_json import IncrementalJSONParser, iter_stream_text
+from summarizer_backend import LlamaCppBackend, create_fake_backend
+from trivial_call import build_trivial_summary
+from result_cache import lookup_cached_response, store_response
+from inference_watchdog import TIMEOUT_FLAG_KEY, begin_deadline, current_deadline, end_deadline
+from korean_text import truncate_to_bytes
+from request_timing import RequestTiming, begin_timing, current_timing, end_timing, timed_stage
+from model_router import ROUTE_KEY, routed_request
+from load_shedding import (EXTRACTIVE, LEVEL_NAMES, NO_REQUERY, SMALL_MODEL, degraded_max_tokens,
+                           get_degradation_controller, observe_request_service, request_degradation_level)
+from extractive_summarizer import (FALLBACK_FLAG_KEY, MODEL_FAILURE_SUMMARY, build_extractive_summary,
+                                   build_fallback_response, fallback_enabled, is_unusable_summary)
+from local_extraction import fill_local_fields, hybrid_enabled
+from topic_segmentation import mark_topic_blocks, topic_segmentation_enabled, turn_start_times
+from summary_compressor import (
+    compress_summary_with_keywords,
+    extract_keywords_from_text,
+    is_acceptable_compression
+)
 from json_repair import (
     extract_json_from_markdown,
     process_and_repair_json,
     extract_valid_data_from_broken_json
 )
 
-# 전역 모델 인스턴스 (싱글톤 패턴)
-_llm_instance = None
-_llm_lock = threading.Lock()
+# 요약 백엔드 (싱글톤 패턴, 추론 풀 워커는 스레드별 백엔드 사용)
+_backend_lock = threading.Lock()
+_backend = None
+_thread_backend = threading.local()
 
 def resource_path(relative_path):
     """PyInstaller 환경에서 리소스 파일 경로를 올바르게 반환"""
@@ -41,108 +65,267 @@ def resource_path(relative_path):
 
 
 def get_llm_instance():
-    """전역 모델 인스턴스를 반환 (싱글톤 패턴)"""
-    global _llm_instance
-
-    if _llm_instance is None:
-        with _llm_lock:
-            if _llm_instance is None:  # Double-checked locking
-                try:
-                    print("llama_cpp 모듈 임포트 중...")
-                    from llama_cpp import Llama
-                    print("llama_cpp 모듈 임포트 성공")
-
-                    # 설정 가져오기
-                    config = get_config()
-                    MODEL_PATH = get_model_path()
-
-                    print(f"모델 로딩 시작: {MODEL_PATH}")
-                    
-                    # CPU 제한 강제 적용
-                    force_threads = config.get('MAX_CPU_THREADS')
-                    if force_threads is not None:
-                        # 강제 스레드 수 설정
-                        max_threads = force_threads
-                        print(f"강제 스레드 수 설정: {max_threads}")
-                    else:
-                        # get_optimal_threads() 결과 사용
-                        from config import get_optimal_threads
-                        max_threads = get_optimal_threads()
-                    
-                    print(f"최종 사용 스레드 수: {max_threads}")
-                    
-                    # GPU 사용 설정 적용
-                    enable_gpu = bool(config.get('ENABLE_GPU', False))
-                    n_gpu_layers = 0
-                    env_n_gpu_layers = os.getenv('N_GPU_LAYERS')
-                    if enable_gpu:
-                        try:
-                            n_gpu_layers = int(env_n_gpu_layers) if env_n_gpu_layers is not None else -1
-                        except ValueError:
-                            n_gpu_layers = -1
-                    # CUDA/오프로딩 지원 및 환경 정보 출력
-                    try:
-                        import llama_cpp as _llama_cpp
-                        from llama_cpp import llama_supports_gpu_offload as _llama_supports_gpu_offload
-                        print(f"llama_cpp 버전: {getattr(_llama_cpp, '__version__', 'n/a')}")
-                        print(f"GPU 오프로딩 지원: {_llama_supports_gpu_offload()}")
-                    except Exception as _gpu_info_err:
-                        print(f"GPU 지원 정보 확인 실패: {_gpu_info_err}")
-                    print(f"CUDA_VISIBLE_DEVICES={os.getenv('CUDA_VISIBLE_DEVICES')}")
-                    print(f"GPU 사용 설정: {'활성화' if enable_gpu else '비활성화'} (n_gpu_layers={n_gpu_layers})")
-
-                    # OS 레벨에서 CPU 사용량 제한 설정
-                    if hasattr(os, 'sched_setaffinity'):
-                        # Linux에서 CPU 코어 제한
-                        available_cpus = list(range(max_threads))
-                        os.sched_setaffinity(0, available_cpus)
-                        print(f"CPU 친화성 설정: {available_cpus}")
-                    elif os.name == 'nt':
-                        # Windows에서 프로세스 우선순위 조정
-                        try:
-                            import psutil
-                            current_process = psutil.Process()
-                            current_process.nice(psutil.BELOW_NORMAL_PRIORITY_CLASS)
-                            print(f"프로세스 우선순위 조정 완료")
-                        except ImportError:
-                            print("psutil 패키지가 없어 우선순위 조정을 건너뜁니다")
-                    
-                    # 환경변수로 OpenMP 스레드 수 제한
-                    os.environ['OMP_NUM_THREADS'] = str(max_threads)
-                    os.environ['MKL_NUM_THREADS'] = str(max_threads)
-                    os.environ['OPENBLAS_NUM_THREADS'] = str(max_threads)
-                    os.environ['VECLIB_MAXIMUM_THREADS'] = str(max_threads)
-                    os.environ['NUMEXPR_NUM_THREADS'] = str(max_threads)
-                    
-                    print(f"환경변수 스레드 제한 설정: {max_threads}")
+    """전역 모델 인스턴스를 반환 (모델 레지스트리를 통해 프로세스당 한 번만 로딩)"""
+    return get_default_model(owner='gemma_summarizer')
+
+def set_thread_backend(backend):
+    """
+    현재 스레드가 사용할 요약 백엔드 지정 (추론 풀 워커용)
+
+    Llama 인스턴스는 동시 호출에 안전하지 않으므로 워커마다 자신의 인스턴스를 바인딩한다.
+    None이면 프로세스 공용 백엔드로 돌아간다.
+    """
+    _thread_backend.backend = backend
+
+def get_thread_backend():
+    """현재 스레드에 바인딩된 요약 백엔드 (없으면 None)"""
+    return getattr(_thread_backend, 'backend', None)
+
+def get_backend():
+    """
+    설정(MODEL_BACKEND)에 맞는 요약 백엔드를 반환 (싱글톤 패턴)
+
+    - 현재 스레드에 바인딩된 백엔드가 있으면 그것을 사용 (set_thread_backend)
+    - llama_cpp: get_llm_instance()의 Llama를 감싼 LlamaCppBackend
+    - fake: sample/*결과.txt를 재생하는 FakeBackend (모델 파일 없이 벤치마크/부하 테스트)
+    """
+    global _backend
+
+    bound = getattr(_thread_backend, 'backend', None)
+    if bound is not None:
+        return bound
+
+    if _backend is None:
+        config = get_config()
+        if str(config.get('MODEL_BACKEND', 'llama_cpp')).lower() == 'fake':
+            with _backend_lock:
+                if _backend is None:
+                    _backend = create_fake_backend(config)
+        else:
+            # 모델 로딩은 레지스트리 락에서 수행되므로 이 락 밖에서 호출
+            llm = get_llm_instance()
+            with _backend_lock:
+                if _backend is None:
+                    _backend = LlamaCppBackend(llm)
+        print(f"요약 백엔드: {_backend.name}")
+
+    return _backend
+
+# 주제 구간을 표시한 프롬프트의 paragraphs 규칙 (구간 수와 관계없이 같은 문구여야 지시문 접두부 KV 캐시를 공유)
+SEGMENTED_PARAGRAPH_RULE = "대화 내용에 표시된 [구간 N]마다 하나씩, 구간 순서대로 나누어 (구간 표시가 없으면 1개)"
+
+def mark_paragraph_blocks(text: str, start_times=None) -> tuple:
+    """
+    TOPIC_SEGMENTATION_ENABLED면 대화 내용을 주제 구간으로 나눠 [구간 N] 표시
+
+    Returns:
+        tuple: (프롬프트에 넣을 대화 내용, paragraphs 규칙 문구)
+    """
+    if not topic_segmentation_enabled():
+        return text, "통화 내용을 반드시 2-3개의 논리적 단위로 나누어"
+    marked_text, _ = mark_topic_blocks(text, start_times)
+    return marked_text, SEGMENTED_PARAGRAPH_RULE
+
+def build_summary_prompt(text: str, start_times=None) -> str:
+    """
+    대화 내용으로 요약 프롬프트를 생성 (HYBRID_EXTRACTION_ENABLED면 요약 문장만 요청하는 프롬프트)
+
+    Args:
+        start_times (list, optional): 발화별 시작 시각(ms). 주제 구간 경계의 침묵 추정에 사용
+    """
+    if hybrid_enabled():
+        return build_slim_summary_prompt(text, start_times)
+    text, paragraph_rule = mark_paragraph_blocks(text, start_times)
+    # 프롬프트를 요점 중심으로 변경 (간결한 요약) - 강제성 강화
+    return (
+        f"당신은 대화 내용을 분석하고 지정된 JSON 형식으로 요약하는 전문가입니다.\n"
+        f"오타나 유사어는 문맥에 맞게 적절하게 수정 후 요약해야 하며 가상정보나 추정정보 없이 반드시 '대화내용' 범위에서만 요약을 수행해야 한다."
+        f"아래 [분석 규칙]을 참고하여, [원본 통화 내용]을 분석하고 완벽한 JSON을 생성하세요.\n\n"
+        f"--- [분석 규칙] ---\n"
+        f"summary: 통화의 핵심 내용을 25자 이내의 주어를 제외한 매우 짧은 한 문장으로 요약하세요. 문장의 끝은 '명사형' 으로 끝내야 합니다.\n"
+        f"keyword: 가장 중요한 키워드를 3개 추출하여 쉼표로 구분하세요.\n"
+        f"paragraphs: {paragraph_rule} 각각 분석하세요.\n"
+        f"  - 각 paragraph는 반드시 다음 필드를 포함해야 합니다:\n"
+        f"    * summary: 해당 부분의 핵심 내용을 25자 이내로 요약\n"
+        f"    * keyword: 해당 부분의 주요 키워드 3개를 쉼표로 구분\n"
+        f"    * sentiment: 감정을 '강한긍정', '약한긍정', '보통', '약한부정', '강한부정' 중에서 선택\n\n"
+        f"--- [응답 형식] ---\n"
+        f"반드시 이 형식으로만 응답하세요:\n"
+        f"```json\n"
+        f'{{\n'
+        f'"summary": "통화 핵심 요약",\n'
+        f'"keyword": "",\n'
+        f'"paragraphs": [\n'
+        f'{{\n'
+        f'"summary": "",\n'
+        f'"keyword": "",\n'
+        f'"sentiment": ""\n'
+        f'}},\n'
+        f'{{\n'
+        f'"summary": "",\n'
+        f'"keyword": "",\n'
+        f'"sentiment": ""\n'
+        f'}}\n'
+        f']\n'
+        f'}}\n'
+        f"```\n\n"
+        f"대화 내용:\n{text}\n\n"
+        f"위 내용을 분석하여 반드시 paragraphs를 포함한 완전한 JSON으로 응답하세요."
+    )
 
-                    _llm_instance = Llama(
-                        model_path=MODEL_PATH,
-                        n_ctx=config['MODEL_CONTEXT_SIZE'],
-                        n_threads=max_threads,
-                        n_threads_batch=max_threads,  # 배치 처리 스레드도 제한
-                        n_gpu_layers=n_gpu_layers,
-                        verbose=False  # 불필요한 출력 줄이기
-                    )
-                    print("모델 로딩 완료")
+def build_slim_summary_prompt(text: str, start_times=None) -> str:
+    """
+    요약 문장만 요청하는 하이브리드 추출 프롬프트
+
+    keyword와 paragraph sentiment는 local_extraction에서 계산하므로 모델은 summary 문장만 생성한다.
+    """
+    text, paragraph_rule = mark_paragraph_blocks(text, start_times)
+    return (
+        f"당신은 대화 내용을 지정된 JSON 형식으로 요약하는 전문가입니다.\n"
+        f"오타나 유사어는 문맥에 맞게 적절하게 수정 후 요약해야 하며 가상정보나 추정정보 없이 반드시 '대화내용' 범위에서만 요약을 수행해야 한다."
+        f"아래 [분석 규칙]을 참고하여, [원본 통화 내용]을 요약하고 완벽한 JSON을 생성하세요.\n\n"
+        f"--- [분석 규칙] ---\n"
+        f"summary: 통화의 핵심 내용을 25자 이내의 주어를 제외한 매우 짧은 한 문장으로 요약하세요. 문장의 끝은 '명사형' 으로 끝내야 합니다.\n"
+        f"paragraphs: {paragraph_rule} 각 부분의 핵심 내용을 25자 이내로 요약하세요.\n\n"
+        f"--- [응답 형식] ---\n"
+        f"반드시 이 형식으로만 응답하세요:\n"
+        f"```json\n"
+        f'{{"summary": "통화 핵심 요약", "paragraphs": [{{"summary": ""}}, {{"summary": ""}}]}}\n'
+        f"```\n\n"
+        f"대화 내용:\n{text}\n\n"
+        f"위 내용을 요약하여 반드시 paragraphs를 포함한 완전한 JSON으로 응답하세요."
+    )
+
+# 요약 생성 샘플링 파라미터 (일관성 강화)
+SUMMARY_SAMPLING_PARAMS = {
+    'temperature': 0.3,
+    'min_p': 0.1,
+    'top_p': 0.8,
+    'top_k': 20,
+    'repeat_penalty': 1.05,
+}
 
-                except Exception as e:
-                    print(f"모델 로딩 실패: {e}")
-                    raise
+def generate_summary_streaming(llm, prompt: str, max_tokens: int, allow_continuation: bool = True):
+    """
+    스트리밍으로 요약을 생성하면서 JSON을 점진적으로 파싱
 
-    return _llm_instance
+    - 최상위 JSON 객체가 닫히면 즉시 생성 중단 (뒤따르는 ``` 와 설명문은 생성하지 않음)
+    - 필드 값이 잘못 생성되면 그 필드 직전까지의 출력을 이어받아 해당 필드만 다시 생성
+    - 토큰 제한으로 끊기면 처음부터 다시 생성하지 않고 이어서 생성 (prefix KV 캐시 재사용)
+    - 필드(summary, keyword 등)가 완성되기까지 걸린 시간을 stream.field_ready_seconds.<필드>로 기록
+    - allow_continuation=False이면 max_tokens를 넘겨 이어서 생성하지 않음 (과부하 시 생성 토큰 상한)
 
-def summarize_with_gemma(text: str, max_tokens: int = None) -> str:
+    Returns:
+        tuple: (llama_cpp 응답 형식 dict, IncrementalJSONParser)
+    """
+    config = get_config()
+    field_retry_max = config.get('STREAM_FIELD_RETRY_MAX', 1)
+    max_tokens = int(max_tokens)
+    start_time = time.time()
+
+    emitted = set()
+
+    def emit(key, value):
+        # 필드 재생성 시 접두부를 다시 파싱하므로 같은 필드는 한 번만 기록
+        if key in emitted:
+            return
+        emitted.add(key)
+        metrics.observe(f'stream.field_ready_seconds.{key}', time.time() - start_time)
+
+    parser = IncrementalJSONParser(on_field=emit)
+    completion_tokens = 0
+    finish_reason = None
+    field_retries = {}
+    continued = False
+    budget = max_tokens
+
+    timing = current_timing()
+
+    while True:
+        stream = llm(prompt + parser.raw, max_tokens=budget, stream=True, echo=False, **SUMMARY_SAMPLING_PARAMS)
+        try:
+            for text, reason in iter_stream_text(stream):
+                if text:
+                    if completion_tokens == 0 and timing is not None:
+                        # 첫 토큰까지 시간 (프롬프트 평가 포함)
+                        timing.set_default('ttft_ms', (time.time() - start_time) * 1000)
+                    completion_tokens += 1
+                finish_reason = reason or finish_reason
+                if parser.feed(text):
+                    break
+        finally:
+            if hasattr(stream, 'close'):
+                stream.close()
+
+        if parser.done:
+            finish_reason = 'stop'
+            metrics.increment('stream.early_stop')
+            break
+
+        # MODEL_TIMEOUT이 지나면 재생성/이어서 생성하지 않고 부분 결과로 종료
+        deadline = current_deadline()
+        if deadline is not None and (deadline.triggered or deadline.expired()):
+            deadline.trigger()
+            break
+
+        field = parser.error_field
+        if parser.error and field and parser.error_value_start is not None \
+                and field_retries.get(field, 0) < field_retry_max:
+            field_retries[field] = field_retries.get(field, 0) + 1
+            metrics.increment('stream.field_retry')
+            print(f"🔄 잘못 생성된 필드만 재생성: {field} ({parser.error})")
+            prefix = parser.raw[:parser.error_value_start].rstrip()
+            parser = IncrementalJSONParser(on_field=emit)
+            parser.feed(prefix)
+            budget = max(100, max_tokens - completion_tokens)
+            continue
+
+        if parser.error:
+            print(f"⚠️ 스트리밍 JSON 파싱 중단: {parser.error}")
+        elif finish_reason == 'length' and allow_continuation and not continued and max_tokens < 1200:
+            # 기존 재시도(max_tokens 2배)와 같은 총 예산으로 이어서 생성
+            continued = True
+            metrics.increment('stream.continuation')
+            print(f"🔄 토큰 제한으로 잘린 응답 이어서 생성 (추가 max_tokens: {max_tokens})")
+            budget = max_tokens
+            continue
+        break
+
+    output = {
+        'choices': [{'text': parser.raw, 'finish_reason': finish_reason}],
+        'usage': {'completion_tokens': completion_tokens},
+    }
+    return output, parser
+
+def clean_conversation_text(text: str) -> str:
+    """요약 전 대화 텍스트 정리 (중복 발화 제거)"""
+    if text and isinstance(text, str):
+        # 대화 형태로 분리
+        lines = text.strip().split('\n')
+        # 중복 제거
+        cleaned_lines = STTPreprocessor.remove_duplicates(lines)
+        # 다시 결합
+        text = '\n'.join(cleaned_lines)
+    return text
+
+def summarize_with_gemma(text: str, max_tokens: int = None, prompt_tokens: int = None,
+                         token_cap: int = None, start_times=None) -> str:
     """
     Gemma 모델을 사용하여 텍스트를 요약합니다.
 
     Args:
         text (str): 요약할 텍스트
         max_tokens (int, optional): 최대 토큰 수. None이면 설정값 사용
+        prompt_tokens (int, optional): 미리 계산한 프롬프트 토큰 수 (단계별 파이프라인의 준비 단계). None이면 여기서 토큰화
+        token_cap (int, optional): 생성 토큰 수 상한 (과부하 성능 저하 단계). 지정하면 잘려도 이어서 생성/재시도하지 않음
+        start_times (list, optional): 발화별 시작 시각(ms, metadata.turn_start_times). 주제 구간 나누기에 사용
 
     Returns:
         str: 반드시 JSON 형태의 문자열 (summary 키에 요약)
+             MODEL_TIMEOUT으로 생성을 중단한 경우 TIMEOUT_FLAG_KEY가 True로 포함됨
     """
+    # 추론 워치독: MODEL_TIMEOUT이 지나면 stopping_criteria로 디코딩 중단
+    previous_deadline = begin_deadline(float(get_config().get('MODEL_TIMEOUT', 180.0)))
     try:
         # 설정 가져오기
         config = get_config()
@@ -151,52 +334,16 @@ def summarize_with_gemma(text: str, max_tokens: int = None) -> str:
 
         # 텍스트 전처리 (중복 제거)
         if text and isinstance(text, str):
-            # 대화 형태로 분리
-            lines = text.strip().split('\n')
-            # 중복 제거
-            cleaned_lines = STTPreprocessor.remove_duplicates(lines)
-            # 다시 결합
-            text = '\n'.join(cleaned_lines)
+            text = clean_conversation_text(text)
             print(f"전처리 후 텍스트 길이: {len(text)}자")
 
-        llm = get_llm_instance()
-
-        # 프롬프트를 요점 중심으로 변경 (간결한 요약) - 강제성 강화
-        prompt = (
-            f"당신은 대화 내용을 분석하고 지정된 JSON 형식으로 요약하는 전문가입니다.\n"
-            f"오타나 유사어는 문맥에 맞게 적절하게 수정 후 요약해야 하며 가상정보나 추정정보 없이 반드시 '대화내용' 범위에서만 요약을 수행해야 한다."
-            f"아래 [분석 규칙]을 참고하여, [원본 통화 내용]을 분석하고 완벽한 JSON을 생성하세요.\n\n"
-            f"--- [분석 규칙] ---\n"
-            f"summary: 통화의 핵심 내용을 25자 이내의 주어를 제외한 매우 짧은 한 문장으로 요약하세요. 문장의 끝은 '명사형' 으로 끝내야 합니다.\n"
-            f"keyword: 가장 중요한 키워드를 3개 추출하여 쉼표로 구분하세요.\n"
-            f"paragraphs: 통화 내용을 반드시 2-3개의 논리적 단위로 나누어 각각 분석하세요.\n"
-            f"  - 각 paragraph는 반드시 다음 필드를 포함해야 합니다:\n"
-            f"    * summary: 해당 부분의 핵심 내용을 25자 이내로 요약\n"
-            f"    * keyword: 해당 부분의 주요 키워드 3개를 쉼표로 구분\n"
-            f"    * sentiment: 감정을 '강한긍정', '약한긍정', '보통', '약한부정', '강한부정' 중에서 선택\n\n"
-            f"--- [응답 형식] ---\n"
-            f"반드시 이 형식으로만 응답하세요:\n"
-            f"```json\n"
-            f'{{\n'
-            f'"summary": "통화 핵심 요약",\n'
-            f'"keyword": "",\n'
-            f'"paragraphs": [\n'
-            f'{{\n'
-            f'"summary": "",\n'
-            f'"keyword": "",\n'
-            f'"sentiment": ""\n'
-            f'}},\n'
-            f'{{\n'
-            f'"summary": "",\n'
-            f'"keyword": "",\n'
-            f'"sentiment": ""\n'
-            f'}}\n'
-            f']\n'
-            f'}}\n'
-            f"```\n\n"
-            f"대화 내용:\n{text}\n\n"
-            f"위 내용을 분석하여 반드시 paragraphs를 포함한 완전한 JSON으로 응답하세요."
-        )
+        # 모델 로딩/백엔드 준비 대기 (서버 준비 전 첫 요청은 여기서 모델 로딩을 기다림)
+        with timed_stage('model_wait_ms'):
+            llm = get_backend()
+        timing = current_timing()
+        perf_before = llm.perf_counters()
+
+        prompt = build_summary_prompt(text, start_times)
 
         print("요약 생성 중...")
         log_gemma_query(prompt, "gemma_summarizer")
@@ -220,6 +367,28 @@ def summarize_with_gemma(text: str, max_tokens: int = None) -> str:
         # max_tokens를 사용 가능한 토큰 수로 제한 (최소값 보장)
         max_tokens = max(500, min(4000, available_tokens))  # 최소 500, 최대 4000토큰
         
+        # 프롬프트가 Context Window에 충분히 들어가지 않으면 긴 통화 map-reduce 모드로 요약
+        if config.get('LONG_CALL_ENABLED', True):
+            if prompt_tokens is None:
+                prompt_tokens = count_tokens(llm, prompt)
+            if timing is not None:
+                timing.set('prompt_tokens', prompt_tokens)
+            remaining_tokens = context_size - prompt_tokens - 100
+            if remaining_tokens < config.get('LONG_CALL_MIN_OUTPUT_TOKENS', 1000):
+                print(f"📚 긴 통화 감지 (프롬프트 {prompt_tokens}토큰, 남은 토큰 {remaining_tokens}) - map-reduce 모드로 전환")
+                long_result = summarize_long_conversation(llm, text)
+                gemma_query_elapsed = time.time() - gemma_query_start
+                print(f"[Gemma Query 소요시간] {gemma_query_elapsed:.2f}초 (map-reduce)")
+                if timing is not None:
+                    timing.add('inference_ms', gemma_query_elapsed * 1000)
+                    timing.record_perf(perf_before, llm.perf_counters())
+                with timed_stage('postprocess_ms'):
+                    processed_result = ResponsePostprocessor.process_response(long_result)
+                deadline = current_deadline()
+                if deadline is not None and deadline.triggered:
+                    processed_result[TIMEOUT_FLAG_KEY] = True
+                return json.dumps(processed_result, ensure_ascii=False, indent=2)
+        
         # 프롬프트가 너무 길어서 Context Window 초과하는 경우 처리
         if available_tokens < 500:
             print(f"⚠️ 프롬프트가 Context Window를 초과합니다!")
@@ -227,27 +396,38 @@ def summarize_with_gemma(text: str, max_tokens: int = None) -> str:
             print(f"텍스트를 줄이거나 Context Window를 늘려야 합니다.")
             max_tokens = 500  # 최소 응답 보장
         
+        if token_cap:
+            max_tokens = min(max_tokens, int(token_cap))
+            print(f"⚠️ 과부하로 생성 토큰 수 제한: {max_tokens}")
+        
         print(f"추정 프롬프트 토큰: {estimated_prompt_tokens}, 사용 가능 토큰: {available_tokens}, 설정된 max_tokens: {max_tokens}")
         
         print(f"모델 추론 시작 (타임아웃: {model_timeout}초)")
         
         # 1B 8Q 모델에 맞는 파라미터 조정 (일관성 강화)
         print(f"설정된 max_tokens: {max_tokens}")
-        output = llm(
-            prompt,
-            max_tokens=max_tokens,
-            temperature=0.3,  # 매우 낮은 temperature로 일관성 극대화
-            min_p=0.1,  # 더 엄격한 최소 확률
-            top_p=0.8,  # 더 낮은 top_p로 일관성 향상
-            top_k=20,  # 더 좁은 토큰 선택 범위
-            repeat_penalty=1.05,  # 반복 방지 강화
-            echo=False
-        )
+        stream_parser = None
+        if config.get('STREAM_JSON_ENABLED', True):
+            output, stream_parser = generate_summary_streaming(llm, prompt, max_tokens, allow_continuation=not token_cap)
+        else:
+            output = llm(
+                prompt,
+                max_tokens=max_tokens,
+                temperature=0.3,  # 매우 낮은 temperature로 일관성 극대화
+                min_p=0.1,  # 더 엄격한 최소 확률
+                top_p=0.8,  # 더 낮은 top_p로 일관성 향상
+                top_k=20,  # 더 좁은 토큰 선택 범위
+                repeat_penalty=1.05,  # 반복 방지 강화
+                echo=False
+            )
         
         # Gemma Query 시간 측정 완료
         gemma_query_end = time.time()
         gemma_query_elapsed = gemma_query_end - gemma_query_start
         print(f"[Gemma Query 소요시간] {gemma_query_elapsed:.2f}초")
+        tokens_per_second = record_generation_speed(output, gemma_query_elapsed)
+        if tokens_per_second:
+            print(f"[생성 속도] {tokens_per_second:.2f} tokens/s, 추측 디코딩 통계: {get_speculative_stats()}")
         
         print(f"output 전체: {output}")
 
@@ -297,8 +477,15 @@ def summarize_with_gemma(text: str, max_tokens: int = None) -> str:
                     print("⚠️  JSON 중괄호가 맞지 않아 잘린 것으로 판단됩니다.")
                     was_truncated = True
         
+        # 스트리밍 모드에서는 이어서 생성하기를 이미 수행했으므로 재시도하지 않음
+        if stream_parser is not None:
+            was_truncated = False
+        
+        # 시간 초과로 중단된 경우 재시도하지 않음
+        timed_out = current_deadline() is not None and current_deadline().triggered
+        
         # 잘린 경우 한 번 더 시도 (토큰 수 증가)
-        if was_truncated and max_tokens < 1200:
+        if was_truncated and max_tokens < 1200 and not timed_out and not token_cap:
             retry_max_tokens = max_tokens * 2
             print(f"🔄 토큰 제한으로 잘린 응답 재시도 (max_tokens: {max_tokens} → {retry_max_tokens})")
             
@@ -332,30 +519,60 @@ def summarize_with_gemma(text: str, max_tokens: int = None) -> str:
                     result = retry_result
                     output = retry_output
         
+        # 추론 시간 분석 (재시도/이어서 생성 포함, 성능 카운터가 없으면 응답의 토큰 수 사용)
+        if timing is not None:
+            timing.add('inference_ms', (time.time() - gemma_query_start) * 1000)
+            timing.record_perf(perf_before, llm.perf_counters())
+            usage = output.get('usage', {}) if isinstance(output, dict) else {}
+            timing.set_default('generated_tokens', usage.get('completion_tokens', 0))
+        
         # 원본 응답을 항상 명확히 출력
         print(f"[원본 응답]:\n{result}\n---")
         log_gemma_response(result, "gemma_summarizer")
 
-
+        if timed_out:
+            # 시간 초과: 지금까지 생성된 부분 JSON에서 유효한 필드만 추출
+            print(f"⏱️ 부분 결과 복구 ({len(result)}자)")
+            with timed_stage('json_repair_ms'):
+                extracted_data = extract_valid_data_from_broken_json(result)
+            with timed_stage('postprocess_ms'):
+                if hybrid_enabled(config):
+                    extracted_data = fill_local_fields(extracted_data, text, config, start_times)
+                processed_result = ResponsePostprocessor.process_response(extracted_data)
+            processed_result[TIMEOUT_FLAG_KEY] = True
+            return json.dumps(processed_result, ensure_ascii=False, indent=2)
         
         # JSON 추출 및 처리 (json_repair 모듈 사용)
-        json_str = extract_json_from_markdown(result)
+        # 스트리밍 파서가 최상위 객체를 완성했다면 전체 텍스트에서 중괄호를 다시 찾지 않음
+        with timed_stage('json_repair_ms'):
+            if stream_parser is not None and stream_parser.done:
+                json_str = stream_parser.json_text
+            else:
+                json_str = extract_json_from_markdown(result)
         
         if json_str is None:
             # JSON 추출 실패 시 원본에서 데이터 추출
             print("JSON 추출 실패 - 원본 데이터 추출 시도")
-            extracted_data = extract_valid_data_from_broken_json(result)
-            processed_result = ResponsePostprocessor.process_response(extracted_data)
+            with timed_stage('json_repair_ms'):
+                extracted_data = extract_valid_data_from_broken_json(result)
+            with timed_stage('postprocess_ms'):
+                if hybrid_enabled(config):
+                    extracted_data = fill_local_fields(extracted_data, text, config, start_times)
+                processed_result = ResponsePostprocessor.process_response(extracted_data)
             return json.dumps(processed_result, ensure_ascii=False, indent=2)
         
         # JSON 처리 및 복구
-        final_json = process_and_repair_json(json_str)
+        with timed_stage('json_repair_ms'):
+            final_json = process_and_repair_json(json_str)
         
         # 최종 후처리
         try:
             parsed_result = json.loads(final_json)
             print(f"🔍 후처리 전 parsed_result: {parsed_result}")
-            processed_result = ResponsePostprocessor.process_response(parsed_result)
+            with timed_stage('postprocess_ms'):
+                if hybrid_enabled(config):
+                    parsed_result = fill_local_fields(parsed_result, text, config, start_times)
+                processed_result = ResponsePostprocessor.process_response(parsed_result)
             print(f"🔍 후처리 후 processed_result: {processed_result}")
             return json.dumps(processed_result, ensure_ascii=False, indent=2)
         except json.JSONDecodeError as e:
@@ -379,18 +596,151 @@ def summarize_with_gemma(text: str, max_tokens: int = None) -> str:
     except Exception as e:
         error_msg = f"요약 생성 중 오류 발생: {str(e)}\n{traceback.format_exc()}"
         print(error_msg)
-        return json.dumps({"summary": "요약을 생성할 수 없습니다."}, ensure_ascii=False)
+        return json.dumps({"summary": MODEL_FAILURE_SUMMARY}, ensure_ascii=False)
+    finally:
+        end_deadline(previous_deadline)
+
+def compress_summary_locally(summary: str, keyword_field, conversation_text: str) -> str:
+    """
+    [재질의 필요] summary를 규칙 기반으로 압축합니다.
+
+    응답의 keyword 필드와 대화 원문에서 추출한 키워드를 함께 사용하며,
+    압축 결과가 품질 검사를 통과하지 못하면 빈 문자열을 반환합니다 (LLM 재질의 필요).
+
+    Args:
+        summary (str): [재질의 필요] 태그를 제거한 원본 요약
+        keyword_field: 응답의 keyword 필드 (쉼표 구분 문자열 또는 리스트)
+        conversation_text (str): 대화 원문
+
+    Returns:
+        str: 압축된 요약 또는 빈 문자열
+    """
+    try:
+        config = get_config()
+        if not config.get('SUMMARY_COMPRESS_ENABLED', True):
+            return ""
+
+        if isinstance(keyword_field, list):
+            keywords = [str(kw).strip() for kw in keyword_field if kw and str(kw).strip()]
+        else:
+            keywords = [kw.strip() for kw in str(keyword_field or '').split(',') if kw.strip()]
+        keywords = [kw for kw in keywords if kw != '키워드 없음']
+        for keyword in extract_keywords_from_text(conversation_text or ''):
+            if keyword not in keywords:
+                keywords.append(keyword)
+
+        max_chars = config.get('SUMMARY_COMPRESS_MAX_CHARS', 25)
+        max_bytes = ResponsePostprocessor.SUMMARY_MAX_BYTES
+        compressed = compress_summary_with_keywords(summary, keywords, max_chars, max_bytes)
+        if is_acceptable_compression(compressed, keywords, max_chars, max_bytes):
+            print(f"📝 로컬 압축 성공: '{summary}' → '{compressed}'")
+            return compressed
+
+        print(f"📝 로컬 압축 품질 검사 실패: '{summary}' → '{compressed}'")
+        return ""
+    except Exception as e:
+        print(f"로컬 압축 중 오류: {e}")
+        return ""
+
+def requery_summary_with_gemma(original_summary: str, timeout_seconds: float = None) -> tuple:
+    """
+    LLM에 재질의하여 긴 요약을 짧게 다시 요약합니다.
+
+    Args:
+        original_summary (str): [재질의 필요] 태그를 제거한 원본 요약
+        timeout_seconds (float, optional): 재질의 추론 마감 (요청에 남은 MODEL_TIMEOUT). None이면 MODEL_TIMEOUT
+
+    Returns:
+        tuple: (재요약 결과, 소요시간(초))
+    """
+    requery_prompt = (
+        f"다음 요약을 매우 짧은 요약으로 다시 요약해주세요.\n\n"
+        f"예시:\n"
+        f"원본: 기존 평생 교육 희망 카드는 작년까지만 사용 가능했고 농협 체험 카드를 발급받아야 포인트 지급 가능하여 카드 발급 방법을 안내드렸습니다.\n"
+        f"요약: 농협 카드 발급 안내\n\n"
+        f"원본 요약:\n{original_summary}\n\n"
+        f"재요약:"
+    )
+    
+    # 재질의 수행
+    requery_start = time.time()
+    log_gemma_query(f"🔄 재질의 시작...", "requery_start")
+    
+    config = get_config()
+    llm = get_backend()
+    
+    # 재질의용 max_tokens 설정 (기본값 사용)
+    requery_max_tokens = config.get('DEFAULT_MAX_TOKENS', 500)
+    
+    # 재질의 시작 로그
+    log_gemma_query(requery_prompt, "requery_prompt")
+    
+    # 재질의도 요청의 MODEL_TIMEOUT 안에서만 생성
+    if timeout_seconds is None:
+        timeout_seconds = float(config.get('MODEL_TIMEOUT', 180.0))
+    previous_deadline = begin_deadline(timeout_seconds)
+    try:
+        requery_response = llm(
+            requery_prompt,
+            max_tokens=requery_max_tokens,
+            temperature=0.3,  # 매우 낮은 temperature로 일관성 극대화
+            min_p=0.1,  # 더 엄격한 최소 확률
+            top_p=0.8,  # 더 낮은 top_p로 일관성 향상
+            top_k=20,  # 더 좁은 토큰 선택 범위
+            repeat_penalty=1.05,  # 반복 방지 강화
+            echo=False
+        )
+    finally:
+        end_deadline(previous_deadline)
+    
+    requery_time = time.time() - requery_start
+    metrics.increment('requery.llm')
+    metrics.observe('requery.llm_seconds', requery_time)
+    
+    return requery_response['choices'][0]['text'].strip(), requery_time
 
-def process_request(data: dict) -> dict:
+def get_requery_stats() -> dict:
+    """
+    재질의 통계를 반환합니다.
+
+    Returns:
+        dict: 요약 요청 수, 재질의 필요 수, 로컬 압축/LLM 재질의 횟수, 비율, 절약된 추론 시간(초)
+    """
+    summarized = metrics.get_counter('request.summarized')
+    needed = metrics.get_counter('requery.needed')
+    local_compressed = metrics.get_counter('requery.local_compressed')
+    llm_requery = metrics.get_counter('requery.llm')
+    
+    # 실측 재질의 평균 시간이 없으면 설정값으로 추정
+    estimated_seconds = get_config().get('REQUERY_ESTIMATED_SECONDS', 5.0)
+    avg_requery_seconds = metrics.get_average('requery.llm_seconds', estimated_seconds)
+    
+    return {
+        'summarized': int(summarized),
+        'requery_needed': int(needed),
+        'local_compressed': int(local_compressed),
+        'llm_requery': int(llm_requery),
+        'requery_needed_rate': round(needed / summarized, 4) if summarized else 0.0,
+        'llm_requery_rate': round(llm_requery / summarized, 4) if summarized else 0.0,
+        'local_compress_rate': round(local_compressed / needed, 4) if needed else 0.0,
+        'avg_requery_seconds': round(avg_requery_seconds, 3),
+        'saved_inference_seconds': round(local_compressed * avg_requery_seconds, 3),
+    }
+
+def process_request(data: dict, summary_json: str = None, timing: RequestTiming = None) -> dict:
     """
     요청 데이터를 처리하여 응답을 반환합니다.
 
     Args:
         data (dict): 요청 데이터 (request_id, text 포함)
+        summary_json (str, optional): 이미 생성된 요약 JSON (묶음 처리 결과). 있으면 요약 생성을 생략
+        timing (RequestTiming, optional): 추론 단계에서 기록하던 시간 분석 (단계별 파이프라인). None이면 새로 시작
 
     Returns:
-        dict: 새로운 응답 규격에 맞는 응답 데이터
+        dict: 새로운 응답 규격에 맞는 응답 데이터 (RESPONSE_TIMING_ENABLED이면 response.timing 포함)
     """
+    timing = timing or RequestTiming()
+    previous_timing = begin_timing(timing)
     try:
         # 요청 데이터에서 필요한 정보 추출
         transactionid = data.get("transactionid", "")
@@ -412,11 +762,36 @@ def process_request(data: dict) -> dict:
             }
             return response_data
 
+        # 같은 대화(재전송/중복 요청)는 결과 캐시에서 바로 응답
+        if summary_json is None:
+            cached_response = lookup_cached_response(data)
+            if cached_response is not None:
+                print(f"결과 캐시 적중 (ID: {request_id})")
+                return cached_response
+
         print(f"요청 처리 시작 (ID: {request_id})")
         start_time = time.time()
+        timing.mark_queue_wait(data)
+        # 과부하 성능 저하 단계 (DEGRADE_ENABLED, 대기 시간과 대기열 길이로 결정)
+        degrade_level = request_degradation_level(data, timing)
+
+        # 내용 없는 통화(인사/맞장구만)는 LLM 없이 템플릿 요약으로 응답
+        if summary_json is None:
+            summary_json = build_trivial_summary(text)
+
+        # 성능 저하 최고 단계는 LLM 없이 추출 요약으로 응답
+        if summary_json is None and degrade_level >= EXTRACTIVE:
+            summary_json = build_extractive_summary(text, 'overload')
 
-        # 첫 번째 요약 수행
-        summary = summarize_with_gemma(text)
+        # 첫 번째 요약 수행 (묶음 처리에서 이미 생성된 경우 재사용, 모델 라우터가 있으면 모델 선택)
+        if summary_json is None:
+            with routed_request(data, degraded=degrade_level >= SMALL_MODEL):
+                summary_json = summarize_with_gemma(text, token_cap=degraded_max_tokens(degrade_level),
+                                                    start_times=turn_start_times(data))
+        summary = summary_json
+        metrics.increment('request.summarized')
+        timed_out = False
+        fallback_reason = None
         
         # 후처리 수행
         try:
@@ -438,15 +813,27 @@ def process_request(data: dict) -> dict:
                     print(f"🎯 오류 문자: '{summary[e.pos] if e.pos < len(summary) else 'EOF'}'")
                 raise
             
+            # MODEL_TIMEOUT으로 중단된 부분 결과 여부 (응답 플래그로 전달)
+            timed_out = bool(processed_response.pop(TIMEOUT_FLAG_KEY, False))
+            fallback_reason = processed_response.pop(FALLBACK_FLAG_KEY, None)
+            
+            # 시간 초과/모델 오류로 쓸 수 있는 요약이 없으면 추출 요약으로 대체 (EXTRACTIVE_FALLBACK_ENABLED)
+            if fallback_reason is None and is_unusable_summary(processed_response) and fallback_enabled():
+                fallback_reason = 'timeout' if timed_out else 'model_failure'
+                processed_response = json.loads(build_extractive_summary(text, fallback_reason))
+                fallback_reason = processed_response.pop(FALLBACK_FLAG_KEY)
+            
             # ResponsePostprocessor로 최종 후처리 수행
             print(f"🔍 process_request 후처리 전: {processed_response}")
-            processed_response = ResponsePostprocessor.process_response(processed_response)
+            with timing.stage('postprocess_ms'):
+                processed_response = ResponsePostprocessor.process_response(processed_response)
             print(f"🔍 process_request 후처리 후: {processed_response}")
             
             processed_summary = processed_response.get('summary', '')
             
             # 재질의 필요 여부 확인
             if processed_summary.startswith('[재질의 필요]'):
+                requery_stage_start = time.time()
                 # 재질의 발생 로그 기록
                 original_length = len(processed_summary.replace('[재질의 필요] ', ''))
                 
@@ -458,53 +845,42 @@ def process_request(data: dict) -> dict:
                 log_gemma_query(f"재질의 전 keyword: {processed_response.get('keyword', '없음')}", "requery_detection")
                 log_gemma_query(f"재질의 전 sentiment: {processed_response.get('sentiment', '없음')}", "requery_detection")
                 
-                # 재질의용 프롬프트 생성 (이미 처리된 summary를 재질의)
                 # [재질의 필요] 문구 제거
                 original_summary = processed_summary.replace('[재질의 필요] ', '')
-                requery_prompt = (
-                    f"다음 요약을 매우 짧은 요약으로 다시 요약해주세요.\n\n"
-                    f"예시:\n"
-                    f"원본: 기존 평생 교육 희망 카드는 작년까지만 사용 가능했고 농협 체험 카드를 발급받아야 포인트 지급 가능하여 카드 발급 방법을 안내드렸습니다.\n"
-                    f"요약: 농협 카드 발급 안내\n\n"
-                    f"원본 요약:\n{original_summary}\n\n"
-                    f"재요약:"
-                )
-                
-                # 재질의 수행
-                start_time = time.time()
-                log_gemma_query(f"🔄 재질의 시작...", "requery_start")
-                
-                config = get_config()
-                llm = get_llm_instance()
-                
-                # 재질의용 max_tokens 설정 (기본값 사용)
-                requery_max_tokens = config.get('DEFAULT_MAX_TOKENS', 500)
-                
-                # 재질의 시작 로그
-                log_gemma_query(requery_prompt, "requery_prompt")
-                
-                requery_response = llm(
-                    requery_prompt,
-                    max_tokens=requery_max_tokens,
-                    temperature=0.3,  # 매우 낮은 temperature로 일관성 극대화
-                    min_p=0.1,  # 더 엄격한 최소 확률
-                    top_p=0.8,  # 더 낮은 top_p로 일관성 향상
-                    top_k=20,  # 더 좁은 토큰 선택 범위
-                    repeat_penalty=1.05,  # 반복 방지 강화
-                    echo=False
-                )
-                
-                end_time = time.time()
-                requery_time = end_time - start_time
+                metrics.increment('requery.needed')
                 
-                requery_summary = requery_response['choices'][0]['text'].strip()
-                requery_length = len(requery_summary)
+                # 재질의는 요약 추론에 쓰고 남은 MODEL_TIMEOUT 안에서만 수행 (0이면 무제한)
+                model_timeout = float(get_config().get('MODEL_TIMEOUT', 180.0))
+                requery_timeout = model_timeout - (time.time() - timing.started_at)
+                budget_exhausted = model_timeout > 0 and requery_timeout <= 0
                 
-                # 재질의 완료 로그
-                log_gemma_response(f"✅ 재질의 완료 (소요시간: {requery_time:.2f}초)", "requery_result")
-                log_gemma_response(f"📏 재질의 결과 길이: {requery_length}바이트", "requery_result")
-                log_gemma_response(f"📝 재질의 결과: {requery_summary}", "requery_result")
-                log_gemma_response(f"🔄 압축률: {original_length}바이트 → {requery_length}바이트 ({((original_length-requery_length)/original_length*100):.1f}% 단축)", "requery_result")
+                # 1차: 규칙 기반 로컬 압축 (품질 검사 통과 시 LLM 재질의 생략)
+                compressed_summary = compress_summary_locally(original_summary, processed_response.get('keyword', ''), text)
+                if compressed_summary:
+                    metrics.increment('requery.local_compressed')
+                    requery_summary = compressed_summary
+                    requery_length = len(requery_summary)
+                    log_gemma_response(f"✅ 로컬 압축 성공 (LLM 재질의 생략): '{original_summary}' → '{requery_summary}'", "requery_result")
+                    log_gemma_response(f"🔄 압축률: {original_length}바이트 → {requery_length}바이트 ({((original_length-requery_length)/original_length*100):.1f}% 단축)", "requery_result")
+                elif timed_out or budget_exhausted or degrade_level >= NO_REQUERY:
+                    # 시간 초과/과부하 요청은 LLM 재질의 없이 바이트 예산에 맞게 자름
+                    requery_summary = truncate_to_bytes(original_summary, ResponsePostprocessor.SUMMARY_MAX_BYTES)
+                    reason = '시간 초과' if timed_out or budget_exhausted else '과부하'
+                    log_gemma_response(f"⏱️ {reason}로 재질의 생략: '{original_summary}' → '{requery_summary}'", "requery_result")
+                else:
+                    # 2차: 로컬 압축이 품질 검사를 통과하지 못한 경우에만 LLM 재질의
+                    log_gemma_query(f"로컬 압축 품질 검사 실패 - LLM 재질의 수행", "requery_detection")
+                    requery_summary, requery_time = requery_summary_with_gemma(original_summary, requery_timeout)
+                    if not requery_summary:
+                        # 마감으로 재질의 결과가 비면 원본을 바이트 예산에 맞게 자름
+                        requery_summary = truncate_to_bytes(original_summary, ResponsePostprocessor.SUMMARY_MAX_BYTES)
+                    requery_length = len(requery_summary)
+                    
+                    # 재질의 완료 로그
+                    log_gemma_response(f"✅ 재질의 완료 (소요시간: {requery_time:.2f}초)", "requery_result")
+                    log_gemma_response(f"📏 재질의 결과 길이: {requery_length}바이트", "requery_result")
+                    log_gemma_response(f"📝 재질의 결과: {requery_summary}", "requery_result")
+                    log_gemma_response(f"🔄 압축률: {original_length}바이트 → {requery_length}바이트 ({((original_length-requery_length)/original_length*100):.1f}% 단축)", "requery_result")
                 
                 # 재질의 결과를 processed_response의 summary에 직접 설정
                 # 기존 processed_response 구조는 유지하고 summary만 업데이트
@@ -539,15 +915,26 @@ def process_request(data: dict) -> dict:
                 
                 # 재질의 전체 과정 완료 로그
                 log_gemma_response(f"[재질의 프로세스 완료] 최종 요약: {processed_response.get('summary', '')}, 최종 길이: {final_length}바이트", "requery_process_complete")
+                
+                # 재질의 통계 보고
+                requery_stats = get_requery_stats()
+                print(f"[재질의 통계] {requery_stats}")
+                log_gemma_response(f"[재질의 통계] {json.dumps(requery_stats, ensure_ascii=False)}", "requery_stats")
+                timing.add('requery_ms', (time.time() - requery_stage_start) * 1000)
 
             # 최종 결과를 딕셔너리로 사용
             # processed_response는 이미 올바른 구조를 가지고 있으므로 그대로 사용
             summary = processed_response
                 
         except json.JSONDecodeError:
-            print("원본 요약 JSON 파싱 실패 - 원본 사용")
-            # JSON 파싱 실패 시 원본 사용
-            pass
+            if fallback_enabled():
+                # JSON 파싱 실패 시 추출 요약으로 대체
+                print("원본 요약 JSON 파싱 실패 - 추출 요약 사용")
+                fallback_reason = 'model_failure'
+                summary = json.loads(build_extractive_summary(text, fallback_reason))
+                summary.pop(FALLBACK_FLAG_KEY)
+            else:
+                print("원본 요약 JSON 파싱 실패 - 원본 사용")
 
         processing_time = time.time() - start_time
         
@@ -565,13 +952,43 @@ def process_request(data: dict) -> dict:
                 "summary": summary
             }
         }
+        if timed_out:
+            # 부분 결과 표시 (결과 캐시에는 저장하지 않음)
+            response_data["response"]["timedOut"] = True
+            metrics.increment('request.timed_out')
+
+        if fallback_reason:
+            # LLM 대신 추출 요약으로 응답한 경우 (결과 캐시에는 저장하지 않음)
+            response_data["response"]["fallback"] = {"method": "extractive", "reason": fallback_reason}
+            metrics.increment('request.fallback')
+
+        if get_degradation_controller() is not None:
+            # 이 요청에 적용된 성능 저하 단계 (0이 아니면 결과 캐시에 저장하지 않음)
+            response_data["response"]["degradation"] = {"level": degrade_level, "mode": LEVEL_NAMES[degrade_level]}
 
+        route = data.get(ROUTE_KEY)
+        if route is not None:
+            # 모델 라우터가 선택한 모델과 이유 (결과 캐시에는 저장하지 않음)
+            response_data["response"]["route"] = route.to_response()
+
+        # 처리 시간 분석 (지표는 항상 기록, 응답에는 RESPONSE_TIMING_ENABLED일 때만 포함)
+        observe_request_service(timing.finish())
+        print(f"[처리 시간 분석] {timing.describe()}")
+        if get_config().get('RESPONSE_TIMING_ENABLED', False):
+            response_data["response"]["timing"] = timing.to_response()
+
+        store_response(data, response_data)
         return response_data
 
     except Exception as e:
         error_msg = f"요청 처리 중 오류: {str(e)}"
         print(error_msg)
 
+        # 대화가 있으면 오류 대신 추출 요약으로 응답 (EXTRACTIVE_FALLBACK_ENABLED)
+        fallback_response = build_fallback_response(data, 'error')
+        if fallback_response is not None:
+            return fallback_response
+
         # 오류 응답
         response_data = {
             "transactionid": data.get("transactionid", ""),
@@ -586,6 +1003,8 @@ def process_request(data: dict) -> dict:
         }
 
         return response_data
+    finally:
+        end_timing(previous_timing)
 
 # 단독 실행 시 테스트
 if __name__ == "__main__":
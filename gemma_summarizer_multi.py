@@ -7,34 +7,121 @@ from pathlib import Path
 import threading
 from datetime import datetime
 from config import get_config, validate_config
-from ipc_queue_manager import IPCMultiSlotManager, QueueManager, SlotStatus
-from gemma_summarizer import process_request
+from ipc_queue_manager import IPCMultiSlotManager, QueueManager, ServerState, SlotStatus
+from gemma_summarizer import process_request, set_thread_backend
+from call_packing import process_with_packing
+from trivial_call import build_trivial_summary, get_trivial_stats
+from result_cache import lookup_cached_response, request_cache_key
+from single_flight import get_single_flight
+from inference_pool import InferencePool, create_inference_pool, warm_up_pool
+from model_router import SMALL, ModelRouter, bind_thread_router, create_model_router
+from load_shedding import attach_degradation_queue
+from metrics import metrics
+from model_prefetch import start_model_prefetch
+from staged_pipeline import build_error_response, create_summary_pipeline
 from preprocessor import preprocess_request_data
+from request_timing import ENQUEUED_AT_KEY
 from logger import log_request_only, log_response_only, log_gemma_query, log_gemma_response
 
 
 
-def worker_thread(queue_manager: QueueManager):
-    """AI 요약 처리 워커 스레드"""
-    print("워커 스레드 시작")
+def prepare_request_data(data: dict) -> dict:
+    """요약 전에 전처리 수행 (이미 전처리된 데이터는 그대로 사용)"""
+    if 'sttResultList' in data:
+        print(f"워커: 전처리 수행 중...")
+        processed_data = preprocess_request_data(data)
+        print(f"워커: 전처리 완료: {len(processed_data.get('text', ''))} 문자")
+        return processed_data
+    print(f"워커: 이미 전처리된 데이터 사용")
+    return data
+
+def respond_to_slot(queue_manager: QueueManager, slot_id: int, response_data: dict):
+    """슬롯 응답을 응답 큐에 넣고, 처리 중에 합류한 같은 요청들에도 응답"""
+    # 응답 데이터 로깅
+    log_response_only(response_data, "gemma_summarizer")
+    
+    # 응답 큐에 추가
+    queue_manager.put_response(slot_id, response_data)
+    print(f"워커: 슬롯 {slot_id} 응답 큐에 추가 완료")
     
-    # CPU 제한 확인
-    import multiprocessing
-    import os
-    cpu_count = multiprocessing.cpu_count()
-    cpu_limit_percent = int(os.getenv('CPU_LIMIT_PERCENT', 25))
-    max_threads = max(1, int(cpu_count * cpu_limit_percent / 100))
-    force_threads = os.getenv('MAX_CPU_THREADS')
-    if force_threads:
-        max_threads = int(force_threads)
+    # 처리 중에 합류한 같은 요청들에도 응답
+    for follower_slot_id, follower_response in get_single_flight(get_config()).complete(slot_id, response_data):
+        log_response_only(follower_response, "gemma_summarizer")
+        queue_manager.put_response(follower_slot_id, follower_response)
+        print(f"워커: 합류 슬롯 {follower_slot_id} 응답 큐에 추가 완료")
+
+def route_prepared_request(queue_manager: QueueManager, slot_id: int, data: dict) -> bool:
+    """
+    전처리된 요청 중 추론이 필요 없는 요청은 바로 응답
     
-    print(f"워커 스레드 CPU 제한 설정:")
-    print(f"  - 총 CPU 코어 수: {cpu_count}")
-    print(f"  - CPU 제한 퍼센트: {cpu_limit_percent}%")
-    print(f"  - 사용할 스레드 수: {max_threads}")
-    print(f"  - 강제 스레드 설정: {force_threads if force_threads else '없음'}")
+    - 결과 캐시 적중(재전송/중복 요청)과 내용 없는 통화는 추론 워커를 거치지 않고 응답
+    - 같은 대화를 처리 중인 요청이 있으면 합류하여 그 결과를 함께 받음
+    
+    Returns:
+        bool: 추론이 필요하면 True
+    """
+    cached_response = lookup_cached_response(data, record_miss=False)
+    trivial_summary = None if cached_response else build_trivial_summary(data.get('text', ''), record_miss=False)
+    if cached_response is not None:
+        # 결과 캐시 적중 (재전송/중복 요청)
+        log_response_only(cached_response, "gemma_summarizer")
+        queue_manager.put_response(slot_id, cached_response)
+        print(f"캐시 응답 완료: 슬롯 {slot_id}")
+        return False
+    if trivial_summary is not None:
+        response_data = process_request(data, summary_json=trivial_summary)
+        log_response_only(response_data, "gemma_summarizer")
+        queue_manager.put_response(slot_id, response_data)
+        print(f"템플릿 응답 완료: 슬롯 {slot_id} (판정 통계: {get_trivial_stats()})")
+        return False
+    flights = get_single_flight(get_config())
+    is_leader = flights.join(request_cache_key(data), slot_id, data)
+    for abandoned_slot_id, abandoned_data in flights.expire_stale():
+        # 리더가 응답 없이 사라진 다른 대화의 팔로워는 오류로 응답 (클라이언트 재시도)
+        error_response = build_error_response(abandoned_data, TimeoutError("합류한 요청의 처리 결과를 받지 못했습니다"))
+        queue_manager.put_response(abandoned_slot_id, error_response)
+        print(f"응답 없는 요청 정리: 합류 슬롯 {abandoned_slot_id} 오류 응답")
+    if not is_leader:
+        # 같은 대화를 처리 중인 요청이 있으면 그 결과를 함께 받음 (재시도 중복 추론 방지)
+        print(f"진행 중인 같은 요청에 합류: 슬롯 {slot_id}")
+        return False
+    return True
+
+def prepare_and_route(queue_manager: QueueManager, slot_id: int, data: dict):
+    """
+    워커/파이프라인 준비 단계: 전처리 후 추론이 필요 없는 요청은 바로 응답
+
+    Returns:
+        dict: 추론할 전처리된 data (이미 응답한 요청이면 None)
+    """
+    enqueued_at = data.get(ENQUEUED_AT_KEY)
+    data = prepare_request_data(data)
+    if enqueued_at is not None:
+        # 전처리가 새 딕셔너리를 만들어도 큐 대기 시간 측정용 시각은 유지
+        data[ENQUEUED_AT_KEY] = enqueued_at
+    return data if route_prepared_request(queue_manager, slot_id, data) else None
+
+def worker_thread(queue_manager: QueueManager, pool: InferencePool = None, worker_id: int = 0,
+                  router: ModelRouter = None):
+    """AI 요약 처리 워커 스레드 (추론 풀의 인스턴스 하나를 전담, router가 있으면 요청마다 모델 크기 선택)"""
+    print(f"워커 스레드 {worker_id} 시작")
+    if pool is not None:
+        set_thread_backend(pool.backend(worker_id))
+        if router is not None:
+            bind_thread_router(router, worker_id, queue_depth=queue_manager.request_queue.qsize)
+        print(f"워커 {worker_id}: 추론 인스턴스 {worker_id} 사용 (스레드 {pool.thread_slices[worker_id]}개)")
+        # 인스턴스 전용 CPU 집합에 고정 (이 스레드에서 만드는 llama.cpp 작업 스레드도 상속)
+        if pool.pin_worker(worker_id):
+            print(f"워커 {worker_id}: CPU {pool.cpu_sets[worker_id]}에 고정")
+    
+    def respond(slot_id, response_data):
+        respond_to_slot(queue_manager, slot_id, response_data)
+    
+    def prepare(slot_id, data):
+        return prepare_and_route(queue_manager, slot_id, data)
     
     while queue_manager.running:
+        request_item = None
         try:
             # 요청 큐에서 작업 가져오기
             request_item = queue_manager.get_request()
@@ -42,34 +129,26 @@ def worker_thread(queue_manager: QueueManager):
                 continue
             
             slot_id, data = request_item
-            print(f"워커: 슬롯 {slot_id}에서 요청 처리 시작")
-            
-            # 전처리 수행 (요약 전에 수행)
-            if 'sttResultList' in data:
-                print(f"워커: 슬롯 {slot_id} 전처리 수행 중...")
-                processed_data = preprocess_request_data(data)
-                print(f"워커: 슬롯 {slot_id} 전처리 완료: {len(processed_data.get('text', ''))} 문자")
-                
-                # 전처리된 데이터로 요약 수행
-                response_data = process_request(processed_data)
-            else:
-                # 이미 전처리된 데이터인 경우
-                print(f"워커: 슬롯 {slot_id} 이미 전처리된 데이터 사용")
-                response_data = process_request(data)
-            
-            # 응답 데이터 로깅
-            log_response_only(response_data, "gemma_summarizer")
+            print(f"워커 {worker_id}: 슬롯 {slot_id}에서 요청 처리 시작")
+            if pool is not None:
+                pool.mark_busy(worker_id, True)
             
-            # 응답 큐에 추가
-            queue_manager.put_response(slot_id, response_data)
-            print(f"워커: 슬롯 {slot_id} 응답 큐에 추가 완료")
+            # 전처리 후 캐시 적중/내용 없는 통화/합류 요청은 추론 없이 응답하고,
+            # 짧은 요청은 PACKING_WINDOW_MS 동안 모아서 한 번에 요약 (PACKING_ENABLED)
+            process_with_packing(queue_manager, request_item, prepare, respond)
             
         except Exception as e:
             print(f"워커 스레드 오류: {e}")
             traceback.print_exc()
+            if request_item:
+                # 응답하지 못한 슬롯과 합류한 팔로워에게 오류 응답 (진행 중 요청 항목도 정리)
+                respond(request_item[0], build_error_response(request_item[1], e))
             time.sleep(1.0)
+        finally:
+            if pool is not None:
+                pool.mark_busy(worker_id, False)
     
-    print("워커 스레드 종료")
+    print(f"워커 스레드 {worker_id} 종료")
 
 def response_writer_thread(ipc_manager: IPCMultiSlotManager, queue_manager: QueueManager):
     """응답 쓰기 스레드"""
@@ -138,6 +217,10 @@ def main():
     print(f"현재 작업 디렉토리: {os.getcwd()}")
     print(f"Python 실행 파일: {sys.executable}")
     
+    # 모델 파일 미리 읽기 (이전 프로세스 정리/설정 검사/공유 메모리 초기화와 디스크 읽기를 겹침)
+    startup_start = time.time()
+    prefetcher = start_model_prefetch()
+    
     # 이전 프로세스 종료
     kill_previous_processes()
     
@@ -155,8 +238,9 @@ def main():
     # IPC 관리자 초기화
     ipc_manager = None
     queue_manager = None
-    worker_thread_obj = None
+    worker_thread_objs = []
     response_writer_thread_obj = None
+    pipeline = None
     
     try:
         # IPC 관리자 초기화
@@ -171,15 +255,50 @@ def main():
         ipc_manager.force_reset_all_slots()
         
         print(f"IPC 설정: {slot_count}개 슬롯, 슬롯당 {slot_size} bytes")
-        print("IPC 서버 시작 - 대기 중...")
+        print("IPC 서버 시작 - 모델 로딩 중 (준비 전까지 헤더 상태 STARTING)...")
         
-        # 워커 스레드 시작
-        worker_thread_obj = threading.Thread(
-            target=worker_thread, 
-            args=(queue_manager,),
-            daemon=True
-        )
-        worker_thread_obj.start()
+        # 추론 풀 생성 (IPC_WORKER_THREADS개의 독립 컨텍스트, 가중치는 mmap 공유) - 첫 요청 전에 미리 로딩
+        load_start = time.time()
+        if prefetcher is not None:
+            print(f"모델 로딩 시작 시점 미리 읽기 {'완료' if prefetcher.done else '진행 중'} "
+                  f"(시작 후 {load_start - startup_start:.2f}초)")
+        pool = create_inference_pool(config)
+        pool_elapsed = time.time() - load_start
+        # 통화 길이/대기열에 따라 요청마다 큰 모델과 작은 모델 중 선택 (MODEL_ROUTER_ENABLED) - 작은 모델도 준비 전에 로딩
+        router = create_model_router(pool, config)
+        load_elapsed = time.time() - load_start
+        metrics.set_gauge('startup.model_load_seconds', load_elapsed)
+        if router is not None and router.has_small():
+            print(f"모델 로딩 소요시간: {load_elapsed:.2f}초 (추론 풀 {pool_elapsed:.2f}초, "
+                  f"작은 모델 {load_elapsed - pool_elapsed:.2f}초)")
+        else:
+            print(f"모델 로딩 소요시간: {load_elapsed:.2f}초")
+        
+        # 워밍업 프롬프트로 가중치 페이지와 요약 지시문 prefix KV 캐시를 미리 채움 (라우터의 작은 모델 포함)
+        warmup_elapsed = warm_up_pool(pool, config, router.backends.get(SMALL) if router is not None else None)
+        
+        if config.get('PIPELINE_ENABLED', False):
+            # 단계별 파이프라인: 전처리/토큰화 → 추론 → 후처리를 각자의 스레드에서 겹쳐서 처리
+            def prepare_for_pipeline(slot_id, data):
+                return prepare_and_route(queue_manager, slot_id, data)
+            
+            pipeline = create_summary_pipeline(
+                pool, prepare_for_pipeline,
+                lambda slot_id, response_data: respond_to_slot(queue_manager, slot_id, response_data),
+                config, router=router)
+            pipeline.start()
+        else:
+            # 과부하 성능 저하 단계는 워커 요청 큐 길이와 대기 시간으로 판단 (DEGRADE_ENABLED)
+            attach_degradation_queue(queue_manager.request_queue.qsize, pool.size)
+            # 워커 스레드 시작 (컨텍스트당 워커 1개)
+            for worker_id in range(pool.size):
+                worker_thread_obj = threading.Thread(
+                    target=worker_thread, 
+                    args=(queue_manager, pool, worker_id, router),
+                    daemon=True
+                )
+                worker_thread_obj.start()
+                worker_thread_objs.append(worker_thread_obj)
         
         # 응답 쓰기 스레드 시작
         response_writer_thread_obj = threading.Thread(
@@ -191,6 +310,13 @@ def main():
         
         print("모든 스레드 시작 완료")
         
+        # 모델 로딩과 워밍업이 끝난 뒤에만 클라이언트에 준비 완료 표시
+        ipc_manager.set_server_state(ServerState.READY)
+        ready_elapsed = time.time() - startup_start
+        metrics.set_gauge('startup.ready_seconds', ready_elapsed)
+        print(f"서버 준비 완료 (READY) - 모델 로딩 {load_elapsed:.2f}초, 워밍업 {warmup_elapsed:.2f}초, "
+              f"시작부터 {ready_elapsed:.2f}초")
+        
         # 메인 루프: 요청 감지 및 큐에 추가
         last_activity = time.time()
         polling_interval = config.get('IPC_POLLING_INTERVAL', 0.5)
@@ -208,9 +334,15 @@ def main():
                     # 원본 요청 데이터 로깅
                     log_request_only(data, "gemma_summarizer")
                     
-                    # 원본 데이터를 그대로 큐에 추가 (전처리는 worker에서 수행)
-                    queue_manager.put_request(slot_id, data)
-                    print(f"요청 큐에 추가 완료: 슬롯 {slot_id}")
+                    if pipeline is not None:
+                        # 전처리부터 파이프라인 준비 단계에서 수행 (큐가 가득 차면 대기)
+                        pipeline.submit((slot_id, data))
+                        print(f"파이프라인에 추가 완료: 슬롯 {slot_id}")
+                    else:
+                        # 원본 데이터를 그대로 큐에 추가 (전처리/캐시/판정은 워커에서 수행해 슬롯 감지를 막지 않음)
+                        data[ENQUEUED_AT_KEY] = time.time()
+                        queue_manager.put_request(slot_id, data)
+                        print(f"요청 큐에 추가 완료: 슬롯 {slot_id}")
                 
                 # 타임아웃 체크
                 if time.time() - last_activity > request_timeout:
@@ -238,13 +370,23 @@ def main():
         # 서버 종료 로그 추가 완전 제거
         pass
         
+        # 클라이언트가 새 요청을 보내지 않도록 종료 중 표시
+        if ipc_manager and ipc_manager.shm:
+            ipc_manager.set_server_state(ServerState.STOPPING)
+        
+        # 파이프라인 중지 (남은 요청 처리 후 종료)
+        if pipeline:
+            pipeline.stop()
+            print(f"파이프라인 단계별 점유율: {pipeline.get_stats()}")
+        
         # 큐 매니저 중지
         if queue_manager:
             queue_manager.stop()
         
         # 스레드 종료 대기
-        if worker_thread_obj and worker_thread_obj.is_alive():
-            worker_thread_obj.join(timeout=5.0)
+        for worker_thread_obj in worker_thread_objs:
+            if worker_thread_obj.is_alive():
+                worker_thread_obj.join(timeout=5.0)
         
         if response_writer_thread_obj and response_writer_thread_obj.is_alive():
             response_writer_thread_obj.join(timeout=5.0)
@@ -256,4 +398,8 @@ def main():
         print("=== 프로그램 종료 ===")
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--autotune":
+        # 서버 대신 스레드/배치 파라미터 자동 튜닝만 실행하고 프로파일 저장
+        from autotune import main as autotune_main
+        sys.exit(autotune_main())
     main() 
\ No newline at end of file
@@ -0,0 +1,169 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from config import get_config
+from cpu_planner import describe_plan, pin_current_thread, plan_cpus, plan_thread_slices
+from kv_cache_planner import check_pool_capacity
+from metrics import metrics
+from model_registry import get_model_weights, get_pool_model, resolve_thread_count
+from summarizer_backend import LlamaCppBackend, SummarizerBackend, create_fake_backend
+
+
+class InferencePool:
+    """
+    독립된 모델 컨텍스트(KV 캐시) K개와 인스턴스별 스레드 예산
+
+    Llama 객체는 동시 호출에 안전하지 않으므로 워커 하나가 인스턴스 하나를 전담한다.
+    """
+
+    def __init__(self, backends: List[SummarizerBackend], thread_slices: Optional[List[int]] = None,
+                 cpu_sets: Optional[List[List[int]]] = None):
+        if not backends:
+            raise ValueError("추론 풀에 인스턴스가 없습니다")
+        self.backends = backends
+        self.thread_slices = thread_slices or [0] * len(backends)
+        # 인스턴스별 CPU 집합 (None이면 고정하지 않음)
+        self.cpu_sets = cpu_sets
+        self._busy = [False] * len(backends)
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return len(self.backends)
+
+    def backend(self, index: int) -> SummarizerBackend:
+        return self.backends[index]
+
+    def pin_worker(self, index: int) -> bool:
+        """현재 스레드를 인스턴스의 CPU 집합에 고정 (워커/워밍업 스레드 시작 시 호출)"""
+        if not self.cpu_sets:
+            return False
+        return pin_current_thread(self.cpu_sets[index])
+
+    def mark_busy(self, index: int, busy: bool):
+        """인스턴스 사용 상태 기록 (풀 사용률 지표)"""
+        with self._lock:
+            self._busy[index] = busy
+            metrics.set_gauge('inference_pool.busy_instances', sum(self._busy))
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'size': self.size,
+                'thread_slices': list(self.thread_slices),
+                'cpu_sets': [list(cpus) for cpus in self.cpu_sets] if self.cpu_sets else None,
+                'busy_instances': sum(self._busy),
+            }
+
+
+def create_inference_pool(config: Optional[Dict[str, Any]] = None) -> InferencePool:
+    """
+    설정으로 추론 풀 생성
+
+    - 인스턴스 수: IPC_WORKER_THREADS
+    - 인스턴스당 스레드: MODEL_THREADS_PER_INSTANCE (0이면 CPU 제한 스레드를 균등 분할)
+    - 인스턴스별 CPU 집합: cpu_planner가 cgroup 할당량/affinity/물리 코어/NUMA를 보고 겹치지 않게 배분 (CPU_PIN_THREADS)
+    - MODEL_BACKEND=fake이면 인스턴스마다 독립된 FakeBackend (prefix 캐시도 인스턴스별)
+    - BATCH_ENGINE_ENABLED이면 모든 워커가 연속 배칭 엔진 하나를 공유 (워커 수 = BATCH_MAX_SEQUENCES)
+    """
+    config = config or get_config()
+    if config.get('BATCH_ENGINE_ENABLED', False):
+        if str(config.get('MODEL_BACKEND', 'llama_cpp')).lower() == 'fake':
+            print("⚠️ FakeBackend에서는 배치 엔진을 사용할 수 없어 추론 풀로 대체합니다")
+        else:
+            return _create_batched_pool(config)
+
+    pool_size = max(1, int(config.get('IPC_WORKER_THREADS', 1)))
+    per_instance = int(config.get('MODEL_THREADS_PER_INSTANCE', 0))
+    if per_instance > 0:
+        plan = plan_cpus(pool_size, dict(config, MAX_CPU_THREADS=per_instance * pool_size))
+    else:
+        plan = plan_cpus(pool_size, config)
+    thread_slices = plan.instance_threads
+    is_fake = str(config.get('MODEL_BACKEND', 'llama_cpp')).lower() == 'fake'
+    cpu_sets = plan.instance_cpus if config.get('CPU_PIN_THREADS', True) and not is_fake else None
+
+    print(f"추론 풀 생성: 인스턴스 {pool_size}개, 인스턴스별 스레드 {thread_slices}")
+    print(f"CPU 계획: {describe_plan(plan)}")
+    if not is_fake:
+        check_pool_capacity(pool_size, config)
+
+    backends: List[SummarizerBackend] = []
+    for index, n_threads in enumerate(thread_slices):
+        if str(config.get('MODEL_BACKEND', 'llama_cpp')).lower() == 'fake':
+            backends.append(create_fake_backend(config))
+        else:
+            llm = get_pool_model(index, n_threads, owner=f'inference_pool.{index}')
+            backends.append(LlamaCppBackend(llm))
+    metrics.set_gauge('inference_pool.size', pool_size)
+    return InferencePool(backends, thread_slices, cpu_sets)
+
+
+def _create_batched_pool(config: Dict[str, Any]) -> InferencePool:
+    """연속 배칭 엔진 하나를 여러 워커가 공유하는 풀 (동시 시퀀스 수만큼 워커)"""
+    from batch_engine import create_batched_backend
+    from gemma_summarizer import build_summary_prompt
+
+    n_threads = resolve_thread_count(config)
+    # 배치 컨텍스트만 KV 캐시를 가지도록 Llama 대신 가중치만 로딩
+    model = get_model_weights(owner='batch_engine')
+    # 대화 내용 앞까지의 지시문을 공유 접두부로 미리 평가
+    shared_prefix = build_summary_prompt('\0').split('\0')[0]
+    backend = create_batched_backend(config, model, n_threads, shared_prefix=shared_prefix)
+    worker_count = max(1, int(config.get('BATCH_MAX_SEQUENCES', 4)))
+    print(f"배치 엔진 풀 생성: 워커 {worker_count}개가 엔진 1개 공유, 스레드 {n_threads}")
+    metrics.set_gauge('inference_pool.size', worker_count)
+    return InferencePool([backend] * worker_count, [n_threads] * worker_count)
+
+
+def warm_up_pool(pool: InferencePool, config: Optional[Dict[str, Any]] = None,
+                 extra_backends: Optional[List[SummarizerBackend]] = None) -> float:
+    """
+    서버 준비 전에 인스턴스마다 워밍업 프롬프트를 한 번 실행
+
+    요약 프롬프트(WARMUP_TEXT)를 WARMUP_MAX_TOKENS만큼만 생성하여 가중치 페이지를 읽어 들이고
+    요약 지시문 접두부를 prefix KV 캐시에 올려 둔다. 인스턴스별로 동시에 실행한다 (배치 엔진 공유 백엔드는 한 번).
+
+    Args:
+        extra_backends (list, optional): 워커 번호 순서의 추가 백엔드 (모델 라우터의 작은 모델).
+            같은 번호 인스턴스의 워밍업 스레드에서 이어서 실행한다
+
+    Returns:
+        float: 워밍업 소요 시간 (초)
+    """
+    from gemma_summarizer import build_summary_prompt
+
+    config = config or get_config()
+    if not config.get('WARMUP_ENABLED', True):
+        return 0.0
+    prompt = build_summary_prompt(config.get('WARMUP_TEXT', ''))
+    max_tokens = int(config.get('WARMUP_MAX_TOKENS', 8))
+    # 워커 번호 → 데울 백엔드 목록 (공유 백엔드는 처음 쓰는 워커에서 한 번)
+    assigned: Dict[int, List[SummarizerBackend]] = {}
+    seen = set()
+    for worker_id, backend in list(enumerate(pool.backends)) + list(enumerate(extra_backends or [])):
+        if id(backend) not in seen:
+            seen.add(id(backend))
+            assigned.setdefault(worker_id, []).append(backend)
+
+    def run(worker_id, backends):
+        pool.pin_worker(worker_id)
+        for backend in backends:
+            start = time.time()
+            try:
+                backend.complete(prompt, max_tokens=max_tokens)
+                print(f"워밍업 완료: 인스턴스 {worker_id} ({time.time() - start:.2f}초)")
+            except Exception as e:
+                print(f"워밍업 실패: 인스턴스 {worker_id}: {e}")
+
+    start = time.time()
+    threads = [threading.Thread(target=run, args=item) for item in assigned.items()]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - start
+    metrics.set_gauge('startup.warmup_seconds', elapsed)
+    print(f"워밍업 완료: 백엔드 {len(seen)}개, {elapsed:.2f}초")
+    return elapsed
@@ -0,0 +1,84 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from metrics import metrics
+
+# 요약 JSON에 붙여 process_request로 시간 초과를 전달하는 키 (응답 전에 제거)
+TIMEOUT_FLAG_KEY = '_timed_out'
+
+_local = threading.local()
+
+
+class InferenceDeadline:
+    """
+    요청 하나의 추론 마감 시각 (llama_cpp stopping_criteria로 사용)
+
+    llama_cpp는 토큰을 하나 생성할 때마다 stopping_criteria(input_ids, logits)를 호출하므로
+    마감이 지나면 True를 반환해 디코딩을 멈춘다. 프롬프트 평가 중에는 멈추지 않는다.
+    """
+
+    def __init__(self, timeout_seconds: float):
+        self.timeout_seconds = timeout_seconds
+        self.started_at = time.time()
+        self.deadline = self.started_at + timeout_seconds
+        self.triggered = False
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - time.time())
+
+    def expired(self) -> bool:
+        return time.time() >= self.deadline
+
+    def trigger(self):
+        """마감으로 생성을 중단했음을 기록"""
+        if not self.triggered:
+            self.triggered = True
+            metrics.increment('watchdog.timeouts')
+            print(f"⏱️ 추론 시간 초과 ({self.timeout_seconds:.0f}초) - 생성 중단, 부분 결과 사용")
+
+    def __call__(self, input_ids, logits) -> bool:
+        if self.expired():
+            self.trigger()
+            return True
+        return False
+
+
+def begin_deadline(timeout_seconds: float) -> Optional[InferenceDeadline]:
+    """
+    현재 스레드의 추론 마감 시작 (timeout_seconds <= 0이면 마감 없음)
+
+    Returns:
+        이전 마감 (end_deadline에 넘겨 복원)
+    """
+    previous = getattr(_local, 'deadline', None)
+    _local.deadline = InferenceDeadline(timeout_seconds) if timeout_seconds > 0 else None
+    return previous
+
+
+def end_deadline(previous: Optional[InferenceDeadline] = None):
+    """begin_deadline 이전 상태로 복원"""
+    _local.deadline = previous
+
+
+def current_deadline() -> Optional[InferenceDeadline]:
+    """현재 스레드의 추론 마감 (없으면 None)"""
+    return getattr(_local, 'deadline', None)
+
+
+def apply_deadline(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    현재 마감을 생성 파라미터의 stopping_criteria에 추가
+
+    기존 stopping_criteria가 있으면 둘 중 하나라도 True일 때 멈춘다.
+    """
+    deadline = current_deadline()
+    if deadline is None:
+        return params
+    existing = params.get('stopping_criteria')
+    params = dict(params)
+    if existing is None:
+        params['stopping_criteria'] = deadline
+    else:
+        params['stopping_criteria'] = lambda input_ids, logits: existing(input_ids, logits) or deadline(input_ids, logits)
+    return params
@@ -14,6 +14,7 @@ config_dict = config.get_config()
 SHM_NAME = config_dict['IPC_SHM_NAME']
 SLOT_COUNT = config_dict['IPC_SLOT_COUNT']
 SLOT_SIZE = config_dict['IPC_SLOT_SIZE']
+READY_WAIT_SECONDS = 60  # 서버 준비(READY) 최대 대기 시간
 POLLING_INTERVAL = config_dict['IPC_POLLING_INTERVAL']
 REQUEST_TIMEOUT = config_dict['IPC_REQUEST_TIMEOUT']
 
@@ -98,6 +99,11 @@ def test_single_request():
     try:
         ipc_manager = IPCMultiSlotManager(SHM_NAME, SLOT_COUNT, SLOT_SIZE, is_client=True)
         print(f"공유 메모리 연결됨: {SHM_NAME}")
+        # 서버가 모델 로딩/워밍업을 마칠 때까지 대기 (준비되지 않으면 다른 서버로 보내야 함)
+        if not ipc_manager.wait_until_ready(timeout=READY_WAIT_SECONDS):
+            print(f"서버가 {READY_WAIT_SECONDS}초 안에 준비되지 않았습니다 (모델 로딩/워밍업 중)")
+            ipc_manager.cleanup()
+            return
     except FileNotFoundError:
         print(f"공유 메모리를 찾을 수 없습니다: {SHM_NAME}")
         print("서버가 실행 중인지 확인해주세요.")
@@ -190,6 +196,11 @@ def test_concurrent_requests():
     try:
         ipc_manager = IPCMultiSlotManager(SHM_NAME, SLOT_COUNT, SLOT_SIZE, is_client=True)
         print(f"공유 메모리 연결됨: {SHM_NAME}")
+        # 서버가 모델 로딩/워밍업을 마칠 때까지 대기 (준비되지 않으면 다른 서버로 보내야 함)
+        if not ipc_manager.wait_until_ready(timeout=READY_WAIT_SECONDS):
+            print(f"서버가 {READY_WAIT_SECONDS}초 안에 준비되지 않았습니다 (모델 로딩/워밍업 중)")
+            ipc_manager.cleanup()
+            return
     except FileNotFoundError:
         print(f"공유 메모리를 찾을 수 없습니다: {SHM_NAME}")
         print("서버가 실행 중인지 확인해주세요.")
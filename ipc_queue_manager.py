@@ -14,6 +14,16 @@ class SlotStatus:
     RESPONSE = 3
     ERROR = 4
 
+class ServerState:
+    """서버 상태 상수 (공유 메모리 헤더)"""
+    STARTING = 0  # 모델 로딩/워밍업 중 (요청을 보내면 준비될 때까지 대기)
+    READY = 1     # 요청 처리 가능
+    STOPPING = 2  # 종료 중
+
+# 공유 메모리 헤더: magic(4) + state(4) + ready_timestamp(8) + 예비(48) = 64 bytes, 슬롯은 헤더 뒤부터 시작
+SHM_HEADER_SIZE = 64
+SHM_MAGIC = b'GIPC'
+
 class IPCSlot:
     """개별 IPC 슬롯 클래스"""
     def __init__(self, slot_id: int, data_offset: int, data_size: int):
@@ -47,13 +57,13 @@ class IPCMultiSlotManager:
         self.shm_name = shm_name
         self.slot_count = slot_count
         self.slot_size = slot_size
-        self.total_size = slot_count * slot_size
+        self.total_size = SHM_HEADER_SIZE + slot_count * slot_size
         self.is_client = is_client
         
         # 슬롯 정보 계산
         self.slots = []
         for i in range(slot_count):
-            data_offset = i * slot_size
+            data_offset = SHM_HEADER_SIZE + i * slot_size
             self.slots.append(IPCSlot(i, data_offset, slot_size))
         
         # Lock 관리
@@ -161,8 +171,42 @@ class IPCMultiSlotManager:
         except Exception as e:
             print(f"기존 공유 메모리 정리 중 오류: {e}")
     
+    def set_server_state(self, state: int):
+        """헤더에 서버 상태 기록 (READY면 준비 완료 시각도 기록)"""
+        timestamp = int(time.time() * 1000) if state == ServerState.READY else 0
+        self.shm.buf[0:16] = SHM_MAGIC + struct.pack('<IQ', state, timestamp)
+    
+    def get_server_state(self) -> int:
+        """헤더의 서버 상태 (헤더가 기록되지 않았으면 STARTING)"""
+        header = bytes(self.shm.buf[0:16])
+        if header[:4] != SHM_MAGIC:
+            return ServerState.STARTING
+        return struct.unpack('<I', header[4:8])[0]
+    
+    def is_ready(self) -> bool:
+        """서버가 모델 로딩/워밍업을 마치고 요청을 처리할 수 있는지 확인"""
+        return self.get_server_state() == ServerState.READY
+    
+    def wait_until_ready(self, timeout: float = 0.0, interval: float = 0.5) -> bool:
+        """
+        서버가 준비될 때까지 대기
+        
+        Args:
+            timeout (float): 최대 대기 시간 (0이면 한 번만 확인)
+        
+        Returns:
+            bool: 준비되었으면 True (시간 초과면 False, 다른 서버로 보내는 등 클라이언트가 판단)
+        """
+        deadline = time.time() + timeout
+        while not self.is_ready():
+            if time.time() >= deadline:
+                return False
+            time.sleep(interval)
+        return True
+    
     def _initialize_slots(self):
         """슬롯 초기화"""
+        self.set_server_state(ServerState.STARTING)
         print("모든 슬롯 초기화 중...")
         for slot in self.slots:
             # 슬롯 상태 초기화
@@ -509,10 +553,10 @@ class QueueManager:
         """요청 큐에 추가"""
         self.request_queue.put((slot_id, data))
     
-    def get_request(self) -> Optional[tuple[int, Dict[str, Any]]]:
+    def get_request(self, timeout: float = 1.0) -> Optional[tuple[int, Dict[str, Any]]]:
         """요청 큐에서 가져오기"""
         try:
-            return self.request_queue.get(timeout=1.0)
+            return self.request_queue.get(timeout=timeout)
         except queue.Empty:
             return None
     
@@ -0,0 +1,176 @@
+import re
+from typing import List
+
+# 명사 뒤에 붙는 조사 (긴 것부터 매칭)
+PARTICLES = sorted([
+    '에서는', '으로는', '에게서', '까지는', '부터는', '이라고', '이라는', '에서도', '으로도',
+    '에서', '으로', '에게', '께서', '까지', '부터', '처럼', '보다', '라고', '라는', '이나',
+    '하고', '이랑', '에는', '에도', '과는', '와는', '이고', '이며', '한테',
+    '과', '와', '을', '를', '이', '가', '은', '는', '에', '의', '도', '만', '로', '랑',
+], key=len, reverse=True)
+
+# 요약에서 의미를 거의 갖지 않는 부사
+ADVERBS = {
+    '매우', '상세히', '자세히', '정말', '아주', '너무', '모두', '완전히', '바로', '다시',
+    '잘', '좀', '또', '이미', '함께', '특히', '충분히', '친절하게', '상세하게', '자세하게',
+    '간단히', '빠르게', '계속', '일단', '우선', '그냥', '진짜', '약간', '조금', '많이',
+}
+
+# 통화에서 자주 나오는 추임새/맞장구
+FILLERS = {
+    '네', '예', '아', '어', '음', '응', '그', '저', '뭐', '좀', '아니', '여보세요',
+    '네네', '예예', '아아', '어어', '음음', '그래요', '그렇죠', '맞아요', '알겠습니다',
+    '감사합니다', '안녕하세요', '수고하세요', '안녕히', '계세요', '네에', '아네', '아예',
+    '아니요', '아니오', '예예예', '네네네',
+    'yes', 'no', 'ok',
+}
+
+# 의미가 약한 일반 단어 (키워드 후보에서 제외)
+STOPWORDS = {
+    '그거', '이거', '저거', '거기', '여기', '저기', '그게', '이게', '그런', '이런', '저런',
+    '상대방', '화자', '그래서', '그러면', '그런데', '근데', '그리고', '그럼', '그러니까', '지금', '혹시',
+    '제가', '저희', '우리', '선생님', '고객님', '그냥', '이제', '인제', '정도', '하나',
+    '있는', '없는', '하는', '되는', '같은', '때문', '경우', '부분', '관련', '대한',
+    '대해', '대하여', '관해', '관하여', '위해', '위하여', '통해', '통하여', '따라',
+    '들어', '요거', '그거', '따로', '해가지고', '그거는', '이거는', '어떻게', '이렇게', '그렇게', '저렇게', '왜냐면',
+}
+
+# 동사/형용사 활용 어미 (단어 끝이 이 패턴이면 서술어로 본다)
+VERB_ENDINGS = (
+    '했습니다', '합니다', '됩니다', '했고', '하고', '하여', '해서', '했으며', '하였으며',
+    '되었습니다', '되어', '됐습니다', '습니다', '입니다', '었습니다', '았습니다', '였습니다',
+    '해요', '해주세요', '드렸습니다', '드립니다', '했다', '한다', '된다', '있습니다', '없습니다',
+    '있어요', '없어요', '거든요', '는데', '는데요', '어요', '아요', '네요', '죠',
+    '하는', '되는', '하던', '해야', '되어야', '아야', '어야', '었고', '았고', '였고', '으며',
+    '시면', '하면', '되면', '으면', '세요', '니다', '까요', '나요', '군요', '는지',
+    '어서', '아서', '어가지고', '거예요', '건데', '는데도',
+)
+
+# 조사처럼 끝나지만 그 자체가 명사인 단어 (조사 제거 대상에서 제외)
+NOUNS_ENDING_WITH_PARTICLE = {
+    '문의', '회의', '동의', '주의', '논의', '이의', '합의', '건의', '정의', '의의',
+    '차이', '사이', '나이', '종이', '높이', '길이', '놀이', '다이',
+    '평가', '추가', '휴가', '증가', '단가', '원가', '대가', '물가', '시가', '정가',
+    '정도', '제도', '한도', '속도', '용도', '태도', '강도', '지도', '온도', '각도', '시도',
+    '경로', '도로', '진로', '통로', '선로',
+    '불만', '천만', '백만', '십만',
+    '결과', '효과', '부과', '초과', '통과', '학과', '사과',
+    '이자', '비용',
+}
+
+# 명사를 꾸미는 관형형 (상세한, 다양한 등) - 명사인 경우는 제외
+_MODIFIER_PATTERN = re.compile(r'^[가-힣]{2,}(?:한|된|스러운|적인)$')
+_MODIFIER_NOUNS = {'제한', '기한', '권한', '무한', '상한', '하한', '최소한', '최대한', '부한'}
+
+# '~하다' 동사의 명사 어간을 살리는 패턴 (답변했습니다 → 답변)
+_HADA_STEM_PATTERN = re.compile(
+    r'^([가-힣]{2,}?)(?:했습니다|하였습니다|합니다|했고|하고|하여|해서|했으며|하였으며|됐습니다|되었습니다|됩니다|되어'
+    r'|해드렸습니다|해드렸으며|해드렸고|해드림|해드립니다|안내드렸습니다'
+    r'|받아야|받았습니다|받고|받은|드렸습니다|드립니다|드리고|했음|됨)$'
+)
+
+_WORD_PATTERN = re.compile(r'[가-힣A-Za-z0-9]+')
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    텍스트를 단어(어절) 단위로 분리
+
+    Args:
+        text (str): 원본 텍스트
+
+    Returns:
+        List[str]: 한글/영문/숫자로 이루어진 어절 리스트
+    """
+    if not text:
+        return []
+    return _WORD_PATTERN.findall(text)
+
+
+def strip_particle(word: str) -> str:
+    """
+    어절 끝의 조사를 제거 (예: "문의를" → "문의", "고객이" → "고객")
+    한 글자 조사는 어간이 두 글자 이상일 때만 제거하여 "나이" 같은 단어 훼손을 줄인다.
+    """
+    if not word or word.endswith(tuple(NOUNS_ENDING_WITH_PARTICLE)):
+        return word
+    for particle in PARTICLES:
+        if word.endswith(particle) and word != particle:
+            stem = word[:-len(particle)]
+            if len(particle) == 1 and len(stem) < 2:
+                continue
+            return stem
+    return word
+
+
+def is_modifier(word: str) -> bool:
+    """관형형 수식어 여부 (예: "상세한", "다양한")"""
+    return bool(_MODIFIER_PATTERN.match(word or '')) and word not in _MODIFIER_NOUNS
+
+
+def hada_stem(word: str) -> str:
+    """'~하다/~되다' 활용형에서 명사 어간을 반환 (해당 없으면 빈 문자열)"""
+    match = _HADA_STEM_PATTERN.match(word or '')
+    return match.group(1) if match else ''
+
+
+def is_predicate(word: str) -> bool:
+    """서술어(동사/형용사 활용형) 여부"""
+    return bool(word) and word.endswith(VERB_ENDINGS)
+
+
+def is_filler(word: str) -> bool:
+    """추임새/맞장구 여부"""
+    return word in FILLERS
+
+
+def content_words(text: str, min_length: int = 2) -> List[str]:
+    """
+    텍스트에서 내용어(명사 위주)만 추출
+
+    조사를 떼고, 부사/추임새/불용어/서술어를 제거한다.
+    '~하다' 서술어는 명사 어간(예: "답변했습니다" → "답변")을 살린다.
+
+    Args:
+        text (str): 원본 텍스트
+        min_length (int): 최소 글자 수
+
+    Returns:
+        List[str]: 등장 순서를 유지한 내용어 리스트 (중복 포함)
+    """
+    words = []
+    for token in tokenize(text):
+        if token in ADVERBS or token in FILLERS:
+            continue
+        stem = hada_stem(token)
+        if stem:
+            token = stem
+        elif is_predicate(token) or is_modifier(token):
+            continue
+        else:
+            token = strip_particle(token)
+        if len(token) < min_length or token in STOPWORDS or token in FILLERS or token in ADVERBS:
+            continue
+        if token.isdigit():
+            continue
+        words.append(token)
+    return words
+
+
+def truncate_to_bytes(text: str, max_bytes: int, encoding: str = 'utf-8') -> str:
+    """
+    바이트 예산에 맞게 음절(문자) 경계에서 자른다
+
+    UTF-8 바이트 단위로 자르면 한글 음절이 깨지므로 문자 단위로 줄인다.
+    """
+    if not text or len(text.encode(encoding)) <= max_bytes:
+        return text
+    result = []
+    used = 0
+    for char in text:
+        size = len(char.encode(encoding))
+        if used + size > max_bytes:
+            break
+        result.append(char)
+        used += size
+    return ''.join(result).rstrip()
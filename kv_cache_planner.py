@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+KV 캐시 양자화 설정과 컨텍스트 용량 계획
+
+- MODEL_KV_CACHE_TYPE_K/V(f16/q8_0/q4_0), MODEL_FLASH_ATTN, MODEL_OFFLOAD_KQV를 Llama 생성 인자로 변환
+- MODEL_SWA_FULL(슬라이딩 윈도우 레이어의 KV 캐시를 n_ctx 크기로 둘지)을 Llama 생성 인자로 변환
+- GGUF 헤더의 모델 구조(레이어 수, KV 헤드 수, 헤드 차원, 슬라이딩 윈도우)로 인스턴스당 KV 캐시 바이트를 계산하고
+  메모리(물리 메모리와 cgroup memory.max 중 작은 값)에 동시에 올릴 수 있는 컨텍스트 수를 계산
+
+사용법:
+    python kv_cache_planner.py                 # 현재 설정 모델로 KV 타입 x n_ctx 표 출력
+    python kv_cache_planner.py 8192 16384      # 계산할 n_ctx 지정
+"""
+
+import os
+import struct
+import sys
+from typing import Any, BinaryIO, Dict, List, NamedTuple, Optional, Tuple
+
+from config import get_config, get_model_path
+from cpu_planner import read_cgroup_memory_limit
+
+# KV 캐시 타입 → (ggml 타입 번호, 원소당 바이트) - q8_0/q4_0은 32개 원소 블록마다 f16 스케일 포함
+KV_CACHE_TYPES = {
+    'f32': (0, 4.0),
+    'f16': (1, 2.0),
+    'q8_0': (8, 34 / 32),
+    'q4_0': (2, 18 / 32),
+}
+
+GGUF_MAGIC = b'GGUF'
+
+# GGUF 메타데이터 값 타입 → struct 형식 (8: 문자열, 9: 배열)
+_GGUF_SCALARS = {0: '<B', 1: '<b', 2: '<H', 3: '<h', 4: '<I', 5: '<i', 6: '<f', 7: '<?', 10: '<Q', 11: '<q', 12: '<d'}
+_GGUF_STRING = 8
+_GGUF_ARRAY = 9
+
+# 슬라이딩 윈도우 어텐션(SWA) 레이어 패턴 (llama.cpp set_swa_pattern): n개 레이어마다 마지막 하나만 전체 어텐션
+SWA_LAYER_PATTERNS = {
+    'gemma2': 2,
+    'gemma3': 6,
+    'gemma3n': 5,
+    'cohere2': 4,
+}
+
+# Llama 기본 n_ubatch (SWA 캐시는 윈도우 + n_ubatch 칸)
+DEFAULT_N_UBATCH = 512
+
+
+class ModelShape(NamedTuple):
+    """
+    KV 캐시 크기 계산에 필요한 모델 구조
+
+    n_head_kv는 레이어별 KV 헤드 수, swa_layers는 레이어별 슬라이딩 윈도우 어텐션 여부 (SWA가 없으면 빈 튜플)
+    """
+    architecture: str
+    n_layer: int
+    n_head_kv: List[int]
+    key_length: int
+    value_length: int
+    n_ctx_train: int
+    n_vocab: int
+    sliding_window: int = 0
+    swa_layers: Tuple[bool, ...] = ()
+
+
+class CapacityPlan(NamedTuple):
+    """컨텍스트 용량 계획 (바이트 단위)"""
+    n_ctx: int
+    type_k: str
+    type_v: str
+    memory_bytes: int
+    model_bytes: int
+    kv_bytes_per_instance: int
+    compute_bytes_per_instance: int
+    max_instances: int
+
+    @property
+    def instance_bytes(self) -> int:
+        return self.kv_bytes_per_instance + self.compute_bytes_per_instance
+
+
+def resolve_kv_cache_params(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    설정을 Llama 생성 인자(type_k, type_v, flash_attn, offload_kqv)로 변환
+
+    llama.cpp는 V 캐시 양자화에 flash attention이 필요하므로 V가 f16/f32가 아니면 flash_attn을 켠다.
+
+    Raises:
+        ValueError: 알 수 없는 KV 캐시 타입
+    """
+    config = config or get_config()
+    type_k = str(config.get('MODEL_KV_CACHE_TYPE_K', 'f16')).lower()
+    type_v = str(config.get('MODEL_KV_CACHE_TYPE_V', 'f16')).lower()
+    for name in (type_k, type_v):
+        if name not in KV_CACHE_TYPES:
+            raise ValueError(f"알 수 없는 KV 캐시 타입: {name} (가능: {', '.join(KV_CACHE_TYPES)})")
+    flash_attn = bool(config.get('MODEL_FLASH_ATTN', False))
+    if type_v not in ('f16', 'f32') and not flash_attn:
+        print(f"V 캐시 양자화({type_v})에는 flash attention이 필요하여 MODEL_FLASH_ATTN을 켭니다")
+        flash_attn = True
+    return {
+        'type_k': KV_CACHE_TYPES[type_k][0],
+        'type_v': KV_CACHE_TYPES[type_v][0],
+        'flash_attn': flash_attn,
+        'offload_kqv': bool(config.get('MODEL_OFFLOAD_KQV', True)),
+        'swa_full': bool(config.get('MODEL_SWA_FULL', True)),
+    }
+
+
+def _read_struct(f: BinaryIO, fmt: str):
+    size = struct.calcsize(fmt)
+    data = f.read(size)
+    if len(data) != size:
+        raise ValueError("GGUF 헤더가 잘렸습니다")
+    return struct.unpack(fmt, data)[0]
+
+
+def _read_string(f: BinaryIO) -> str:
+    return f.read(_read_struct(f, '<Q')).decode('utf-8', errors='replace')
+
+
+def _read_value(f: BinaryIO, value_type: int, keep: bool):
+    """메타데이터 값 하나 읽기 (keep=False인 배열은 건너뛰기만 하여 토크나이저 어휘 등을 메모리에 올리지 않음)"""
+    if value_type in _GGUF_SCALARS:
+        return _read_struct(f, _GGUF_SCALARS[value_type])
+    if value_type == _GGUF_STRING:
+        return _read_string(f)
+    if value_type == _GGUF_ARRAY:
+        item_type = _read_struct(f, '<I')
+        count = _read_struct(f, '<Q')
+        if not keep and item_type in _GGUF_SCALARS:
+            f.seek(count * struct.calcsize(_GGUF_SCALARS[item_type]), os.SEEK_CUR)
+            return count
+        items = [_read_value(f, item_type, keep) for _ in range(count)]
+        return items if keep else count
+    raise ValueError(f"알 수 없는 GGUF 값 타입: {value_type}")
+
+
+def read_gguf_metadata(path: str) -> Dict[str, Any]:
+    """
+    GGUF 헤더의 메타데이터 (모델을 로딩하지 않고 읽음)
+
+    tokenizer.* 배열은 내용 대신 원소 수만 저장한다.
+
+    Raises:
+        ValueError: GGUF 파일이 아니거나 헤더가 손상된 경우
+    """
+    with open(path, 'rb') as f:
+        if f.read(4) != GGUF_MAGIC:
+            raise ValueError(f"GGUF 파일이 아닙니다: {path}")
+        version = _read_struct(f, '<I')
+        count_fmt = '<I' if version == 1 else '<Q'
+        _read_struct(f, count_fmt)  # 텐서 수
+        kv_count = _read_struct(f, count_fmt)
+        metadata = {}
+        for _ in range(kv_count):
+            key = _read_string(f)
+            value_type = _read_struct(f, '<I')
+            metadata[key] = _read_value(f, value_type, keep=not key.startswith('tokenizer.'))
+        return metadata
+
+
+def model_shape(metadata: Dict[str, Any]) -> ModelShape:
+    """
+    GGUF 메타데이터에서 모델 구조 추출 (헤드 차원이 없으면 embedding_length / head_count)
+
+    {arch}.attention.sliding_window가 있고 llama.cpp가 SWA 레이어 패턴을 아는 구조(gemma3 등)면
+    레이어별 SWA 여부를 채운다.
+    """
+    arch = metadata.get('general.architecture', 'llama')
+    n_layer = int(metadata[f'{arch}.block_count'])
+    sliding_window = int(metadata.get(f'{arch}.attention.sliding_window', 0) or 0)
+    pattern = SWA_LAYER_PATTERNS.get(arch)
+    swa_layers = tuple(layer % pattern < pattern - 1 for layer in range(n_layer)) if sliding_window and pattern else ()
+    n_head = metadata.get(f'{arch}.attention.head_count', 1)
+    n_head_kv = metadata.get(f'{arch}.attention.head_count_kv', n_head)
+    # 레이어마다 헤드 수가 다른 모델은 배열로 저장됨
+    n_head_kv = [int(v) for v in n_head_kv] if isinstance(n_head_kv, list) else [int(n_head_kv)] * n_layer
+    max_head = max(n_head) if isinstance(n_head, list) else int(n_head)
+    head_dim = int(metadata.get(f'{arch}.embedding_length', 0)) // max(1, max_head)
+    return ModelShape(
+        architecture=arch,
+        n_layer=n_layer,
+        n_head_kv=n_head_kv,
+        key_length=int(metadata.get(f'{arch}.attention.key_length', head_dim)),
+        value_length=int(metadata.get(f'{arch}.attention.value_length', head_dim)),
+        n_ctx_train=int(metadata.get(f'{arch}.context_length', 0)),
+        n_vocab=int(metadata.get(f'{arch}.vocab_size', metadata.get('tokenizer.ggml.tokens', 0))),
+        sliding_window=sliding_window if swa_layers else 0,
+        swa_layers=swa_layers,
+    )
+
+
+def swa_cache_cells(shape: ModelShape, n_ctx: int, swa_full: bool = True, n_ubatch: int = DEFAULT_N_UBATCH,
+                    flash_attn: bool = False) -> int:
+    """
+    슬라이딩 윈도우 레이어의 KV 캐시 칸 수 (llama.cpp iSWA 캐시)
+
+    swa_full이 꺼져 있으면 윈도우 + n_ubatch를 패딩(flash attention 256, 아니면 32) 단위로 올린 값,
+    켜져 있거나 SWA가 없는 모델이면 n_ctx.
+    """
+    if swa_full or not shape.swa_layers:
+        return n_ctx
+    pad = 256 if flash_attn else 32
+    return min(n_ctx, -(-(shape.sliding_window + n_ubatch) // pad) * pad)
+
+
+def kv_cache_bytes(shape: ModelShape, n_ctx: int, type_k: str = 'f16', type_v: str = 'f16',
+                   swa_cells: Optional[int] = None) -> int:
+    """
+    컨텍스트 하나의 KV 캐시 크기
+
+    레이어마다 칸 수 x n_head_kv x (key_length x K 원소 크기 + value_length x V 원소 크기).
+    칸 수는 전체 어텐션 레이어는 n_ctx, 슬라이딩 윈도우 레이어는 swa_cells(기본 n_ctx, swa_cache_cells 참고).
+    """
+    k_bytes = KV_CACHE_TYPES[type_k][1]
+    v_bytes = KV_CACHE_TYPES[type_v][1]
+    swa_cells = n_ctx if swa_cells is None else swa_cells
+    swa_layers = shape.swa_layers or (False,) * len(shape.n_head_kv)
+    total = 0.0
+    for heads, is_swa in zip(shape.n_head_kv, swa_layers):
+        total += (swa_cells if is_swa else n_ctx) * heads * (shape.key_length * k_bytes + shape.value_length * v_bytes)
+    return int(total)
+
+
+def _config_kv_cache_bytes(config: Dict[str, Any], shape: ModelShape, n_ctx: int, type_k: str, type_v: str) -> int:
+    """설정(MODEL_SWA_FULL, flash attention)에 맞춘 KV 캐시 크기"""
+    # resolve_kv_cache_params와 같은 규칙 (V 캐시 양자화는 flash attention 사용)
+    flash_attn = bool(config.get('MODEL_FLASH_ATTN', False)) or type_v not in ('f16', 'f32')
+    swa_cells = swa_cache_cells(shape, n_ctx, bool(config.get('MODEL_SWA_FULL', True)), flash_attn=flash_attn)
+    return kv_cache_bytes(shape, n_ctx, type_k, type_v, swa_cells)
+
+
+def instance_memory_bytes(config: Optional[Dict[str, Any]] = None, model_path: Optional[str] = None,
+                          n_ctx: Optional[int] = None) -> int:
+    """
+    컨텍스트(Llama 인스턴스) 하나가 가중치 외에 쓰는 메모리: KV 캐시 + 계산 버퍼(MODEL_COMPUTE_BUFFER_MB)
+
+    모델 레지스트리가 인스턴스 메모리 예산을 계산할 때 사용한다. GGUF 헤더를 읽을 수 없으면 계산 버퍼만.
+    """
+    config = config or get_config()
+    model_path = model_path or get_model_path()
+    compute_bytes = int(config.get('MODEL_COMPUTE_BUFFER_MB', 256)) * 1024 * 1024
+    try:
+        shape = model_shape(read_gguf_metadata(model_path))
+    except (OSError, ValueError, KeyError):
+        return compute_bytes
+    type_k = str(config.get('MODEL_KV_CACHE_TYPE_K', 'f16')).lower()
+    type_v = str(config.get('MODEL_KV_CACHE_TYPE_V', 'f16')).lower()
+    return _config_kv_cache_bytes(config, shape, int(n_ctx or config['MODEL_CONTEXT_SIZE']), type_k, type_v) + compute_bytes
+
+
+def host_memory_bytes() -> int:
+    """계획에 사용할 메모리 (물리 메모리와 cgroup memory.max 중 작은 값)"""
+    try:
+        total = os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        try:
+            import psutil
+            total = psutil.virtual_memory().total
+        except ImportError:
+            total = 0
+    limit = read_cgroup_memory_limit()
+    if limit is not None:
+        total = min(total, limit) if total else limit
+    return total
+
+
+def plan_capacity(config: Optional[Dict[str, Any]] = None, n_ctx: Optional[int] = None,
+                  type_k: Optional[str] = None, type_v: Optional[str] = None,
+                  memory_bytes: Optional[int] = None, model_path: Optional[str] = None,
+                  shape: Optional[ModelShape] = None) -> CapacityPlan:
+    """
+    동시에 올릴 수 있는 컨텍스트(추론 인스턴스) 수 계산
+
+    가중치는 mmap으로 인스턴스끼리 공유하므로 한 번만 빼고,
+    인스턴스마다 KV 캐시 + 계산 버퍼(MODEL_COMPUTE_BUFFER_MB 추정치)를 사용한다고 본다.
+    메모리에서 KV_PLANNER_RESERVE_MB(OS, 파이썬, 공유 메모리 등)를 먼저 뺀다.
+
+    Args:
+        n_ctx/type_k/type_v: 기본은 설정값 (MODEL_CONTEXT_SIZE, MODEL_KV_CACHE_TYPE_K/V)
+        memory_bytes (int, optional): 기본은 KV_PLANNER_MEMORY_MB, 0이면 host_memory_bytes()
+        shape (ModelShape, optional): 기본은 모델 파일 GGUF 헤더에서 읽음
+    """
+    config = config or get_config()
+    model_path = model_path or get_model_path()
+    n_ctx = int(n_ctx or config['MODEL_CONTEXT_SIZE'])
+    type_k = (type_k or str(config.get('MODEL_KV_CACHE_TYPE_K', 'f16'))).lower()
+    type_v = (type_v or str(config.get('MODEL_KV_CACHE_TYPE_V', 'f16'))).lower()
+    if shape is None:
+        shape = model_shape(read_gguf_metadata(model_path))
+    if memory_bytes is None:
+        memory_bytes = int(config.get('KV_PLANNER_MEMORY_MB', 0)) * 1024 * 1024 or host_memory_bytes()
+
+    model_bytes = os.path.getsize(model_path) if os.path.isfile(model_path) else 0
+    kv_bytes = _config_kv_cache_bytes(config, shape, n_ctx, type_k, type_v)
+    compute_bytes = int(config.get('MODEL_COMPUTE_BUFFER_MB', 256)) * 1024 * 1024
+    reserve = int(config.get('KV_PLANNER_RESERVE_MB', 1024)) * 1024 * 1024
+    usable = memory_bytes - reserve - model_bytes
+    max_instances = max(0, usable // (kv_bytes + compute_bytes)) if kv_bytes + compute_bytes > 0 else 0
+    return CapacityPlan(n_ctx, type_k, type_v, memory_bytes, model_bytes, kv_bytes, compute_bytes, int(max_instances))
+
+
+def describe_capacity(plan: CapacityPlan) -> str:
+    mb = 1024 * 1024
+    return (f"n_ctx={plan.n_ctx}, KV {plan.type_k}/{plan.type_v}: 인스턴스당 KV {plan.kv_bytes_per_instance / mb:.0f}MB"
+            f" + 계산 버퍼 {plan.compute_bytes_per_instance / mb:.0f}MB, 가중치 {plan.model_bytes / mb:.0f}MB,"
+            f" 메모리 {plan.memory_bytes / mb:.0f}MB → 최대 동시 컨텍스트 {plan.max_instances}개")
+
+
+def check_pool_capacity(pool_size: int, config: Optional[Dict[str, Any]] = None) -> Optional[CapacityPlan]:
+    """
+    추론 풀 생성 전 용량 확인 (계획을 로그/지표로 남기고 인스턴스 수가 용량을 넘으면 경고)
+
+    모델 파일이 없거나 GGUF 헤더를 읽을 수 없으면 None.
+    """
+    try:
+        plan = plan_capacity(config)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"KV 캐시 용량 계획 생략: {e}")
+        return None
+    from metrics import metrics
+
+    metrics.set_gauge('capacity.kv_bytes_per_instance', plan.kv_bytes_per_instance)
+    metrics.set_gauge('capacity.max_instances', plan.max_instances)
+    print(f"KV 캐시 용량 계획: {describe_capacity(plan)}")
+    if pool_size > plan.max_instances:
+        print(f"⚠️ 추론 인스턴스 {pool_size}개가 메모리 용량({plan.max_instances}개)을 넘습니다 "
+              f"(MODEL_KV_CACHE_TYPE_K/V=q8_0 또는 MODEL_CONTEXT_SIZE 축소 권장)")
+    return plan
+
+
+def main():
+    config = get_config()
+    contexts = [int(arg) for arg in sys.argv[1:]] or sorted({4096, 8192, 16384, int(config['MODEL_CONTEXT_SIZE'])})
+    model_path = get_model_path()
+    shape = model_shape(read_gguf_metadata(model_path))
+    print(f"모델: {model_path} ({shape.architecture}, 레이어 {shape.n_layer}, KV 헤드 {max(shape.n_head_kv)}, "
+          f"헤드 차원 {shape.key_length}/{shape.value_length}, 학습 컨텍스트 {shape.n_ctx_train}, "
+          f"슬라이딩 윈도우 {shape.sliding_window} ({sum(shape.swa_layers)}개 레이어))")
+    for n_ctx in contexts:
+        for kv_type in ('f16', 'q8_0', 'q4_0'):
+            plan = plan_capacity(config, n_ctx=n_ctx, type_k=kv_type, type_v=kv_type, model_path=model_path, shape=shape)
+            print(describe_capacity(plan))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,173 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from config import get_config
+from metrics import metrics
+
+# 요청 data에 적용할 성능 저하 단계를 기록하는 키 (추론 단계와 후처리 단계가 같은 단계를 사용)
+DEGRADE_KEY = '_degrade_level'
+
+# 단계별 이름 (높은 단계는 낮은 단계의 조치를 모두 포함)
+NORMAL = 0
+NO_REQUERY = 1  # [재질의 필요] 시 LLM 재질의 없이 로컬 압축/바이트 예산 자르기
+CAP_TOKENS = 2  # 생성 토큰 수 상한 (DEGRADE_MAX_TOKENS, 이어서 생성/재시도 없음)
+SMALL_MODEL = 3  # 모델 라우터의 작은 모델 사용 (작은 모델이 없으면 큰 모델)
+EXTRACTIVE = 4  # LLM 없이 추출 요약 (extractive_summarizer)
+LEVEL_NAMES = ('normal', 'no_requery', 'cap_tokens', 'small_model', 'extractive')
+
+
+class DegradationController:
+    """
+    과부하가 계속될 때 요청 처리 품질을 한 단계씩 낮추는 제어기
+
+    부하(pressure)는 이 요청이 실제로 기다린 시간과 대기열 길이 x 최근 처리 시간으로 추정한 대기 시간 중 큰 값이다.
+    - 부하가 다음 단계의 진입 기준(thresholds[level])을 넘고 마지막 변경 후 step_up_seconds가 지나면 한 단계 올림
+    - 부하가 현재 단계 진입 기준 x recovery_ratio 아래이고 step_down_seconds가 지나면 한 단계 내림 (히스테리시스)
+    """
+
+    def __init__(self, thresholds: List[float], recovery_ratio: float = 0.5, step_up_seconds: float = 5.0,
+                 step_down_seconds: float = 30.0, workers: int = 1, queue_depth: Optional[Callable[[], int]] = None,
+                 smoothing: float = 0.2, clock: Callable[[], float] = time.time):
+        if len(thresholds) != len(LEVEL_NAMES) - 1:
+            raise ValueError(f"단계 진입 기준은 {len(LEVEL_NAMES) - 1}개여야 합니다: {thresholds}")
+        self.thresholds = [float(value) for value in thresholds]
+        self.recovery_ratio = float(recovery_ratio)
+        self.step_up_seconds = float(step_up_seconds)
+        self.step_down_seconds = float(step_down_seconds)
+        self.smoothing = float(smoothing)
+        self.clock = clock
+        self.workers = max(1, int(workers))
+        self.queue_depth = queue_depth
+        self._level = NORMAL
+        self._changed_at = clock()
+        self._service_seconds: Optional[float] = None
+        self._pressure = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def level(self) -> int:
+        return self._level
+
+    def attach_queue(self, queue_depth: Callable[[], int], workers: int):
+        """부하 추정에 사용할 대기열 (워커 요청 큐 또는 파이프라인 추론 단계 입력 큐)"""
+        self.queue_depth = queue_depth
+        self.workers = max(1, int(workers))
+
+    def observe_service(self, seconds: float):
+        """요청 하나의 처리 시간(대기 제외)으로 최근 처리 시간 이동 평균 갱신"""
+        if seconds < 0:
+            return
+        with self._lock:
+            self._service_seconds = (seconds if self._service_seconds is None
+                                     else (1 - self.smoothing) * self._service_seconds + self.smoothing * seconds)
+
+    def update(self, queue_wait_seconds: float = 0.0) -> int:
+        """요청 처리 시작 시 부하를 계산하여 단계를 조정하고 현재 단계 반환"""
+        depth = int(self.queue_depth()) if self.queue_depth is not None else 0
+        now = self.clock()
+        with self._lock:
+            estimated_wait = depth / self.workers * (self._service_seconds or 0.0)
+            pressure = max(float(queue_wait_seconds), estimated_wait)
+            self._pressure = pressure
+            held = now - self._changed_at
+            level = self._level
+            if level < EXTRACTIVE and pressure >= self.thresholds[level] and held >= self.step_up_seconds:
+                self._level = level + 1
+            elif level > NORMAL and pressure < self.thresholds[level - 1] * self.recovery_ratio \
+                    and held >= self.step_down_seconds:
+                self._level = level - 1
+            if self._level != level:
+                self._changed_at = now
+            new_level = self._level
+
+        if new_level != level:
+            direction = 'up' if new_level > level else 'down'
+            metrics.increment(f'degrade.step_{direction}')
+            print(f"성능 저하 단계 변경: {LEVEL_NAMES[level]} → {LEVEL_NAMES[new_level]} "
+                  f"(부하 {pressure:.1f}초, 대기 {depth}건)")
+        metrics.set_gauge('degrade.level', new_level)
+        metrics.set_gauge('degrade.pressure_seconds', pressure)
+        return new_level
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'level': self._level,
+                'mode': LEVEL_NAMES[self._level],
+                'pressure_seconds': self._pressure,
+                'service_seconds': self._service_seconds,
+            }
+
+
+_controller: Optional[DegradationController] = None
+_controller_lock = threading.Lock()
+
+
+def get_degradation_controller() -> Optional[DegradationController]:
+    """설정(DEGRADE_*)으로 만든 전역 성능 저하 제어기 (비활성화면 None)"""
+    global _controller
+    config = get_config()
+    if not config.get('DEGRADE_ENABLED', False):
+        return None
+    with _controller_lock:
+        if _controller is None:
+            thresholds = [float(value) for value in str(config.get('DEGRADE_LEVEL_SECONDS', '')).split(',') if value.strip()]
+            _controller = DegradationController(
+                thresholds,
+                recovery_ratio=float(config.get('DEGRADE_RECOVERY_RATIO', 0.5)),
+                step_up_seconds=float(config.get('DEGRADE_STEP_UP_SECONDS', 5.0)),
+                step_down_seconds=float(config.get('DEGRADE_STEP_DOWN_SECONDS', 30.0)),
+            )
+        return _controller
+
+
+def reset_degradation_controller():
+    """전역 제어기 제거 (설정 변경 후 다시 생성, 테스트용)"""
+    global _controller
+    with _controller_lock:
+        _controller = None
+
+
+def attach_degradation_queue(queue_depth: Callable[[], int], workers: int):
+    """서버 시작 시 부하 추정에 사용할 대기열 지정 (제어기가 비활성화면 무시)"""
+    controller = get_degradation_controller()
+    if controller is not None:
+        controller.attach_queue(queue_depth, workers)
+
+
+def request_degradation_level(data: Dict[str, Any], timing=None) -> int:
+    """
+    요청에 적용할 성능 저하 단계 (처음 호출할 때 결정하여 data[DEGRADE_KEY]에 기록)
+
+    Args:
+        timing (RequestTiming, optional): 대기 시간(queue_wait_ms)이 기록된 요청 시간 분석
+    """
+    if DEGRADE_KEY in data:
+        return data[DEGRADE_KEY]
+    controller = get_degradation_controller()
+    if controller is None:
+        return NORMAL
+    queue_wait_ms = timing.values.get('queue_wait_ms', 0.0) if timing is not None else 0.0
+    level = controller.update(queue_wait_ms / 1000)
+    data[DEGRADE_KEY] = level
+    metrics.increment(f'degrade.requests.{LEVEL_NAMES[level]}')
+    return level
+
+
+def observe_request_service(timing_values: Dict[str, float]):
+    """처리가 끝난 요청의 처리 시간(전체 - 대기)을 제어기에 반영"""
+    controller = get_degradation_controller()
+    if controller is None:
+        return
+    total = timing_values.get('total_ms', 0.0) - timing_values.get('queue_wait_ms', 0.0)
+    controller.observe_service(max(0.0, total) / 1000)
+
+
+def degraded_max_tokens(level: int, config: Optional[Dict[str, Any]] = None) -> Optional[int]:
+    """CAP_TOKENS 이상이면 생성 토큰 수 상한 (아니면 None)"""
+    if level < CAP_TOKENS:
+        return None
+    config = config or get_config()
+    return int(config.get('DEGRADE_MAX_TOKENS', 512))
+
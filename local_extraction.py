@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+하이브리드 추출: keyword와 paragraph sentiment를 모델 없이 계산
+
+모델은 요약 문장(summary, paragraphs[].summary)만 생성하고
+- keyword: 통화 말뭉치로 미리 계산한 IDF 표를 사용한 TF-IDF 상위 내용어
+- sentiment: 문단에 해당하는 발화 구간의 감정 사전 점수
+를 로컬에서 채운다.
+
+IDF 표 생성:
+    python local_extraction.py                       # sample/sample_request_*.json → idf_table.json
+    python local_extraction.py "data/*.json" out.json
+"""
+
+import glob
+import json
+import math
+import os
+import re
+import sys
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import get_config
+from extractive_summarizer import split_turns
+from korean_text import content_words
+from topic_segmentation import segment_turns
+
+# 감정 단어 (어간 → 가중치, 발화에 어간이 포함되면 발화당 한 번 반영)
+POSITIVE_WORDS = {
+    '감사': 0.5, '고맙': 0.5, '수고': 0.5, '괜찮': 0.5,  # 통화 끝 인사로 자주 쓰이므로 낮은 가중치
+    '좋': 1.0, '다행': 1.0, '편리': 1.0, '편하': 1.0, '도움': 1.0, '해결': 1.0, '반갑': 1.0,
+    '만족': 1.5, '친절': 1.5, '기쁘': 1.5, '기뻐': 1.5,
+    '최고': 2.0, '훌륭': 2.0,
+}
+NEGATIVE_WORDS = {
+    '죄송': 0.5, '문제': 0.5, '어렵': 0.5, '늦어': 0.5, '지연': 0.5,
+    '안 되': 0.5, '안되': 0.5, '안 돼': 0.5, '안돼': 0.5,  # 안내 중 '그건 안 되고요'처럼 중립적으로도 쓰임
+    '불편': 1.0, '오류': 1.0, '걱정': 1.0, '곤란': 1.0, '못 받': 1.0,
+    '불만': 1.5, '답답': 1.5, '말이 안': 1.5,
+    '짜증': 2.0, '화나': 2.0, '화났': 2.0, '실망': 2.0, '억울': 2.0, '항의': 2.0, '황당': 2.0, '어이없': 2.0,
+}
+
+# 감정 단어가 있는 발화의 점수를 키우는 강조어
+INTENSIFIERS = ('너무', '정말', '진짜', '매우', '엄청', '완전', '되게', '굉장히', '아주')
+INTENSIFIER_WEIGHT = 1.5
+
+# 긍정 어간 뒤에 오면 부정으로 뒤집는 표현 (좋지 않다, 편하지 못하다)
+_NEGATION_SUFFIX = re.compile(r'^\S*지\s*(?:는\s*)?(?:않|못)')
+
+# 구간 점수 → 감정 값 (점수 >= 기준이면 해당 값, 부정은 대칭)
+STRONG_SENTIMENT_SCORE = 3.0
+WEAK_SENTIMENT_SCORE = 0.5
+
+# 키워드 후보에서 제외할 단어 (content_words가 남기는 구어체 표현)
+KEYWORD_STOPWORDS = {'내가', '그래', '가지', '가지고', '고거', '저랑', '것도', '한번'}
+_NON_KEYWORD_ENDINGS = ('면', '며', '데요', '오니', '될', '쯤', '하시', '하기')
+
+_idf_cache: Dict[str, Optional[Dict[str, Any]]] = {}
+_idf_lock = threading.Lock()
+
+
+def hybrid_enabled(config: Optional[Dict[str, Any]] = None) -> bool:
+    config = config or get_config()
+    return bool(config.get('HYBRID_EXTRACTION_ENABLED', False))
+
+
+def build_idf_table(documents: List[str]) -> Dict[str, Any]:
+    """
+    문서(전처리된 통화) 목록으로 IDF 표 생성
+
+    idf = log((N + 1) / (df + 1)) + 1 (평활화, 모든 통화에 나오는 단어도 0이 되지 않음)
+    """
+    document_frequency = Counter()
+    for document in documents:
+        document_frequency.update(set(content_words(document)))
+    count = len(documents)
+    return {
+        'documents': count,
+        'idf': {word: round(math.log((count + 1) / (df + 1)) + 1, 4)
+                for word, df in sorted(document_frequency.items())},
+    }
+
+
+def _idf_table_path(config: Dict[str, Any]) -> str:
+    path = config.get('LOCAL_IDF_TABLE_PATH', 'idf_table.json')
+    if not os.path.isabs(path):
+        path = os.path.join(config.get('WORKSPACE_DIR', '.'), path)
+    return path
+
+
+def load_idf_table(config: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """LOCAL_IDF_TABLE_PATH의 IDF 표 (경로별로 한 번만 읽음, 없거나 읽을 수 없으면 None)"""
+    path = _idf_table_path(config or get_config())
+    with _idf_lock:
+        if path not in _idf_cache:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    _idf_cache[path] = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"IDF 표를 읽을 수 없어 단어 빈도만 사용합니다 ({path}): {e}")
+                _idf_cache[path] = None
+        return _idf_cache[path]
+
+
+def extract_keywords(text: str, top_n: int = 3, idf_table: Optional[Dict[str, Any]] = None) -> List[str]:
+    """
+    TF-IDF 상위 내용어 (동률이면 먼저 등장한 단어 우선)
+
+    IDF 표에 없는 단어는 말뭉치에 한 번도 나오지 않은 단어로 보고 최대 IDF를 준다.
+    IDF 표가 없으면 단어 빈도 순.
+    """
+    words = [word for word in content_words(text)
+             if word not in KEYWORD_STOPWORDS and not word.endswith(_NON_KEYWORD_ENDINGS)]
+    if not words:
+        return []
+    counts = Counter(words)
+    first_seen: Dict[str, int] = {}
+    for index, word in enumerate(words):
+        first_seen.setdefault(word, index)
+    if idf_table:
+        idf = idf_table.get('idf', {})
+        unseen_idf = math.log(int(idf_table.get('documents', 0)) + 1) + 1
+        scores = {word: count * idf.get(word, unseen_idf) for word, count in counts.items()}
+    else:
+        scores = dict(counts)
+    ranked = sorted(scores, key=lambda word: (-scores[word], first_seen[word]))
+    return ranked[:top_n]
+
+
+def _lexicon_hits(utterance: str, lexicon: Dict[str, float]) -> List[Tuple[str, float]]:
+    return [(stem, weight) for stem, weight in lexicon.items() if stem in utterance]
+
+
+def _is_negated(utterance: str, stem: str) -> bool:
+    """긍정 어간이 부정 표현과 함께 쓰였는지 (안 좋아요, 좋지 않아요)"""
+    index = utterance.find(stem)
+    if index >= 2 and utterance[index - 2:index] == '안 ':
+        return True
+    return bool(_NEGATION_SUFFIX.match(utterance[index + len(stem):]))
+
+
+def utterance_sentiment(utterance: str) -> float:
+    """발화 하나의 감정 점수 (양수 긍정, 음수 부정)"""
+    score = 0.0
+    for stem, weight in _lexicon_hits(utterance, POSITIVE_WORDS):
+        score += -weight if _is_negated(utterance, stem) else weight
+    for _, weight in _lexicon_hits(utterance, NEGATIVE_WORDS):
+        score -= weight
+    if score and any(word in utterance for word in INTENSIFIERS):
+        score *= INTENSIFIER_WEIGHT
+    return score
+
+
+def score_sentiment(utterances: List[str]) -> str:
+    """발화 구간의 감정 값 ('강한긍정', '약한긍정', '보통', '약한부정', '강한부정')"""
+    total = sum(utterance_sentiment(utterance) for utterance in utterances)
+    if total >= STRONG_SENTIMENT_SCORE:
+        return '강한긍정'
+    if total >= WEAK_SENTIMENT_SCORE:
+        return '약한긍정'
+    if total <= -STRONG_SENTIMENT_SCORE:
+        return '강한부정'
+    if total <= -WEAK_SENTIMENT_SCORE:
+        return '약한부정'
+    return '보통'
+
+
+def paragraph_blocks(utterances: List[str], count: int, start_times: Optional[List[int]] = None,
+                     config: Optional[Dict[str, Any]] = None) -> List[Tuple[int, int]]:
+    """문단 count개에 대응하는 발화 구간 [(start, end)] (주제 구간 나누기, 프롬프트의 [구간 N]과 같은 경계)"""
+    return segment_turns(utterances, count=count, start_times=start_times, config=config)
+
+
+def fill_local_fields(result: Dict[str, Any], text: str, config: Optional[Dict[str, Any]] = None,
+                      start_times: Optional[List[int]] = None) -> Dict[str, Any]:
+    """
+    모델이 생성한 요약 결과에 keyword와 문단별 keyword/sentiment를 로컬 계산 값으로 채움
+
+    문단 i는 대화를 문단 수만큼 주제 구간으로 나눈 i번째 발화 구간에 대응한다.
+    문단이 없으면 전체 summary로 문단 하나를 만든다.
+
+    Args:
+        start_times (list, optional): 발화별 시작 시각(ms, 구간 경계의 침묵 추정)
+    """
+    if not isinstance(result, dict):
+        return result
+    idf_table = load_idf_table(config)
+    utterances = [utterance for _, utterance in split_turns(text)]
+    result['keyword'] = ', '.join(extract_keywords(text, idf_table=idf_table))
+
+    paragraphs = [paragraph for paragraph in result.get('paragraphs') or [] if isinstance(paragraph, dict)]
+    if not paragraphs and result.get('summary'):
+        paragraphs = [{'summary': result['summary']}]
+    blocks = paragraph_blocks(utterances, len(paragraphs), start_times, config)
+    for index, paragraph in enumerate(paragraphs):
+        if index < len(blocks):
+            start, end = blocks[index]
+            block = utterances[start:end]
+        else:
+            block = []
+        paragraph['keyword'] = ', '.join(extract_keywords('\n'.join(block), idf_table=idf_table))
+        paragraph['sentiment'] = score_sentiment(block)
+    result['paragraphs'] = paragraphs
+    return result
+
+
+def load_corpus(pattern: str) -> List[str]:
+    """요청 JSON 파일들을 전처리하여 대화 텍스트 목록으로 변환 (대화가 없는 파일 제외)"""
+    from preprocessor import preprocess_request_data
+
+    documents = []
+    for path in sorted(glob.glob(pattern)):
+        with open(path, 'r', encoding='utf-8') as f:
+            text = preprocess_request_data(json.load(f)).get('text', '')
+        if split_turns(text) and ' > ' in text:
+            documents.append(text)
+    return documents
+
+
+def main():
+    pattern = sys.argv[1] if len(sys.argv) > 1 else os.path.join('sample', 'sample_request_*.json')
+    output = sys.argv[2] if len(sys.argv) > 2 else _idf_table_path(get_config())
+    documents = load_corpus(pattern)
+    if not documents:
+        print(f"말뭉치 파일이 없습니다: {pattern}")
+        sys.exit(1)
+    table = build_idf_table(documents)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(table, f, ensure_ascii=False, indent=1)
+    print(f"IDF 표 저장: {output} (통화 {table['documents']}건, 단어 {len(table['idf'])}개)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,346 @@
+import json
+import time
+from typing import Any, Callable, Dict, List
+
+from config import get_config
+from inference_watchdog import current_deadline
+from logger import log_gemma_query, log_gemma_response
+from korean_text import tokenize, is_filler
+from json_repair import (
+    extract_json_from_markdown,
+    process_and_repair_json,
+    extract_valid_data_from_broken_json
+)
+
+# map 단계 프롬프트 (구간마다 동일한 접두부를 유지해야 llama_cpp의 prefix KV 캐시가 재사용됨)
+MAP_PROMPT_PREFIX = (
+    "당신은 긴 통화 내용의 일부 구간을 분석하여 지정된 JSON 형식으로 요약하는 전문가입니다.\n"
+    "오타나 유사어는 문맥에 맞게 적절하게 수정 후 요약해야 하며 가상정보나 추정정보 없이 반드시 '대화내용' 범위에서만 요약을 수행해야 한다.\n\n"
+    "--- [분석 규칙] ---\n"
+    "paragraphs: 주어진 구간을 1-3개의 논리적 단위로 나누어 각각 분석하세요.\n"
+    "  - 각 paragraph는 반드시 다음 필드를 포함해야 합니다:\n"
+    "    * summary: 해당 부분의 핵심 내용을 25자 이내로 요약\n"
+    "    * keyword: 해당 부분의 주요 키워드 3개를 쉼표로 구분\n"
+    "    * sentiment: 감정을 '강한긍정', '약한긍정', '보통', '약한부정', '강한부정' 중에서 선택\n\n"
+    "--- [응답 형식] ---\n"
+    "반드시 이 형식으로만 응답하세요:\n"
+    "```json\n"
+    "{\n"
+    "\"paragraphs\": [\n"
+    "{\n"
+    "\"summary\": \"\",\n"
+    "\"keyword\": \"\",\n"
+    "\"sentiment\": \"\"\n"
+    "}\n"
+    "]\n"
+    "}\n"
+    "```\n\n"
+    "대화 내용:\n"
+)
+
+MAP_PROMPT_SUFFIX = "\n\n위 구간을 분석하여 반드시 paragraphs를 포함한 완전한 JSON으로 응답하세요."
+
+# reduce 단계 프롬프트 (구간별 문단 후보를 최종 결과로 병합)
+REDUCE_PROMPT_PREFIX = (
+    "당신은 긴 통화의 구간별 요약 목록을 하나의 통화 요약으로 병합하는 전문가입니다.\n"
+    "가상정보나 추정정보 없이 반드시 '구간별 요약' 범위에서만 요약을 수행해야 한다.\n\n"
+    "--- [분석 규칙] ---\n"
+    "summary: 통화 전체의 핵심 내용을 25자 이내의 주어를 제외한 매우 짧은 한 문장으로 요약하세요. 문장의 끝은 '명사형' 으로 끝내야 합니다.\n"
+    "keyword: 통화 전체에서 가장 중요한 키워드를 3개 추출하여 쉼표로 구분하세요.\n"
+    "paragraphs: 구간별 요약을 시간 순서대로 2-3개의 논리적 단위로 병합하세요.\n"
+    "  - 각 paragraph는 summary(25자 이내), keyword(3개, 쉼표 구분), sentiment('강한긍정', '약한긍정', '보통', '약한부정', '강한부정' 중 하나)를 포함해야 합니다.\n\n"
+    "--- [응답 형식] ---\n"
+    "반드시 이 형식으로만 응답하세요:\n"
+    "```json\n"
+    "{\n"
+    "\"summary\": \"통화 핵심 요약\",\n"
+    "\"keyword\": \"\",\n"
+    "\"paragraphs\": [\n"
+    "{\n"
+    "\"summary\": \"\",\n"
+    "\"keyword\": \"\",\n"
+    "\"sentiment\": \"\"\n"
+    "}\n"
+    "]\n"
+    "}\n"
+    "```\n\n"
+    "구간별 요약 (시간 순서, 요약 | 키워드 | 감정):\n"
+)
+
+REDUCE_PROMPT_SUFFIX = "\n\n위 구간별 요약을 병합하여 반드시 paragraphs를 포함한 완전한 JSON으로 응답하세요."
+
+
+def count_tokens(llm, text: str) -> int:
+    """
+    모델 토크나이저로 토큰 수를 계산 (실패 시 한글 1글자 ≈ 0.8토큰으로 추정)
+    """
+    if not text:
+        return 0
+    try:
+        return len(llm.tokenize(text.encode('utf-8'), add_bos=False))
+    except Exception:
+        return int(len(text) * 0.8) + 1
+
+
+def is_filler_turn(line: str) -> bool:
+    """추임새만 있는 발화인지 확인 (예: "나 > 네 네")"""
+    text = line.split(" > ", 1)[1] if " > " in line else line
+    words = tokenize(text)
+    return bool(words) and all(is_filler(word) for word in words)
+
+
+def split_into_windows(lines: List[str], count: Callable[[str], int], max_window_tokens: int) -> List[str]:
+    """
+    대화를 발화(turn) 경계에 맞춰 토큰 예산 이하의 구간으로 분할
+
+    한 발화가 예산을 넘으면 글자 단위로 잘라 여러 구간에 나눈다.
+
+    Args:
+        lines (List[str]): "화자 > 발화" 형식의 대화 줄 목록
+        count (Callable[[str], int]): 토큰 수 계산 함수
+        max_window_tokens (int): 구간당 최대 토큰 수
+
+    Returns:
+        List[str]: 구간별 대화 텍스트
+    """
+    windows = []
+    current = []
+    current_tokens = 0
+
+    for line in lines:
+        line_tokens = count(line) + 1  # 줄바꿈
+        if line_tokens > max_window_tokens:
+            # 긴 단일 발화는 예산에 맞게 글자 단위로 분할
+            if current:
+                windows.append("\n".join(current))
+                current, current_tokens = [], 0
+            chars_per_piece = max(1, int(len(line) * max_window_tokens / line_tokens))
+            for start in range(0, len(line), chars_per_piece):
+                windows.append(line[start:start + chars_per_piece])
+            continue
+
+        if current and current_tokens + line_tokens > max_window_tokens:
+            windows.append("\n".join(current))
+            current, current_tokens = [], 0
+
+        current.append(line)
+        current_tokens += line_tokens
+
+    if current:
+        windows.append("\n".join(current))
+
+    return windows
+
+
+def select_windows(windows: List[Any], max_windows: int) -> List[Any]:
+    """
+    항목 수가 상한을 넘으면 처음과 끝을 포함하여 고르게 선택 (마감 초과 시 모델 없이 병합할 후보 선택)
+    """
+    if max_windows <= 0 or len(windows) <= max_windows:
+        return windows
+    if max_windows == 1:
+        return [windows[0]]
+    step = (len(windows) - 1) / (max_windows - 1)
+    indexes = sorted({round(i * step) for i in range(max_windows)})
+    return [windows[i] for i in indexes]
+
+
+def parse_json_output(result: str) -> Dict[str, Any]:
+    """모델 출력에서 JSON을 추출/복구하여 딕셔너리로 반환 (실패 시 유효한 필드만 추출)"""
+    json_str = extract_json_from_markdown(result)
+    if json_str is None:
+        return extract_valid_data_from_broken_json(result)
+    try:
+        parsed = json.loads(process_and_repair_json(json_str))
+        if isinstance(parsed, dict):
+            return parsed
+    except json.JSONDecodeError:
+        pass
+    return extract_valid_data_from_broken_json(result)
+
+
+def _generate(llm, prompt: str, max_tokens: int, process_name: str) -> str:
+    """요약과 동일한 샘플링 파라미터로 생성 (prefix가 같으면 llama_cpp가 KV 캐시를 재사용)"""
+    log_gemma_query(prompt, process_name)
+    output = llm(
+        prompt,
+        max_tokens=max_tokens,
+        temperature=0.3,
+        min_p=0.1,
+        top_p=0.8,
+        top_k=20,
+        repeat_penalty=1.05,
+        echo=False
+    )
+    if isinstance(output, dict) and 'choices' in output:
+        result = output['choices'][0]['text'].strip()
+    else:
+        result = str(output).strip()
+    log_gemma_response(result, process_name)
+    return result
+
+
+def _deadline_passed() -> bool:
+    """추론 마감(MODEL_TIMEOUT)이 지났거나 이미 생성을 중단했으면 True (중단 기록)"""
+    deadline = current_deadline()
+    if deadline is not None and (deadline.triggered or deadline.expired()):
+        deadline.trigger()
+        return True
+    return False
+
+
+def _normalize_paragraphs(paragraphs: Any, limit: int) -> List[Dict[str, str]]:
+    """문단 후보를 summary/keyword/sentiment 문자열 딕셔너리로 정리 (최대 limit개)"""
+    candidates = []
+    if not isinstance(paragraphs, list):
+        return candidates
+    for paragraph in paragraphs:
+        if not isinstance(paragraph, dict):
+            continue
+        summary = str(paragraph.get('summary', '') or '').strip()
+        if not summary:
+            continue
+        keyword = paragraph.get('keyword', '')
+        if isinstance(keyword, list):
+            keyword = ', '.join(str(kw).strip() for kw in keyword if kw and str(kw).strip())
+        candidates.append({
+            'summary': summary,
+            'keyword': str(keyword or '').strip(),
+            'sentiment': str(paragraph.get('sentiment', '') or '보통').strip(),
+        })
+        if len(candidates) >= limit:
+            break
+    return candidates
+
+
+def _render_candidates(candidates: List[Dict[str, str]]) -> str:
+    return "\n".join(
+        f"- {c['summary']} | {c['keyword']} | {c['sentiment']}" for c in candidates
+    )
+
+
+def map_windows(llm, windows: List[str], max_tokens: int, max_paragraphs: int) -> List[Dict[str, str]]:
+    """
+    map 단계: 구간별로 문단 후보를 생성
+
+    후보만 보관하고 구간 원문/모델 출력은 즉시 버려 메모리 사용량을 구간 수에 비례하는 작은 크기로 제한한다.
+    """
+    candidates = []
+    for index, window in enumerate(windows, 1):
+        if _deadline_passed():
+            # 마감이 지나면 남은 구간은 건너뛰고 지금까지의 후보로 reduce
+            print(f"⏱️ [긴 통화 map] 마감 초과 - 구간 {index - 1}/{len(windows)}개까지의 후보로 병합")
+            break
+        start = time.time()
+        prompt = f"{MAP_PROMPT_PREFIX}{window}{MAP_PROMPT_SUFFIX}"
+        result = _generate(llm, prompt, max_tokens, "long_call_map")
+        parsed = parse_json_output(result)
+        window_candidates = _normalize_paragraphs(parsed.get('paragraphs', []), max_paragraphs)
+        if not window_candidates and parsed.get('summary'):
+            window_candidates = _normalize_paragraphs([parsed], 1)
+        candidates.extend(window_candidates)
+        print(f"[긴 통화 map] 구간 {index}/{len(windows)}: 문단 후보 {len(window_candidates)}개 ({time.time() - start:.2f}초)")
+    return candidates
+
+
+def reduce_candidates(llm, candidates: List[Dict[str, str]], count: Callable[[str], int],
+                      max_reduce_tokens: int, max_tokens: int) -> Dict[str, Any]:
+    """
+    reduce 단계: 문단 후보를 최종 {summary, keyword, paragraphs}로 병합
+
+    후보 목록이 reduce 예산을 넘으면 그룹 단위로 먼저 병합(계층적 reduce)하여
+    최종 프롬프트 크기를 항상 예산 이하로 유지한다.
+    추론 마감이 지나면 더 생성하지 않고 지금까지의 후보로 결과를 만든다.
+    """
+    level = 0
+    while len(candidates) > 3 and count(_render_candidates(candidates)) > max_reduce_tokens and not _deadline_passed():
+        level += 1
+        groups = split_into_windows(
+            [f"- {c['summary']} | {c['keyword']} | {c['sentiment']}" for c in candidates],
+            count,
+            max_reduce_tokens
+        )
+        if len(groups) <= 1:
+            break
+        merged = []
+        for group in groups:
+            if _deadline_passed():
+                # 일부 그룹만 병합된 목록은 시간 순서가 어긋나므로 기존 후보를 그대로 사용
+                merged = []
+                break
+            result = _generate(llm, f"{REDUCE_PROMPT_PREFIX}{group}{REDUCE_PROMPT_SUFFIX}", max_tokens, "long_call_reduce")
+            merged.extend(_normalize_paragraphs(parse_json_output(result).get('paragraphs', []), 3))
+        print(f"[긴 통화 reduce] 단계 {level}: 후보 {len(candidates)}개 → {len(merged)}개")
+        if not merged or len(merged) >= len(candidates):
+            break
+        candidates = merged
+
+    if _deadline_passed():
+        # 최종 병합 없이 시간 순서대로 고르게 고른 후보로 응답
+        print(f"⏱️ [긴 통화 reduce] 마감 초과 - 후보 {len(candidates)}개를 모델 없이 병합")
+        paragraphs = select_windows(candidates, 3)
+        parsed = {'summary': paragraphs[0]['summary'] if paragraphs else '', 'paragraphs': paragraphs}
+    else:
+        result = _generate(llm, f"{REDUCE_PROMPT_PREFIX}{_render_candidates(candidates)}{REDUCE_PROMPT_SUFFIX}",
+                           max_tokens, "long_call_reduce")
+        parsed = parse_json_output(result)
+    if not parsed.get('paragraphs'):
+        parsed['paragraphs'] = candidates[:3]
+    if not parsed.get('keyword') and candidates:
+        parsed['keyword'] = candidates[0]['keyword']
+    parsed.setdefault('summary', '')
+    parsed.setdefault('keyword', '')
+    return parsed
+
+
+def summarize_long_conversation(llm, text: str) -> Dict[str, Any]:
+    """
+    컨텍스트 윈도우보다 긴 통화를 계층적 map-reduce로 요약합니다.
+
+    1. 발화 경계에 맞춰 구간으로 분할 (구간 수가 많으면 추임새 발화를 먼저 제거)
+    2. 구간별로 문단 후보 생성 (map) - 구간을 버리지 않고 모두 요약하며,
+       LONG_CALL_MAX_WINDOWS를 넘으면 구간당 후보를 1개로 줄여 reduce 입력을 제한
+    3. 후보를 병합하여 최종 {summary, keyword, paragraphs} 생성 (reduce)
+
+    지연 시간은 추론 마감(MODEL_TIMEOUT)으로 제한한다. 마감으로 남은 구간을 건너뛰면
+    마감이 중단 상태로 남아 응답에 timedOut(부분 결과)으로 표시된다.
+
+    Args:
+        llm: llama_cpp Llama 인스턴스
+        text (str): 전처리된 대화 텍스트
+
+    Returns:
+        Dict[str, Any]: 후처리 전의 {summary, keyword, paragraphs}
+    """
+    config = get_config()
+    window_tokens = config.get('LONG_CALL_WINDOW_TOKENS', 3000)
+    max_windows = config.get('LONG_CALL_MAX_WINDOWS', 8)
+    map_max_tokens = config.get('LONG_CALL_MAP_MAX_TOKENS', 400)
+    reduce_max_tokens = config.get('LONG_CALL_REDUCE_MAX_TOKENS', 600)
+    max_reduce_tokens = config.get('LONG_CALL_REDUCE_INPUT_TOKENS', 2000)
+
+    def count(value: str) -> int:
+        return count_tokens(llm, value)
+
+    start = time.time()
+    lines = [line for line in text.strip().split('\n') if line.strip()]
+    windows = split_into_windows(lines, count, window_tokens)
+
+    if len(windows) > max_windows:
+        # 추임새만 있는 발화를 제거하고 다시 분할
+        content_lines = [line for line in lines if not is_filler_turn(line)]
+        print(f"[긴 통화] 구간 {len(windows)}개 > 상한 {max_windows}개 - 추임새 발화 {len(lines) - len(content_lines)}개 제거")
+        windows = split_into_windows(content_lines, count, window_tokens)
+
+    # 구간이 상한보다 많아도 대화 중간을 버리지 않고 모두 요약하되, 구간당 문단 후보를 줄여 reduce 입력을 제한
+    max_paragraphs = 3 if len(windows) <= max_windows else 1
+    print(f"[긴 통화] map-reduce 시작: 대화 {len(lines)}줄, 구간 {len(windows)}개 "
+          f"(구간당 최대 {window_tokens}토큰, 후보 {max_paragraphs}개)")
+    candidates = map_windows(llm, windows, map_max_tokens, max_paragraphs)
+    if not candidates:
+        print("[긴 통화] 문단 후보가 없습니다.")
+        return {"summary": "", "keyword": "", "paragraphs": []}
+
+    result = reduce_candidates(llm, candidates, count, max_reduce_tokens, reduce_max_tokens)
+    print(f"[긴 통화] map-reduce 완료: 후보 {len(candidates)}개, 소요시간 {time.time() - start:.2f}초")
+    return result
@@ -0,0 +1,84 @@
+import threading
+import time
+from typing import Dict, Any
+
+
+class MetricsRegistry:
+    """프로세스 전역 성능 지표 수집 클래스 (카운터, 게이지, 시간 측정)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._timers: Dict[str, Dict[str, float]] = {}
+        self._started_at = time.time()
+
+    def increment(self, name: str, value: float = 1):
+        """카운터 증가"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float):
+        """게이지 값 설정 (현재 상태를 나타내는 값)"""
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, value: float):
+        """시간(초) 등 측정값 기록"""
+        with self._lock:
+            timer = self._timers.get(name)
+            if timer is None:
+                timer = {'count': 0, 'total': 0.0, 'min': value, 'max': value, 'last': value}
+                self._timers[name] = timer
+            timer['count'] += 1
+            timer['total'] += value
+            timer['min'] = min(timer['min'], value)
+            timer['max'] = max(timer['max'], value)
+            timer['last'] = value
+
+    def get_counter(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def get_gauge(self, name: str, default: float = 0) -> float:
+        with self._lock:
+            return self._gauges.get(name, default)
+
+    def get_average(self, name: str, default: float = 0.0) -> float:
+        """측정값 평균 (기록이 없으면 default)"""
+        with self._lock:
+            timer = self._timers.get(name)
+            if not timer or timer['count'] == 0:
+                return default
+            return timer['total'] / timer['count']
+
+    def snapshot(self) -> Dict[str, Any]:
+        """현재 지표 전체를 딕셔너리로 반환"""
+        with self._lock:
+            timers = {}
+            for name, timer in self._timers.items():
+                timers[name] = dict(timer)
+                timers[name]['avg'] = timer['total'] / timer['count'] if timer['count'] else 0.0
+            return {
+                'uptime': time.time() - self._started_at,
+                'counters': dict(self._counters),
+                'gauges': dict(self._gauges),
+                'timers': timers,
+            }
+
+    def reset(self):
+        """모든 지표 초기화 (테스트용)"""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._timers.clear()
+            self._started_at = time.time()
+
+
+# 전역 지표 인스턴스
+metrics = MetricsRegistry()
+
+
+def get_metrics_snapshot() -> Dict[str, Any]:
+    """전역 지표 스냅샷 반환"""
+    return metrics.snapshot()
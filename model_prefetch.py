@@ -0,0 +1,145 @@
+import mmap
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from config import get_config, get_model_path
+from metrics import metrics
+
+# 순차 읽기 단위 (페이지 캐시 적재용, 내용은 버림)
+PREFETCH_CHUNK_BYTES = 8 * 1024 * 1024
+
+
+def available_memory_bytes() -> Optional[int]:
+    """사용 가능한 물리 메모리 (확인할 수 없으면 None)"""
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        pass
+    try:
+        import psutil
+        return psutil.virtual_memory().available
+    except ImportError:
+        return None
+
+
+def _advise_willneed(f, size: int):
+    """커널에 파일 전체를 미리 읽도록 요청 (지원하는 OS에서만, 비동기)"""
+    if hasattr(os, 'posix_fadvise'):
+        os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+    if hasattr(mmap, 'MADV_WILLNEED'):
+        with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as mapped:
+            mapped.madvise(mmap.MADV_WILLNEED)
+
+
+def prefetch_file(path: str, chunk_bytes: int = PREFETCH_CHUNK_BYTES) -> int:
+    """
+    파일을 페이지 캐시에 올림 (readahead/madvise WILLNEED 후 순차 읽기로 완료 대기)
+
+    Llama(use_mmap=True)는 같은 페이지 캐시를 매핑하므로, 이후 모델 로딩과 첫 추론에서
+    디스크를 다시 읽지 않는다. WILLNEED 힌트를 지원하지 않는 OS(Windows)에서는 순차 읽기만 한다.
+
+    Returns:
+        int: 읽은 바이트 수
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return 0
+    total = 0
+    buffer = bytearray(chunk_bytes)
+    with open(path, 'rb', buffering=0) as f:
+        try:
+            _advise_willneed(f, size)
+        except (OSError, ValueError) as e:
+            print(f"미리 읽기 힌트 실패 (순차 읽기로 진행): {e}")
+        while True:
+            read = f.readinto(buffer)
+            if not read:
+                break
+            total += read
+    return total
+
+
+class ModelPrefetcher:
+    """
+    모델 파일 백그라운드 미리 읽기
+
+    서버 초기화(이전 프로세스 정리, 설정 검사, 공유 메모리 생성)와 디스크 읽기가 겹치도록
+    main() 시작 시 스레드로 실행한다. 모델 로딩은 기다리지 않고 바로 진행해도 같은 페이지 캐시를 사용한다.
+    """
+
+    def __init__(self, paths: List[str]):
+        self.paths = paths
+        self.bytes_read = 0
+        self.elapsed = 0.0
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'ModelPrefetcher':
+        self._thread = threading.Thread(target=self._run, name='model-prefetch', daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        start = time.time()
+        try:
+            for path in self.paths:
+                path_start = time.time()
+                read = prefetch_file(path)
+                self.bytes_read += read
+                print(f"모델 파일 미리 읽기 완료: {path} ({read / 1024 / 1024:.0f}MB, {time.time() - path_start:.2f}초)")
+        except OSError as e:
+            print(f"모델 파일 미리 읽기 실패: {e}")
+        finally:
+            self.elapsed = time.time() - start
+            metrics.set_gauge('startup.prefetch_seconds', self.elapsed)
+            metrics.set_gauge('startup.prefetch_bytes', self.bytes_read)
+            self._done.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """미리 읽기 완료 대기 (완료되었으면 True)"""
+        return self._done.wait(timeout)
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+
+def prefetch_model_paths(config: Dict[str, Any]) -> List[str]:
+    """미리 읽을 모델 파일 (요약 모델 + draft_model 모드의 드래프트 모델 + 모델 라우터의 작은 모델, 존재하는 파일만)"""
+    extra_paths = []
+    if str(config.get('SPECULATIVE_MODE', 'off')).lower() == 'draft_model' and config.get('SPECULATIVE_DRAFT_MODEL_PATH'):
+        extra_paths.append(config['SPECULATIVE_DRAFT_MODEL_PATH'])
+    if config.get('MODEL_ROUTER_ENABLED', False) and config.get('MODEL_ROUTER_SMALL_MODEL_PATH'):
+        extra_paths.append(config['MODEL_ROUTER_SMALL_MODEL_PATH'])
+    paths = [get_model_path()]
+    for path in extra_paths:
+        if not os.path.isabs(path):
+            path = os.path.join(config.get('WORKSPACE_DIR', '.'), path)
+        paths.append(path)
+    return list(dict.fromkeys(os.path.realpath(path) for path in paths if os.path.isfile(path)))
+
+
+def start_model_prefetch(config: Optional[Dict[str, Any]] = None) -> Optional[ModelPrefetcher]:
+    """
+    설정(MODEL_PREFETCH_ENABLED)에 따라 모델 파일 미리 읽기 시작
+
+    FakeBackend이거나 파일이 없거나, 파일 합계가 사용 가능한 메모리보다 크면(다른 페이지를 밀어내므로) 건너뛴다.
+    """
+    config = config or get_config()
+    if not config.get('MODEL_PREFETCH_ENABLED', True):
+        return None
+    if str(config.get('MODEL_BACKEND', 'llama_cpp')).lower() == 'fake':
+        return None
+    paths = prefetch_model_paths(config)
+    if not paths:
+        print("미리 읽을 모델 파일이 없습니다")
+        return None
+    total = sum(os.path.getsize(path) for path in paths)
+    available = available_memory_bytes()
+    if available is not None and total > available:
+        print(f"모델 파일({total / 1024 / 1024:.0f}MB)이 사용 가능한 메모리({available / 1024 / 1024:.0f}MB)보다 커서 미리 읽기 생략")
+        return None
+    print(f"모델 파일 미리 읽기 시작: {len(paths)}개, {total / 1024 / 1024:.0f}MB")
+    return ModelPrefetcher(paths).start()
@@ -0,0 +1,468 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+from autotune import apply_tuned_profile, load_tuned_profile
+from config import get_config, get_model_path
+from cpu_planner import pin_current_thread, plan_cpus
+from kv_cache_planner import instance_memory_bytes, resolve_kv_cache_params
+from metrics import metrics
+
+
+class ModelKey(NamedTuple):
+    """
+    모델 인스턴스를 구분하는 키 - 같은 키는 프로세스에서 한 번만 로딩
+
+    instance는 같은 가중치로 만든 독립 컨텍스트 번호다.
+    0은 get_default_model()이 공유하는 기본 인스턴스, 추론 풀 인스턴스는 1부터 (워커 전용),
+    WEIGHTS_ONLY_INSTANCE는 컨텍스트 없이 가중치만 로드한 llama_model (배치 엔진).
+    """
+    model_path: str
+    n_ctx: int
+    n_gpu_layers: int
+    instance: int = 0
+
+
+# 컨텍스트 없이 가중치만 로드한 모델의 instance 번호
+WEIGHTS_ONLY_INSTANCE = -1
+
+
+class _ModelEntry:
+    def __init__(self, key: ModelKey, model: Any, size_bytes: int, load_seconds: float, weights_bytes: int = 0):
+        self.key = key
+        self.model = model
+        self.size_bytes = size_bytes
+        self.weights_bytes = weights_bytes
+        self.load_seconds = load_seconds
+        self.owners = set()
+        self.anonymous_refs = 0
+        self.last_used = time.time()
+
+    @property
+    def refcount(self) -> int:
+        return len(self.owners) + self.anonymous_refs
+
+
+class _PendingLoad:
+    """로딩 중인 모델 (같은 키의 다른 acquire는 done을 기다리고, 메모리 예산에는 미리 포함)"""
+
+    def __init__(self, key: ModelKey, size_bytes: int, weights_bytes: int):
+        self.key = key
+        self.size_bytes = size_bytes
+        self.weights_bytes = weights_bytes
+        self.done = threading.Event()
+
+
+def make_model_key(model_path: str, n_ctx: int, n_gpu_layers: int = 0, instance: int = 0) -> ModelKey:
+    """경로를 정규화하여 모델 키 생성 (상대/절대/심볼릭 링크 경로가 달라도 같은 키)"""
+    return ModelKey(os.path.realpath(model_path), int(n_ctx), int(n_gpu_layers), int(instance))
+
+
+def estimate_model_bytes(model_path: str) -> int:
+    """모델 메모리 사용량 추정 (GGUF 파일 크기, 파일이 없으면 0)"""
+    try:
+        return os.path.getsize(model_path)
+    except OSError:
+        return 0
+
+
+class ModelRegistry:
+    """
+    프로세스 전역 모델 레지스트리
+
+    - (모델 경로, n_ctx, gpu layers) 키당 한 번만 로딩하여 같은 GGUF를 두 번 올리지 않음
+    - 사용자(owner)별 참조 카운트 - 같은 owner의 반복 acquire는 한 번으로 센다
+    - 메모리 예산(bytes)을 넘으면 참조가 없는 모델부터 LRU 순으로 언로딩
+    - 메모리 = 인스턴스별 크기 합 + 모델 경로별 공유 가중치 (mmap으로 공유되므로 경로당 한 번)
+    - 모델 로딩은 레지스트리 잠금 밖에서 수행 (로딩 중에도 다른 키의 acquire/release는 기다리지 않음)
+    """
+
+    def __init__(self, memory_budget_bytes: Optional[int] = None, lru_unload: Optional[bool] = None):
+        self._lock = threading.RLock()
+        self._entries: "OrderedDict[ModelKey, _ModelEntry]" = OrderedDict()
+        self._loading: Dict[ModelKey, _PendingLoad] = {}
+        self._memory_budget_bytes = memory_budget_bytes
+        self._lru_unload = lru_unload
+
+    def _budget(self) -> int:
+        if self._memory_budget_bytes is not None:
+            return self._memory_budget_bytes
+        return int(get_config().get('MODEL_MEMORY_BUDGET_MB', 0)) * 1024 * 1024
+
+    def _lru_enabled(self) -> bool:
+        if self._lru_unload is not None:
+            return self._lru_unload
+        return bool(get_config().get('MODEL_LRU_UNLOAD', True))
+
+    def acquire(self, key: ModelKey, loader: Callable[[], Any], owner: Optional[str] = None,
+                size_bytes: Optional[int] = None, weights_bytes: int = 0) -> Any:
+        """
+        모델을 반환 (없으면 loader로 로딩)
+
+        같은 키를 다른 스레드가 로딩 중이면 그 로딩이 끝나기를 기다린다 (실패하면 이어서 직접 로딩).
+
+        Args:
+            key (ModelKey): 모델 키
+            loader (callable): 모델 로딩 함수 (인자 없음)
+            owner (str, optional): 참조 주체 이름. None이면 익명 참조 (release 필요)
+            size_bytes (int, optional): 이 인스턴스만 쓰는 메모리. None이면 모델 파일 크기로 추정
+            weights_bytes (int): 같은 모델 경로의 인스턴스끼리 공유하는 가중치 메모리 (경로당 한 번만 계산)
+
+        Raises:
+            MemoryError: 언로딩 후에도 메모리 예산을 넘는 경우
+        """
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    metrics.increment('model_registry.hits')
+                    return self._add_reference(entry, owner)
+                pending = self._loading.get(key)
+                if pending is None:
+                    size = estimate_model_bytes(key.model_path) if size_bytes is None else size_bytes
+                    self._make_room(key, size, weights_bytes)
+                    pending = self._loading[key] = _PendingLoad(key, size, weights_bytes)
+                    break
+            pending.done.wait()
+
+        print(f"모델 레지스트리: 로딩 {key}")
+        load_start = time.time()
+        try:
+            model = loader()
+        except BaseException:
+            with self._lock:
+                self._loading.pop(key, None)
+            pending.done.set()
+            raise
+        with self._lock:
+            entry = _ModelEntry(key, model, pending.size_bytes, time.time() - load_start, pending.weights_bytes)
+            self._entries[key] = entry
+            self._loading.pop(key, None)
+            metrics.increment('model_registry.loads')
+            metrics.observe('model_registry.load_seconds', entry.load_seconds)
+            model = self._add_reference(entry, owner)
+        pending.done.set()
+        return model
+
+    def _add_reference(self, entry: _ModelEntry, owner: Optional[str]) -> Any:
+        if owner is None:
+            entry.anonymous_refs += 1
+        else:
+            entry.owners.add(owner)
+        entry.last_used = time.time()
+        self._entries.move_to_end(entry.key)
+        self._update_gauges()
+        return entry.model
+
+    def release(self, key: ModelKey, owner: Optional[str] = None):
+        """참조 해제 (모델은 메모리 예산이 부족할 때 LRU로 언로딩)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            if owner is None:
+                entry.anonymous_refs = max(0, entry.anonymous_refs - 1)
+            else:
+                entry.owners.discard(owner)
+            entry.last_used = time.time()
+
+    def _used_bytes(self) -> int:
+        """로딩된(로딩 중 포함) 모델의 메모리: 인스턴스별 크기 합 + 모델 경로별 가중치"""
+        items = list(self._entries.values()) + list(self._loading.values())
+        weights: Dict[str, int] = {}
+        for item in items:
+            weights[item.key.model_path] = max(weights.get(item.key.model_path, 0), item.weights_bytes)
+        return sum(item.size_bytes for item in items) + sum(weights.values())
+
+    def _incoming_bytes(self, key: ModelKey, size_bytes: int, weights_bytes: int) -> int:
+        """새 인스턴스가 더하는 메모리 (같은 경로의 가중치가 이미 올라와 있으면 인스턴스 크기만)"""
+        loaded_weights = max((item.weights_bytes for item in list(self._entries.values()) + list(self._loading.values())
+                              if item.key.model_path == key.model_path), default=0)
+        return size_bytes + max(0, weights_bytes - loaded_weights)
+
+    def _make_room(self, key: ModelKey, size_bytes: int, weights_bytes: int):
+        budget = self._budget()
+        if budget <= 0:
+            return
+        if self._used_bytes() + self._incoming_bytes(key, size_bytes, weights_bytes) <= budget:
+            return
+        if self._lru_enabled():
+            for candidate in list(self._entries.keys()):  # 오래 사용하지 않은 순
+                if self._used_bytes() + self._incoming_bytes(key, size_bytes, weights_bytes) <= budget:
+                    break
+                if self._entries[candidate].refcount == 0:
+                    self._unload_entry(candidate)
+        used = self._used_bytes()
+        incoming = self._incoming_bytes(key, size_bytes, weights_bytes)
+        if used + incoming > budget:
+            raise MemoryError(
+                f"모델 메모리 예산 초과: 사용 중 {used / 1024 ** 2:.0f}MB + "
+                f"신규 {incoming / 1024 ** 2:.0f}MB > 예산 {budget / 1024 ** 2:.0f}MB"
+            )
+
+    def _unload_entry(self, key: ModelKey):
+        entry = self._entries.pop(key)
+        print(f"모델 레지스트리: 언로딩 {key}")
+        close = getattr(entry.model, 'close', None)
+        if callable(close):
+            try:
+                close()
+            except Exception as e:
+                print(f"모델 해제 중 오류: {e}")
+        entry.model = None
+        metrics.increment('model_registry.unloads')
+        self._update_gauges()
+
+    def unload(self, key: ModelKey, force: bool = False) -> bool:
+        """모델 언로딩 (참조가 남아 있으면 force=True일 때만)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (entry.refcount > 0 and not force):
+                return False
+            self._unload_entry(key)
+            return True
+
+    def unload_all(self):
+        """모든 모델 강제 언로딩 (설정 변경 후 재로딩, 테스트용)"""
+        with self._lock:
+            for key in list(self._entries.keys()):
+                self._unload_entry(key)
+
+    def _update_gauges(self):
+        metrics.set_gauge('model_registry.loaded_models', len(self._entries))
+        metrics.set_gauge('model_registry.loaded_bytes', self._used_bytes())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """로딩된 모델 목록과 참조 현황"""
+        with self._lock:
+            return {
+                'memory_budget_bytes': self._budget(),
+                'loaded_bytes': self._used_bytes(),
+                'models': [
+                    {
+                        'model_path': key.model_path,
+                        'n_ctx': key.n_ctx,
+                        'n_gpu_layers': key.n_gpu_layers,
+                        'instance': key.instance,
+                        'size_bytes': entry.size_bytes,
+                        'weights_bytes': entry.weights_bytes,
+                        'refcount': entry.refcount,
+                        'owners': sorted(entry.owners),
+                        'load_seconds': entry.load_seconds,
+                    }
+                    for key, entry in self._entries.items()
+                ],
+            }
+
+
+# 전역 레지스트리 인스턴스
+model_registry = ModelRegistry()
+
+
+def resolve_thread_count(config: Dict[str, Any]) -> int:
+    """CPU 제한(affinity 마스크, cgroup 할당량, 물리 코어 수, CPU_LIMIT_PERCENT)을 적용한 추론 스레드 수"""
+    # CPU 제한 강제 적용
+    force_threads = config.get('MAX_CPU_THREADS')
+    if force_threads is not None:
+        # 강제 스레드 수 설정
+        print(f"강제 스레드 수 설정: {force_threads}")
+        return force_threads
+    return plan_cpus(1, config).total_threads
+
+
+def resolve_gpu_layers(config: Dict[str, Any]) -> int:
+    """GPU 사용 설정(ENABLE_GPU, N_GPU_LAYERS)에 따른 오프로딩 레이어 수"""
+    n_gpu_layers = 0
+    env_n_gpu_layers = os.getenv('N_GPU_LAYERS')
+    if bool(config.get('ENABLE_GPU', False)):
+        try:
+            n_gpu_layers = int(env_n_gpu_layers) if env_n_gpu_layers is not None else -1
+        except ValueError:
+            n_gpu_layers = -1
+    return n_gpu_layers
+
+
+def _load_llama(config: Dict[str, Any], key: ModelKey, max_threads: int, n_threads: Optional[int] = None):
+    """
+    요약 모델 로딩 (CPU 제한, GPU 오프로딩, 추측 디코딩 설정 적용)
+
+    Args:
+        max_threads (int): 프로세스 전체 CPU 제한 (CPU 친화성, OpenMP 스레드)
+        n_threads (int, optional): 이 인스턴스의 추론 스레드 수 (None이면 max_threads)
+    """
+    n_threads = n_threads or max_threads
+    try:
+        print("llama_cpp 모듈 임포트 중...")
+        from llama_cpp import Llama
+        print("llama_cpp 모듈 임포트 성공")
+
+        print(f"모델 로딩 시작: {key.model_path}")
+
+        # 자동 튜닝 프로파일(--autotune)이 있으면 n_threads/n_threads_batch/n_batch/n_ubatch 적용
+        tuned = apply_tuned_profile(load_tuned_profile(key.model_path, config), n_threads)
+        print(f"최종 사용 스레드 수: 디코드 {tuned['n_threads']}, prefill {tuned['n_threads_batch']} "
+              f"(인스턴스 {n_threads}, 프로세스 제한 {max_threads})")
+        if 'n_batch' in tuned:
+            print(f"자동 튜닝 프로파일 적용: n_batch={tuned['n_batch']}, n_ubatch={tuned['n_ubatch']}")
+
+        # CUDA/오프로딩 지원 및 환경 정보 출력
+        enable_gpu = bool(config.get('ENABLE_GPU', False))
+        try:
+            import llama_cpp as _llama_cpp
+            from llama_cpp import llama_supports_gpu_offload as _llama_supports_gpu_offload
+            print(f"llama_cpp 버전: {getattr(_llama_cpp, '__version__', 'n/a')}")
+            print(f"GPU 오프로딩 지원: {_llama_supports_gpu_offload()}")
+        except Exception as _gpu_info_err:
+            print(f"GPU 지원 정보 확인 실패: {_gpu_info_err}")
+        print(f"CUDA_VISIBLE_DEVICES={os.getenv('CUDA_VISIBLE_DEVICES')}")
+        print(f"GPU 사용 설정: {'활성화' if enable_gpu else '비활성화'} (n_gpu_layers={key.n_gpu_layers})")
+
+        # OS 레벨에서 CPU 사용량 제한 설정
+        if hasattr(os, 'sched_setaffinity'):
+            # Linux에서 CPU 코어 제한 (허용된 CPU 중 물리 코어 단위로 선택, 0..N-1 고정 대신)
+            available_cpus = plan_cpus(1, dict(config, MAX_CPU_THREADS=max_threads)).process_cpus
+            pin_current_thread(available_cpus)
+            print(f"CPU 친화성 설정: {available_cpus}")
+        elif os.name == 'nt':
+            # Windows에서 프로세스 우선순위 조정
+            try:
+                import psutil
+                current_process = psutil.Process()
+                current_process.nice(psutil.BELOW_NORMAL_PRIORITY_CLASS)
+                print(f"프로세스 우선순위 조정 완료")
+            except ImportError:
+                print("psutil 패키지가 없어 우선순위 조정을 건너뜁니다")
+
+        # 환경변수로 OpenMP 스레드 수 제한
+        os.environ['OMP_NUM_THREADS'] = str(max_threads)
+        os.environ['MKL_NUM_THREADS'] = str(max_threads)
+        os.environ['OPENBLAS_NUM_THREADS'] = str(max_threads)
+        os.environ['VECLIB_MAXIMUM_THREADS'] = str(max_threads)
+        os.environ['NUMEXPR_NUM_THREADS'] = str(max_threads)
+
+        print(f"환경변수 스레드 제한 설정: {max_threads}")
+
+        # 추측 디코딩은 드래프트 토큰 위치마다 로짓이 필요하므로 logits_all 활성화
+        speculative_mode = str(config.get('SPECULATIVE_MODE', 'off')).lower()
+        use_speculative = speculative_mode != 'off'
+
+        # mlock은 RLIMIT_MEMLOCK이 모델 크기보다 작으면 llama.cpp가 경고만 남기고 고정하지 않음
+        use_mlock = bool(config.get('MODEL_USE_MLOCK', False))
+        if use_mlock:
+            print("모델 가중치 메모리 고정(use_mlock) 사용")
+
+        # KV 캐시 타입(f16/q8_0/q4_0), flash attention, KV 오프로딩
+        kv_params = resolve_kv_cache_params(config)
+        print(f"KV 캐시 설정: K={config.get('MODEL_KV_CACHE_TYPE_K', 'f16')}, V={config.get('MODEL_KV_CACHE_TYPE_V', 'f16')}, "
+              f"flash_attn={kv_params['flash_attn']}, offload_kqv={kv_params['offload_kqv']}")
+
+        llm = Llama(
+            model_path=key.model_path,
+            n_ctx=key.n_ctx,
+            **tuned,  # 스레드 수(배치 처리 스레드 포함)와 튜닝된 배치 크기
+            n_gpu_layers=key.n_gpu_layers,
+            **kv_params,
+            use_mmap=True,  # 같은 GGUF의 인스턴스들이 페이지 캐시의 가중치를 공유
+            use_mlock=use_mlock,  # 가중치를 메모리에 고정 (스왑/페이지 캐시 회수 방지)
+            logits_all=use_speculative,
+            verbose=False  # 불필요한 출력 줄이기
+        )
+        print("모델 로딩 완료")
+
+        if use_speculative:
+            from speculative_decoding import create_draft_model
+            draft_model = create_draft_model(
+                config,
+                main_llm=llm,
+                llama_kwargs={'n_threads': tuned['n_threads'], 'n_threads_batch': tuned['n_threads_batch']}
+            )
+            llm.draft_model = draft_model
+            if draft_model is not None:
+                print(f"추측 디코딩 활성화: {draft_model.name} "
+                      f"(예측 토큰 수: {config.get('SPECULATIVE_NUM_PRED_TOKENS', 10)})")
+        return llm
+
+    except Exception as e:
+        print(f"모델 로딩 실패: {e}")
+        raise
+
+
+def get_default_model_key(config: Optional[Dict[str, Any]] = None) -> ModelKey:
+    """설정(MODEL_PATH, MODEL_CONTEXT_SIZE, GPU)에 해당하는 기본 모델 키"""
+    config = config or get_config()
+    return make_model_key(get_model_path(), config['MODEL_CONTEXT_SIZE'], resolve_gpu_layers(config))
+
+
+def _acquire_instance(config: Dict[str, Any], key: ModelKey, owner: str, n_threads: Optional[int] = None):
+    """
+    인스턴스 로딩 (메모리 예산: 인스턴스마다 KV 캐시 + 계산 버퍼, 가중치는 모델 경로당 한 번)
+    """
+    return model_registry.acquire(
+        key,
+        lambda: _load_llama(config, key, resolve_thread_count(config), n_threads=n_threads),
+        owner=owner,
+        size_bytes=instance_memory_bytes(config, key.model_path, key.n_ctx),
+        weights_bytes=estimate_model_bytes(key.model_path),
+    )
+
+
+def get_default_model(owner: str = 'default'):
+    """
+    설정의 기본 요약 모델을 레지스트리에서 가져옴 (모든 get_llm_instance()의 공통 경로)
+
+    Args:
+        owner (str): 참조 주체 이름 (같은 owner의 반복 호출은 참조 한 번으로 센다)
+    """
+    config = get_config()
+    return _acquire_instance(config, get_default_model_key(config), owner)
+
+
+def get_pool_model(instance: int, n_threads: int, owner: str, model_path: Optional[str] = None):
+    """
+    추론 풀용 모델 인스턴스를 레지스트리에서 가져옴
+
+    풀 인스턴스는 워커 하나가 전담하므로 get_default_model()의 기본 인스턴스와 키를 나누지 않는다
+    (Llama는 동시 호출에 안전하지 않음). 인스턴스마다 별도의 Llama(컨텍스트, KV 캐시)를 만들지만
+    가중치는 mmap으로 공유되므로 메모리 예산에는 가중치를 모델 경로당 한 번만 더한다.
+
+    Args:
+        instance (int): 풀 안의 인스턴스 번호 (0부터)
+        model_path (str, optional): 기본 모델 대신 로딩할 GGUF (모델 라우터의 작은 모델, 추측 디코딩 없음)
+    """
+    config = get_config()
+    default_key = get_default_model_key(config)
+    if model_path is not None:
+        default_key = make_model_key(model_path, default_key.n_ctx, default_key.n_gpu_layers)
+        config = dict(config, SPECULATIVE_MODE='off')
+    return _acquire_instance(config, default_key._replace(instance=instance + 1), owner, n_threads=n_threads)
+
+
+def _load_llama_weights(config: Dict[str, Any], key: ModelKey):
+    """컨텍스트(KV 캐시) 없이 가중치만 로딩 (_internals.LlamaModel, 배치 엔진이 자체 컨텍스트를 만듦)"""
+    import llama_cpp
+    from llama_cpp import _internals
+
+    print(f"모델 가중치 로딩 시작: {key.model_path}")
+    params = llama_cpp.llama_model_default_params()
+    params.n_gpu_layers = 0x7FFFFFFF if key.n_gpu_layers == -1 else key.n_gpu_layers
+    params.use_mmap = True
+    params.use_mlock = bool(config.get('MODEL_USE_MLOCK', False))
+    model = _internals.LlamaModel(path_model=key.model_path, params=params, verbose=False)
+    print("모델 가중치 로딩 완료")
+    return model
+
+
+def get_model_weights(owner: str, model_path: Optional[str] = None):
+    """
+    가중치만 로드한 llama_model을 레지스트리에서 가져옴 (메모리 예산에는 가중치만, 컨텍스트는 사용하는 쪽 몫)
+
+    Args:
+        model_path (str, optional): 기본 모델 대신 로딩할 GGUF
+    """
+    config = get_config()
+    default_key = get_default_model_key(config)
+    key = make_model_key(model_path or default_key.model_path, 0, default_key.n_gpu_layers, WEIGHTS_ONLY_INSTANCE)
+    return model_registry.acquire(key, lambda: _load_llama_weights(config, key), owner=owner, size_bytes=0,
+                                  weights_bytes=estimate_model_bytes(key.model_path))
@@ -0,0 +1,257 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from config import get_config
+from metrics import metrics
+from summarizer_backend import SummarizerBackend
+
+# 요청 data에 라우팅 결정을 기록하는 키 (process_request가 응답 route 필드로 옮김)
+ROUTE_KEY = '_route'
+
+# 라우팅 대상 모델 이름
+LARGE = 'large'
+SMALL = 'small'
+
+# 통화 내용이 아니라 그때의 부하로 작은 모델을 고른 사유 (같은 대화도 다음에는 큰 모델 결과가 나올 수 있음)
+LOAD_DEPENDENT_REASONS = ('degraded', 'slo')
+
+_local = threading.local()
+
+
+class RouteDecision(NamedTuple):
+    """요청 하나의 모델 선택 결과"""
+    model: str
+    reason: str
+    prompt_tokens: int
+    queue_depth: int
+    estimated_seconds: float
+
+    def to_response(self) -> Dict[str, Any]:
+        """응답 본문용 route 필드 (camelCase)"""
+        return {
+            'model': self.model,
+            'reason': self.reason,
+            'promptTokens': self.prompt_tokens,
+            'queueDepth': self.queue_depth,
+            'estimatedSeconds': round(self.estimated_seconds, 2),
+        }
+
+
+class ModelRouter:
+    """
+    통화 길이와 대기열 상황으로 요청마다 모델 크기를 선택하는 라우터
+
+    추론 인스턴스마다 큰 모델(기본 모델)과 작은 모델 백엔드를 함께 두고, 워커는 요청마다 둘 중 하나를 쓴다.
+    선택 순서:
+    1. 작은 모델이 없으면 큰 모델 (single_model)
+    2. 중요 서비스(svcKey)는 큰 모델 (important)
+    3. 작은 모델 한도(small_max_prompt_tokens)를 넘으면 큰 모델 (too_long_for_small)
+    4. 짧은 통화(short_prompt_tokens 이하)는 작은 모델 (short_call)
+    5. 과부하 성능 저하 단계(degraded)면 작은 모델 (degraded)
+    6. 큰 모델 예상 지연(대기 + 처리)이 SLO를 넘으면 작은 모델 (slo)
+    7. 나머지는 큰 모델 (long_call)
+
+    처리 시간은 모델별 프롬프트 토큰당 ms의 지수 이동 평균으로 추정하며 요청이 끝날 때마다 갱신한다.
+    """
+
+    def __init__(self, backends: Dict[str, List[SummarizerBackend]], short_prompt_tokens: int = 1200,
+                 small_max_prompt_tokens: int = 4000, latency_slo_seconds: float = 30.0,
+                 ms_per_token: Optional[Dict[str, float]] = None, important_svc_keys=(),
+                 smoothing: float = 0.2):
+        if not backends.get(LARGE):
+            raise ValueError("모델 라우터에 큰 모델 백엔드가 없습니다")
+        self.backends = backends
+        self.short_prompt_tokens = int(short_prompt_tokens)
+        self.small_max_prompt_tokens = int(small_max_prompt_tokens)
+        self.latency_slo_seconds = float(latency_slo_seconds)
+        self.important_svc_keys = {str(key) for key in important_svc_keys if str(key)}
+        self.smoothing = float(smoothing)
+        self._ms_per_token = {LARGE: 10.0, SMALL: 3.0}
+        self._ms_per_token.update(ms_per_token or {})
+        # 최근 요청 처리 시간 (대기열 앞 요청들이 끝나기까지의 시간 추정)
+        self._service_seconds: Optional[float] = None
+        self._lock = threading.Lock()
+        self._routes: Dict[str, int] = {}
+
+    @property
+    def workers(self) -> int:
+        return len(self.backends[LARGE])
+
+    def has_small(self) -> bool:
+        return bool(self.backends.get(SMALL))
+
+    def backend(self, model: str, index: int) -> SummarizerBackend:
+        return self.backends[model][index]
+
+    def estimate_seconds(self, model: str, prompt_tokens: int, queue_depth: int) -> float:
+        """대기열 앞 요청 처리 시간 + 이 요청 처리 시간 추정 (초)"""
+        with self._lock:
+            rate = self._ms_per_token[model]
+            service = self._service_seconds
+        own = rate * prompt_tokens / 1000
+        wait = queue_depth / self.workers * (service if service is not None else own)
+        return wait + own
+
+    def choose(self, prompt_tokens: int, queue_depth: int = 0,
+               data: Optional[Dict[str, Any]] = None, degraded: bool = False) -> RouteDecision:
+        """요청 하나의 모델 선택 (degraded: 과부하로 가능하면 작은 모델 사용)"""
+        svc_key = str(((data or {}).get('metadata') or {}).get('svcKey', ''))
+        large_seconds = self.estimate_seconds(LARGE, prompt_tokens, queue_depth)
+
+        def decide(model, reason):
+            seconds = large_seconds if model == LARGE else self.estimate_seconds(SMALL, prompt_tokens, queue_depth)
+            return RouteDecision(model, reason, prompt_tokens, queue_depth, seconds)
+
+        if not self.has_small():
+            decision = decide(LARGE, 'single_model')
+        elif svc_key and svc_key in self.important_svc_keys:
+            decision = decide(LARGE, 'important')
+        elif prompt_tokens > self.small_max_prompt_tokens:
+            decision = decide(LARGE, 'too_long_for_small')
+        elif prompt_tokens <= self.short_prompt_tokens:
+            decision = decide(SMALL, 'short_call')
+        elif degraded:
+            decision = decide(SMALL, 'degraded')
+        elif large_seconds > self.latency_slo_seconds:
+            decision = decide(SMALL, 'slo')
+        else:
+            decision = decide(LARGE, 'long_call')
+
+        with self._lock:
+            self._routes[decision.model] = self._routes.get(decision.model, 0) + 1
+        metrics.increment(f'router.routes.{decision.model}')
+        metrics.increment(f'router.reason.{decision.reason}')
+        return decision
+
+    def observe(self, model: str, prompt_tokens: int, seconds: float):
+        """처리 시간으로 모델별 토큰당 ms와 최근 요청 처리 시간 갱신"""
+        if prompt_tokens <= 0 or seconds <= 0:
+            return
+        alpha = self.smoothing
+        with self._lock:
+            rate = seconds * 1000 / prompt_tokens
+            self._ms_per_token[model] = (1 - alpha) * self._ms_per_token[model] + alpha * rate
+            self._service_seconds = (seconds if self._service_seconds is None
+                                     else (1 - alpha) * self._service_seconds + alpha * seconds)
+            metrics.set_gauge(f'router.ms_per_token.{model}', self._ms_per_token[model])
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'routes': dict(self._routes),
+                'ms_per_token': dict(self._ms_per_token),
+                'service_seconds': self._service_seconds,
+            }
+
+
+def bind_thread_router(router: Optional[ModelRouter], index: int = 0,
+                       queue_depth: Optional[Callable[[], int]] = None):
+    """
+    현재 워커 스레드가 사용할 라우터와 추론 인스턴스 번호 지정 (None이면 라우팅하지 않음)
+
+    Args:
+        queue_depth (callable): 현재 대기 중인 요청 수 (워커 요청 큐, 파이프라인 추론 단계 입력 큐)
+    """
+    _local.router = router
+    _local.index = index
+    _local.queue_depth = queue_depth
+
+
+@contextmanager
+def routed_request(data: Dict[str, Any], prompt_tokens: Optional[int] = None, degraded: bool = False):
+    """
+    현재 스레드에 라우터가 지정되어 있으면 요청의 모델을 선택하고 with 블록 동안 그 백엔드를 사용
+
+    선택 결과는 data[ROUTE_KEY]에 기록하고, 블록이 끝나면 처리 시간으로 라우터 추정치를 갱신한다.
+    with 값은 RouteDecision (라우터가 없으면 None).
+
+    Args:
+        prompt_tokens (int, optional): 큰 모델 토크나이저로 센 프롬프트 토큰 수. None이면 여기서 계산
+        degraded (bool): 과부하 성능 저하 단계(SMALL_MODEL 이상)이므로 가능하면 작은 모델 사용
+    """
+    from gemma_summarizer import (build_summary_prompt, clean_conversation_text, get_thread_backend,
+                                  set_thread_backend)
+    from long_call_summarizer import count_tokens
+    from topic_segmentation import turn_start_times
+
+    router = getattr(_local, 'router', None)
+    if router is None:
+        yield None
+        return
+
+    index = _local.index
+    large = router.backend(LARGE, index)
+    if prompt_tokens is None:
+        prompt = build_summary_prompt(clean_conversation_text(data.get('text', '')), turn_start_times(data))
+        prompt_tokens = count_tokens(large, prompt)
+    queue_depth = int(_local.queue_depth()) if _local.queue_depth is not None else 0
+    decision = router.choose(prompt_tokens, queue_depth, data, degraded=degraded)
+    data[ROUTE_KEY] = decision
+    print(f"모델 라우팅: {decision.model} ({decision.reason}, 프롬프트 {prompt_tokens}토큰, "
+          f"대기 {queue_depth}건, 예상 {decision.estimated_seconds:.1f}초)")
+
+    previous = get_thread_backend()
+    set_thread_backend(router.backend(decision.model, index))
+    start = time.time()
+    try:
+        yield decision
+    finally:
+        router.observe(decision.model, prompt_tokens, time.time() - start)
+        set_thread_backend(previous)
+
+
+def create_model_router(pool, config: Optional[Dict[str, Any]] = None) -> Optional[ModelRouter]:
+    """
+    설정으로 모델 라우터 생성 (MODEL_ROUTER_ENABLED가 아니면 None)
+
+    추론 풀 인스턴스마다 작은 모델(MODEL_ROUTER_SMALL_MODEL_PATH) 컨텍스트를 하나씩 더 만들고
+    같은 인스턴스 번호의 큰 모델과 짝지어 같은 워커가 사용한다 (가중치는 mmap 공유).
+    MODEL_BACKEND=fake이면 작은 모델은 토큰당 속도 비율만큼 빠른 FakeBackend.
+    """
+    from model_registry import get_pool_model
+    from summarizer_backend import LlamaCppBackend, create_fake_backend
+
+    config = config or get_config()
+    if not config.get('MODEL_ROUTER_ENABLED', False):
+        return None
+    if config.get('BATCH_ENGINE_ENABLED', False) and str(config.get('MODEL_BACKEND', 'llama_cpp')).lower() != 'fake':
+        print("⚠️ 배치 엔진에서는 모델 라우터를 사용할 수 없어 큰 모델만 사용합니다")
+        return None
+
+    large_ms = float(config.get('MODEL_ROUTER_LARGE_MS_PER_TOKEN', 10.0))
+    small_ms = float(config.get('MODEL_ROUTER_SMALL_MS_PER_TOKEN', 3.0))
+    small_path = config.get('MODEL_ROUTER_SMALL_MODEL_PATH', '')
+    if small_path and not os.path.isabs(small_path):
+        small_path = os.path.join(config.get('WORKSPACE_DIR', '.'), small_path)
+    small_backends: List[SummarizerBackend] = []
+    if str(config.get('MODEL_BACKEND', 'llama_cpp')).lower() == 'fake':
+        speedup = large_ms / small_ms if small_ms > 0 else 1.0
+        fake_config = dict(
+            config,
+            FAKE_BACKEND_TOKENS_PER_SECOND=float(config.get('FAKE_BACKEND_TOKENS_PER_SECOND', 20.0)) * speedup,
+            FAKE_BACKEND_PROMPT_TOKENS_PER_SECOND=(
+                float(config.get('FAKE_BACKEND_PROMPT_TOKENS_PER_SECOND', 200.0)) * speedup),
+        )
+        small_backends = [create_fake_backend(fake_config) for _ in range(pool.size)]
+    elif small_path:
+        for index in range(pool.size):
+            llm = get_pool_model(index, pool.thread_slices[index], owner=f'model_router.{index}',
+                                 model_path=small_path)
+            small_backends.append(LlamaCppBackend(llm))
+
+    important = [key.strip() for key in str(config.get('MODEL_ROUTER_IMPORTANT_SVC_KEYS', '')).split(',')]
+    router = ModelRouter(
+        {LARGE: list(pool.backends), SMALL: small_backends},
+        short_prompt_tokens=int(config.get('MODEL_ROUTER_SHORT_PROMPT_TOKENS', 1200)),
+        small_max_prompt_tokens=int(config.get('MODEL_ROUTER_SMALL_MAX_PROMPT_TOKENS', 4000)),
+        latency_slo_seconds=float(config.get('MODEL_ROUTER_LATENCY_SLO_SECONDS', 30.0)),
+        ms_per_token={LARGE: large_ms, SMALL: small_ms},
+        important_svc_keys=important,
+    )
+    print(f"모델 라우터 생성: 작은 모델 {small_path if small_backends else '없음'} "
+          f"(짧은 통화 {router.short_prompt_tokens}토큰 이하, 작은 모델 한도 {router.small_max_prompt_tokens}토큰, "
+          f"SLO {router.latency_slo_seconds:.0f}초)")
+    return router
@@ -5,6 +5,9 @@ from typing import Dict, Any, Optional
 class ResponsePostprocessor:
     """Gemma 응답 데이터 후처리 클래스"""
     
+    # summary 최대 바이트 수 (초과 시 [재질의 필요] 표시, 한글 기준 약 40자)
+    SUMMARY_MAX_BYTES = 120
+    
     @staticmethod
     def select_best_sentence(sentences: list) -> str:
         """
@@ -18,44 +21,50 @@ class ResponsePostprocessor:
             return sentences[0]
         
         # 각 문장의 점수 계산
-        sentence_scores = []
-        for sentence in sentences:
-            score = 0
-            
-            # 1. 길이 점수 (너무 짧거나 긴 것 제외)
-            length = len(sentence.strip())
-            if 10 <= length <= 50:
-                score += 3
-            elif 5 <= length <= 80:
-                score += 2
-            else:
-                score += 1
-            
-            # 2. 핵심 키워드 포함 점수
-            keywords = ['문의', '답변', '안내', '설명', '처리', '해결', '확인', '검토', '분석']
-            for keyword in keywords:
-                if keyword in sentence:
-                    score += 2
-                    break
-            
-            # 3. 명확성 점수 (구체적인 동사 포함)
-            action_words = ['문의', '답변', '안내', '설명', '처리', '해결', '확인', '검토', '분석', '제공', '발급', '이용']
-            for word in action_words:
-                if word in sentence:
-                    score += 1
-            
-            # 4. 부정적 표현 제외
-            negative_words = ['불가능', '불가', '오류', '오류', '실패', '실패', '문제', '문제']
-            for word in negative_words:
-                if word in sentence:
-                    score -= 1
-            
-            sentence_scores.append((sentence, score))
+        sentence_scores = [(sentence, ResponsePostprocessor.score_sentence(sentence)) for sentence in sentences]
         
         # 가장 높은 점수의 문장 선택
         best_sentence = max(sentence_scores, key=lambda x: x[1])
         return best_sentence[0]
     
+    @staticmethod
+    def score_sentence(sentence: str) -> int:
+        """
+        요약 문장 적합도 점수 (select_best_sentence, 추출 요약의 문장 선택에서 공통 사용)
+        가중치 기준: 길이, 핵심 키워드 포함 여부, 명확성, 부정적 표현
+        """
+        score = 0
+        
+        # 1. 길이 점수 (너무 짧거나 긴 것 제외)
+        length = len(sentence.strip())
+        if 10 <= length <= 50:
+            score += 3
+        elif 5 <= length <= 80:
+            score += 2
+        else:
+            score += 1
+        
+        # 2. 핵심 키워드 포함 점수
+        keywords = ['문의', '답변', '안내', '설명', '처리', '해결', '확인', '검토', '분석']
+        for keyword in keywords:
+            if keyword in sentence:
+                score += 2
+                break
+        
+        # 3. 명확성 점수 (구체적인 동사 포함)
+        action_words = ['문의', '답변', '안내', '설명', '처리', '해결', '확인', '검토', '분석', '제공', '발급', '이용']
+        for word in action_words:
+            if word in sentence:
+                score += 1
+        
+        # 4. 부정적 표현 제외
+        negative_words = ['불가능', '불가', '오류', '오류', '실패', '실패', '문제', '문제']
+        for word in negative_words:
+            if word in sentence:
+                score -= 1
+        
+        return score
+    
     @staticmethod
     def convert_to_noun_form(text: str) -> str:
         """
@@ -206,7 +215,7 @@ class ResponsePostprocessor:
             print(f"📝 convert_to_noun_form 변경 없음: '{cleaned}'")
         
         # 120 byte 초과 시 재질의 필요 표시 (한글 기준 약 40자)
-        if len(cleaned.encode('utf-8')) > 120:
+        if len(cleaned.encode('utf-8')) > ResponsePostprocessor.SUMMARY_MAX_BYTES:
             return f"[재질의 필요] {cleaned}"
         
         return cleaned
@@ -1,6 +1,6 @@
 import json
 import re
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 from llm_utils import correct_conversation_with_gemma
 
 class STTPreprocessor:
@@ -17,14 +17,26 @@ class STTPreprocessor:
         Returns:
             List[str]: 중복이 제거된 대화 리스트
         """
+        return [line for _, line in STTPreprocessor.remove_duplicates_with_positions(conversation_list)]
+    
+    @staticmethod
+    def remove_duplicates_with_positions(conversation_list: List[str]) -> List[Tuple[int, str]]:
+        """
+        remove_duplicates와 같이 중복을 제거하고 남은 줄마다 원래 위치를 함께 반환
+        (병합된 줄은 먼저 나온 줄의 위치)
+        
+        Returns:
+            List[Tuple[int, str]]: (원래 위치, 줄) 리스트
+        """
         if not conversation_list:
             return []
         
         cleaned_list = []
+        positions = []
         prev_speaker = None
         prev_text = None
         
-        for line in conversation_list:
+        for position, line in enumerate(conversation_list):
             # 화자와 텍스트 분리
             if " > " in line:
                 speaker, text = line.split(" > ", 1)
@@ -56,10 +68,11 @@ class STTPreprocessor:
                 continue
             
             cleaned_list.append(line)
+            positions.append(position)
             prev_speaker = speaker
             prev_text = text
         
-        return cleaned_list
+        return list(zip(positions, cleaned_list))
     
     @staticmethod
     def clean_text(text: str) -> str:
@@ -81,12 +94,13 @@ class STTPreprocessor:
         return text
     
     @staticmethod
-    def preprocess_stt_result(data: Dict[str, Any]) -> str:
+    def preprocess_stt_result(data: Dict[str, Any], conversation: Optional[List[str]] = None) -> str:
         """
         STT 결과를 대화 형태로 전처리
         
         Args:
             data (Dict[str, Any]): STT 결과 데이터
+            conversation (List[str], optional): build_conversation으로 이미 만든 대화 줄 (없으면 여기서 생성)
             
         Returns:
             str: 전처리된 대화 텍스트
@@ -98,34 +112,8 @@ class STTPreprocessor:
             if not stt_result_list:
                 return "대화 내용이 없습니다."
             
-            # 대화 텍스트 생성
-            conversation = []
-            
-            for item in stt_result_list:
-                transcript = item.get('transcript', '').strip()
-                rec_type = item.get('recType', 0)
-                
-                if not transcript:
-                    continue
-                
-                # 텍스트 정리
-                transcript = STTPreprocessor.clean_text(transcript)
-                
-                if not transcript:
-                    continue
-                
-                # recType에 따라 화자 구분
-                if rec_type == 4:
-                    speaker = "나"
-                elif rec_type == 2:
-                    speaker = "상대방"
-                else:
-                    speaker = f"화자{rec_type}"
-                
-                conversation.append(f"{speaker} > {transcript}")
-            
-            # 중복 제거
-            conversation = STTPreprocessor.remove_duplicates(conversation)
+            if conversation is None:
+                conversation, _ = STTPreprocessor.build_conversation(data)
             
             # 대화 텍스트 결합
             result = "\n".join(conversation)
@@ -142,6 +130,49 @@ class STTPreprocessor:
             print(f"전처리 중 오류 발생: {e}")
             return f"전처리 오류: {str(e)}"
     
+    @staticmethod
+    def build_conversation(data: Dict[str, Any]) -> Tuple[List[str], List[Optional[int]]]:
+        """
+        sttResultList를 '화자 > 발화' 줄 목록과 줄별 시작 시각(startTime, ms) 목록으로 변환 (중복 제거 후)
+        
+        Args:
+            data (Dict[str, Any]): STT 결과 데이터
+            
+        Returns:
+            tuple: (대화 줄 리스트, 시작 시각 리스트)
+        """
+        # 대화 텍스트 생성
+        conversation = []
+        start_times = []
+        
+        for item in data.get('sttResultList', []):
+            transcript = item.get('transcript', '').strip()
+            rec_type = item.get('recType', 0)
+            
+            if not transcript:
+                continue
+            
+            # 텍스트 정리
+            transcript = STTPreprocessor.clean_text(transcript)
+            
+            if not transcript:
+                continue
+            
+            # recType에 따라 화자 구분
+            if rec_type == 4:
+                speaker = "나"
+            elif rec_type == 2:
+                speaker = "상대방"
+            else:
+                speaker = f"화자{rec_type}"
+            
+            conversation.append(f"{speaker} > {transcript}")
+            start_times.append(item.get('startTime'))
+        
+        # 중복 제거
+        kept = STTPreprocessor.remove_duplicates_with_positions(conversation)
+        return [line for _, line in kept], [start_times[position] for position, _ in kept]
+    
     @staticmethod
     def extract_metadata(data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -188,8 +219,12 @@ def preprocess_request_data(data: Dict[str, Any]) -> Dict[str, Any]:
         # 메타데이터 추출
         metadata = STTPreprocessor.extract_metadata(data)
         
-        # 대화 텍스트 전처리
-        conversation_text = STTPreprocessor.preprocess_stt_result(data)
+        # 대화 줄과 줄별 시작 시각 (시작 시각은 주제 구간 나누기에서 발화 사이 침묵 추정에 사용)
+        conversation, start_times = STTPreprocessor.build_conversation(data)
+        metadata['turn_start_times'] = start_times
+        
+        # 대화 텍스트 전처리 (같은 대화 줄 재사용)
+        conversation_text = STTPreprocessor.preprocess_stt_result(data, conversation)
         
         # 새로운 형식으로 변환
         processed_data = {
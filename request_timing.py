@@ -0,0 +1,156 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from metrics import metrics
+
+# 요청 data에 추론 대기열에 넣은 시각을 기록하는 키 (대기 시간 계산용, 응답에는 포함되지 않음)
+ENQUEUED_AT_KEY = '_enqueued_at'
+
+# 내부 이름 → 응답 timing 필드 이름 (응답 본문은 camelCase)
+TIMING_FIELDS = {
+    'queue_wait_ms': 'queueWaitMs',
+    'model_wait_ms': 'modelWaitMs',
+    'prompt_tokens': 'promptTokens',
+    'prompt_eval_tokens': 'promptEvalTokens',
+    'prompt_eval_ms': 'promptEvalMs',
+    'ttft_ms': 'timeToFirstTokenMs',
+    'generated_tokens': 'generatedTokens',
+    'decode_ms': 'decodeMs',
+    'decode_tokens_per_second': 'decodeTokensPerSecond',
+    'inference_ms': 'inferenceMs',
+    'json_repair_ms': 'jsonRepairMs',
+    'postprocess_ms': 'postprocessMs',
+    'requery_ms': 'requeryMs',
+    'total_ms': 'totalMs',
+}
+
+# 병목 판정에 사용하는 구간 (이 중 가장 긴 구간)
+_PHASES = {
+    'queue_wait_ms': 'queue',
+    'model_wait_ms': 'model_wait',
+    'prompt_eval_ms': 'prefill',
+    'decode_ms': 'decode',
+    'json_repair_ms': 'repair',
+    'postprocess_ms': 'postprocess',
+    'requery_ms': 'requery',
+}
+
+_local = threading.local()
+
+
+class RequestTiming:
+    """
+    요청 하나의 처리 시간 분석
+
+    llama.cpp 성능 카운터(프롬프트 평가/디코딩 시간과 토큰 수)와 단계별 타이머를 모아
+    느린 요청이 prefill/decode/JSON 복구 중 어디에 시간을 썼는지 구분한다.
+    단계별 파이프라인에서는 추론 단계에서 만든 객체를 후처리 단계로 넘겨 이어서 기록한다.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.values: Dict[str, float] = {}
+
+    def add(self, name: str, value: float):
+        """구간 시간/토큰 수 누적 (재시도, 이어서 생성처럼 여러 번 실행되는 구간)"""
+        self.values[name] = self.values.get(name, 0) + value
+
+    def set(self, name: str, value: float):
+        self.values[name] = value
+
+    def set_default(self, name: str, value: float):
+        """아직 기록되지 않은 경우에만 기록 (성능 카운터 값이 우선)"""
+        self.values.setdefault(name, value)
+
+    @contextmanager
+    def stage(self, name: str):
+        """with 블록 실행 시간을 name(ms)에 누적"""
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.add(name, (time.time() - start) * 1000)
+
+    def mark_queue_wait(self, data: Dict[str, Any]):
+        """대기열에 넣은 시각(ENQUEUED_AT_KEY)부터 지금까지를 대기 시간으로 기록 (한 번만)"""
+        enqueued_at = data.get(ENQUEUED_AT_KEY)
+        if enqueued_at is not None and 'queue_wait_ms' not in self.values:
+            self.values['queue_wait_ms'] = max(0.0, (time.time() - enqueued_at) * 1000)
+
+    def record_perf(self, before: Optional[Dict[str, float]], after: Optional[Dict[str, float]]):
+        """백엔드 성능 카운터 스냅샷 두 개의 차이를 프롬프트 평가/디코딩 시간으로 누적"""
+        if not before or not after:
+            return
+        self.add('prompt_eval_ms', after['prompt_eval_ms'] - before['prompt_eval_ms'])
+        self.add('prompt_eval_tokens', after['prompt_eval_tokens'] - before['prompt_eval_tokens'])
+        self.add('decode_ms', after['eval_ms'] - before['eval_ms'])
+
+    def bottleneck(self) -> Optional[str]:
+        """가장 오래 걸린 구간 이름 (queue, model_wait, prefill, decode, repair, postprocess, requery)"""
+        phases = [(self.values[name], phase) for name, phase in _PHASES.items() if self.values.get(name, 0) > 0]
+        return max(phases)[1] if phases else None
+
+    def finish(self) -> Dict[str, Any]:
+        """총 시간과 디코딩 속도를 계산하고 지표에 기록한 뒤 내부 이름 기준 값 반환"""
+        self.set('total_ms', (time.time() - self.started_at) * 1000)
+        if 'ttft_ms' not in self.values and self.values.get('prompt_eval_ms', 0) > 0:
+            # 스트리밍이 아니면 첫 토큰은 프롬프트 평가 직후 생성됨
+            self.set('ttft_ms', self.values['prompt_eval_ms'])
+        generated = self.values.get('generated_tokens', 0)
+        if generated and self.values.get('decode_ms', 0) > 0:
+            self.set('decode_tokens_per_second', generated / (self.values['decode_ms'] / 1000))
+        for name, value in self.values.items():
+            metrics.observe(f'timing.{name}', value)
+        bottleneck = self.bottleneck()
+        if bottleneck:
+            metrics.increment(f'timing.bottleneck.{bottleneck}')
+        return dict(self.values)
+
+    def to_response(self) -> Dict[str, Any]:
+        """응답 본문용 timing 필드 (기록된 값만, ms는 소수 첫째 자리까지)"""
+        timing = {TIMING_FIELDS[name]: round(value, 1) if isinstance(value, float) else value
+                  for name, value in self.values.items() if name in TIMING_FIELDS}
+        bottleneck = self.bottleneck()
+        if bottleneck:
+            timing['bottleneck'] = bottleneck
+        return timing
+
+    def describe(self) -> str:
+        parts = [f"{name}={value:.1f}" if isinstance(value, float) else f"{name}={value}"
+                 for name, value in self.values.items()]
+        return ', '.join(parts) + (f" (병목: {self.bottleneck()})" if self.bottleneck() else '')
+
+
+def begin_timing(timing: Optional[RequestTiming] = None) -> Optional[RequestTiming]:
+    """
+    현재 스레드의 요청 시간 분석 시작 (timing이 없으면 새로 만듦)
+
+    Returns:
+        이전 객체 (end_timing에 넘겨 복원)
+    """
+    previous = getattr(_local, 'timing', None)
+    _local.timing = timing or RequestTiming()
+    return previous
+
+
+def end_timing(previous: Optional[RequestTiming] = None):
+    """begin_timing 이전 상태로 복원"""
+    _local.timing = previous
+
+
+def current_timing() -> Optional[RequestTiming]:
+    """현재 스레드의 요청 시간 분석 (없으면 None)"""
+    return getattr(_local, 'timing', None)
+
+
+@contextmanager
+def timed_stage(name: str):
+    """현재 요청의 구간 시간 기록 (요청 시간 분석이 없으면 아무것도 하지 않음)"""
+    timing = current_timing()
+    if timing is None:
+        yield
+        return
+    with timing.stage(name):
+        yield
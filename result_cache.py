@@ -0,0 +1,263 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from config import get_config
+from metrics import metrics
+from model_router import LOAD_DEPENDENT_REASONS, SMALL
+
+_SPACES = re.compile(r'\s+')
+
+
+def normalize_transcript(text: str) -> str:
+    """줄마다 공백을 정리하고 빈 줄을 제거 (공백 차이만 있는 재전송도 같은 키)"""
+    lines = (_SPACES.sub(' ', line).strip() for line in (text or '').split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+
+def prompt_template_version() -> str:
+    """요약 프롬프트 템플릿과 샘플링 파라미터의 해시 (템플릿이 바뀌면 캐시 키도 바뀜)"""
+    from gemma_summarizer import SUMMARY_SAMPLING_PARAMS, build_summary_prompt
+
+    template = build_summary_prompt('\0') + json.dumps(SUMMARY_SAMPLING_PARAMS, sort_keys=True)
+    return hashlib.sha1(template.encode('utf-8')).hexdigest()[:12]
+
+
+def make_cache_key(text: str, model_id: str, template_version: str) -> str:
+    """전처리된 대화 + 모델 + 프롬프트 템플릿 버전으로 캐시 키 생성"""
+    payload = '\0'.join((normalize_transcript(text), model_id, template_version))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class SQLiteResultStore:
+    """
+    결과 캐시 디스크 계층 (SQLite, 프로세스 재시작 후에도 유지)
+
+    TTL이 지난 항목은 조회하지 않고, 항목 수가 max_entries를 넘으면 오래 사용하지 않은 것부터 삭제한다.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float, max_entries: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if self.ttl_seconds > 0 and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return row[0]
+
+    def put(self, key: str, value: str):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)", (key, value, now, now))
+            if self.ttl_seconds > 0:
+                self._conn.execute("DELETE FROM results WHERE created < ?", (now - self.ttl_seconds,))
+            if self.max_entries > 0:
+                self._conn.execute(
+                    "DELETE FROM results WHERE key NOT IN "
+                    "(SELECT key FROM results ORDER BY accessed DESC LIMIT ?)", (self.max_entries,)
+                )
+            self._conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ResultCache:
+    """
+    요청 결과 캐시 (메모리 LRU + 선택적 SQLite 계층)
+
+    값은 응답의 response 본문(result/failReason/summary)이며, 적중 시 요청의 transactionid/sequenceno로
+    응답을 다시 만든다. 디스크 계층 적중은 메모리 계층으로 올린다.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 0.0, store: Optional[SQLiteResultStore] = None):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.store = store
+        self._lock = threading.Lock()
+        # key -> (저장 시각, 직렬화된 값)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._memory_bytes = 0
+
+    def get(self, key: str, record_miss: bool = True) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds > 0 and now - entry[0] > self.ttl_seconds:
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                metrics.increment('result_cache.hits')
+                metrics.increment('result_cache.memory_hits')
+                return json.loads(entry[1])
+
+        value = self.store.get(key) if self.store is not None else None
+        if value is not None:
+            self._put_memory(key, value)
+            metrics.increment('result_cache.hits')
+            metrics.increment('result_cache.disk_hits')
+            return json.loads(value)
+        if record_miss:
+            metrics.increment('result_cache.misses')
+        return None
+
+    def put(self, key: str, body: Dict[str, Any]):
+        value = json.dumps(body, ensure_ascii=False)
+        self._put_memory(key, value)
+        if self.store is not None:
+            try:
+                self.store.put(key, value)
+            except sqlite3.Error as e:
+                print(f"결과 캐시 디스크 저장 실패: {e}")
+
+    def _put_memory(self, key: str, value: str):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.time(), value)
+            self._memory_bytes += len(key) + len(value.encode('utf-8'))
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                metrics.increment('result_cache.evictions')
+            metrics.set_gauge('result_cache.entries', len(self._entries))
+            metrics.set_gauge('result_cache.memory_bytes', self._memory_bytes)
+
+    def _remove(self, key: str):
+        _, value = self._entries.pop(key)
+        self._memory_bytes -= len(key) + len(value.encode('utf-8'))
+
+    def get_stats(self) -> Dict[str, Any]:
+        hits = metrics.get_counter('result_cache.hits')
+        misses = metrics.get_counter('result_cache.misses')
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'memory_bytes': self._memory_bytes,
+                'disk_entries': self.store.count() if self.store is not None else 0,
+                'hits': hits,
+                'misses': misses,
+                'hit_ratio': hits / (hits + misses) if hits + misses else 0.0,
+            }
+
+
+_cache_lock = threading.Lock()
+_cache: Optional[ResultCache] = None
+_identity: Optional[tuple] = None
+
+
+def _get_identity() -> tuple:
+    """(모델 식별자, 프롬프트 템플릿 버전) - 프로세스에서 한 번 계산"""
+    global _identity
+    if _identity is None:
+        config = get_config()
+        model_id = f"{config.get('MODEL_BACKEND', 'llama_cpp')}:{os.path.basename(config['MODEL_PATH'])}"
+        _identity = (model_id, prompt_template_version())
+    return _identity
+
+
+def request_cache_key(data: Dict[str, Any]) -> str:
+    """전처리된 요청의 캐시 키 (결과 캐시와 진행 중 요청 병합에서 공통 사용)"""
+    model_id, template_version = _get_identity()
+    return make_cache_key(data.get('text', ''), model_id, template_version)
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """설정(RESULT_CACHE_*)으로 만든 전역 결과 캐시 (비활성화면 None)"""
+    global _cache
+    config = get_config()
+    if not config.get('RESULT_CACHE_ENABLED', True):
+        return None
+    with _cache_lock:
+        if _cache is None:
+            ttl = float(config.get('RESULT_CACHE_TTL_SECONDS', 86400))
+            store = None
+            db_path = config.get('RESULT_CACHE_DB_PATH', '')
+            if db_path:
+                if not os.path.isabs(db_path):
+                    db_path = os.path.join(config.get('WORKSPACE_DIR', '.'), db_path)
+                try:
+                    store = SQLiteResultStore(db_path, ttl, int(config.get('RESULT_CACHE_DB_MAX_ENTRIES', 100000)))
+                except sqlite3.Error as e:
+                    print(f"결과 캐시 디스크 계층 비활성화: {e}")
+            _cache = ResultCache(int(config.get('RESULT_CACHE_MAX_ENTRIES', 1000)), ttl, store)
+            print(f"결과 캐시 생성: 메모리 {_cache.max_entries}건, TTL {ttl:.0f}초, 디스크 {db_path or '없음'}")
+        return _cache
+
+
+def lookup_cached_response(data: Dict[str, Any], record_miss: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    전처리된 요청의 캐시된 응답 (없으면 None)
+
+    Args:
+        record_miss (bool): 미스를 지표에 기록할지 (뒤에서 다시 조회하는 선조회는 False)
+    """
+    cache = get_result_cache()
+    if cache is None or not (data.get('text') or '').strip():
+        return None
+    start = time.time()
+    body = cache.get(request_cache_key(data), record_miss=record_miss)
+    if body is None:
+        return None
+    metrics.observe('result_cache.hit_seconds', time.time() - start)
+    return {
+        "transactionid": data.get("transactionid", ""),
+        "sequenceno": data.get("sequenceno", "0"),
+        "returncode": "1",
+        "returndescription": "Success",
+        "response": body,
+    }
+
+
+def store_response(data: Dict[str, Any], response_data: Dict[str, Any]):
+    """
+    성공 응답만 캐시에 저장
+
+    시간 초과 부분 결과, 과부하로 품질을 낮춘 결과, 추출 요약 대체 결과, 부하 때문에 작은 모델로 보낸 결과
+    (캐시 키는 큰 모델 기준이므로 저장하면 이후 같은 대화가 모두 작은 모델 결과를 받음)는 제외한다.
+    """
+    cache = get_result_cache()
+    body = response_data.get('response', {})
+    if cache is None or body.get('result') != '0' or body.get('timedOut') or not (data.get('text') or '').strip():
+        return
+    if body.get('degradation', {}).get('level', 0) > 0 or body.get('fallback'):
+        return
+    route = body.get('route') or {}
+    if route.get('model') == SMALL and route.get('reason') in LOAD_DEPENDENT_REASONS:
+        metrics.increment('result_cache.skipped_load_routed')
+        return
+    # 처리 시간 분석, 모델 라우팅, 성능 저하 단계는 이 요청에만 해당하므로 저장하지 않음
+    excluded = ('timing', 'route', 'degradation')
+    cache.put(request_cache_key(data), {key: value for key, value in body.items() if key not in excluded})
@@ -0,0 +1,126 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from metrics import metrics
+
+
+class _Flight:
+    def __init__(self, leader_slot: int):
+        self.leader_slot = leader_slot
+        self.started_at = time.time()
+        # (slot_id, 전처리된 data)
+        self.followers: List[Tuple[int, Dict[str, Any]]] = []
+
+
+class SingleFlight:
+    """
+    진행 중 요청 병합 테이블 (같은 대화의 동시 요청은 추론을 한 번만 수행)
+
+    첫 요청(리더)만 요청 큐에 넣고, 리더가 끝나기 전에 들어온 같은 키의 요청(팔로워)은
+    리더 응답을 각자의 transactionid/sequenceno로 바꿔서 받는다.
+    리더가 응답 없이 사라진 경우(워커 오류 등)를 대비해 max_age_seconds가 지난 항목은
+    - 같은 키의 새 요청이 오면 새 리더로 교체하고 기존 팔로워는 새 리더의 응답을 받음
+    - expire_stale()로 정리하여 팔로워에게 오류 응답을 보낼 수 있게 함
+    """
+
+    def __init__(self, max_age_seconds: float = 360.0):
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self._slot_keys: Dict[int, str] = {}
+
+    def _is_stale(self, flight: _Flight, now: float) -> bool:
+        return now - flight.started_at > self.max_age_seconds
+
+    def join(self, key: str, slot_id: int, data: Dict[str, Any]) -> bool:
+        """
+        요청 등록
+
+        Returns:
+            bool: 리더이면 True (추론 큐에 넣어야 함), 진행 중인 같은 요청에 합류했으면 False
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None and self._is_stale(flight, time.time()):
+                print(f"⚠️ 응답 없는 진행 중 요청 교체 (리더 슬롯 {flight.leader_slot} → {slot_id}, "
+                      f"팔로워 {len(flight.followers)}개 인계)")
+                self._slot_keys.pop(flight.leader_slot, None)
+                metrics.increment('single_flight.expired')
+                replaced = _Flight(slot_id)
+                replaced.followers = flight.followers
+                self._flights[key] = replaced
+                self._slot_keys[slot_id] = key
+                metrics.increment('single_flight.leaders')
+                return True
+            if flight is None:
+                self._flights[key] = _Flight(slot_id)
+                self._slot_keys[slot_id] = key
+                metrics.increment('single_flight.leaders')
+                metrics.set_gauge('single_flight.in_flight', len(self._flights))
+                return True
+            flight.followers.append((slot_id, data))
+            metrics.increment('single_flight.coalesced')
+            return False
+
+    def expire_stale(self) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        max_age_seconds가 지난 항목 정리
+
+        Returns:
+            List[(slot_id, 전처리된 data)]: 응답을 받지 못한 팔로워 (호출한 쪽이 오류 응답)
+        """
+        now = time.time()
+        abandoned = []
+        with self._lock:
+            for key, flight in list(self._flights.items()):
+                if not self._is_stale(flight, now):
+                    continue
+                print(f"⚠️ 응답 없는 진행 중 요청 정리 (리더 슬롯 {flight.leader_slot}, 팔로워 {len(flight.followers)}개)")
+                del self._flights[key]
+                self._slot_keys.pop(flight.leader_slot, None)
+                metrics.increment('single_flight.expired')
+                abandoned.extend(flight.followers)
+            metrics.set_gauge('single_flight.in_flight', len(self._flights))
+        return abandoned
+
+    def complete(self, slot_id: int, response_data: Dict[str, Any]) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        리더 슬롯 응답으로 팔로워 응답을 만듦 (리더가 아닌 슬롯이면 빈 목록)
+
+        Returns:
+            List[(slot_id, response_data)]: 팔로워별 응답
+        """
+        with self._lock:
+            key = self._slot_keys.pop(slot_id, None)
+            flight = self._flights.get(key) if key is not None else None
+            if flight is None or flight.leader_slot != slot_id:
+                return []
+            del self._flights[key]
+            metrics.set_gauge('single_flight.in_flight', len(self._flights))
+        return [(follower_slot, fan_out_response(response_data, data)) for follower_slot, data in flight.followers]
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
+
+
+def fan_out_response(response_data: Dict[str, Any], data: Dict[str, Any]) -> Dict[str, Any]:
+    """리더 응답을 팔로워 요청의 transactionid/sequenceno로 복사"""
+    response = dict(response_data)
+    response['transactionid'] = data.get('transactionid', '')
+    response['sequenceno'] = data.get('sequenceno', '0')
+    return response
+
+
+_single_flight_lock = threading.Lock()
+_single_flight: Optional[SingleFlight] = None
+
+
+def get_single_flight(config: Dict[str, Any]) -> SingleFlight:
+    """전역 진행 중 요청 병합 테이블 (리더 최대 대기 시간은 MODEL_TIMEOUT의 2배)"""
+    global _single_flight
+    with _single_flight_lock:
+        if _single_flight is None:
+            _single_flight = SingleFlight(max_age_seconds=float(config.get('MODEL_TIMEOUT', 180.0)) * 2)
+        return _single_flight
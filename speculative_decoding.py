@@ -0,0 +1,209 @@
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from metrics import metrics
+
+SPECULATIVE_MODES = ('off', 'prompt_lookup', 'draft_model')
+
+# 드래프트 모델 토크나이저 호환성 확인용 문장 (한글/숫자/JSON 기호 포함)
+_VOCAB_PROBE_TEXT = '고객님 문의하신 카드 발급 건은 3일 이내 처리됩니다. {"summary": "안내"}'
+
+
+def _common_prefix_length(a: List[int], b: List[int]) -> int:
+    length = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        length += 1
+    return length
+
+
+class InstrumentedDraftModel:
+    """
+    드래프트 모델 래퍼 - 제안/수락 토큰 수를 기록하여 수락률을 계산
+
+    llama_cpp는 드래프트를 제안한 뒤 다음 호출에서 검증이 끝난 토큰열을 넘겨준다.
+    직전 제안과 새로 확정된 토큰열의 공통 접두사 길이가 수락된 토큰 수다.
+    """
+
+    def __init__(self, inner, name: str = 'prompt_lookup'):
+        self.inner = inner
+        self.name = name
+        self._last_length = 0
+        self._last_draft: List[int] = []
+
+    def __call__(self, input_ids, /, **kwargs: Any):
+        ids = [int(t) for t in input_ids]
+        self._record_verification(ids)
+
+        draft_start = time.time()
+        draft = self.inner(input_ids, **kwargs)
+        metrics.observe('speculative.draft_seconds', time.time() - draft_start)
+
+        self._last_length = len(ids)
+        self._last_draft = [int(t) for t in draft]
+        return draft
+
+    def _record_verification(self, ids: List[int]):
+        """직전 드래프트가 검증된 결과를 집계 (새 생성 요청이면 버린다)"""
+        if not self._last_draft:
+            return
+        committed = len(ids) - self._last_length
+        # 같은 생성 흐름이면 (수락 토큰 + 교정/보너스 토큰 1개)만큼 늘어난다
+        if committed < 1 or committed > len(self._last_draft) + 1:
+            self._last_draft = []
+            return
+        accepted = _common_prefix_length(ids[self._last_length:], self._last_draft)
+        metrics.increment('speculative.drafted_tokens', len(self._last_draft))
+        metrics.increment('speculative.accepted_tokens', accepted)
+        metrics.increment('speculative.verifications')
+        self._last_draft = []
+
+
+class SmallModelDraft:
+    """
+    작은 GGUF 모델(예: gemma-3-1b)로 드래프트 토큰을 탐욕적으로 생성
+
+    드래프트 모델의 KV 캐시는 메인 모델 입력과의 최장 공통 접두사만큼 재사용하고
+    나머지만 평가한다. 메인 모델과 같은 토크나이저를 써야 한다.
+    """
+
+    def __init__(self, draft_llm, num_pred_tokens: int = 10):
+        self.llm = draft_llm
+        self.num_pred_tokens = num_pred_tokens
+        self._lock = threading.Lock()
+
+    def __call__(self, input_ids, /, **kwargs: Any):
+        import numpy as np
+
+        ids = [int(t) for t in input_ids]
+        if not ids:
+            return np.array([], dtype=np.intc)
+
+        with self._lock:
+            llm = self.llm
+            cached = [int(t) for t in llm.input_ids[:llm.n_tokens]]
+            # 마지막 토큰은 로짓을 얻기 위해 항상 다시 평가
+            n_past = min(_common_prefix_length(cached, ids), len(ids) - 1)
+            llm.n_tokens = n_past
+            llm.eval(ids[n_past:])
+
+            draft = []
+            eos = llm.token_eos()
+            budget = min(self.num_pred_tokens, llm.n_ctx() - llm.n_tokens - 1)
+            for _ in range(max(0, budget)):
+                token = llm.sample(top_k=1, temp=0.0)
+                if token == eos:
+                    break
+                draft.append(token)
+                llm.eval([token])
+            return np.array(draft, dtype=np.intc)
+
+
+def _tokenizers_match(main_llm, draft_llm) -> bool:
+    """메인/드래프트 모델의 어휘가 같은지 확인 (다르면 드래프트 토큰 ID가 무의미)"""
+    try:
+        if main_llm.n_vocab() != draft_llm.n_vocab():
+            return False
+        probe = _VOCAB_PROBE_TEXT.encode('utf-8')
+        return main_llm.tokenize(probe, add_bos=False) == draft_llm.tokenize(probe, add_bos=False)
+    except Exception as e:
+        print(f"드래프트 모델 토크나이저 비교 실패: {e}")
+        return False
+
+
+def create_draft_model(config: Dict[str, Any], main_llm=None, llama_kwargs: Optional[Dict[str, Any]] = None):
+    """
+    설정(SPECULATIVE_MODE)에 따라 llama_cpp draft_model 객체를 생성
+
+    - off: None 반환
+    - prompt_lookup: 입력 n-gram을 복사하는 LlamaPromptLookupDecoding (추가 모델 없음)
+    - draft_model: 작은 모델로 드래프트 생성. 메인 모델과 토크나이저가 다르면 prompt_lookup으로 대체
+
+    Args:
+        config (dict): get_config() 결과
+        main_llm: 이미 로드된 메인 모델 (draft_model 모드에서 토크나이저 비교용)
+        llama_kwargs (dict, optional): 드래프트 모델 로딩 시 Llama에 넘길 추가 인자 (n_threads 등)
+
+    Returns:
+        InstrumentedDraftModel 또는 None
+    """
+    mode = str(config.get('SPECULATIVE_MODE', 'off')).lower()
+    if mode not in SPECULATIVE_MODES:
+        print(f"⚠️ 알 수 없는 SPECULATIVE_MODE: {mode} - 추측 디코딩 비활성화")
+        return None
+    if mode == 'off':
+        return None
+
+    num_pred_tokens = int(config.get('SPECULATIVE_NUM_PRED_TOKENS', 10))
+
+    if mode == 'draft_model':
+        draft_path = config.get('SPECULATIVE_DRAFT_MODEL_PATH')
+        if draft_path and not os.path.isabs(draft_path):
+            draft_path = os.path.join(config.get('WORKSPACE_DIR', '.'), draft_path)
+        try:
+            from model_registry import make_model_key, model_registry
+
+            def load_draft():
+                from llama_cpp import Llama
+                print(f"드래프트 모델 로딩 시작: {draft_path}")
+                return Llama(
+                    model_path=draft_path,
+                    n_ctx=config['MODEL_CONTEXT_SIZE'],
+                    verbose=False,
+                    **(llama_kwargs or {})
+                )
+
+            # 드래프트 모델도 레지스트리를 통해 로딩하여 중복 로딩 방지
+            draft_key = make_model_key(draft_path, config['MODEL_CONTEXT_SIZE'], 0)
+            draft_llm = model_registry.acquire(draft_key, load_draft, owner='speculative_draft')
+            if main_llm is None or _tokenizers_match(main_llm, draft_llm):
+                print("드래프트 모델 로딩 완료")
+                return InstrumentedDraftModel(SmallModelDraft(draft_llm, num_pred_tokens), name='draft_model')
+            print("⚠️ 드래프트 모델과 메인 모델의 토크나이저가 달라 prompt_lookup으로 대체합니다")
+            model_registry.release(draft_key, owner='speculative_draft')
+            model_registry.unload(draft_key)
+        except Exception as e:
+            print(f"⚠️ 드래프트 모델 로딩 실패: {e} - prompt_lookup으로 대체합니다")
+
+    from llama_cpp.llama_speculative import LlamaPromptLookupDecoding
+    lookup = LlamaPromptLookupDecoding(
+        max_ngram_size=int(config.get('SPECULATIVE_MAX_NGRAM_SIZE', 2)),
+        num_pred_tokens=num_pred_tokens,
+    )
+    return InstrumentedDraftModel(lookup, name='prompt_lookup')
+
+
+def record_generation_speed(output, elapsed: float, process_name: str = 'summary'):
+    """
+    생성 결과의 usage로 초당 생성 토큰 수를 기록
+
+    Returns:
+        float: tokens/s (계산할 수 없으면 0.0)
+    """
+    usage = output.get('usage') if isinstance(output, dict) else getattr(output, 'usage', None)
+    if not usage or elapsed <= 0:
+        return 0.0
+    completion_tokens = usage.get('completion_tokens', 0) if isinstance(usage, dict) else getattr(usage, 'completion_tokens', 0)
+    if not completion_tokens:
+        return 0.0
+    tokens_per_second = completion_tokens / elapsed
+    metrics.increment('generation.completion_tokens', completion_tokens)
+    metrics.observe('generation.tokens_per_second', tokens_per_second)
+    metrics.observe(f'generation.{process_name}.tokens_per_second', tokens_per_second)
+    return tokens_per_second
+
+
+def get_speculative_stats() -> Dict[str, float]:
+    """추측 디코딩 수락률 및 생성 속도 통계"""
+    drafted = metrics.get_counter('speculative.drafted_tokens')
+    accepted = metrics.get_counter('speculative.accepted_tokens')
+    return {
+        'drafted_tokens': drafted,
+        'accepted_tokens': accepted,
+        'acceptance_rate': accepted / drafted if drafted else 0.0,
+        'verifications': metrics.get_counter('speculative.verifications'),
+        'avg_tokens_per_second': metrics.get_average('generation.tokens_per_second'),
+    }
@@ -0,0 +1,319 @@
+import queue
+import threading
+import time
+import traceback
+from typing import Any, Callable, Dict, List, Optional
+
+from config import get_config
+from metrics import metrics
+from summarizer_backend import SummarizerBackend
+
+# 작업 스레드 종료 신호
+_STOP = object()
+
+
+class PipelineStage:
+    """
+    파이프라인 단계 하나 (입력 큐 + 작업 스레드 N개)
+
+    handler(item)의 반환값을 다음 단계 입력 큐에 넣는다 (None이면 이 단계에서 처리 종료).
+    입력 큐는 크기가 제한되어 있어 다음 단계가 밀리면 앞 단계가 기다린다 (backpressure).
+    thread_init(index)는 작업 스레드 시작 시 한 번 호출된다 (스레드별 백엔드 바인딩 등).
+    """
+
+    def __init__(self, name: str, handler: Callable[[Any], Any], workers: int = 1, queue_size: int = 0,
+                 thread_init: Optional[Callable[[int], None]] = None):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, int(workers))
+        self.thread_init = thread_init
+        self.input: "queue.Queue" = queue.Queue(maxsize=max(0, int(queue_size)))
+        self.next_stage: Optional['PipelineStage'] = None
+        self.on_error: Optional[Callable[[Any, Exception], None]] = None
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._started_at = 0.0
+        self._busy = 0
+        self._busy_seconds = 0.0
+        self._blocked_seconds = 0.0
+        self._processed = 0
+        self._errors = 0
+
+    def put(self, item: Any, timeout: Optional[float] = None):
+        """입력 큐에 추가 (큐가 가득 차면 대기)"""
+        self.input.put((time.time(), item), timeout=timeout)
+        metrics.set_gauge(f'pipeline.{self.name}.queue_depth', self.input.qsize())
+
+    def start(self):
+        self._started_at = time.time()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, args=(index,), name=f'pipeline-{self.name}-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0):
+        """남은 입력을 모두 처리한 뒤 작업 스레드 종료"""
+        for _ in self._threads:
+            self.input.put((time.time(), _STOP))
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+
+    def _set_busy(self, delta: int):
+        with self._lock:
+            self._busy += delta
+            metrics.set_gauge(f'pipeline.{self.name}.busy_workers', self._busy)
+
+    def _run(self, index: int):
+        if self.thread_init is not None:
+            self.thread_init(index)
+        while True:
+            enqueued_at, item = self.input.get()
+            if item is _STOP:
+                break
+            metrics.set_gauge(f'pipeline.{self.name}.queue_depth', self.input.qsize())
+            metrics.observe(f'pipeline.{self.name}.wait_seconds', time.time() - enqueued_at)
+
+            self._set_busy(1)
+            start = time.time()
+            result = None
+            try:
+                result = self.handler(item)
+            except Exception as e:
+                print(f"파이프라인 {self.name} 단계 오류: {e}")
+                traceback.print_exc()
+                with self._lock:
+                    self._errors += 1
+                metrics.increment(f'pipeline.{self.name}.errors')
+                if self.on_error is not None:
+                    self.on_error(item, e)
+            finally:
+                elapsed = time.time() - start
+                self._set_busy(-1)
+                with self._lock:
+                    self._busy_seconds += elapsed
+                    self._processed += 1
+                metrics.observe(f'pipeline.{self.name}.seconds', elapsed)
+                metrics.increment(f'pipeline.{self.name}.processed')
+                metrics.set_gauge(f'pipeline.{self.name}.occupancy', self.occupancy())
+
+            if result is not None and self.next_stage is not None:
+                blocked_start = time.time()
+                self.next_stage.put(result)
+                blocked = time.time() - blocked_start
+                with self._lock:
+                    self._blocked_seconds += blocked
+
+    def occupancy(self) -> float:
+        """작업 스레드가 처리 중이었던 시간 비율 (0~1, 병목 단계일수록 1에 가까움)"""
+        with self._lock:
+            wall = (time.time() - self._started_at) * self.workers if self._started_at else 0.0
+            return min(1.0, self._busy_seconds / wall) if wall > 0 else 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        occupancy = self.occupancy()
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'queue_depth': self.input.qsize(),
+                'queue_size': self.input.maxsize,
+                'busy_workers': self._busy,
+                'processed': self._processed,
+                'errors': self._errors,
+                'busy_seconds': self._busy_seconds,
+                'blocked_seconds': self._blocked_seconds,
+                'occupancy': occupancy,
+            }
+
+
+class StagedPipeline:
+    """
+    크기가 제한된 큐로 연결된 단계들의 파이프라인
+
+    단계마다 작업 스레드가 따로 있어 요청 N이 추론 중일 때 요청 N+1의 준비와 요청 N-1의 후처리가 함께 진행된다.
+    on_error(item, exc)는 어느 단계에서든 처리 중 예외가 나면 호출된다 (요청 유실 방지용 오류 응답).
+    """
+
+    def __init__(self, stages: List[PipelineStage], on_error: Optional[Callable[[Any, Exception], None]] = None):
+        if not stages:
+            raise ValueError("파이프라인에 단계가 없습니다")
+        self.stages = stages
+        for stage, next_stage in zip(stages, stages[1:]):
+            stage.next_stage = next_stage
+        for stage in stages:
+            stage.on_error = on_error
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+        print("파이프라인 시작: " + " → ".join(f"{stage.name}({stage.workers})" for stage in self.stages))
+
+    def submit(self, item: Any, timeout: Optional[float] = None):
+        """첫 단계에 요청 추가 (큐가 가득 차면 대기)"""
+        self.stages[0].put(item, timeout=timeout)
+
+    def stop(self, timeout: float = 5.0):
+        """앞 단계부터 차례로 비우고 종료"""
+        for stage in self.stages:
+            stage.stop(timeout=timeout)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {stage.name: stage.get_stats() for stage in self.stages}
+
+
+class _SerializedBackend(SummarizerBackend):
+    """추론 단계 워커와 같은 락으로 호출을 직렬화하는 백엔드 (후처리 단계의 재질의용)"""
+
+    def __init__(self, backend: SummarizerBackend, lock: threading.Lock):
+        self._backend = backend
+        self._lock = lock
+        self.name = backend.name
+
+    def complete(self, prompt: str, max_tokens: int = 256, **params):
+        with self._lock:
+            return self._backend.complete(prompt, max_tokens=max_tokens, **params)
+
+    def stream(self, prompt: str, max_tokens: int = 256, **params):
+        with self._lock:
+            yield from self._backend.stream(prompt, max_tokens=max_tokens, **params)
+
+    def tokenize(self, text, add_bos: bool = False):
+        return self._backend.tokenize(text, add_bos=add_bos)
+
+    def perf_counters(self):
+        return self._backend.perf_counters()
+
+    def __getattr__(self, name):
+        return getattr(self._backend, name)
+
+
+def build_error_response(data: Dict[str, Any], error: Exception, preprocessed: bool = False) -> Dict[str, Any]:
+    """
+    처리 중 예외에 대한 응답 (process_request 오류 응답과 같은 형식, 단계 처리/워커 오류/진행 중 요청 정리)
+
+    준비 단계를 통과한 요청(preprocessed)은 전처리된 대화로 만든 추출 요약으로 응답한다.
+    """
+    from extractive_summarizer import build_fallback_response
+
+    fallback_response = build_fallback_response(data, 'error') if preprocessed else None
+    if fallback_response is not None:
+        return fallback_response
+    return {
+        "transactionid": data.get("transactionid", ""),
+        "sequenceno": data.get("sequenceno", "0"),
+        "returncode": "1",
+        "returndescription": "Success",
+        "response": {
+            "result": "1",
+            "failReason": f"요청 처리 중 오류: {error}",
+            "summary": ""
+        }
+    }
+
+
+def create_summary_pipeline(pool, prepare: Callable[[int, Dict[str, Any]], Optional[Dict[str, Any]]],
+                            respond: Callable[[int, Dict[str, Any]], None],
+                            config: Optional[Dict[str, Any]] = None, router=None) -> StagedPipeline:
+    """
+    요약 요청용 3단계 파이프라인 생성
+
+    - prepare (PIPELINE_PREPARE_WORKERS): prepare(slot_id, data)로 전처리/캐시/판정 후 프롬프트 토큰화.
+      prepare가 None을 반환하면 이미 응답한 요청
+    - inference (추론 풀 크기): 인스턴스당 워커 1개가 모델 생성만 수행 (summarize_with_gemma)
+    - finalize (PIPELINE_FINALIZE_WORKERS): JSON 복구, 후처리, 재질의, 결과 캐시 저장, 응답
+
+    단계 사이 큐 크기는 PIPELINE_QUEUE_SIZE. 후처리 단계의 LLM 재질의는 추론 워커와 인스턴스 락을 공유한다.
+    router가 있으면 추론 워커가 추론 단계 대기열 길이를 보고 요청마다 모델 크기를 선택한다.
+    DEGRADE_ENABLED이면 추론 단계 대기 시간/대기열 길이로 성능 저하 단계를 정해 추론 단계부터 적용한다.
+
+    Args:
+        pool (InferencePool): 추론 풀
+        prepare (callable): (slot_id, 원본 data) → 추론할 전처리된 data 또는 None
+        respond (callable): (slot_id, response_data) 응답 콜백
+        router (ModelRouter, optional): 모델 라우터 (create_model_router)
+    """
+    from gemma_summarizer import (build_summary_prompt, clean_conversation_text, process_request,
+                                  set_thread_backend, summarize_with_gemma)
+    from long_call_summarizer import count_tokens
+    from extractive_summarizer import build_extractive_summary
+    from load_shedding import (EXTRACTIVE, SMALL_MODEL, attach_degradation_queue, degraded_max_tokens,
+                               request_degradation_level)
+    from model_router import LARGE, bind_thread_router, routed_request
+    from request_timing import ENQUEUED_AT_KEY, RequestTiming, begin_timing, end_timing
+    from topic_segmentation import turn_start_times
+
+    config = config or get_config()
+    queue_size = int(config.get('PIPELINE_QUEUE_SIZE', 8))
+    instance_locks = [threading.Lock() for _ in range(pool.size)]
+    worker_local = threading.local()
+
+    def prepare_stage(item):
+        slot_id, data = item
+        data = prepare(slot_id, data)
+        if data is None:
+            return None
+        # 토크나이저는 모델 가중치만 읽으므로 추론 중인 인스턴스와 함께 사용 가능
+        prompt = build_summary_prompt(clean_conversation_text(data.get('text', '')), turn_start_times(data))
+        prompt_tokens = count_tokens(pool.backend(0), prompt)
+        data[ENQUEUED_AT_KEY] = time.time()
+        return slot_id, data, prompt_tokens
+
+    def inference_stage_init(index):
+        worker_local.index = index
+        set_thread_backend(pool.backend(index))
+        if router is not None:
+            bind_thread_router(router, index, queue_depth=lambda: stages[1].input.qsize())
+        pool.pin_worker(index)
+
+    def inference_stage(item):
+        slot_id, data, prompt_tokens = item
+        index = worker_local.index
+        # 시간 분석은 후처리 단계의 process_request로 넘겨 이어서 기록
+        timing = RequestTiming()
+        timing.mark_queue_wait(data)
+        # 과부하 성능 저하 단계 (후처리 단계의 process_request도 같은 단계 사용)
+        level = request_degradation_level(data, timing)
+        if level >= EXTRACTIVE:
+            return slot_id, data, build_extractive_summary(data.get('text', ''), 'overload'), timing
+        previous_timing = begin_timing(timing)
+        pool.mark_busy(index, True)
+        try:
+            with timing.stage('model_wait_ms'):
+                # 후처리 단계의 재질의가 인스턴스를 쓰고 있으면 대기
+                instance_locks[index].acquire()
+            try:
+                with routed_request(data, prompt_tokens=prompt_tokens, degraded=level >= SMALL_MODEL) as route:
+                    # 준비 단계의 토큰 수는 큰 모델 토크나이저 기준이므로 작은 모델이면 다시 계산
+                    use_tokens = prompt_tokens if route is None or route.model == LARGE else None
+                    summary_json = summarize_with_gemma(data.get('text', ''), prompt_tokens=use_tokens,
+                                                        token_cap=degraded_max_tokens(level),
+                                                        start_times=turn_start_times(data))
+            finally:
+                instance_locks[index].release()
+        finally:
+            pool.mark_busy(index, False)
+            end_timing(previous_timing)
+        return slot_id, data, summary_json, timing
+
+    def finalize_stage_init(index):
+        target = index % pool.size
+        set_thread_backend(_SerializedBackend(pool.backend(target), instance_locks[target]))
+
+    def finalize_stage(item):
+        slot_id, data, summary_json, timing = item
+        respond(slot_id, process_request(data, summary_json=summary_json, timing=timing))
+        return None
+
+    def on_error(item, error):
+        # 준비 단계 입력은 (slot_id, 원본 data), 이후 단계는 전처리된 data를 담은 튜플
+        respond(item[0], build_error_response(item[1], error, preprocessed=len(item) > 2))
+
+    stages = [
+        PipelineStage('prepare', prepare_stage, int(config.get('PIPELINE_PREPARE_WORKERS', 2)), queue_size),
+        PipelineStage('inference', inference_stage, pool.size, queue_size, thread_init=inference_stage_init),
+        PipelineStage('finalize', finalize_stage, int(config.get('PIPELINE_FINALIZE_WORKERS', 2)), queue_size,
+                      thread_init=finalize_stage_init),
+    ]
+    # 과부하 판단은 추론 단계 대기열 기준
+    attach_degradation_queue(stages[1].input.qsize, pool.size)
+    return StagedPipeline(stages, on_error=on_error)
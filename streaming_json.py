@@ -0,0 +1,185 @@
+import json
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+# 최상위 필드별 기대 타입 (다르면 해당 필드는 잘못 생성된 것으로 판단)
+SUMMARY_FIELD_TYPES = {
+    'summary': (str,),
+    'keyword': (str, list),
+    'paragraphs': (list,),
+}
+
+_WHITESPACE = ' \t\r\n'
+
+
+class IncrementalJSONParser:
+    """
+    스트리밍 생성 텍스트를 조금씩 받아 최상위 JSON 객체를 점진적으로 파싱
+
+    - 첫 '{' 이전 텍스트("```json" 등)는 무시
+    - 최상위 필드 값이 끝날 때마다 파싱하여 on_field(key, value)로 즉시 전달
+    - 최상위 객체가 닫히면 done=True (이후 텍스트는 받지 않음)
+    - 필드 값이 JSON으로 파싱되지 않거나 기대 타입과 다르면 error_field를 설정하고 멈춤
+    """
+
+    def __init__(self, on_field: Optional[Callable[[str, Any], None]] = None,
+                 field_types: Optional[Dict[str, Tuple[type, ...]]] = None):
+        self.on_field = on_field
+        self.field_types = field_types if field_types is not None else SUMMARY_FIELD_TYPES
+        self.raw = ''            # 받은 전체 텍스트
+        self.fields: Dict[str, Any] = {}
+        self.done = False
+        self.error: Optional[str] = None
+        self.error_field: Optional[str] = None
+        self.error_value_start: Optional[int] = None
+
+        self._object_start: Optional[int] = None
+        self._object_end: Optional[int] = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        # 최상위(depth 1) 상태: key → colon → value → after_value → key ...
+        self._phase = 'key'
+        self._key_start: Optional[int] = None
+        self._current_key: Optional[str] = None
+        self._value_start: Optional[int] = None
+
+    @property
+    def stopped(self) -> bool:
+        """더 이상 텍스트를 받을 필요가 없는지 (완료 또는 오류)"""
+        return self.done or self.error is not None
+
+    @property
+    def json_text(self) -> Optional[str]:
+        """완료된 최상위 JSON 객체 문자열"""
+        if self._object_start is None or self._object_end is None:
+            return None
+        return self.raw[self._object_start:self._object_end]
+
+    def feed(self, text: str) -> bool:
+        """
+        텍스트 조각을 파싱
+
+        Returns:
+            bool: 생성을 멈춰도 되면 True (객체 완료 또는 필드 오류)
+        """
+        if self.stopped or not text:
+            return self.stopped
+        offset = len(self.raw)
+        self.raw += text
+        for index in range(offset, len(self.raw)):
+            self._consume(index, self.raw[index])
+            if self.stopped:
+                break
+        return self.stopped
+
+    def _fail(self, message: str, field: Optional[str] = None):
+        self.error = message
+        self.error_field = field
+        self.error_value_start = self._value_start if field else None
+
+    def _consume(self, index: int, char: str):
+        if self._object_start is None:
+            if char == '{':
+                self._object_start = index
+                self._depth = 1
+                self._phase = 'key'
+            return
+
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif char == '\\':
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+                if self._depth == 1 and self._phase == 'key_string':
+                    try:
+                        self._current_key = json.loads(self.raw[self._key_start:index + 1])
+                    except ValueError:
+                        self._current_key = self.raw[self._key_start + 1:index]
+                    self._phase = 'colon'
+            return
+
+        if self._depth == 1:
+            self._consume_top_level(index, char)
+        elif char == '"':
+            self._in_string = True
+        elif char in '{[':
+            self._depth += 1
+        elif char in '}]':
+            self._depth -= 1
+
+    def _consume_top_level(self, index: int, char: str):
+        phase = self._phase
+        if phase == 'key':
+            if char in _WHITESPACE or char == ',':
+                return
+            if char == '"':
+                self._in_string = True
+                self._key_start = index
+                self._phase = 'key_string'
+            elif char == '}':
+                self._close(index)
+            else:
+                self._fail(f"키 위치에 예상치 못한 문자: {char!r}")
+        elif phase == 'colon':
+            if char in _WHITESPACE:
+                return
+            if char == ':':
+                self._phase = 'value'
+                self._value_start = None
+            else:
+                self._fail(f"콜론 누락 (키: {self._current_key})", field=self._current_key)
+        elif phase == 'value':
+            if self._value_start is None:
+                if char in _WHITESPACE:
+                    return
+                self._value_start = index
+            if char in ',}':
+                self._finish_value(index)
+                if self.stopped:
+                    return
+                self._phase = 'key'
+                if char == '}':
+                    self._close(index)
+            elif char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+            elif char == ']':
+                self._fail(f"값 위치에 예상치 못한 문자: {char!r}", field=self._current_key)
+
+    def _finish_value(self, end: int):
+        key = self._current_key
+        if self._value_start is None:
+            self._fail("필드 값 누락", field=key)
+            return
+        raw_value = self.raw[self._value_start:end].strip()
+        try:
+            value = json.loads(raw_value, strict=False)
+        except ValueError as e:
+            self._fail(f"필드 값 파싱 실패: {e}", field=key)
+            return
+        expected = self.field_types.get(key)
+        if expected and not isinstance(value, expected):
+            self._fail(f"필드 타입 불일치: {type(value).__name__}", field=key)
+            return
+        self.fields[key] = value
+        self._value_start = None
+        if self.on_field:
+            try:
+                self.on_field(key, value)
+            except Exception as e:
+                print(f"필드 콜백 오류 ({key}): {e}")
+
+    def _close(self, index: int):
+        self._depth = 0
+        self._object_end = index + 1
+        self.done = True
+
+
+def iter_stream_text(stream: Iterable[Dict[str, Any]]):
+    """llama_cpp 스트리밍 청크에서 (텍스트, finish_reason)을 순서대로 꺼냄"""
+    for chunk in stream:
+        choice = chunk['choices'][0]
+        yield choice.get('text', ''), choice.get('finish_reason')
@@ -0,0 +1,294 @@
+import glob
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from inference_watchdog import apply_deadline, current_deadline
+
+# 결과 파일의 "N. \n{응답 JSON}" 블록 시작 패턴
+_RESULT_BLOCK_PATTERN = re.compile(r'^\s*\d+\.\s*$', re.MULTILINE)
+
+# 묶음 프롬프트(call_packing)의 통화 블록 머리 "[통화 N]"
+_PACKED_CALL_PATTERN = re.compile(r'^\[통화 (\d+)\]$', re.MULTILINE)
+
+
+class SummarizerBackend:
+    """
+    요약 모델 백엔드 인터페이스
+
+    파이프라인은 llama_cpp Llama와 같은 호출 형태(llm(prompt, ...), llm.tokenize(bytes))를 사용하므로
+    __call__/tokenize는 그 형태를 그대로 따른다. 응답은 llama_cpp completion dict 형식이다.
+    """
+
+    name = 'base'
+
+    def complete(self, prompt: str, max_tokens: int = 256, **params) -> Dict[str, Any]:
+        """프롬프트를 완성하여 {'choices': [{'text', 'finish_reason'}], 'usage': {...}} 반환"""
+        raise NotImplementedError
+
+    def stream(self, prompt: str, max_tokens: int = 256, **params) -> Iterator[Dict[str, Any]]:
+        """토큰 단위 청크 {'choices': [{'text', 'finish_reason'}]}를 순서대로 생성"""
+        raise NotImplementedError
+
+    def tokenize(self, text, add_bos: bool = False) -> List[int]:
+        """텍스트(str 또는 utf-8 bytes)를 토큰 ID 리스트로 변환"""
+        raise NotImplementedError
+
+    def save_state(self) -> Any:
+        """KV 캐시 등 현재 상태 저장"""
+        raise NotImplementedError
+
+    def load_state(self, state: Any):
+        """save_state()로 저장한 상태 복원"""
+        raise NotImplementedError
+
+    def perf_counters(self) -> Optional[Dict[str, float]]:
+        """
+        누적 성능 카운터 (지원하지 않으면 None)
+
+        {'prompt_eval_ms', 'prompt_eval_tokens', 'eval_ms', 'eval_tokens'} - 호출 전후 차이로 요청별 시간을 구한다.
+        """
+        return None
+
+    def __call__(self, prompt: str, max_tokens: int = 256, stream: bool = False, echo: bool = False, **params):
+        if stream:
+            return self.stream(prompt, max_tokens=max_tokens, **params)
+        return self.complete(prompt, max_tokens=max_tokens, **params)
+
+
+class LlamaCppBackend(SummarizerBackend):
+    """llama_cpp Llama 인스턴스 백엔드 (그 외 속성은 Llama에 위임)"""
+
+    name = 'llama_cpp'
+
+    def __init__(self, llm):
+        self.llm = llm
+
+    def complete(self, prompt: str, max_tokens: int = 256, **params) -> Dict[str, Any]:
+        return self.llm(prompt, max_tokens=max_tokens, stream=False, **apply_deadline(params))
+
+    def stream(self, prompt: str, max_tokens: int = 256, **params) -> Iterator[Dict[str, Any]]:
+        return self.llm(prompt, max_tokens=max_tokens, stream=True, **apply_deadline(params))
+
+    def tokenize(self, text, add_bos: bool = False) -> List[int]:
+        if isinstance(text, str):
+            text = text.encode('utf-8')
+        return self.llm.tokenize(text, add_bos=add_bos)
+
+    def save_state(self):
+        return self.llm.save_state()
+
+    def load_state(self, state):
+        self.llm.load_state(state)
+
+    def perf_counters(self) -> Optional[Dict[str, float]]:
+        # llama.cpp 컨텍스트 성능 카운터 (프롬프트 평가/디코딩 누적 시간, 토큰 수)
+        try:
+            import llama_cpp
+            data = llama_cpp.llama_perf_context(self.llm._ctx.ctx)
+        except (ImportError, AttributeError):
+            return None
+        return {
+            'prompt_eval_ms': data.t_p_eval_ms,
+            'prompt_eval_tokens': data.n_p_eval,
+            'eval_ms': data.t_eval_ms,
+            'eval_tokens': data.n_eval,
+        }
+
+    def __getattr__(self, name):
+        # draft_model, reset, n_ctx 등 Llama 고유 속성 접근
+        return getattr(self.llm, name)
+
+
+def load_recorded_outputs(pattern: str) -> List[Dict[str, Any]]:
+    """
+    sample/*결과.txt 형식(번호 + 응답 JSON)에서 요약 결과 JSON을 읽음
+
+    Args:
+        pattern (str): 결과 파일 glob 패턴
+
+    Returns:
+        List[dict]: summary/keyword/paragraphs 딕셔너리 목록 (파일명, 번호 순)
+    """
+    outputs = []
+    for path in sorted(glob.glob(pattern)):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"결과 파일 읽기 실패: {path} ({e})")
+            continue
+        for block in _RESULT_BLOCK_PATTERN.split(content):
+            block = block.strip()
+            if not block.startswith('{'):
+                continue
+            try:
+                response = json.loads(block).get('response', {})
+            except (ValueError, AttributeError):
+                continue
+            summary = response.get('summary', '')
+            if 'paragraphs' in response:
+                # 응답 본문에 필드가 바로 들어있는 형식
+                parsed = {key: response[key] for key in ('summary', 'keyword', 'paragraphs') if key in response}
+            else:
+                try:
+                    parsed = json.loads(summary) if isinstance(summary, str) else summary
+                except ValueError:
+                    continue
+            if isinstance(parsed, dict) and parsed.get('summary'):
+                outputs.append(parsed)
+    return outputs
+
+
+class FakeBackend(SummarizerBackend):
+    """
+    모델 파일 없이 녹화된 결과를 재생하는 결정적 백엔드 (벤치마크/부하 테스트용)
+
+    - 같은 프롬프트에는 항상 같은 녹화 결과를 돌려준다 (프롬프트 해시로 선택)
+    - 지연 시간 모델: 프롬프트 평가(prompt_tokens_per_second) + 토큰 생성(tokens_per_second)
+    - llama_cpp처럼 직전 프롬프트와의 공통 접두사는 다시 평가하지 않는다 (prefix KV 캐시)
+    - 한국어 토큰 하나를 chars_per_token 글자로 모델링한다
+    - 추론 마감(MODEL_TIMEOUT)이 있으면 마감 안에 생성 가능한 토큰까지만 생성한다
+    """
+
+    name = 'fake'
+
+    def __init__(self, outputs: List[Dict[str, Any]], tokens_per_second: float = 20.0,
+                 prompt_tokens_per_second: float = 200.0, time_scale: float = 1.0,
+                 chars_per_token: int = 2, sleep: Callable[[float], None] = time.sleep):
+        if not outputs:
+            raise ValueError("FakeBackend에 재생할 녹화 결과가 없습니다")
+        self.outputs = outputs
+        self.tokens_per_second = tokens_per_second
+        self.prompt_tokens_per_second = prompt_tokens_per_second
+        self.time_scale = time_scale
+        self.chars_per_token = max(1, int(chars_per_token))
+        self.sleep = sleep
+        self._cached_tokens: List[int] = []
+        self._lock = threading.Lock()
+        self._perf = {'prompt_eval_ms': 0.0, 'prompt_eval_tokens': 0, 'eval_ms': 0.0, 'eval_tokens': 0}
+
+    def tokenize(self, text, add_bos: bool = False) -> List[int]:
+        if isinstance(text, bytes):
+            text = text.decode('utf-8', errors='ignore')
+        step = self.chars_per_token
+        tokens = [int.from_bytes(text[i:i + step].encode('utf-8')[:8], 'big') for i in range(0, len(text), step)]
+        return [1] + tokens if add_bos else tokens
+
+    def save_state(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'tokens': list(self._cached_tokens)}
+
+    def load_state(self, state: Dict[str, Any]):
+        with self._lock:
+            self._cached_tokens = list(state.get('tokens', []))
+
+    def perf_counters(self) -> Dict[str, float]:
+        # 지연 시간 모델 기준 (time_scale 적용)
+        with self._lock:
+            return dict(self._perf)
+
+    def _count_perf(self, stage: str, tokens: int, seconds: float):
+        with self._lock:
+            self._perf[f'{stage}_ms'] += seconds * self.time_scale * 1000
+            self._perf[f'{stage}_tokens'] += tokens
+
+    def _pick_record(self, key: str) -> Dict[str, Any]:
+        digest = hashlib.sha1(key.encode('utf-8')).digest()
+        return self.outputs[int.from_bytes(digest[:4], 'big') % len(self.outputs)]
+
+    def _select_text(self, prompt: str) -> str:
+        record = self._pick_record(prompt)
+        if 'JSON' not in prompt:
+            # 재질의처럼 문장만 요구하는 프롬프트
+            return record['summary']
+        call_numbers = _PACKED_CALL_PATTERN.findall(prompt)
+        if call_numbers and 'JSON 배열' in prompt:
+            # 묶음 프롬프트는 통화마다 원소 하나씩인 배열로 응답
+            records = [dict(index=int(number), **self._pick_record(f"{prompt}#{number}")) for number in call_numbers]
+            return "```json\n" + json.dumps(records, ensure_ascii=False) + "\n```"
+        return "```json\n" + json.dumps(record, ensure_ascii=False) + "\n```"
+
+    def _evaluate_prompt(self, prompt: str) -> int:
+        """프롬프트 평가 지연을 흉내내고 평가된(캐시되지 않은) 토큰 수를 반환"""
+        tokens = self.tokenize(prompt)
+        with self._lock:
+            reused = 0
+            for cached, token in zip(self._cached_tokens, tokens):
+                if cached != token:
+                    break
+                reused += 1
+            self._cached_tokens = tokens
+        evaluated = len(tokens) - reused
+        seconds = evaluated / self.prompt_tokens_per_second if self.prompt_tokens_per_second > 0 else 0.0
+        self._count_perf('prompt_eval', evaluated, seconds)
+        self._wait(seconds)
+        return len(tokens)
+
+    def _wait(self, seconds: float):
+        if seconds > 0 and self.time_scale > 0:
+            self.sleep(seconds * self.time_scale)
+
+    def _generate(self, prompt: str, max_tokens: int):
+        prompt_tokens = self._evaluate_prompt(prompt)
+        chunks = self._split_tokens(self._select_text(prompt))
+        limit = int(max_tokens) if max_tokens and max_tokens > 0 else len(chunks)
+        finish_reason = 'length' if len(chunks) > limit else 'stop'
+        chunks = chunks[:limit]
+        deadline = current_deadline()
+        if deadline is not None and self.tokens_per_second > 0 and self.time_scale > 0:
+            affordable = int(deadline.remaining() * self.tokens_per_second / self.time_scale)
+            if affordable < len(chunks):
+                # llama_cpp stopping_criteria처럼 마감 시점에 생성 중단
+                chunks = chunks[:affordable]
+                finish_reason = 'stop'
+                deadline.trigger()
+        return prompt_tokens, chunks, finish_reason
+
+    def _split_tokens(self, text: str) -> List[str]:
+        step = self.chars_per_token
+        return [text[i:i + step] for i in range(0, len(text), step)]
+
+    def complete(self, prompt: str, max_tokens: int = 256, **params) -> Dict[str, Any]:
+        prompt_tokens, chunks, finish_reason = self._generate(prompt, max_tokens)
+        seconds = len(chunks) / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+        self._count_perf('eval', len(chunks), seconds)
+        self._wait(seconds)
+        return {
+            'choices': [{'text': ''.join(chunks), 'index': 0, 'finish_reason': finish_reason}],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': len(chunks),
+                'total_tokens': prompt_tokens + len(chunks),
+            },
+        }
+
+    def stream(self, prompt: str, max_tokens: int = 256, **params) -> Iterator[Dict[str, Any]]:
+        prompt_tokens, chunks, finish_reason = self._generate(prompt, max_tokens)
+        delay = 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+        for chunk in chunks:
+            self._count_perf('eval', 1, delay)
+            self._wait(delay)
+            yield {'choices': [{'text': chunk, 'index': 0, 'finish_reason': None}]}
+        yield {'choices': [{'text': '', 'index': 0, 'finish_reason': finish_reason}]}
+
+
+def create_fake_backend(config: Dict[str, Any], sleep: Optional[Callable[[float], None]] = None) -> FakeBackend:
+    """설정(FAKE_BACKEND_*)으로 FakeBackend 생성"""
+    pattern = config.get('FAKE_BACKEND_RESULTS', 'sample/*결과.txt')
+    if not os.path.isabs(pattern):
+        pattern = os.path.join(config.get('WORKSPACE_DIR', '.'), pattern)
+    outputs = load_recorded_outputs(pattern)
+    print(f"FakeBackend: 녹화 결과 {len(outputs)}건 로드 ({pattern})")
+    return FakeBackend(
+        outputs,
+        tokens_per_second=float(config.get('FAKE_BACKEND_TOKENS_PER_SECOND', 20.0)),
+        prompt_tokens_per_second=float(config.get('FAKE_BACKEND_PROMPT_TOKENS_PER_SECOND', 200.0)),
+        time_scale=float(config.get('FAKE_BACKEND_TIME_SCALE', 1.0)),
+        chars_per_token=int(config.get('FAKE_BACKEND_CHARS_PER_TOKEN', 2)),
+        sleep=sleep or time.sleep,
+    )
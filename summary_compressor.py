@@ -0,0 +1,176 @@
+from collections import Counter
+from typing import List, Optional
+
+from korean_text import (
+    tokenize,
+    strip_particle,
+    hada_stem,
+    is_predicate,
+    is_modifier,
+    content_words,
+    truncate_to_bytes,
+    ADVERBS,
+    FILLERS,
+    STOPWORDS,
+)
+
+# 요약 문장 끝에 두면 자연스러운 행위 명사
+ACTION_NOUNS = (
+    '문의', '답변', '안내', '설명', '처리', '해결', '확인', '검토', '분석', '제공',
+    '발급', '이용', '요청', '접수', '신청', '승인', '취소', '변경', '협의', '논의',
+    '지급', '충전', '결제', '등록', '예약', '상담', '발송', '지연', '완료', '진행',
+)
+
+
+def extract_keywords_from_text(text: str, top_n: int = 5) -> List[str]:
+    """
+    텍스트에서 출현 빈도 기반으로 핵심 키워드를 추출
+
+    Args:
+        text (str): 대화 또는 요약 텍스트
+        top_n (int): 추출할 키워드 개수
+
+    Returns:
+        List[str]: 빈도순 키워드 리스트 (동률이면 먼저 등장한 단어 우선)
+    """
+    words = content_words(text)
+    if not words:
+        return []
+    counts = Counter(words)
+    first_seen = {}
+    for index, word in enumerate(words):
+        first_seen.setdefault(word, index)
+    ranked = sorted(counts, key=lambda w: (-counts[w], first_seen[w]))
+    return ranked[:top_n]
+
+
+def _overlaps_keyword(word: str, keywords: List[str]) -> bool:
+    """단어가 키워드와 겹치는지 (부분 문자열 포함) 확인"""
+    for keyword in keywords:
+        if not keyword:
+            continue
+        if word == keyword or keyword in word or (len(word) >= 2 and word in keyword):
+            return True
+    return False
+
+
+def _summary_words(summary: str) -> List[str]:
+    """요약 문장을 압축 후보 단어로 변환 (조사/부사/서술어 제거, 순서 유지, 중복 제거)"""
+    words = []
+    for token in tokenize(summary):
+        if token in ADVERBS or token in FILLERS:
+            continue
+        stem = hada_stem(token)
+        if stem:
+            word = stem
+        elif is_predicate(token) or is_modifier(token):
+            continue
+        else:
+            word = strip_particle(token)
+        if not word or word in STOPWORDS or word in ADVERBS:
+            continue
+        if word not in words:
+            words.append(word)
+    return words
+
+
+def _fits(words: List[str], max_length: Optional[int], max_bytes: int) -> bool:
+    text = ' '.join(words)
+    if max_length is not None and len(text) > max_length:
+        return False
+    return len(text.encode('utf-8')) <= max_bytes
+
+
+def compress_summary_with_keywords(summary: str, keywords: List[str], max_length: Optional[int] = None,
+                                   max_bytes: int = 120) -> str:
+    """
+    규칙 기반으로 요약 문장을 압축 (LLM 재질의 대체)
+
+    - 조사, 부사, 서술어 어미를 제거하고 명사 위주로 남긴다
+    - 키워드와 겹치는 명사를 우선 유지하고, 행위 명사(안내, 문의 등)로 끝나도록 한다
+    - 예산을 넘으면 음절 경계에서 자른다
+
+    Args:
+        summary (str): 압축할 요약 문장
+        keywords (List[str]): 우선 유지할 키워드
+        max_length (int, optional): 최대 글자 수
+        max_bytes (int): 최대 UTF-8 바이트 수
+
+    Returns:
+        str: 압축된 요약 (압축할 수 없으면 빈 문자열)
+    """
+    if not summary:
+        return ""
+    summary = summary.replace('[재질의 필요]', '').strip().rstrip('.!?。')
+    keywords = [kw.strip() for kw in (keywords or []) if kw and kw.strip()]
+
+    words = _summary_words(summary)
+    if not words:
+        return ""
+    if _fits(words, max_length, max_bytes):
+        return ' '.join(words)
+
+    # 우선순위: 키워드 겹침(2) > 행위 명사(1) > 기타(0), 동률이면 앞쪽 단어 우선
+    def priority(item):
+        index, word = item
+        if _overlaps_keyword(word, keywords):
+            rank = 2
+        elif word in ACTION_NOUNS:
+            rank = 1
+        else:
+            rank = 0
+        return (-rank, index)
+
+    selected = []
+    for index, word in sorted(enumerate(words), key=priority):
+        candidate = sorted(selected + [(index, word)])
+        if _fits([w for _, w in candidate], max_length, max_bytes):
+            selected = candidate
+
+    # 행위 명사가 빠졌다면 마지막 행위 명사로 끝나도록 보정
+    action_words = [(i, w) for i, w in enumerate(words) if w in ACTION_NOUNS]
+    if action_words and not any(w in ACTION_NOUNS for _, w in selected):
+        last_action = action_words[-1]
+        while selected and not _fits([w for _, w in selected] + [last_action[1]], max_length, max_bytes):
+            # 키워드와 겹치지 않는 단어부터 제거
+            removable = [item for item in selected if not _overlaps_keyword(item[1], keywords)]
+            selected.remove(removable[-1] if removable else selected[-1])
+        selected.append(last_action)
+
+    if not selected:
+        # 한 단어도 예산에 맞지 않으면 첫 단어를 음절 경계에서 자름
+        limit_bytes = max_bytes
+        text = words[0]
+        if max_length is not None:
+            text = text[:max_length]
+        return truncate_to_bytes(text, limit_bytes)
+
+    compressed = ' '.join(w for _, w in selected)
+    if max_length is not None:
+        compressed = compressed[:max_length].rstrip()
+    return truncate_to_bytes(compressed, max_bytes)
+
+
+def is_acceptable_compression(compressed: str, keywords: List[str], max_length: Optional[int] = None,
+                              max_bytes: int = 120, min_length: int = 4) -> bool:
+    """
+    압축 결과 품질 검사 (실패 시 LLM 재질의로 넘어간다)
+
+    - 비어있지 않고 최소 글자 수 이상
+    - 글자/바이트 예산 준수
+    - 키워드가 주어진 경우 하나 이상과 겹침
+    - 두 단어 이상이거나 키워드 자체인 경우만 허용
+    """
+    if not compressed or len(compressed.replace(' ', '')) < min_length:
+        return False
+    if max_length is not None and len(compressed) > max_length:
+        return False
+    if len(compressed.encode('utf-8')) > max_bytes:
+        return False
+    words = compressed.split()
+    keywords = [kw.strip() for kw in (keywords or []) if kw and kw.strip()]
+    if keywords and not any(_overlaps_keyword(word, keywords) for word in words):
+        return False
+    if len(words) < 2 and not (keywords and _overlaps_keyword(words[0], keywords)):
+        return False
+    return True
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+자동 튜닝 테스트 (후보 측정과 최적값 선택, 호스트/모델별 프로파일 저장과 적용)
+"""
+
+from autotune import apply_tuned_profile, autotune, load_tuned_profile, save_profile, thread_candidates
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class _FakeBench:
+    """
+    가상 시계로 평가 시간을 흉내 내는 벤치마크 대상
+
+    prefill은 n_ubatch=512, n_threads_batch=8에서 가장 빠르고, decode는 메모리 대역폭 포화로 n_threads=6이 가장 빠르다.
+    """
+
+    def __init__(self, clock, n_batch, n_ubatch, opened):
+        self.clock = clock
+        self.n_batch = n_batch
+        self.n_ubatch = n_ubatch
+        self.n_threads = self.n_threads_batch = 0
+        self.closed = False
+        opened.append(self)
+
+    def tokenize(self, text):
+        return list(range(len(text)))
+
+    def set_threads(self, n_threads, n_threads_batch):
+        self.n_threads, self.n_threads_batch = n_threads, n_threads_batch
+
+    def reset(self):
+        pass
+
+    def eval(self, tokens):
+        if len(tokens) > 1:
+            rate = 10.0 * self.n_threads_batch * (1.5 if self.n_ubatch == 512 else 1.0)
+            rate /= 1.2 if self.n_batch > 1024 else 1.0
+        else:
+            rate = {8: 10.0, 6: 14.0, 4: 11.0, 2: 6.0}[self.n_threads]
+        self.clock.now += len(tokens) / rate
+
+    def close(self):
+        self.closed = True
+
+
+def test_thread_candidates():
+    assert thread_candidates(8) == [8, 6, 4, 2]
+    assert thread_candidates(2) == [2, 1]
+    assert thread_candidates(1) == [1]
+
+
+def test_autotune_picks_fastest_prefill_and_decode():
+    """prefill(배치 크기, n_threads_batch)과 decode(n_threads)의 최적값을 따로 고르고 후보별 속도를 남깁니다."""
+    clock, opened = _Clock(), []
+    profile = autotune(8, lambda n_batch, n_ubatch, n_threads: _FakeBench(clock, n_batch, n_ubatch, opened),
+                       '요약할 통화 내용' * 10, prefill_tokens=64, decode_tokens=8, clock=clock)
+
+    assert profile['n_threads_batch'] == 8
+    assert profile['n_ubatch'] == 512
+    assert profile['n_batch'] == 512
+    assert profile['n_threads'] == 6
+    assert abs(profile['prefill_tps'] - 120.0) < 1e-6
+    assert abs(profile['decode_tps'] - 14.0) < 1e-6
+
+    prefill = [result for result in profile['results'] if result['prefill_tps'] > 0]
+    decode = [result for result in profile['results'] if result['decode_tps'] > 0]
+    assert len(prefill) == 5 * 4 and len(decode) == 4
+    assert all(bench.closed for bench in opened)
+    print(f"최적 설정: {dict((k, v) for k, v in profile.items() if k != 'results')}")
+
+
+def test_profile_is_saved_per_model_and_capped(tmp_path):
+    """프로파일은 모델 파일별로 저장되고, 파일이 바뀌거나 비활성화하면 적용하지 않으며 스레드는 인스턴스 예산 이하입니다."""
+    model = tmp_path / 'model.gguf'
+    model.write_bytes(b'gguf')
+    config = {'WORKSPACE_DIR': str(tmp_path), 'AUTOTUNE_PROFILE_PATH': 'profile.json', 'AUTOTUNE_PROFILE_ENABLED': True}
+    profile = {'n_threads': 6, 'n_threads_batch': 8, 'n_batch': 512, 'n_ubatch': 512}
+
+    path = save_profile(str(model), profile, config)
+    assert path == str(tmp_path / 'profile.json')
+    assert load_tuned_profile(str(model), config) == profile
+    assert load_tuned_profile(str(model), dict(config, AUTOTUNE_PROFILE_ENABLED=False)) is None
+
+    assert apply_tuned_profile(profile, 4) == {'n_threads': 4, 'n_threads_batch': 4, 'n_batch': 512, 'n_ubatch': 512}
+    assert apply_tuned_profile(profile, 16) == profile
+    assert apply_tuned_profile(None, 4) == {'n_threads': 4, 'n_threads_batch': 4}
+
+    model.write_bytes(b'gguf v2')
+    assert load_tuned_profile(str(model), config) is None
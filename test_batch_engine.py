@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+연속 배칭 엔진 테스트 (디코드/prefill 혼합 배치, 공유 접두부, 취소, llama_cpp 저수준 API 확인)
+"""
+
+import inspect
+
+import pytest
+
+from batch_engine import PREFIX_SEQ_ID, BatchedBackend, ContinuousBatchEngine
+
+EOG = 0
+
+
+class ScriptedRuntime:
+    """글자 하나를 토큰 하나로 보고, 시퀀스마다 정해진 답을 순서대로 내는 런타임"""
+
+    def __init__(self, answers, n_ctx=256, kv_unified=True):
+        self.answers = answers
+        self._n_ctx = n_ctx
+        self.kv_unified = kv_unified
+        self.batches = []
+        self.copies = []
+        self.removed = []
+        self.kv = {}
+
+    def n_ctx(self):
+        return self._n_ctx
+
+    def tokenize(self, text):
+        return [ord(c) for c in text]
+
+    def decode(self, entries):
+        self.batches.append(list(entries))
+        for token, pos, seq_id, _ in entries:
+            cells = self.kv.setdefault(seq_id, [])
+            assert pos == len(cells), f"seq {seq_id}: 위치 {pos}, KV {len(cells)}"
+            cells.append(token)
+
+    def new_sampler(self, params):
+        return {'answer': [ord(c) for c in self.answers[params['answer']]] + [EOG]}
+
+    def sample(self, sampler, batch_index):
+        return sampler['answer'].pop(0)
+
+    def free_sampler(self, sampler):
+        pass
+
+    def seq_cp(self, src, dst, p0, p1):
+        # llama.cpp처럼 시퀀스별 KV 캐시에서는 전체 복사만 허용
+        assert self.kv_unified or (p0 < 0 and p1 < 0), "seq_cp() is only supported for full KV buffers"
+        self.copies.append((src, dst, p0, p1))
+        self.kv[dst] = self.kv[src][max(p0, 0):None if p1 < 0 else p1]
+
+    def seq_rm(self, seq_id, p0=0, p1=-1):
+        self.removed.append((seq_id, p0))
+        self.kv[seq_id] = self.kv.get(seq_id, [])[:max(p0, 0)]
+
+    def is_eog(self, token):
+        return token == EOG
+
+    def token_to_piece(self, token):
+        return chr(token).encode('utf-8')
+
+
+def run_until_idle(engine):
+    while engine.step():
+        pass
+
+
+def test_interleaves_prefill_with_decode_and_shares_prefix():
+    """생성 중인 시퀀스의 디코드와 새 요청의 prefill이 같은 배치에 들어가고 접두부는 복사됩니다."""
+    runtime = ScriptedRuntime({'a': '가나다', 'b': '라마'})
+    engine = ContinuousBatchEngine(runtime, n_seq_max=3, n_batch=8, min_shared_prefix=4)
+    engine.set_shared_prefix('지시문입니다:')
+
+    first = engine.submit('지시문입니다:하나', max_tokens=10, answer='a')
+    engine.step()
+    second = engine.submit('지시문입니다:둘둘둘둘둘', max_tokens=10, answer='b')
+    run_until_idle(engine)
+
+    assert first.to_completion()['choices'][0] == {'text': '가나다', 'index': 0, 'finish_reason': 'stop'}
+    assert second.to_completion()['choices'][0]['text'] == '라마'
+    # 두 요청 모두 공유 접두부 7토큰 전체를 복사하고 나머지만 prefill
+    assert runtime.copies == [(PREFIX_SEQ_ID, first.seq_id, -1, -1), (PREFIX_SEQ_ID, second.seq_id, -1, -1)]
+    mixed = [batch for batch in runtime.batches
+             if {entry[2] for entry in batch} == {first.seq_id, second.seq_id}]
+    assert mixed, "디코드와 prefill이 한 배치에 섞이지 않았습니다"
+    assert all(len(batch) <= 8 for batch in runtime.batches)
+    assert sorted(engine._free_seq_ids) == [1, 2]
+
+
+def test_split_kv_cache_copies_whole_prefix_and_budgets_per_sequence():
+    """시퀀스별 KV 캐시에서는 접두부를 통째로 복사해 잘라 쓰고, 예산을 n_ctx/n_seq_max로 잡습니다."""
+    runtime = ScriptedRuntime({'a': '가나', 'b': '다라'}, n_ctx=90, kv_unified=False)
+    engine = ContinuousBatchEngine(runtime, n_seq_max=3, n_batch=64, min_shared_prefix=4)
+    engine.set_shared_prefix('지시문입니다:')
+    assert engine.seq_ctx == 30
+
+    # 프롬프트가 접두부보다 짧으면(마지막 토큰을 남겨 공유 5토큰) 전체 복사 뒤 5번 위치부터 잘라냄
+    short = engine.submit('지시문입니다', max_tokens=10, answer='a')
+    # 단일 풀이면 들어갈 크기지만 시퀀스 캐시(30)에는 넘치므로 생성 길이를 줄임
+    long = engine.submit('지시문입니다:' + '가' * 13, max_tokens=50, answer='b')
+    run_until_idle(engine)
+
+    assert runtime.copies == [(PREFIX_SEQ_ID, short.seq_id, -1, -1), (PREFIX_SEQ_ID, long.seq_id, -1, -1)]
+    assert (short.seq_id, 5) in runtime.removed
+    assert short.to_completion()['choices'][0]['text'] == '가나'
+    assert long.max_tokens == 30 - 20
+    assert long.to_completion()['choices'][0]['text'] == '다라'
+
+    too_long = engine.submit('가' * 31, max_tokens=5, answer='a')
+    run_until_idle(engine)
+    assert too_long.finish_reason == 'error' and '30' in too_long.error
+
+
+def test_cancel_and_length_limit_through_backend():
+    """max_tokens에서 멈추고, 스트림을 중간에 닫으면 시퀀스를 반납합니다."""
+    runtime = ScriptedRuntime({'long': '가나다라마바사'})
+    engine = ContinuousBatchEngine(runtime, n_seq_max=2, n_batch=16)
+
+    limited = engine.submit('질문', max_tokens=3, answer='long')
+    run_until_idle(engine)
+    assert limited.finish_reason == 'length'
+    assert ''.join(limited.text_parts) == '가나다'
+
+    engine.start()
+    try:
+        backend = BatchedBackend(engine)
+        stream = backend('질문', max_tokens=50, stream=True, answer='long')
+        assert next(stream)['choices'][0]['text'] == '가'
+        stream.close()
+        request = engine._waiting or engine._active
+        assert not request or request[0].cancelled
+        assert backend.complete('질문', max_tokens=2, answer='long')['choices'][0]['text'] == '가나'
+    finally:
+        engine.stop()
+    assert engine._free_seq_ids == [1]
+
+
+def test_llama_batch_runtime_api_smoke():
+    """LlamaBatchRuntime이 호출하는 llama_cpp 저수준 API가 설치된 버전에 있는지 확인 (llama_cpp가 없으면 건너뜀)"""
+    llama_cpp = pytest.importorskip('llama_cpp')
+    from llama_cpp import _internals
+
+    from kv_cache_planner import resolve_kv_cache_params
+
+    for name in ('llama_context_default_params', 'llama_model_default_params', 'llama_sampler_sample',
+                 'llama_vocab_is_eog', 'llama_token_to_piece', 'LLAMA_DEFAULT_SEED'):
+        assert hasattr(llama_cpp, name), name
+
+    context_params = llama_cpp.llama_context_default_params()
+    kv_params = resolve_kv_cache_params({})
+    for field in ('n_ctx', 'n_batch', 'n_ubatch', 'n_seq_max', 'n_threads', 'n_threads_batch', *kv_params):
+        assert hasattr(context_params, field), field
+    model_params = llama_cpp.llama_model_default_params()
+    for field in ('n_gpu_layers', 'use_mmap', 'use_mlock'):
+        assert hasattr(model_params, field), field
+
+    def arguments(function):
+        return list(inspect.signature(function).parameters)[1:]  # self 제외
+
+    assert arguments(_internals.LlamaModel.__init__)[:3] == ['path_model', 'params', 'verbose']
+    assert len(arguments(_internals.LlamaModel.tokenize)) == 3
+    assert len(arguments(_internals.LlamaContext.kv_cache_seq_cp)) == 4
+    assert len(arguments(_internals.LlamaContext.kv_cache_seq_rm)) == 3
+    assert len(arguments(_internals.LlamaContext.decode)) == 1
+    assert len(arguments(_internals.LlamaSampler.add_penalties)) == 4
+    for name in ('add_greedy', 'add_top_k', 'add_top_p', 'add_min_p', 'add_temp', 'add_dist', 'close'):
+        assert callable(getattr(_internals.LlamaSampler, name)), name
+    assert 'n_seq_max' in arguments(_internals.LlamaBatch.__init__)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+짧은 통화 묶음 처리 테스트 (배열 분리, 슬롯별 응답, 단일 처리 대체, 시간 초과 시 추출 요약)
+"""
+
+import json
+
+from call_packing import build_packed_prompt, parse_packed_output, process_with_packing
+from gemma_summarizer import set_thread_backend
+from ipc_queue_manager import QueueManager
+from summarizer_backend import SummarizerBackend
+
+PACKING_CONFIG = {'PACKING_ENABLED': True, 'PACKING_MAX_CHARS': 100, 'PACKING_MAX_CALLS': 3,
+                  'PACKING_MAX_TOTAL_CHARS': 300, 'PACKING_WINDOW_MS': 50, 'PACKING_TOKENS_PER_CALL': 100}
+
+
+class ScriptedBackend(SummarizerBackend):
+    """묶음 프롬프트에는 정해진 배열을, 단일 프롬프트에는 단일 결과를 돌려주는 백엔드"""
+
+    def __init__(self, packed_text):
+        self.packed_text = packed_text
+        self.prompts = []
+
+    def complete(self, prompt, max_tokens=256, **params):
+        self.prompts.append(prompt)
+        if 'JSON 배열' in prompt:
+            text = self.packed_text
+        else:
+            text = '```json\n{"summary": "단일 처리 요약", "keyword": "단일", "paragraphs": []}\n```'
+        return {'choices': [{'text': text, 'finish_reason': 'stop'}], 'usage': {'completion_tokens': 10}}
+
+    def stream(self, prompt, max_tokens=256, **params):
+        output = self.complete(prompt, max_tokens)
+        yield {'choices': [{'text': output['choices'][0]['text'], 'finish_reason': None}]}
+        yield {'choices': [{'text': '', 'finish_reason': 'stop'}]}
+
+    def tokenize(self, text, add_bos=False):
+        return list(range(len(text) // 2))
+
+
+def test_parse_packed_output_by_index_and_truncation():
+    """index 순서가 바뀌어도 분리하고, 잘린 배열은 완성된 원소까지만 사용합니다."""
+    result = ('```json\n[{"index": 2, "summary": "둘째 요약", "keyword": "b"},\n'
+              ' {"index": 1, "summary": "첫째 요약", "keyword": "a"},\n'
+              ' {"index": 3, "summary": "셋째')
+    parsed = parse_packed_output(result, 3)
+    assert sorted(parsed) == [1, 2]
+    assert parsed[1]['summary'] == '첫째 요약'
+    assert parse_packed_output('배열 없음', 2) == {}
+
+    prompt = build_packed_prompt(['고객: 안녕하세요', '상담사: 네'])
+    assert '[통화 1]\n고객: 안녕하세요' in prompt and '[통화 2]\n상담사: 네' in prompt
+
+
+def test_packed_requests_keep_slot_ids_and_fall_back():
+    """짧은 요청을 묶어 슬롯별로 응답하고, 누락된 통화는 단일 처리합니다."""
+    backend = ScriptedBackend('```json\n[{"index": 1, "summary": "포인트 사용처 안내", "keyword": "포인트, 사용처", '
+                              '"paragraphs": []}]\n```')
+    set_thread_backend(backend)
+    queue_manager = QueueManager()
+    queue_manager.put_request(2, {'transactionid': 'tx-2', 'sequenceno': '2', 'text': '고객: 카드 발급 문의합니다'})
+    queue_manager.put_request(3, {'transactionid': 'tx-3', 'sequenceno': '3', 'text': '고객: ' + '카드 발급 일정과 포인트 적립 조건 문의합니다 ' * 5})
+    responses = {}
+    try:
+        count = process_with_packing(
+            queue_manager, (1, {'transactionid': 'tx-1', 'sequenceno': '1', 'text': '고객: 포인트 어디서 써요'}),
+            lambda slot_id, data: data, lambda slot_id, response: responses.setdefault(slot_id, response), PACKING_CONFIG)
+    finally:
+        set_thread_backend(None)
+
+    assert count == 3
+    assert sorted(responses) == [1, 2, 3]
+    assert [responses[i]['transactionid'] for i in (1, 2, 3)] == ['tx-1', 'tx-2', 'tx-3']
+    assert responses[1]['response']['summary']['summary'].startswith('포인트 사용처')
+    # 묶음 결과에 없던 2번과 길어서 묶이지 않은 3번은 단일 처리
+    assert responses[2]['response']['summary']['summary'].startswith('단일 처리')
+    assert responses[3]['response']['summary']['summary'].startswith('단일 처리')
+    assert sum('JSON 배열' in prompt for prompt in backend.prompts) == 1
+    print(json.dumps(responses[1], ensure_ascii=False))
+
+
+def test_packed_timeout_uses_extractive_summary_instead_of_single_calls():
+    """묶음 생성이 MODEL_TIMEOUT으로 중단되면 누락된 통화를 다시 추론하지 않고 추출 요약으로 응답합니다."""
+    from inference_watchdog import current_deadline
+
+    class ExpiringBackend(ScriptedBackend):
+        def complete(self, prompt, max_tokens=256, **params):
+            current_deadline().trigger()  # 생성 중 마감 도달
+            return super().complete(prompt, max_tokens, **params)
+
+    backend = ExpiringBackend('```json\n[{"index": 1, "summary": "포인트 사용처 안내", "keyword": "포인트, 사용처", '
+                              '"paragraphs": []}]\n```')
+    set_thread_backend(backend)
+    queue_manager = QueueManager()
+    queue_manager.put_request(2, {'transactionid': 'tx-2', 'sequenceno': '2', 'text': '고객: 카드 발급 문의합니다'})
+    responses = {}
+    try:
+        process_with_packing(
+            queue_manager, (1, {'transactionid': 'tx-1', 'sequenceno': '1', 'text': '고객: 포인트 어디서 써요'}),
+            lambda slot_id, data: data, lambda slot_id, response: responses.setdefault(slot_id, response), PACKING_CONFIG)
+    finally:
+        set_thread_backend(None)
+
+    assert len(backend.prompts) == 1 and current_deadline() is None
+    assert responses[1]['response']['summary']['summary'].startswith('포인트 사용처')
+    assert not responses[2]['response']['summary']['summary'].startswith('단일 처리')
@@ -2,55 +2,116 @@
 # -*- coding: utf-8 -*-
 
 """
-압축 로직 직접 테스트
+압축 로직 직접 테스트 (글자/바이트 예산, 키워드 유지, 로컬 압축 실패 시 LLM 재질의)
 """
 
-from gemma_summarizer import compress_summary_with_keywords, extract_keywords_from_text
+import gemma_summarizer
+from gemma_summarizer import compress_summary_with_keywords, extract_keywords_from_text, process_request
+from metrics import metrics
+from postprocessor import ResponsePostprocessor
+from summarizer_backend import FakeBackend
+from summary_compressor import is_acceptable_compression
+
+TEST_CASES = [
+    {
+        "original": "고객이 바우처 카드 사용 문의를 하고 상담원이 상세히 답변했습니다.",
+        "keywords": ["바우처", "카드", "사용", "문의", "상담"],
+        "expected_max_length": 20
+    },
+    {
+        "original": "지급문의 관련하여 상세한 안내를 제공했습니다.",
+        "keywords": ["지급", "문의", "안내", "제공"],
+        "expected_max_length": 20
+    },
+    {
+        "original": "매우 긴 문장으로 20자를 초과하는 내용을 포함하고 있어서 자동으로 압축되어야 합니다.",
+        "keywords": ["문장", "초과", "내용", "압축"],
+        "expected_max_length": 20
+    },
+    {
+        "original": "짧은 요약",
+        "keywords": ["짧은", "요약"],
+        "expected_max_length": 20
+    }
+]
+
+CONVERSATION = ('나 > 농협 카드 발급 문의드립니다\n'
+                '상대방 > 네 농협 체험 카드 발급 방법 안내해 드리겠습니다\n'
+                '나 > 포인트 지급은 언제 되나요\n'
+                '상대방 > 카드 발급 후 포인트 지급됩니다')
+
+# 120바이트를 넘고 로컬 압축으로 줄일 수 있는 요약 (대화 키워드와 겹침)
+COMPRESSIBLE_SUMMARY = ('고객이 농협 체험 카드 발급 방법과 포인트 지급 일정 및 기존 평생 교육 희망 카드 '
+                        '사용 기간 만료에 대해 문의하여 상담원이 상세히 안내했습니다')
+
+# 120바이트를 넘고 대화 키워드와 겹치지 않아 로컬 압축 품질 검사를 통과하지 못하는 요약
+INCOMPRESSIBLE_SUMMARY = '어제저녁회식자리에서있었던일에대한개인적인감상과주말등산계획그리고가족여행일정에관한이야기를길게나누었음'
+
 
 def test_compression_logic():
-    """압축 로직을 직접 테스트합니다."""
-    
-    test_cases = [
-        {
-            "original": "고객이 바우처 카드 사용 문의를 하고 상담원이 상세히 답변했습니다.",
-            "keywords": ["바우처", "카드", "사용", "문의", "상담"],
-            "expected_max_length": 20
-        },
-        {
-            "original": "지급문의 관련하여 상세한 안내를 제공했습니다.",
-            "keywords": ["지급", "문의", "안내", "제공"],
-            "expected_max_length": 20
-        },
-        {
-            "original": "매우 긴 문장으로 20자를 초과하는 내용을 포함하고 있어서 자동으로 압축되어야 합니다.",
-            "keywords": ["문장", "초과", "내용", "압축"],
-            "expected_max_length": 20
-        },
-        {
-            "original": "짧은 요약",
-            "keywords": ["짧은", "요약"],
-            "expected_max_length": 20
-        }
-    ]
-    
-    print("=== 압축 로직 직접 테스트 ===\n")
-    
-    for i, test_case in enumerate(test_cases, 1):
+    """압축 결과는 글자/바이트 예산을 지키고 품질 검사를 통과합니다."""
+    for test_case in TEST_CASES:
         original = test_case["original"]
         keywords = test_case["keywords"]
         max_length = test_case["expected_max_length"]
-        
-        print(f"테스트 {i}:")
-        print(f"  원본: '{original}' ({len(original)}자)")
-        print(f"  키워드: {keywords}")
-        
-        # 압축 실행
+
         compressed = compress_summary_with_keywords(original, keywords, max_length)
-        
-        print(f"  압축 결과: '{compressed}' ({len(compressed)}자)")
-        print(f"  길이 제한 준수: {'✅' if len(compressed) <= max_length else '❌'}")
-        print(f"  의미 보존: {'✅' if len(compressed) >= 4 else '❌'}")
-        print()
+        assert 4 <= len(compressed) <= max_length, compressed
+        assert len(compressed.encode('utf-8')) <= 120
+        assert is_acceptable_compression(compressed, keywords, max_length)
+
+        # 바이트 예산만 주면 바이트 수로 제한
+        compressed = compress_summary_with_keywords(original, keywords, None, max_bytes=30)
+        assert 0 < len(compressed.encode('utf-8')) <= 30, compressed
+
+
+def test_compression_keeps_keywords():
+    """예산 안에서 키워드와 겹치는 단어를 먼저 남깁니다."""
+    compressed = compress_summary_with_keywords(TEST_CASES[0]["original"], TEST_CASES[0]["keywords"], 12)
+    assert compressed.split()[:2] == ['바우처', '카드']
+    compressed = compress_summary_with_keywords(TEST_CASES[2]["original"], TEST_CASES[2]["keywords"], 20)
+    assert '문장' in compressed and '내용' in compressed
+    assert extract_keywords_from_text(CONVERSATION, top_n=3) == ['카드', '발급', '농협']
+
+
+def _run_requery_request(monkeypatch, summary, text=CONVERSATION):
+    prompts = []
+
+    class RecordingBackend(FakeBackend):
+        def _generate(self, prompt, max_tokens):
+            prompts.append(prompt)
+            return super()._generate(prompt, max_tokens)
+
+    record = {'summary': summary, 'keyword': '농협, 카드, 포인트',
+              'paragraphs': [{'summary': '농협 카드 발급 문의', 'keyword': '농협, 카드', 'sentiment': '보통'}]}
+    metrics.reset()
+    monkeypatch.setattr(gemma_summarizer, '_backend', RecordingBackend([record], sleep=lambda seconds: None))
+    response = process_request({'transactionid': 'tx-requery', 'sequenceno': '1', 'text': text})
+    return response['response']['summary'], prompts
+
+
+def test_local_compression_skips_llm_requery(monkeypatch):
+    """긴 요약은 로컬 압축으로 예산에 맞추고 LLM 재질의를 하지 않습니다."""
+    summary, prompts = _run_requery_request(monkeypatch, COMPRESSIBLE_SUMMARY)
+    assert len(prompts) == 1
+    assert len(summary['summary'].encode('utf-8')) <= ResponsePostprocessor.SUMMARY_MAX_BYTES
+    assert '농협' in summary['summary'] and '카드' in summary['summary']
+    assert metrics.get_counter('requery.needed') == 1
+    assert metrics.get_counter('requery.local_compressed') == 1
+    assert metrics.get_counter('requery.llm') == 0
+
+
+def test_llm_requery_when_local_compression_fails(monkeypatch):
+    """로컬 압축이 품질 검사를 통과하지 못하면 LLM 재질의로 넘어갑니다."""
+    summary, prompts = _run_requery_request(monkeypatch, INCOMPRESSIBLE_SUMMARY,
+                                            text=CONVERSATION + '\n나 > 네 감사합니다')
+    assert len(prompts) == 2 and '다시 요약' in prompts[1]
+    assert not summary['summary'].startswith('[재질의 필요]')
+    assert metrics.get_counter('requery.local_compressed') == 0
+    assert metrics.get_counter('requery.llm') == 1
+
 
 if __name__ == "__main__":
-    test_compression_logic() 
\ No newline at end of file
+    test_compression_logic()
+    test_compression_keeps_keywords()
+    print("압축 로직 테스트 통과")
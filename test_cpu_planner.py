@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+CPU 계획 테스트 (cgroup cpu.max, 물리 코어/SMT/NUMA 토폴로지, 인스턴스별 겹치지 않는 CPU 집합)
+"""
+
+from cpu_planner import parse_cpu_list, plan_cpus, read_cgroup_cpu_limit, read_cpu_topology
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def _fake_sysfs(tmp_path):
+    """NUMA 노드 2개 x 물리 코어 2개 x SMT 2 = 논리 CPU 8개"""
+    cpu_root, node_root = tmp_path / 'cpu', tmp_path / 'node'
+    _write(node_root / 'node0' / 'cpulist', '0-3\n')
+    _write(node_root / 'node1' / 'cpulist', '4-7\n')
+    for cpu in range(8):
+        _write(cpu_root / f'cpu{cpu}' / 'topology' / 'physical_package_id', str(cpu // 4))
+        _write(cpu_root / f'cpu{cpu}' / 'topology' / 'core_id', str((cpu % 4) // 2))
+    return str(cpu_root), str(node_root)
+
+
+def test_cgroup_cpu_max(tmp_path):
+    """자신의 cgroup부터 상위까지 cpu.max 중 가장 작은 할당량을 사용하고, 제한이 없으면 None입니다."""
+    root = tmp_path / 'cgroup'
+    _write(root / 'cpu.max', 'max 100000\n')
+    _write(root / 'system.slice' / 'cpu.max', '400000 100000\n')
+    _write(root / 'system.slice' / 'app' / 'cpu.max', '250000 100000\n')
+    _write(tmp_path / 'proc_cgroup', '0::/system.slice/app\n')
+    assert read_cgroup_cpu_limit(str(root), str(tmp_path / 'proc_cgroup')) == 2.5
+
+    _write(tmp_path / 'unlimited', '0::/\n')
+    assert read_cgroup_cpu_limit(str(root), str(tmp_path / 'unlimited')) is None
+
+    v1 = tmp_path / 'v1'
+    _write(v1 / 'cpu' / 'cpu.cfs_quota_us', '150000')
+    _write(v1 / 'cpu' / 'cpu.cfs_period_us', '100000')
+    assert read_cgroup_cpu_limit(str(v1), str(tmp_path / 'missing')) == 1.5
+
+
+def test_plan_uses_physical_cores_and_disjoint_numa_local_sets(tmp_path):
+    """물리 코어당 스레드 1개, 인스턴스마다 같은 NUMA 노드의 겹치지 않는 코어를 배정합니다."""
+    assert parse_cpu_list('0-2,5,7-8') == [0, 1, 2, 5, 7, 8]
+    topology = read_cpu_topology(list(range(8)), *_fake_sysfs(tmp_path))
+    assert [core.cpus for core in topology] == [[0, 1], [2, 3], [4, 5], [6, 7]]
+    assert [core.numa_node for core in topology] == [0, 0, 1, 1]
+
+    plan = plan_cpus(2, {'CPU_LIMIT_PERCENT': 100}, allowed=list(range(8)), topology=topology, cgroup_cpus=None)
+    assert plan.total_threads == 4 and plan.instance_threads == [2, 2]
+    assert plan.instance_cpus == [[0, 2], [4, 6]]
+
+    # cgroup 할당량 2.5 CPU → 스레드 2개
+    quota = plan_cpus(2, {'CPU_LIMIT_PERCENT': 100}, allowed=list(range(8)), topology=topology, cgroup_cpus=2.5)
+    assert quota.instance_threads == [1, 1] and quota.instance_cpus == [[0], [2]]
+
+    # SMT 사용 시 형제 논리 CPU까지 사용
+    smt = plan_cpus(2, {'CPU_LIMIT_PERCENT': 100, 'CPU_USE_SMT': True}, allowed=list(range(8)),
+                    topology=topology, cgroup_cpus=None)
+    assert smt.instance_cpus == [[0, 1, 2, 3], [4, 5, 6, 7]]
+
+    # affinity 마스크가 일부 CPU만 허용하면 그 안에서만 배정
+    allowed = [4, 5, 6, 7]
+    masked = plan_cpus(1, {'CPU_LIMIT_PERCENT': 100}, allowed=allowed,
+                       topology=read_cpu_topology(allowed, *_fake_sysfs(tmp_path)), cgroup_cpus=None)
+    assert masked.process_cpus == [4, 6]
+
+    forced = plan_cpus(3, {'MAX_CPU_THREADS': 3}, allowed=list(range(8)), topology=topology, cgroup_cpus=None)
+    assert forced.instance_threads == [1, 1, 1] and forced.instance_cpus == [[0], [2], [4]]
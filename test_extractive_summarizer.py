@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+추출 요약 대체 테스트 (TextRank 발화 순위와 후보 상한, 응답 스키마, 모델 오류/처리 오류 시 대체 응답)
+"""
+
+import glob
+import json
+import time
+
+from extractive_summarizer import extractive_summary, rank_turns, split_turns, textrank
+from gemma_summarizer import process_request, set_thread_backend
+from postprocessor import ResponsePostprocessor
+from preprocessor import preprocess_request_data
+from summarizer_backend import FakeBackend
+
+TEXT = ('나 > 여보세요\n'
+        '상대방 > 네 고객님\n'
+        '나 > 카드를 잃어버려서 분실 신고 문의드립니다\n'
+        '상대방 > 네 카드 분실 신고 접수 도와드리겠습니다\n'
+        '나 > 재발급 카드도 같이 신청할 수 있나요\n'
+        '상대방 > 네 재발급 카드 신청 처리해 드리고 배송 안내 문자 보내드리겠습니다\n'
+        '나 > 네 감사합니다')
+
+
+def test_textrank_prefers_central_turns():
+    scores = textrank([{'카드', '분실'}, {'카드', '분실', '신고'}, {'카드', '재발급'}, {'날씨'}])
+    assert min(scores[0], scores[1]) > scores[2] > scores[3]
+
+
+def test_textrank_matches_dense_graph_and_stays_fast():
+    """역색인으로 만든 간선만 써도 모든 발화 쌍을 비교한 TextRank와 같은 점수이며, 2,000발화도 빠르게 계산합니다."""
+    from extractive_summarizer import _similarity
+
+    word_sets = [{'카드', '분실'}, {'카드', '분실', '신고'}, {'카드', '재발급'}, {'날씨'}, {'재발급', '배송', '주소'}]
+    count = len(word_sets)
+    weights = [[_similarity(a, b) if i != j else 0.0 for j, b in enumerate(word_sets)] for i, a in enumerate(word_sets)]
+    dense = [1.0 / count] * count
+    for _ in range(50):
+        dense = [0.15 / count + 0.85 * sum(weights[j][i] / sum(weights[j]) * dense[j]
+                                            for j in range(count) if weights[j][i] > 0) for i in range(count)]
+    assert all(abs(a - b) < 1e-6 for a, b in zip(textrank(word_sets), dense))
+
+    vocabulary = [f'단어{i}' for i in range(300)]
+    many = [{vocabulary[(i * 7 + k * 13) % 300] for k in range(5)} for i in range(2000)]
+    start = time.time()
+    assert len(textrank(many)) == 2000
+    assert time.time() - start < 3.0
+
+
+def test_rank_turns_caps_candidates_by_sentence_score():
+    """후보가 max_candidates를 넘으면 문장 적합도 상위 발화만 순위를 받습니다."""
+    utterances = [utterance for _, utterance in split_turns(TEXT)]
+    uncapped = rank_turns(utterances, max_candidates=0)
+    capped = rank_turns(utterances, max_candidates=1)
+    assert sum(score > 0 for score in uncapped) > 1 and sum(score > 0 for score in capped) == 1
+    best = max(range(len(utterances)), key=lambda index: (ResponsePostprocessor.score_sentence(utterances[index])
+                                                          if uncapped[index] > 0 else -1, -index))
+    assert capped[best] > 0
+
+
+def test_rank_turns_skips_backchannel():
+    utterances = [utterance for _, utterance in split_turns(TEXT)]
+    scores = rank_turns(utterances)
+    assert scores[0] == 0.0 and scores[1] == 0.0 and scores[-1] == 0.0
+    assert max(scores) > 0
+
+
+def test_extractive_summary_schema_on_samples():
+    """샘플 요청 모두 스키마에 맞는 요약을 수십 ms 안에 생성합니다."""
+    paths = sorted(glob.glob('sample/sample_request_*.json'))
+    assert paths
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            text = preprocess_request_data(json.load(f))['text']
+        start = time.time()
+        result = extractive_summary(text)
+        assert time.time() - start < 1.0
+        assert set(result) == {'summary', 'keyword', 'paragraphs'}
+        assert result['summary'] and len(result['summary'].encode('utf-8')) <= ResponsePostprocessor.SUMMARY_MAX_BYTES
+        assert 1 <= len(result['paragraphs']) <= 3
+        for paragraph in result['paragraphs']:
+            assert set(paragraph) == {'summary', 'keyword', 'sentiment'}
+
+
+def test_model_failure_falls_back_to_extractive(monkeypatch):
+    """모델이 쓸 수 있는 요약을 만들지 못하면 오류 대신 추출 요약으로 응답합니다."""
+    monkeypatch.setenv('RESULT_CACHE_ENABLED', 'false')
+
+    class BrokenBackend(FakeBackend):
+        def complete(self, prompt, max_tokens=256, **params):
+            raise RuntimeError("모델 오류")
+
+        stream = complete
+
+    set_thread_backend(BrokenBackend([{'summary': '사용 안 함'}], sleep=lambda seconds: None))
+    try:
+        response = process_request({'transactionid': 'tx-fallback', 'sequenceno': '1', 'text': TEXT})
+    finally:
+        set_thread_backend(None)
+
+    body = response['response']
+    assert body['result'] == '0'
+    assert body['fallback'] == {'method': 'extractive', 'reason': 'model_failure'}
+    assert '카드' in body['summary']['keyword']
+
+
+def test_fallback_can_be_disabled(monkeypatch):
+    monkeypatch.setenv('RESULT_CACHE_ENABLED', 'false')
+    monkeypatch.setenv('EXTRACTIVE_FALLBACK_ENABLED', 'false')
+    set_thread_backend(FakeBackend([{'summary': ''}], sleep=lambda seconds: None))
+    try:
+        response = process_request({'transactionid': 'tx-nofallback', 'sequenceno': '1', 'text': TEXT})
+    finally:
+        set_thread_backend(None)
+    assert 'fallback' not in response['response']
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+추론 풀 테스트 (스레드 분할, 워커별 백엔드 바인딩)
+"""
+
+import threading
+
+from gemma_summarizer import get_backend, set_thread_backend
+from inference_pool import create_inference_pool, plan_thread_slices
+
+
+def test_plan_thread_slices():
+    """전체 스레드를 인스턴스 수로 균등 분할하고 나머지는 앞에서부터 배분합니다."""
+    assert plan_thread_slices(32, 4) == [8, 8, 8, 8]
+    assert plan_thread_slices(10, 3) == [4, 3, 3]
+    assert plan_thread_slices(2, 4) == [1, 1, 1, 1]
+
+
+def test_workers_use_their_own_instance():
+    """각 워커 스레드는 자신에게 바인딩된 인스턴스만 사용합니다."""
+    pool = create_inference_pool({'IPC_WORKER_THREADS': 3, 'MODEL_THREADS_PER_INSTANCE': 2,
+                                  'MODEL_BACKEND': 'fake', 'FAKE_BACKEND_TIME_SCALE': 0.0})
+    seen = {}
+
+    def worker(worker_id):
+        set_thread_backend(pool.backend(worker_id))
+        seen[worker_id] = get_backend()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(pool.size)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert pool.thread_slices == [2, 2, 2]
+    assert [seen[i] is pool.backend(i) for i in range(3)] == [True, True, True]
+    assert len({id(backend) for backend in seen.values()}) == 3
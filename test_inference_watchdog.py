@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+추론 워치독 테스트 (stopping_criteria 마감, 부분 결과 응답)
+"""
+
+import json
+
+from gemma_summarizer import process_request, set_thread_backend
+from inference_watchdog import apply_deadline, begin_deadline, current_deadline, end_deadline
+from metrics import metrics
+from summarizer_backend import FakeBackend
+
+RECORD = {"summary": "해외 결제 차단 해제 요청과 처리 완료 안내",
+          "keyword": "해외 결제, 차단 해제, 카드",
+          "paragraphs": [{"summary": "해외 결제 차단 해제 요청", "keyword": "해외 결제", "sentiment": "보통"},
+                         {"summary": "차단 해제 처리 완료 안내", "keyword": "처리 완료", "sentiment": "보통"}]}
+
+
+def test_deadline_as_stopping_criteria():
+    """마감 전에는 False, 마감 후에는 True를 반환하고 기존 stopping_criteria와 결합됩니다."""
+    previous = begin_deadline(60)
+    try:
+        deadline = current_deadline()
+        assert deadline([1, 2], None) is False and not deadline.triggered
+        params = apply_deadline({'stopping_criteria': lambda input_ids, logits: len(input_ids) > 2})
+        assert params['stopping_criteria']([1, 2, 3], None) is True
+        assert params['stopping_criteria']([1], None) is False
+
+        deadline.deadline = 0
+        assert deadline([1], None) is True and deadline.triggered
+    finally:
+        end_deadline(previous)
+    assert current_deadline() is previous
+    assert begin_deadline(0) is None and apply_deadline({'top_k': 1}) == {'top_k': 1}
+    end_deadline(None)
+
+
+def test_timeout_returns_partial_summary(monkeypatch):
+    """MODEL_TIMEOUT이 지나면 생성을 중단하고 부분 결과를 timedOut 플래그와 함께 응답합니다."""
+    monkeypatch.setenv('MODEL_TIMEOUT', '2')
+    # 초당 20토큰 x 2초 = 40토큰(80자)까지만 생성, 실제로는 기다리지 않음
+    backend = FakeBackend([RECORD], tokens_per_second=20, sleep=lambda seconds: None)
+    metrics.reset()
+    set_thread_backend(backend)
+    try:
+        response = process_request({'transactionid': 'tx-1', 'sequenceno': '1',
+                                    'text': '나 > 해외 결제가 막혔어요\n상대방 > 네 해외 결제 차단 해제해 드렸습니다'})
+    finally:
+        set_thread_backend(None)
+
+    body = response['response']
+    assert body['timedOut'] is True
+    assert body['result'] == '0'
+    assert body['summary']['summary'].startswith('해외 결제 차단 해제')
+    assert '_timed_out' not in body['summary']
+    assert metrics.get_counter('watchdog.timeouts') == 1
+    print(json.dumps(response, ensure_ascii=False))
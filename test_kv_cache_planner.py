@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+KV 캐시 용량 계획 테스트 (GGUF 헤더 읽기, KV 캐시 크기, 슬라이딩 윈도우 레이어, 최대 동시 컨텍스트 수, KV 캐시 설정 변환)
+"""
+
+import struct
+
+from cpu_planner import read_cgroup_memory_limit
+from kv_cache_planner import (instance_memory_bytes, kv_cache_bytes, model_shape, plan_capacity, read_gguf_metadata,
+                              resolve_kv_cache_params, swa_cache_cells)
+
+MB = 1024 * 1024
+
+
+def _gguf_string(text):
+    data = text.encode('utf-8')
+    return struct.pack('<Q', len(data)) + data
+
+
+def _write_gguf(path, metadata):
+    """메타데이터만 있는 GGUF v3 파일 (값: int → uint32, str → 문자열, list[str] → 문자열 배열)"""
+    body = b''
+    for key, value in metadata.items():
+        body += _gguf_string(key)
+        if isinstance(value, str):
+            body += struct.pack('<I', 8) + _gguf_string(value)
+        elif isinstance(value, list):
+            body += struct.pack('<IIQ', 9, 8, len(value)) + b''.join(_gguf_string(item) for item in value)
+        else:
+            body += struct.pack('<II', 4, value)
+    path.write_bytes(b'GGUF' + struct.pack('<IQQ', 3, 0, len(metadata)) + body)
+
+
+def _llama_gguf(tmp_path):
+    """레이어 32, 어텐션 헤드 32, KV 헤드 8(GQA), 임베딩 4096 → 헤드 차원 128"""
+    path = tmp_path / 'model.gguf'
+    _write_gguf(path, {
+        'general.architecture': 'llama',
+        'llama.block_count': 32,
+        'llama.context_length': 32768,
+        'llama.embedding_length': 4096,
+        'llama.attention.head_count': 32,
+        'llama.attention.head_count_kv': 8,
+        'tokenizer.ggml.tokens': ['<s>', '</s>', '가', '나'],
+    })
+    return path
+
+
+def test_read_gguf_metadata_and_shape(tmp_path):
+    path = _llama_gguf(tmp_path)
+    metadata = read_gguf_metadata(str(path))
+    assert metadata['llama.block_count'] == 32
+    assert metadata['tokenizer.ggml.tokens'] == 4  # 토크나이저 배열은 원소 수만
+
+    shape = model_shape(metadata)
+    assert shape.n_layer == 32 and shape.n_head_kv == [8] * 32
+    assert shape.key_length == shape.value_length == 128
+    assert shape.n_ctx_train == 32768 and shape.n_vocab == 4
+
+
+def test_kv_cache_bytes_by_type(tmp_path):
+    """f16 KV는 토큰당 32레이어 x 8헤드 x 128 x 2(K, V) x 2바이트, q8_0/q4_0은 블록 스케일 포함 비율."""
+    shape = model_shape(read_gguf_metadata(str(_llama_gguf(tmp_path))))
+    f16 = kv_cache_bytes(shape, 8192)
+    assert f16 == 8192 * 32 * 8 * 128 * 2 * 2 == 1024 * MB
+    assert kv_cache_bytes(shape, 8192, 'q8_0', 'q8_0') == f16 * 34 // 64
+    assert kv_cache_bytes(shape, 8192, 'q4_0', 'q4_0') == f16 * 18 // 64
+    assert kv_cache_bytes(shape, 16384) == 2 * f16
+
+
+def test_sliding_window_layers_use_window_cells(tmp_path):
+    """gemma3는 6개 레이어 중 5개가 SWA 레이어이며, MODEL_SWA_FULL=false면 윈도우 + n_ubatch 칸만 계산합니다."""
+    path = tmp_path / 'gemma3.gguf'
+    _write_gguf(path, {
+        'general.architecture': 'gemma3',
+        'gemma3.block_count': 26,
+        'gemma3.context_length': 32768,
+        'gemma3.embedding_length': 1152,
+        'gemma3.attention.head_count': 4,
+        'gemma3.attention.head_count_kv': 1,
+        'gemma3.attention.key_length': 256,
+        'gemma3.attention.value_length': 256,
+        'gemma3.attention.sliding_window': 512,
+    })
+    shape = model_shape(read_gguf_metadata(str(path)))
+    assert shape.sliding_window == 512
+    assert sum(shape.swa_layers) == 22 and not shape.swa_layers[5] and shape.swa_layers[6]
+
+    per_cell = 1 * 256 * 2 * 2  # 레이어당 칸 하나: KV 헤드 1 x 256 x (K, V) x f16
+    assert swa_cache_cells(shape, 8192) == 8192
+    assert swa_cache_cells(shape, 8192, swa_full=False) == 1024
+    assert swa_cache_cells(shape, 8192, swa_full=False, n_ubatch=100, flash_attn=True) == 768
+    assert swa_cache_cells(shape, 512, swa_full=False) == 512
+    assert kv_cache_bytes(shape, 8192) == 26 * 8192 * per_cell
+    assert kv_cache_bytes(shape, 8192, swa_cells=1024) == (4 * 8192 + 22 * 1024) * per_cell
+
+    config = {'MODEL_CONTEXT_SIZE': 8192, 'MODEL_COMPUTE_BUFFER_MB': 0}
+    assert instance_memory_bytes(config, str(path)) == 26 * 8192 * per_cell
+    assert instance_memory_bytes({**config, 'MODEL_SWA_FULL': False}, str(path)) == (4 * 8192 + 22 * 1024) * per_cell
+    # 패턴을 모르는 구조나 sliding_window가 없는 모델은 모든 레이어가 n_ctx 칸
+    assert model_shape(read_gguf_metadata(str(_llama_gguf(tmp_path)))).swa_layers == ()
+
+
+def test_plan_capacity(tmp_path):
+    """가중치는 한 번만 빼고 인스턴스마다 KV + 계산 버퍼를 더해 최대 동시 컨텍스트 수를 계산합니다."""
+    path = _llama_gguf(tmp_path)
+    config = {'MODEL_CONTEXT_SIZE': 8192, 'MODEL_COMPUTE_BUFFER_MB': 256, 'KV_PLANNER_RESERVE_MB': 1024}
+
+    plan = plan_capacity(config, memory_bytes=8 * 1024 * MB, model_path=str(path))
+    assert plan.kv_bytes_per_instance == 1024 * MB
+    assert plan.max_instances == (7 * 1024 * MB - plan.model_bytes) // (1280 * MB) == 5
+
+    q8 = plan_capacity(config, type_k='q8_0', type_v='q8_0', memory_bytes=8 * 1024 * MB, model_path=str(path))
+    q4 = plan_capacity(config, type_k='q4_0', type_v='q4_0', memory_bytes=8 * 1024 * MB, model_path=str(path))
+    long_context = plan_capacity(config, n_ctx=16384, memory_bytes=8 * 1024 * MB, model_path=str(path))
+    assert (q8.max_instances, q4.max_instances, long_context.max_instances) == (8, 13, 3)
+
+
+def test_resolve_kv_cache_params():
+    """V 캐시를 양자화하면 flash attention을 켜고, 알 수 없는 타입은 거부합니다."""
+    params = resolve_kv_cache_params({'MODEL_KV_CACHE_TYPE_K': 'q8_0', 'MODEL_KV_CACHE_TYPE_V': 'q4_0'})
+    assert params == {'type_k': 8, 'type_v': 2, 'flash_attn': True, 'offload_kqv': True, 'swa_full': True}
+    params = resolve_kv_cache_params({'MODEL_KV_CACHE_TYPE_K': 'q8_0', 'MODEL_KV_CACHE_TYPE_V': 'f16'})
+    assert params['flash_attn'] is False and params['type_v'] == 1
+
+    try:
+        resolve_kv_cache_params({'MODEL_KV_CACHE_TYPE_K': 'q5_1'})
+        assert False, "알 수 없는 타입은 ValueError"
+    except ValueError:
+        pass
+
+
+def test_cgroup_memory_max(tmp_path):
+    root = tmp_path / 'cgroup'
+    (root / 'app').mkdir(parents=True)
+    (root / 'memory.max').write_text('max\n')
+    (root / 'app' / 'memory.max').write_text(f'{4096 * MB}\n')
+    proc = tmp_path / 'proc_cgroup'
+    proc.write_text('0::/app\n')
+    assert read_cgroup_memory_limit(str(root), str(proc)) == 4096 * MB
+
+    (root / 'app' / 'memory.max').write_text('max\n')
+    assert read_cgroup_memory_limit(str(root), str(proc)) is None
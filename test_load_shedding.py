@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+과부하 성능 저하 단계 테스트 (히스테리시스, 단계별 조치, 응답 degradation 필드)
+"""
+
+import time
+
+from gemma_summarizer import process_request, set_thread_backend
+from load_shedding import (CAP_TOKENS, DEGRADE_KEY, EXTRACTIVE, NO_REQUERY, NORMAL, DegradationController,
+                           degraded_max_tokens, get_degradation_controller, reset_degradation_controller)
+from metrics import metrics
+from request_timing import ENQUEUED_AT_KEY
+from summarizer_backend import FakeBackend
+
+TEXT = ('나 > 카드를 잃어버려서 분실 신고 문의드립니다\n'
+        '상대방 > 네 고객님 분실 신고 접수 도와드리겠습니다\n'
+        '나 > 재발급도 같이 신청할 수 있나요\n'
+        '상대방 > 네 재발급 신청 처리해 드리고 배송 안내 문자 보내드리겠습니다')
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_step_up_and_down_with_hysteresis():
+    clock = FakeClock()
+    depth = {'value': 0}
+    controller = DegradationController([10, 20, 30, 40], recovery_ratio=0.5, step_up_seconds=1,
+                                       step_down_seconds=5, workers=2, queue_depth=lambda: depth['value'],
+                                       clock=clock)
+    clock.now += 1
+    assert controller.update(15) == NO_REQUERY
+    # 단계 변경 직후에는 부하가 높아도 step_up_seconds 동안 유지
+    assert controller.update(25) == NO_REQUERY
+    clock.now += 1
+    assert controller.update(25) == CAP_TOKENS
+
+    # 대기열 8건 / 워커 2 x 최근 처리 10초 = 예상 대기 40초 → 단계 상승
+    controller.observe_service(10.0)
+    depth['value'] = 8
+    clock.now += 1
+    assert controller.update(0) == 3
+    clock.now += 1
+    assert controller.update(0) == EXTRACTIVE
+
+    # 부하가 진입 기준(30초) x 0.5 이상이면 내려가지 않음
+    depth['value'] = 4
+    clock.now += 10
+    assert controller.update(0) == EXTRACTIVE
+    depth['value'] = 2
+    assert controller.update(0) == 3  # 10초 < 15초
+    assert controller.update(0) == 3  # step_down_seconds 동안 유지
+    assert controller.get_stats()['mode'] == 'small_model'
+
+
+def test_degraded_max_tokens():
+    assert degraded_max_tokens(NORMAL) is None and degraded_max_tokens(NO_REQUERY) is None
+    assert degraded_max_tokens(CAP_TOKENS) == 512 and degraded_max_tokens(EXTRACTIVE) == 512
+
+
+def test_overloaded_request_gets_extractive_summary(monkeypatch):
+    """대기 시간이 최고 단계 기준을 넘으면 LLM 없이 응답하고 단계를 응답에 표시합니다."""
+    monkeypatch.setenv('DEGRADE_ENABLED', 'true')
+    monkeypatch.setenv('DEGRADE_LEVEL_SECONDS', '0.01,0.02,0.03,0.04')
+    monkeypatch.setenv('DEGRADE_STEP_UP_SECONDS', '0')
+    monkeypatch.setenv('RESULT_CACHE_ENABLED', 'false')
+    reset_degradation_controller()
+
+    class FailingBackend(FakeBackend):
+        def complete(self, prompt, max_tokens=256, **params):
+            raise AssertionError("추출 요약 단계에서는 모델을 호출하지 않아야 합니다")
+
+        stream = complete
+
+    metrics.reset()
+    # 앞선 요청들의 대기 시간으로 단계가 3까지 올라간 상태 (한 번에 한 단계씩 상승)
+    for _ in range(3):
+        get_degradation_controller().update(1.0)
+    set_thread_backend(FailingBackend([{'summary': '사용 안 함'}], sleep=lambda seconds: None))
+    try:
+        data = {'transactionid': 'tx-overload', 'sequenceno': '1', 'text': TEXT, ENQUEUED_AT_KEY: time.time() - 1.0}
+        response = process_request(data)
+    finally:
+        set_thread_backend(None)
+        reset_degradation_controller()
+
+    assert data[DEGRADE_KEY] == EXTRACTIVE
+    body = response['response']
+    assert body['result'] == '0'
+    assert body['degradation'] == {'level': EXTRACTIVE, 'mode': 'extractive'}
+    assert body['fallback'] == {'method': 'extractive', 'reason': 'overload'}
+    assert body['summary']['summary']
+    assert metrics.get_counter('degrade.requests.extractive') == 1
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+하이브리드 추출 테스트 (TF-IDF 키워드, 감정 사전 점수, 요약 문장만 요청하는 프롬프트와 로컬 필드 채우기)
+"""
+
+from gemma_summarizer import build_summary_prompt, process_request, set_thread_backend
+from local_extraction import build_idf_table, extract_keywords, fill_local_fields, score_sentiment
+from summarizer_backend import FakeBackend
+
+TEXT = ('나 > 네 고객센터입니다\n'
+        '상대방 > 카드를 잃어버려서 분실 신고 문의드립니다\n'
+        '나 > 네 카드 분실 신고 접수 도와드리겠습니다\n'
+        '상대방 > 재발급이 너무 늦어서 정말 불편하고 답답해요\n'
+        '나 > 불편을 드려 죄송합니다 재발급 카드는 내일 발송됩니다\n'
+        '상대방 > 빨리 처리해 주셔서 다행이네요 정말 감사합니다')
+
+
+def test_idf_downweights_common_words():
+    table = build_idf_table(['카드 분실 신고 상담', '카드 결제 취소 상담', '카드 포인트 충전 상담'])
+    assert table['documents'] == 3
+    assert table['idf']['카드'] < table['idf']['분실']
+    # 모든 통화에 나오는 단어보다 이 통화에 특징적인 단어가 앞 (IDF 표가 없으면 등장 순서)
+    assert extract_keywords('카드 상담 분실', top_n=2, idf_table=table) == ['분실', '카드']
+    assert extract_keywords('카드 상담 분실', top_n=2) == ['카드', '상담']
+
+
+def test_sentiment_lexicon():
+    assert score_sentiment(['네 알겠습니다', '주소 확인 부탁드립니다']) == '보통'
+    assert score_sentiment(['처리해 주셔서 감사합니다']) == '약한긍정'
+    assert score_sentiment(['정말 친절하게 해결해 주셔서 만족합니다']) == '강한긍정'
+    assert score_sentiment(['서비스가 좋지 않아요']) == '약한부정'
+    assert score_sentiment(['너무 답답하고 짜증나요']) == '강한부정'
+
+
+def test_fill_local_fields_aligns_paragraphs_with_turns():
+    result = fill_local_fields({'summary': '카드 분실 신고와 재발급 안내',
+                                'paragraphs': [{'summary': '분실 신고 접수'}, {'summary': '재발급 지연 불만'}]}, TEXT)
+    assert '분실' in result['keyword'] and len(result['keyword'].split(', ')) == 3
+    first, second = result['paragraphs']
+    assert '분실' in first['keyword'] and '재발급' in second['keyword']
+    assert first['sentiment'] == '보통' and second['sentiment'] == '약한부정'
+
+
+def test_hybrid_prompt_and_response(monkeypatch):
+    """하이브리드 모드에서는 모델에 요약 문장만 요청하고 keyword/sentiment는 로컬 값으로 응답합니다."""
+    monkeypatch.setenv('RESULT_CACHE_ENABLED', 'false')
+    full_prompt = build_summary_prompt(TEXT)
+    monkeypatch.setenv('HYBRID_EXTRACTION_ENABLED', 'true')
+    slim_prompt = build_summary_prompt(TEXT)
+    assert 'sentiment' in full_prompt and 'sentiment' not in slim_prompt and 'keyword' not in slim_prompt
+    assert len(slim_prompt) < len(full_prompt)
+
+    prompts = []
+
+    class RecordingBackend(FakeBackend):
+        def _generate(self, prompt, max_tokens):
+            prompts.append(prompt)
+            return super()._generate(prompt, max_tokens)
+
+    record = {'summary': '카드 분실 신고와 재발급 안내',
+              'paragraphs': [{'summary': '카드 분실 신고 접수'}, {'summary': '재발급 지연 불만 및 발송 안내'}]}
+    set_thread_backend(RecordingBackend([record], sleep=lambda seconds: None))
+    try:
+        response = process_request({'transactionid': 'tx-hybrid', 'sequenceno': '1', 'text': TEXT})
+    finally:
+        set_thread_backend(None)
+
+    assert prompts and 'sentiment' not in prompts[0]
+    summary = response['response']['summary']
+    assert summary['summary'] == record['summary']
+    assert '분실' in summary['keyword']
+    assert [paragraph['sentiment'] for paragraph in summary['paragraphs']] == ['보통', '약한부정']
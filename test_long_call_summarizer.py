@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+긴 통화 map-reduce 요약 테스트 (추론 마감 포함, 모델 없이 고정 응답을 돌려주는 LLM 대역 사용)
+"""
+
+import json
+
+from long_call_summarizer import split_into_windows, select_windows, summarize_long_conversation
+
+
+class ScriptedLLM:
+    """프롬프트 종류(map/reduce)에 따라 고정 JSON을 돌려주는 LLM 대역"""
+
+    def __init__(self):
+        self.prompts = []
+
+    def tokenize(self, data: bytes, add_bos: bool = False):
+        # 한 글자 = 1토큰으로 단순화
+        return list(data.decode('utf-8'))
+
+    def __call__(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        if prompt.startswith("당신은 긴 통화 내용의 일부 구간"):
+            body = {"paragraphs": [{"summary": f"구간 요약 {len(self.prompts)}", "keyword": "카드, 포인트", "sentiment": "보통"}]}
+        else:
+            body = {"summary": "포인트 사용처 안내", "keyword": "포인트, 사용처, 카드",
+                    "paragraphs": [{"summary": "포인트 지급 확인", "keyword": "포인트", "sentiment": "약한긍정"}]}
+        return {"choices": [{"text": "```json\n" + json.dumps(body, ensure_ascii=False) + "\n```", "finish_reason": "stop"}]}
+
+
+def test_split_into_windows_respects_turns():
+    """구간은 발화 경계에서 나뉘고 예산을 넘지 않아야 합니다."""
+    lines = [f"나 > 발화 내용 {i:02d}" for i in range(20)]
+    windows = split_into_windows(lines, len, 60)
+
+    print(f"구간 수: {len(windows)}")
+    assert len(windows) > 1
+    assert "\n".join(windows).split("\n") == lines
+    for window in windows:
+        assert sum(len(line) + 1 for line in window.split("\n")) <= 60
+
+
+def test_select_windows_keeps_first_and_last():
+    """구간 수 상한을 넘으면 처음과 끝을 포함하여 고르게 선택해야 합니다."""
+    windows = [str(i) for i in range(20)]
+    selected = select_windows(windows, 5)
+
+    print(f"선택된 구간: {selected}")
+    assert len(selected) == 5
+    assert selected[0] == "0" and selected[-1] == "19"
+
+
+def test_summarize_long_conversation_map_reduce():
+    """map 단계는 구간마다 같은 접두부를 쓰고, reduce 결과가 최종 구조가 되어야 합니다."""
+    import os
+    os.environ['LONG_CALL_WINDOW_TOKENS'] = '200'
+    try:
+        llm = ScriptedLLM()
+        text = "\n".join(f"{'나' if i % 2 else '상대방'} > 카드 포인트 사용처 문의 내용 {i}" for i in range(40))
+        result = summarize_long_conversation(llm, text)
+    finally:
+        del os.environ['LONG_CALL_WINDOW_TOKENS']
+
+    map_prompts = [p for p in llm.prompts if p.startswith("당신은 긴 통화 내용의 일부 구간")]
+    print(f"map 호출: {len(map_prompts)}회, 전체 호출: {len(llm.prompts)}회")
+    print(json.dumps(result, ensure_ascii=False))
+    assert len(map_prompts) > 1
+    prefix = map_prompts[0][:map_prompts[0].index("대화 내용:")]
+    assert all(p.startswith(prefix) for p in map_prompts)
+    assert result["summary"] == "포인트 사용처 안내"
+    assert result["paragraphs"]
+
+
+def test_map_covers_every_window_above_window_limit(monkeypatch):
+    """구간 수가 LONG_CALL_MAX_WINDOWS를 넘어도 중간 구간을 버리지 않고 모든 발화를 map 단계에서 요약합니다."""
+    monkeypatch.setenv('LONG_CALL_WINDOW_TOKENS', '200')
+    monkeypatch.setenv('LONG_CALL_MAX_WINDOWS', '2')
+    llm = ScriptedLLM()
+    lines = [f"{'나' if i % 2 else '상대방'} > 카드 포인트 사용처 문의 내용 {i}" for i in range(40)]
+    result = summarize_long_conversation(llm, "\n".join(lines))
+
+    map_prompts = [p for p in llm.prompts if p.startswith("당신은 긴 통화 내용의 일부 구간")]
+    assert len(map_prompts) > 2
+    mapped = "\n".join(map_prompts)
+    assert all(line in mapped for line in lines)
+    assert result["summary"] == "포인트 사용처 안내"
+
+
+def test_map_reduce_stops_generating_after_deadline():
+    """추론 마감이 지나면 남은 구간/reduce를 생성하지 않고 이미 만든 후보로 결과를 만듭니다."""
+    import os
+    from inference_watchdog import begin_deadline, current_deadline, end_deadline
+
+    class ExpiringLLM(ScriptedLLM):
+        def __call__(self, prompt, **kwargs):
+            output = super().__call__(prompt, **kwargs)
+            current_deadline().deadline = 0  # 첫 구간 생성 중 마감 도달
+            return output
+
+    os.environ['LONG_CALL_WINDOW_TOKENS'] = '200'
+    previous = begin_deadline(60.0)
+    try:
+        llm = ExpiringLLM()
+        text = "\n".join(f"{'나' if i % 2 else '상대방'} > 카드 포인트 사용처 문의 내용 {i}" for i in range(40))
+        result = summarize_long_conversation(llm, text)
+        triggered = current_deadline().triggered
+    finally:
+        end_deadline(previous)
+        del os.environ['LONG_CALL_WINDOW_TOKENS']
+
+    assert len(llm.prompts) == 1 and triggered
+    assert result["summary"] == "구간 요약 1"
+    assert [p["summary"] for p in result["paragraphs"]] == ["구간 요약 1"]
+
+
+if __name__ == "__main__":
+    test_split_into_windows_respects_turns()
+    test_select_windows_keeps_first_and_last()
+    test_summarize_long_conversation_map_reduce()
+    test_map_reduce_stops_generating_after_deadline()
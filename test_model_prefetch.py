@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+모델 파일 미리 읽기 테스트 (파일 전체 읽기, 백그라운드 완료 대기, 건너뛰기 조건, 라우터 작은 모델)
+"""
+
+from metrics import metrics
+from model_prefetch import ModelPrefetcher, prefetch_file, prefetch_model_paths, start_model_prefetch
+
+
+def test_prefetch_reads_whole_file_in_background(tmp_path):
+    """청크 크기와 관계없이 파일 전체를 읽고, 완료되면 소요 시간과 바이트 수를 기록합니다."""
+    path = tmp_path / 'model.gguf'
+    path.write_bytes(b'GGUF' + bytes(10000))
+    assert prefetch_file(str(path), chunk_bytes=4096) == 10004
+    assert prefetch_file(str(tmp_path / 'model.gguf'), chunk_bytes=1 << 20) == 10004
+
+    metrics.reset()
+    prefetcher = ModelPrefetcher([str(path), str(path)]).start()
+    assert prefetcher.wait(timeout=5.0) and prefetcher.done
+    assert prefetcher.bytes_read == 20008
+    assert metrics.snapshot()['gauges']['startup.prefetch_bytes'] == 20008
+
+    # 없는 파일은 실패를 기록하고 완료 처리 (서버 시작을 막지 않음)
+    missing = ModelPrefetcher([str(tmp_path / 'missing.gguf')]).start()
+    assert missing.wait(timeout=5.0) and missing.bytes_read == 0
+
+
+def test_prefetch_skipped_when_not_applicable(tmp_path):
+    """비활성화, FakeBackend, 모델 파일이 없으면 미리 읽기를 시작하지 않습니다."""
+    assert start_model_prefetch({'MODEL_PREFETCH_ENABLED': False}) is None
+    assert start_model_prefetch({'MODEL_PREFETCH_ENABLED': True, 'MODEL_BACKEND': 'fake'}) is None
+
+
+def test_prefetch_includes_router_small_model(tmp_path, monkeypatch):
+    """모델 라우터를 켜면 작은 모델 파일도 미리 읽고, 끄면 요약 모델만 읽습니다."""
+    import model_prefetch
+
+    large, small = tmp_path / 'large.gguf', tmp_path / 'small.gguf'
+    large.write_bytes(b'GGUF')
+    small.write_bytes(b'GGUF')
+    monkeypatch.setattr(model_prefetch, 'get_model_path', lambda: str(large))
+    config = {'WORKSPACE_DIR': str(tmp_path), 'MODEL_ROUTER_SMALL_MODEL_PATH': 'small.gguf'}
+    assert prefetch_model_paths(config) == [str(large.resolve())]
+    assert prefetch_model_paths(dict(config, MODEL_ROUTER_ENABLED=True)) == [str(large.resolve()), str(small.resolve())]
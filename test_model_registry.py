@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+모델 레지스트리 테스트 (중복 로딩 방지, 참조 카운트, 메모리 예산/LRU 언로딩, 잠금 밖 로딩, 풀 인스턴스 키)
+"""
+
+import os
+import threading
+
+import pytest
+
+import model_registry
+from model_registry import ModelRegistry, make_model_key
+
+
+class DummyModel:
+    def __init__(self, name):
+        self.name = name
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_same_key_is_loaded_once_across_owners():
+    """경로 표기가 달라도 같은 모델은 한 번만 로딩되고 owner별로 참조를 셉니다."""
+    registry = ModelRegistry(memory_budget_bytes=0)
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return DummyModel("midm")
+
+    first = registry.acquire(make_model_key("models/a.gguf", 8192, 0), loader, owner="gemma_summarizer")
+    again = registry.acquire(make_model_key("models/a.gguf", 8192, 0), loader, owner="gemma_summarizer")
+    other = registry.acquire(make_model_key(os.path.abspath("models/./a.gguf"), 8192, 0), loader, owner="llm_utils")
+
+    assert first is again is other
+    assert len(loads) == 1
+    assert registry.get_stats()["models"][0]["refcount"] == 2
+
+
+def test_lru_unload_respects_budget_and_references():
+    """예산을 넘으면 참조가 없는 모델부터 언로딩하고, 모두 사용 중이면 MemoryError를 냅니다."""
+    registry = ModelRegistry(memory_budget_bytes=100, lru_unload=True)
+    key_a = make_model_key("a.gguf", 4096, 0)
+    key_b = make_model_key("b.gguf", 4096, 0)
+    key_c = make_model_key("c.gguf", 4096, 0)
+
+    model_a = registry.acquire(key_a, lambda: DummyModel("a"), size_bytes=60)
+    registry.release(key_a)
+    registry.acquire(key_b, lambda: DummyModel("b"), owner="worker", size_bytes=60)
+
+    assert model_a.closed
+    assert [m["model_path"] for m in registry.get_stats()["models"]] == [key_b.model_path]
+
+    with pytest.raises(MemoryError):
+        registry.acquire(key_c, lambda: DummyModel("c"), size_bytes=60)
+
+
+def test_loading_does_not_block_other_keys():
+    """모델 로딩 중에도 다른 키의 acquire/release는 기다리지 않고, 같은 키는 한 번만 로딩합니다."""
+    registry = ModelRegistry(memory_budget_bytes=0)
+    key_a = make_model_key("a.gguf", 4096, 0)
+    key_b = make_model_key("b.gguf", 4096, 0)
+    started = threading.Event()
+    finish = threading.Event()
+    loads = []
+
+    def slow_loader():
+        loads.append("a")
+        started.set()
+        assert finish.wait(5)
+        return DummyModel("a")
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.acquire(key_a, slow_loader, owner=f"w{i}")))
+               for i in range(2)]
+    for thread in threads:
+        thread.start()
+    assert started.wait(5)
+
+    # a 로딩이 끝나지 않았어도 b는 바로 로딩/해제됨
+    model_b = registry.acquire(key_b, lambda: DummyModel("b"), owner="router")
+    registry.release(key_b, owner="router")
+    assert model_b.name == "b" and not finish.is_set()
+
+    finish.set()
+    for thread in threads:
+        thread.join(5)
+    assert loads == ["a"] and len(results) == 2 and results[0] is results[1]
+
+
+def test_shared_weights_charged_once_per_path():
+    """같은 GGUF의 인스턴스는 KV 캐시 등 인스턴스 크기만 더하고 가중치는 경로당 한 번만 셉니다."""
+    registry = ModelRegistry(memory_budget_bytes=250, lru_unload=True)
+    keys = [make_model_key("a.gguf", 4096, 0, instance) for instance in range(3)]
+    registry.acquire(keys[0], lambda: DummyModel("a0"), owner="w0", size_bytes=30, weights_bytes=100)
+    registry.acquire(keys[1], lambda: DummyModel("a1"), owner="w1", size_bytes=30, weights_bytes=100)
+    assert registry.get_stats()["loaded_bytes"] == 160
+
+    registry.acquire(keys[2], lambda: DummyModel("a2"), owner="w2", size_bytes=30, weights_bytes=100)
+    with pytest.raises(MemoryError):
+        # 다른 GGUF는 가중치까지 더해 예산 초과
+        registry.acquire(make_model_key("b.gguf", 4096, 0), lambda: DummyModel("b"), size_bytes=30,
+                         weights_bytes=100)
+
+
+def test_pool_instances_do_not_share_default_model(monkeypatch):
+    """추론 풀 인스턴스는 get_default_model()의 기본 인스턴스와 다른 Llama를 받습니다."""
+    monkeypatch.setattr(model_registry, "model_registry", ModelRegistry(memory_budget_bytes=0))
+    monkeypatch.setattr(model_registry, "_load_llama",
+                        lambda config, key, max_threads, n_threads=None: DummyModel(f"instance{key.instance}"))
+
+    default = model_registry.get_default_model(owner="llm_utils")
+    pool = [model_registry.get_pool_model(index, 2, owner=f"inference_pool.{index}") for index in range(2)]
+    assert [model.name for model in [default] + pool] == ["instance0", "instance1", "instance2"]
+    assert model_registry.get_pool_model(0, 2, owner="inference_pool.0") is pool[0]
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+모델 라우터 테스트 (통화 길이/중요 서비스/지연 목표에 따른 모델 선택, 응답 route 필드)
+"""
+
+from gemma_summarizer import get_thread_backend, process_request, set_thread_backend
+from metrics import metrics
+from model_router import LARGE, ROUTE_KEY, SMALL, ModelRouter, bind_thread_router
+from summarizer_backend import FakeBackend
+
+LARGE_RECORD = {"summary": "카드 분실 신고와 재발급 안내", "keyword": "카드 분실, 재발급",
+                "paragraphs": [{"summary": "카드 분실 신고 접수", "keyword": "분실 신고", "sentiment": "보통"}]}
+SMALL_RECORD = {"summary": "카드 분실 신고 접수", "keyword": "카드 분실",
+                "paragraphs": [{"summary": "카드 분실 신고 접수", "keyword": "분실 신고", "sentiment": "보통"}]}
+
+
+def make_router(small=True, **kwargs):
+    backends = {LARGE: [FakeBackend([LARGE_RECORD], sleep=lambda seconds: None)],
+                SMALL: [FakeBackend([SMALL_RECORD], sleep=lambda seconds: None)] if small else []}
+    params = dict(short_prompt_tokens=1000, small_max_prompt_tokens=3000, latency_slo_seconds=30.0,
+                  ms_per_token={LARGE: 10.0, SMALL: 3.0}, important_svc_keys=['VIP'])
+    params.update(kwargs)
+    return ModelRouter(backends, **params)
+
+
+def test_route_by_length_importance_and_slo():
+    router = make_router()
+    assert router.choose(500).reason == 'short_call' and router.choose(500).model == SMALL
+    assert router.choose(5000).model == LARGE and router.choose(5000).reason == 'too_long_for_small'
+    # 2000토큰 x 10ms = 20초: 대기열이 비어 있으면 SLO 안이므로 큰 모델
+    assert router.choose(2000).reason == 'long_call'
+    # 대기 2건이면 (2 + 1) x 20초 = 60초 > 30초 → 작은 모델 (2000 x 3ms x 3 = 18초)
+    decision = router.choose(2000, queue_depth=2)
+    assert decision.model == SMALL and decision.reason == 'slo'
+    assert abs(decision.estimated_seconds - 18.0) < 1e-6
+    # 중요 서비스는 짧아도 큰 모델
+    assert router.choose(500, data={'metadata': {'svcKey': 'VIP'}}).reason == 'important'
+    assert make_router(small=False).choose(500).reason == 'single_model'
+
+
+def test_observe_updates_estimates():
+    router = make_router(smoothing=0.5)
+    router.observe(LARGE, 1000, 30.0)  # 토큰당 30ms
+    assert router.get_stats()['ms_per_token'][LARGE] == 20.0
+    assert router.get_stats()['service_seconds'] == 30.0
+    # 추정치가 느려지면 대기열이 비어 있어도 SLO 초과 → 작은 모델
+    assert router.choose(2000).reason == 'slo'
+
+
+def test_process_request_uses_routed_backend(monkeypatch):
+    """짧은 통화는 작은 모델로 요약하고 선택 결과를 응답 route 필드에 기록합니다."""
+    monkeypatch.setenv('RESULT_CACHE_ENABLED', 'false')
+    router = make_router()
+    large = router.backend(LARGE, 0)
+    metrics.reset()
+    set_thread_backend(large)
+    bind_thread_router(router, 0, queue_depth=lambda: 0)
+    try:
+        data = {'transactionid': 'tx-route', 'sequenceno': '1',
+                'text': '나 > 카드를 잃어버렸어요\n상대방 > 분실 신고 접수하고 재발급 도와드리겠습니다'}
+        response = process_request(data)
+        assert get_thread_backend() is large  # 요청이 끝나면 인스턴스 기본 백엔드로 복원
+    finally:
+        bind_thread_router(None)
+        set_thread_backend(None)
+
+    assert data[ROUTE_KEY].model == SMALL
+    route = response['response']['route']
+    assert route['model'] == SMALL and route['reason'] == 'short_call' and route['promptTokens'] > 0
+    assert response['response']['summary']['keyword'] == SMALL_RECORD['keyword']
+    assert metrics.get_counter('router.routes.small') == 1
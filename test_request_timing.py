@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+요청 처리 시간 분석 테스트 (대기/prefill/decode/JSON 복구 구간, 응답 timing 필드, 병목 판정)
+"""
+
+import json
+import time
+
+from gemma_summarizer import process_request, set_thread_backend
+from metrics import metrics
+from request_timing import ENQUEUED_AT_KEY, RequestTiming, begin_timing, current_timing, end_timing, timed_stage
+from summarizer_backend import FakeBackend
+
+RECORD = {"summary": "카드 분실 신고와 재발급 안내",
+          "keyword": "카드 분실, 재발급",
+          "paragraphs": [{"summary": "카드 분실 신고 접수", "keyword": "분실 신고", "sentiment": "보통"}]}
+
+
+def test_perf_counter_deltas_and_bottleneck():
+    """성능 카운터 차이로 prefill/decode 시간을 구하고 가장 긴 구간을 병목으로 판정합니다."""
+    timing = RequestTiming()
+    timing.record_perf({'prompt_eval_ms': 100.0, 'prompt_eval_tokens': 10, 'eval_ms': 50.0, 'eval_tokens': 5},
+                       {'prompt_eval_ms': 400.0, 'prompt_eval_tokens': 310, 'eval_ms': 2050.0, 'eval_tokens': 105})
+    timing.set('generated_tokens', 100)
+    timing.add('json_repair_ms', 5.0)
+    values = timing.finish()
+
+    assert values['prompt_eval_ms'] == 300.0 and values['prompt_eval_tokens'] == 300
+    assert values['decode_ms'] == 2000.0
+    assert values['decode_tokens_per_second'] == 50.0
+    assert values['ttft_ms'] == 300.0  # 스트리밍이 아니면 prefill 직후 첫 토큰
+    assert timing.bottleneck() == 'decode'
+    response = timing.to_response()
+    assert response['decodeTokensPerSecond'] == 50.0 and response['bottleneck'] == 'decode'
+
+
+def test_timed_stage_without_timing_is_noop():
+    previous = begin_timing()
+    end_timing(None)
+    with timed_stage('json_repair_ms'):
+        pass
+    assert current_timing() is None
+    end_timing(previous)
+
+
+def test_process_request_reports_timing(monkeypatch):
+    """RESPONSE_TIMING_ENABLED이면 응답에 대기/prefill/decode/후처리 시간이 포함되고 지표에도 기록됩니다."""
+    monkeypatch.setenv('RESPONSE_TIMING_ENABLED', 'true')
+    monkeypatch.setenv('RESULT_CACHE_ENABLED', 'false')
+    # 초당 prefill 200토큰, 생성 20토큰 지연 모델 (실제로는 기다리지 않음)
+    backend = FakeBackend([RECORD], tokens_per_second=20, prompt_tokens_per_second=200, sleep=lambda seconds: None)
+    metrics.reset()
+    set_thread_backend(backend)
+    try:
+        data = {'transactionid': 'tx-timing', 'sequenceno': '1',
+                'text': '나 > 카드를 잃어버렸어요\n상대방 > 분실 신고 접수하고 재발급 도와드리겠습니다',
+                ENQUEUED_AT_KEY: time.time() - 0.25}
+        response = process_request(data)
+    finally:
+        set_thread_backend(None)
+
+    timing = response['response']['timing']
+    print(json.dumps(timing, ensure_ascii=False))
+    assert timing['queueWaitMs'] >= 250
+    assert timing['promptTokens'] > 0 and timing['promptEvalTokens'] > 0
+    assert timing['promptEvalMs'] > 0 and timing['decodeMs'] > 0
+    assert 0 < timing['timeToFirstTokenMs'] <= timing['totalMs']
+    assert timing['generatedTokens'] > 0
+    assert abs(timing['decodeTokensPerSecond'] - 20) < 1
+    assert 'jsonRepairMs' in timing and 'postprocessMs' in timing
+    assert timing['bottleneck'] == 'decode'
+    assert metrics.snapshot()['timers']['timing.decode_ms']['count'] == 1
+
+
+def test_timing_is_not_in_response_by_default(monkeypatch):
+    monkeypatch.setenv('RESULT_CACHE_ENABLED', 'false')
+    set_thread_backend(FakeBackend([RECORD], sleep=lambda seconds: None))
+    try:
+        response = process_request({'transactionid': 'tx-2', 'sequenceno': '1',
+                                    'text': '나 > 카드 분실 신고요\n상대방 > 네 접수했습니다'})
+    finally:
+        set_thread_backend(None)
+    assert 'timing' not in response['response']
+    assert response['response']['result'] == '0'
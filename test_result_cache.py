@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+결과 캐시 테스트 (키 정규화, LRU/TTL, SQLite 계층, process_request 적중, 부하 라우팅 결과 제외)
+"""
+
+from gemma_summarizer import process_request, set_thread_backend
+from result_cache import ResultCache, SQLiteResultStore, make_cache_key
+from summarizer_backend import FakeBackend
+
+RECORD = {"summary": "카드 발급 일정 안내", "keyword": "카드, 발급, 일정", "paragraphs": []}
+
+
+def test_cache_key_lru_ttl_and_disk_tier(tmp_path):
+    """공백 차이는 같은 키, 모델/템플릿이 다르면 다른 키이며 디스크 계층은 재시작 후에도 유지됩니다."""
+    key = make_cache_key('나 >  카드  발급\n\n상대방 > 네', 'llama_cpp:a.gguf', 'v1')
+    assert key == make_cache_key('나 > 카드 발급\n상대방 > 네 ', 'llama_cpp:a.gguf', 'v1')
+    assert key != make_cache_key('나 > 카드 발급\n상대방 > 네', 'llama_cpp:b.gguf', 'v1')
+    assert key != make_cache_key('나 > 카드 발급\n상대방 > 네', 'llama_cpp:a.gguf', 'v2')
+
+    cache = ResultCache(max_entries=2)
+    for name in ('a', 'b', 'c'):
+        cache.put(name, {'result': '0', 'summary': name})
+    assert cache.get('a') is None and cache.get('c')['summary'] == 'c'
+    assert cache.get_stats()['entries'] == 2 and cache.get_stats()['memory_bytes'] > 0
+
+    expired = ResultCache(ttl_seconds=1e-9)
+    expired.put('a', {'result': '0'})
+    assert expired.get('a') is None
+
+    db_path = str(tmp_path / 'cache.sqlite3')
+    store = SQLiteResultStore(db_path, ttl_seconds=60, max_entries=2)
+    ResultCache(store=store).put('a', {'result': '0', 'summary': 'disk'})
+    store.close()
+    restarted = ResultCache(store=SQLiteResultStore(db_path, ttl_seconds=60, max_entries=2))
+    assert restarted.get('a')['summary'] == 'disk'
+    for name in ('b', 'c'):
+        restarted.put(name, {'result': '0'})
+    assert restarted.store.count() == 2
+
+
+def test_process_request_hits_cache_for_duplicates():
+    """같은 대화의 재전송은 모델을 다시 호출하지 않고 자신의 transactionid로 응답합니다."""
+    backend = FakeBackend([RECORD], time_scale=0)
+    calls = []
+    original_stream = backend.stream
+    backend.stream = lambda *args, **kwargs: calls.append(args) or original_stream(*args, **kwargs)
+    text = '나 > 카드 발급 언제 되나요\n상대방 > 네 신청하신 카드는 다음 주 월요일 발송 예정입니다'
+    set_thread_backend(backend)
+    try:
+        first = process_request({'transactionid': 'tx-1', 'sequenceno': '1', 'text': text})
+        second = process_request({'transactionid': 'tx-2', 'sequenceno': '2', 'text': text + '\n'})
+    finally:
+        set_thread_backend(None)
+
+    assert len(calls) == 1
+    assert second['transactionid'] == 'tx-2' and second['sequenceno'] == '2'
+    assert second['response'] == first['response']
+
+
+def test_load_routed_small_model_results_are_not_cached(monkeypatch):
+    """부하(slo/degraded)로 작은 모델이 만든 결과는 저장하지 않고, 짧은 통화로 고른 작은 모델 결과는 저장합니다."""
+    import result_cache
+    from model_router import RouteDecision
+
+    cache = ResultCache()
+    monkeypatch.setattr(result_cache, 'get_result_cache', lambda: cache)
+    monkeypatch.setattr(result_cache, '_identity', ('llama_cpp:large.gguf', 'v1'))
+
+    def respond(text, model, reason):
+        data = {'transactionid': 'tx-1', 'sequenceno': '1', 'text': text}
+        route = RouteDecision(model, reason, 100, 0, 1.0).to_response()
+        result_cache.store_response(data, {'response': {'result': '0', 'summary': RECORD, 'route': route}})
+        return result_cache.lookup_cached_response(data, record_miss=False)
+
+    assert respond('나 > 카드 발급 문의', 'small', 'slo') is None
+    assert respond('나 > 포인트 문의', 'small', 'degraded') is None
+    assert respond('나 > 주소 변경 문의', 'small', 'short_call')['response']['summary'] == RECORD
+    assert 'route' not in respond('나 > 해지 문의', 'large', 'long_call')['response']
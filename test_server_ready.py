@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+서버 준비 상태 테스트 (공유 메모리 헤더 READY 플래그, 시작 워밍업, 라우터 작은 모델 워밍업)
+"""
+
+import os
+
+from inference_pool import InferencePool, warm_up_pool
+from ipc_queue_manager import IPCMultiSlotManager, ServerState
+from summarizer_backend import FakeBackend
+
+RECORD = {"summary": "카드 발급 문의", "keyword": "카드, 발급", "paragraphs": []}
+
+
+def test_ready_flag_in_shared_memory_header():
+    """서버가 READY를 기록하기 전까지 클라이언트는 준비되지 않은 것으로 보고, 슬롯은 헤더 뒤에서 동작합니다."""
+    shm_name = f'gemma_ready_test_{os.getpid()}'
+    server = IPCMultiSlotManager(shm_name, slot_count=2, slot_size=512)
+    client = IPCMultiSlotManager(shm_name, slot_count=2, slot_size=512, is_client=True)
+    try:
+        assert server.get_server_state() == ServerState.STARTING
+        assert not client.is_ready() and not client.wait_until_ready(timeout=0.05, interval=0.01)
+
+        server.set_server_state(ServerState.READY)
+        assert client.wait_until_ready(timeout=0.05)
+
+        slot_id = client.write_request({'request_id': 'r-1', 'text': '안녕하세요'})
+        assert server.read_request() == (slot_id, {'request_id': 'r-1', 'text': '안녕하세요'})
+        # 슬롯 쓰기가 헤더를 덮어쓰지 않음
+        assert client.is_ready()
+
+        server.set_server_state(ServerState.STOPPING)
+        assert client.get_server_state() == ServerState.STOPPING
+    finally:
+        client.cleanup()
+        server.cleanup()
+
+
+def test_warm_up_primes_each_instance():
+    """워밍업은 인스턴스마다 요약 프롬프트를 한 번 평가하고, 공유 백엔드는 한 번만 실행합니다."""
+    first, second = FakeBackend([RECORD], time_scale=0), FakeBackend([RECORD], time_scale=0)
+    calls = []
+    original_complete = second.complete
+    second.complete = lambda *args, **kwargs: calls.append(args) or original_complete(*args, **kwargs)
+    config = {'WARMUP_ENABLED': True, 'WARMUP_TEXT': '나 > 카드 발급 문의', 'WARMUP_MAX_TOKENS': 4}
+    warm_up_pool(InferencePool([first, second, second]), config)
+    assert first.save_state()['tokens'] and second.save_state()['tokens']
+    assert len(calls) == 1
+
+    # 모델 라우터의 작은 모델 백엔드도 같은 워커 번호에서 함께 워밍업
+    small = FakeBackend([RECORD], time_scale=0)
+    warm_up_pool(InferencePool([FakeBackend([RECORD], time_scale=0)]), config, [small])
+    assert small.save_state()['tokens']
+
+    cold = FakeBackend([RECORD], time_scale=0)
+    assert warm_up_pool(InferencePool([cold]), {'WARMUP_ENABLED': False}) == 0.0
+    assert not cold.save_state()['tokens']
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+진행 중 요청 병합 테스트 (리더/팔로워, 응답 분배, 응답 없는 리더 교체/정리, 워커 오류 응답)
+"""
+
+from single_flight import SingleFlight
+
+RESPONSE = {'transactionid': 'tx-1', 'sequenceno': '1', 'returncode': '1',
+            'response': {'result': '0', 'summary': {'summary': '카드 발급 안내'}}}
+
+
+def test_followers_receive_leader_response_with_own_ids():
+    """처리 중인 같은 대화에 합류한 슬롯은 리더 응답을 자신의 transactionid로 받습니다."""
+    flights = SingleFlight()
+    assert flights.join('key', 1, {'transactionid': 'tx-1', 'sequenceno': '1'}) is True
+    assert flights.join('key', 2, {'transactionid': 'tx-2', 'sequenceno': '2'}) is False
+    assert flights.join('key', 3, {'transactionid': 'tx-3', 'sequenceno': '3'}) is False
+    assert flights.join('other', 4, {}) is True
+
+    assert flights.complete(4, RESPONSE) == []
+    fanned = flights.complete(1, RESPONSE)
+    assert [slot_id for slot_id, _ in fanned] == [2, 3]
+    assert [(r['transactionid'], r['sequenceno']) for _, r in fanned] == [('tx-2', '2'), ('tx-3', '3')]
+    assert all(r['response'] == RESPONSE['response'] for _, r in fanned)
+    assert RESPONSE['transactionid'] == 'tx-1'
+    # 완료 후 같은 대화는 새 리더 (결과 캐시가 먼저 응답하는 경우가 대부분)
+    assert flights.join('key', 5, {}) is True
+    assert flights.complete(2, RESPONSE) == []
+
+
+def test_stale_leader_is_replaced():
+    """응답 없이 max_age_seconds가 지난 리더는 새 요청으로 교체하고, 기존 팔로워는 새 리더의 응답을 받습니다."""
+    flights = SingleFlight(max_age_seconds=60.0)
+    assert flights.join('key', 1, {}) is True
+    assert flights.join('key', 2, {'transactionid': 'tx-2', 'sequenceno': '2'}) is False
+    flights._flights['key'].started_at -= 120
+    assert flights.join('key', 3, {}) is True
+    assert flights.complete(1, RESPONSE) == []
+    assert [(slot_id, r['transactionid']) for slot_id, r in flights.complete(3, RESPONSE)] == [(2, 'tx-2')]
+    assert flights.in_flight() == 0
+
+
+def test_expire_stale_returns_abandoned_followers():
+    """리더가 사라진 항목을 정리하면 팔로워를 돌려주어 오류 응답을 보낼 수 있습니다."""
+    flights = SingleFlight(max_age_seconds=60.0)
+    assert flights.join('stale', 1, {}) is True
+    assert flights.join('stale', 2, {'transactionid': 'tx-2'}) is False
+    assert flights.join('fresh', 3, {}) is True
+    flights._flights['stale'].started_at -= 120
+    assert flights.expire_stale() == [(2, {'transactionid': 'tx-2'})]
+    assert flights.in_flight() == 1 and flights.complete(1, RESPONSE) == []
+
+
+def test_worker_error_answers_leader_and_followers(monkeypatch):
+    """워커가 응답 전에 예외를 내면 리더 슬롯과 합류한 슬롯 모두 오류 응답을 받습니다."""
+    import gemma_summarizer_multi
+    from ipc_queue_manager import QueueManager
+
+    flights = SingleFlight()
+    monkeypatch.setattr(gemma_summarizer_multi, 'get_single_flight', lambda config: flights)
+    queue_manager = QueueManager()
+    data = {'transactionid': 'tx-1', 'sequenceno': '1', 'text': ''}
+    assert flights.join('key', 1, data) is True
+    assert flights.join('key', 2, {'transactionid': 'tx-2', 'sequenceno': '2'}) is False
+    queue_manager.put_request(1, data)
+
+    def fail(*args):
+        queue_manager.running = False
+        raise RuntimeError("prepare 실패")
+
+    monkeypatch.setattr(gemma_summarizer_multi, 'process_with_packing', fail)
+    monkeypatch.setattr(gemma_summarizer_multi.time, 'sleep', lambda seconds: None)
+    gemma_summarizer_multi.worker_thread(queue_manager)
+
+    responses = dict(queue_manager.get_response() for _ in range(2))
+    assert responses[1]['response']['result'] == '1' and responses[2]['transactionid'] == 'tx-2'
+    assert responses[2]['response']['failReason'] == responses[1]['response']['failReason']
+    assert flights.in_flight() == 0
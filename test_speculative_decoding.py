@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+추측 디코딩 수락률 집계 테스트 (llama_cpp 없이 고정 드래프트를 돌려주는 대역 사용)
+"""
+
+from metrics import metrics
+from speculative_decoding import InstrumentedDraftModel, create_draft_model, get_speculative_stats
+
+
+class FixedDraft:
+    """호출 순서대로 미리 정한 드래프트 토큰을 돌려주는 대역"""
+
+    def __init__(self, drafts):
+        self.drafts = list(drafts)
+
+    def __call__(self, input_ids, **kwargs):
+        return self.drafts.pop(0) if self.drafts else []
+
+
+def test_acceptance_rate_counts_verified_prefix():
+    """다음 호출의 확정 토큰열과 직전 드래프트의 공통 접두사만 수락으로 집계합니다."""
+    metrics.reset()
+    draft = InstrumentedDraftModel(FixedDraft([[5, 6, 7, 8], [9, 10], [1, 2]]))
+
+    prompt = [1, 2, 3, 4]
+    draft(prompt)                       # 드래프트 [5, 6, 7, 8] 제안
+    draft(prompt + [5, 6, 11])          # 2개 수락 후 11로 교정
+    draft(prompt + [5, 6, 11, 9, 10, 12])  # 2개 모두 수락 + 보너스 토큰
+    draft([7, 7])                       # 새 생성 요청 - 직전 드래프트는 집계하지 않음
+
+    stats = get_speculative_stats()
+    print(f"추측 디코딩 통계: {stats}")
+    assert stats['drafted_tokens'] == 6
+    assert stats['accepted_tokens'] == 4
+    assert abs(stats['acceptance_rate'] - 4 / 6) < 1e-9
+
+
+def test_speculative_mode_off_returns_none():
+    """기본 설정(off)이나 알 수 없는 모드에서는 드래프트 모델을 만들지 않습니다."""
+    assert create_draft_model({'SPECULATIVE_MODE': 'off'}) is None
+    assert create_draft_model({'SPECULATIVE_MODE': 'medusa'}) is None
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+단계별 파이프라인 테스트 (단계 겹침, 크기 제한 큐, 단계별 점유율, 요약 파이프라인 응답)
+"""
+
+import threading
+import time
+
+from inference_pool import InferencePool
+from staged_pipeline import PipelineStage, StagedPipeline, create_summary_pipeline
+from summarizer_backend import FakeBackend
+
+RECORD = {"summary": "카드 발급 일정 안내", "keyword": "카드, 발급, 일정",
+          "paragraphs": [{"summary": "카드 발급 일정 안내", "keyword": "카드, 발급", "sentiment": "보통"}]}
+
+
+def test_stages_overlap_with_bounded_queues():
+    """준비 단계는 추론 단계가 처리 중인 동안 다음 요청을 처리하고, 큐 크기만큼만 앞서 나갑니다."""
+    events = []
+    lock = threading.Lock()
+    release = threading.Event()
+    done = []
+
+    def record(name):
+        def handler(item):
+            with lock:
+                events.append((name, item))
+            if name == 'slow':
+                release.wait(timeout=5.0)
+            return item
+        return handler
+
+    pipeline = StagedPipeline([
+        PipelineStage('fast', record('fast'), workers=1, queue_size=1),
+        PipelineStage('slow', record('slow'), workers=1, queue_size=1),
+        PipelineStage('sink', lambda item: done.append(item), workers=1, queue_size=1),
+    ])
+    pipeline.start()
+    for item in range(3):
+        pipeline.submit(item)
+    time.sleep(0.1)
+    # 요청 0이 slow에서 멈춘 동안 fast는 1을 처리해 큐에 넣고, 2를 처리한 뒤 큐가 가득 차서 대기
+    assert ('slow', 0) in events and ('fast', 2) in events and ('slow', 1) not in events
+    assert pipeline.get_stats()['fast']['busy_workers'] == 0
+
+    release.set()
+    pipeline.stop()
+    assert sorted(done) == [0, 1, 2]
+    stats = pipeline.get_stats()
+    assert stats['slow']['occupancy'] > stats['sink']['occupancy']
+    assert stats['fast']['blocked_seconds'] > 0
+
+
+def test_summary_pipeline_responds_per_slot():
+    """요약 파이프라인은 슬롯별로 응답하고, 준비 단계에서 응답한 요청과 단계 오류도 처리합니다."""
+    pool = InferencePool([FakeBackend([RECORD], time_scale=0), FakeBackend([RECORD], time_scale=0)])
+    responses = {}
+    text = '나 > 카드 발급 언제 되나요\n상대방 > 네 신청하신 카드는 다음 주 월요일 발송 예정입니다'
+
+    def prepare(slot_id, data):
+        if slot_id == 3:
+            return None
+        if slot_id == 4:
+            raise ValueError('전처리 실패')
+        return data
+
+    pipeline = create_summary_pipeline(pool, prepare, lambda slot_id, response: responses.setdefault(slot_id, response),
+                                       {'PIPELINE_QUEUE_SIZE': 2, 'PIPELINE_PREPARE_WORKERS': 2,
+                                        'PIPELINE_FINALIZE_WORKERS': 1})
+    pipeline.start()
+    for slot_id in range(5):
+        pipeline.submit((slot_id, {'transactionid': f'tx-{slot_id}', 'sequenceno': str(slot_id),
+                                   'text': f'{text}\n나 > 요청 {slot_id}'}))
+    pipeline.stop()
+
+    assert sorted(responses) == [0, 1, 2, 4]
+    for slot_id in (0, 1, 2):
+        assert responses[slot_id]['transactionid'] == f'tx-{slot_id}'
+        assert responses[slot_id]['response']['result'] == '0'
+    assert responses[4]['response']['result'] == '1' and '전처리 실패' in responses[4]['response']['failReason']
+    stats = pipeline.get_stats()
+    assert stats['prepare']['processed'] == 5 and stats['inference']['processed'] == 3
+    assert stats['finalize']['processed'] == 3 and stats['prepare']['errors'] == 1
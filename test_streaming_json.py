@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+스트리밍 JSON 점진 파싱 및 조기 종료 테스트 (토큰 단위로 고정 응답을 흘려주는 LLM 대역 사용)
+"""
+
+import json
+
+from gemma_summarizer import generate_summary_streaming
+from metrics import metrics
+from streaming_json import IncrementalJSONParser
+
+GOOD_BODY = {
+    "summary": "포인트 사용처 안내",
+    "keyword": "포인트, 사용처, 카드",
+    "paragraphs": [{"summary": "포인트 지급 확인 {완료}", "keyword": "포인트", "sentiment": "약한긍정"}],
+}
+
+
+class StreamingLLM:
+    """호출마다 준비된 응답을 3글자씩 스트리밍하는 LLM 대역"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.prompts = []
+        self.yielded = 0
+
+    def __call__(self, prompt, max_tokens=None, stream=False, **kwargs):
+        self.prompts.append(prompt)
+        text = self.responses.pop(0)
+
+        def generate():
+            for i in range(0, len(text), 3):
+                self.yielded += 1
+                yield {"choices": [{"text": text[i:i + 3], "finish_reason": None}]}
+            yield {"choices": [{"text": "", "finish_reason": "stop"}]}
+        return generate()
+
+
+def test_parser_emits_fields_and_stops_at_object_close():
+    """최상위 필드는 완성 즉시 전달되고, 객체가 닫히면 이후 텍스트는 받지 않습니다."""
+    seen = []
+    parser = IncrementalJSONParser(on_field=lambda key, value: seen.append(key))
+    text = "```json\n" + json.dumps(GOOD_BODY, ensure_ascii=False) + "\n```\n추가 설명입니다."
+
+    for i in range(0, len(text), 4):
+        if parser.feed(text[i:i + 4]):
+            break
+
+    assert parser.done and parser.error is None
+    assert seen == ["summary", "keyword", "paragraphs"]
+    assert json.loads(parser.json_text) == GOOD_BODY
+    assert "추가 설명" not in parser.raw
+
+
+def test_streaming_retries_only_malformed_field():
+    """paragraphs가 잘못 생성되면 앞 필드는 유지하고 paragraphs만 다시 생성합니다."""
+    bad = '```json\n{"summary": "포인트 사용처 안내", "keyword": "포인트, 사용처, 카드", "paragraphs": "없음", "x": 1}'
+    retry = ' ' + json.dumps(GOOD_BODY["paragraphs"], ensure_ascii=False) + '\n}\n```\n설명'
+    llm = StreamingLLM([bad, retry])
+    metrics.reset()
+
+    output, parser = generate_summary_streaming(llm, "PROMPT", 500)
+
+    assert len(llm.prompts) == 2
+    assert llm.prompts[1].endswith('"paragraphs":')
+    assert parser.done
+    assert json.loads(parser.json_text) == GOOD_BODY
+    # 필드 완성 시각은 재생성으로 다시 파싱해도 필드마다 한 번만 기록
+    ready = metrics.snapshot()['timers']
+    assert [ready[f'stream.field_ready_seconds.{key}']['count'] for key in GOOD_BODY] == [1, 1, 1]
+    assert output["choices"][0]["finish_reason"] == "stop"
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+FakeBackend 테스트 (녹화 결과 재생, 지연 시간 모델, prefix 캐시)
+"""
+
+import json
+
+from summarizer_backend import FakeBackend, load_recorded_outputs
+
+RECORDS = [
+    {"summary": "포인트 사용처 안내", "keyword": "포인트, 사용처", "paragraphs": []},
+    {"summary": "카드 발급 문의", "keyword": "카드, 발급", "paragraphs": []},
+]
+
+
+def test_load_recorded_outputs_from_samples():
+    """sample 결과 파일의 두 가지 응답 형식을 모두 읽습니다."""
+    outputs = load_recorded_outputs('sample/*결과.txt')
+    print(f"녹화 결과 수: {len(outputs)}")
+    assert len(outputs) >= 16
+    assert all(isinstance(item['summary'], str) and item['summary'] for item in outputs)
+
+
+def test_fake_backend_is_deterministic_and_models_latency():
+    """같은 프롬프트는 같은 결과를 내고, 공통 접두사는 다시 평가하지 않습니다."""
+    waits = []
+    backend = FakeBackend(RECORDS, tokens_per_second=10.0, prompt_tokens_per_second=100.0,
+                          chars_per_token=2, sleep=waits.append)
+    prompt = "JSON 형식으로 요약하세요. 대화 내용: " + "가나" * 100
+
+    first = backend(prompt, max_tokens=500)
+    prefill_first = waits[0]
+    waits.clear()
+    second = backend(prompt, max_tokens=500)
+
+    assert first['choices'][0]['text'] == second['choices'][0]['text']
+    assert json.loads(first['choices'][0]['text'][len("```json\n"):-len("\n```")]) in RECORDS
+    # 두 번째 호출은 전체가 prefix 캐시에 있으므로 생성 지연만 남음
+    assert prefill_first > 0
+    assert len(waits) == 1
+    streamed = ''.join(chunk['choices'][0]['text'] for chunk in backend(prompt, max_tokens=500, stream=True))
+    assert streamed == first['choices'][0]['text']
+    assert first['usage']['completion_tokens'] == len(backend.tokenize(first['choices'][0]['text']))
+
+
+def test_fake_backend_respects_max_tokens():
+    """max_tokens를 넘으면 잘리고 finish_reason이 length가 됩니다."""
+    backend = FakeBackend(RECORDS, time_scale=0)
+    output = backend("JSON 응답", max_tokens=3)
+    assert output['choices'][0]['finish_reason'] == 'length'
+    assert output['usage']['completion_tokens'] == 3
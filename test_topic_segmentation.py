@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+주제 구간 나누기 테스트 (어휘 응집도 경계, startTime 침묵, 구간 수 일관성, 프롬프트 [구간 N] 표시)
+"""
+
+import json
+
+from gemma_summarizer import build_summary_prompt, process_request, set_thread_backend
+from preprocessor import preprocess_request_data
+from summarizer_backend import FakeBackend
+from topic_segmentation import segment_turns, turn_start_times
+
+CARD_TURNS = [
+    '카드를 잃어버려서 분실 신고하려고요',
+    '네 카드 분실 신고 접수해 드리겠습니다',
+    '분실된 카드는 바로 정지되나요',
+    '네 분실 신고하시면 카드 사용이 바로 정지됩니다',
+]
+ADDRESS_TURNS = [
+    '그리고 주소 변경도 하고 싶은데요',
+    '네 새 주소 말씀해 주시면 주소 변경 도와드리겠습니다',
+    '부산 해운대구 주소로 변경해 주세요',
+    '해운대구 주소 변경 완료되었습니다',
+    '우편물도 새 주소로 가나요',
+    '네 우편물은 변경된 주소로 발송됩니다',
+    '주소 변경 문자도 오나요',
+    '네 주소 변경 안내 문자 보내드리겠습니다',
+]
+
+
+def test_boundary_follows_topic_change():
+    utterances = CARD_TURNS + ADDRESS_TURNS
+    blocks = segment_turns(utterances, count=2)
+    # 균등 분할(6)이 아니라 화제가 바뀌는 곳(4)에서 나눔
+    assert blocks == [(0, 4), (4, 12)]
+    assert segment_turns(utterances) == segment_turns(utterances, count=len(segment_turns(utterances)))
+    assert segment_turns(CARD_TURNS) == [(0, 4)]  # 짧은 통화는 구간 1개
+
+
+def test_pause_breaks_ties():
+    utterances = ['네 확인해 드리겠습니다'] * 8
+    assert segment_turns(utterances, count=2) == [(0, 3), (3, 8)]
+    start_times = [index * 2000 for index in range(8)]
+    start_times[5:] = [value + 20000 for value in start_times[5:]]  # 발화 4와 5 사이 20초 침묵
+    assert segment_turns(utterances, count=2, start_times=start_times) == [(0, 5), (5, 8)]
+    # 발화 수와 시작 시각 수가 다르면 침묵은 무시
+    assert segment_turns(utterances, count=2, start_times=start_times[:-1]) == [(0, 3), (3, 8)]
+
+
+def test_preprocess_records_turn_start_times(monkeypatch):
+    """대화 줄과 줄별 시작 시각은 sttResultList를 한 번만 변환하여 만듭니다."""
+    from preprocessor import STTPreprocessor
+
+    calls = []
+    build_conversation = STTPreprocessor.build_conversation
+    monkeypatch.setattr(STTPreprocessor, 'build_conversation',
+                        staticmethod(lambda data: calls.append(1) or build_conversation(data)))
+    with open('sample/sample_request_2.json', 'r', encoding='utf-8') as f:
+        data = preprocess_request_data(json.load(f))
+    lines = data['text'].split('\n')
+    start_times = turn_start_times(data)
+    assert len(calls) == 1
+    assert len(start_times) == len(lines)
+    assert start_times[0] == 0 and start_times == sorted(start_times)
+
+
+def test_prompt_block_markers(monkeypatch):
+    """[구간 N]을 표시하고 구간마다 paragraph 하나를 요청합니다 (지시문 접두부는 구간 수와 관계없이 동일)."""
+    monkeypatch.setenv('RESULT_CACHE_ENABLED', 'false')
+    text = '\n'.join(f"{'나' if index % 2 else '상대방'} > {utterance}"
+                     for index, utterance in enumerate(CARD_TURNS + ADDRESS_TURNS))
+    plain_prompt = build_summary_prompt(text)
+    assert '[구간' not in plain_prompt
+
+    monkeypatch.setenv('TOPIC_SEGMENTATION_ENABLED', 'true')
+    prompt = build_summary_prompt(text)
+    assert '[구간 1]\n상대방 > 카드를 잃어버려서' in prompt and '[구간 2]\n상대방 > 그리고 주소 변경도' in prompt
+    assert prompt.split('대화 내용:')[0] == build_summary_prompt('나 > 네').split('대화 내용:')[0]
+
+    prompts = []
+
+    class RecordingBackend(FakeBackend):
+        def _generate(self, prompt, max_tokens):
+            prompts.append(prompt)
+            return super()._generate(prompt, max_tokens)
+
+    record = {'summary': '카드 분실 신고와 주소 변경', 'keyword': '카드, 분실, 주소',
+              'paragraphs': [{'summary': '카드 분실 신고 접수', 'keyword': '분실', 'sentiment': '보통'},
+                             {'summary': '주소 변경 완료 안내', 'keyword': '주소', 'sentiment': '보통'}]}
+    set_thread_backend(RecordingBackend([record], sleep=lambda seconds: None))
+    try:
+        response = process_request({'transactionid': 'tx-segment', 'sequenceno': '1', 'text': text,
+                                    'metadata': {'turn_start_times': [index * 3000 for index in range(12)]}})
+    finally:
+        set_thread_backend(None)
+    assert '[구간 2]' in prompts[0]
+    assert len(response['response']['summary']['paragraphs']) == 2
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+내용 없는 통화 판정 테스트 (규칙별 판정, 템플릿 응답, 적중률, 서버 선판정 중복 집계 방지)
+"""
+
+import glob
+import json
+
+from config import get_config
+from gemma_summarizer import process_request, set_thread_backend
+from gemma_summarizer_multi import prepare_and_route, route_prepared_request
+from metrics import metrics
+from preprocessor import preprocess_request_data
+from request_timing import ENQUEUED_AT_KEY
+from single_flight import get_single_flight
+from summarizer_backend import FakeBackend
+from trivial_call import classify_call, get_trivial_stats
+
+
+def test_classify_trivial_calls():
+    """인사/맞장구만 있는 통화는 판정하고 용건이 있는 짧은 통화는 통과시킵니다."""
+    assert classify_call('대화 내용이 없습니다.', {}) == 'empty'
+    assert classify_call('나 > 여보세요\n상대방 > 네 안녕하세요\n나 > 네', {}) == 'no_content'
+    assert classify_call('나 > 여보세요\n상대방 > 네 네\n나 > 네 포인트 확인 감사합니다', {}) == 'short_call'
+    # 짧아도 용건(내용어)이 오간 발화가 대부분이면 모델로 요약
+    assert classify_call('나 > 네 네\n상대방 > 네 포인트 확인 알겠습니다', {}) is None
+    assert classify_call('나 > 카드 정지해주세요\n상대방 > 네 정지했습니다', {}) is None
+    assert classify_call('나 > 카드 분실했어요\n상대방 > 네 분실 신고 접수해드릴게요', {}) is None
+    # 규칙 조정: 내용어 상한을 높이면 같은 통화도 판정
+    assert classify_call('나 > 카드 분실했어요\n상대방 > 네 분실 신고 접수해드릴게요',
+                         {'TRIVIAL_MAX_CONTENT_WORDS': 5}) == 'no_content'
+
+
+def test_samples_and_templated_response():
+    """샘플 중 실제 통화는 판정하지 않고, 내용 없는 통화는 모델 없이 응답합니다."""
+    for path in sorted(glob.glob('sample/sample_request_*.json')):
+        with open(path, 'r', encoding='utf-8') as f:
+            text = preprocess_request_data(json.load(f))['text']
+        expected = 'empty' if path.endswith('sample_request_4.json') else None
+        assert classify_call(text, {}) == expected, path
+
+    metrics.reset()
+    response = process_request({'transactionid': 'tx-1', 'sequenceno': '1',
+                                'text': '나 > 여보세요\n상대방 > 네 안녕하세요\n나 > 네'})
+    summary = response['response']['summary']
+    assert response['response']['result'] == '0'
+    assert summary['summary'] and summary['paragraphs'][0]['sentiment'] == '보통'
+    stats = get_trivial_stats()
+    assert stats['hits'] == 1 and stats['hit_rate'] == 1.0 and stats['by_reason']['no_content'] == 1
+
+
+def test_routed_requests_are_counted_once(monkeypatch):
+    """서버가 큐에 넣기 전에 판정한 요청을 process_request가 다시 판정해도 판정 횟수는 한 번입니다."""
+    monkeypatch.setenv('RESULT_CACHE_ENABLED', 'false')
+    responses = []
+
+    class RecordingQueue:
+        def put_response(self, slot_id, response_data):
+            responses.append(slot_id)
+
+    record = {'summary': '카드 분실 신고 접수', 'keyword': '카드, 분실',
+              'paragraphs': [{'summary': '카드 분실 신고 접수', 'keyword': '분실', 'sentiment': '보통'}]}
+    metrics.reset()
+    trivial = {'transactionid': 'tx-1', 'sequenceno': '1', 'text': '나 > 여보세요\n상대방 > 네 안녕하세요\n나 > 네'}
+    assert route_prepared_request(RecordingQueue(), 1, trivial) is False and responses == [1]
+
+    call = {'transactionid': 'tx-2', 'sequenceno': '1', 'text': '나 > 카드 분실했어요\n상대방 > 네 분실 신고 접수해드릴게요'}
+    assert route_prepared_request(RecordingQueue(), 2, call) is True
+    set_thread_backend(FakeBackend([record], sleep=lambda seconds: None))
+    try:
+        response = process_request(call)
+    finally:
+        set_thread_backend(None)
+        get_single_flight(get_config()).complete(2, response)
+    stats = get_trivial_stats()
+    assert (stats['checked'], stats['hits'], stats['hit_rate']) == (2, 1, 0.5)
+
+
+def test_worker_prepares_raw_requests(monkeypatch):
+    """메인 루프가 큐에 넣은 원본 요청을 워커가 전처리하고, 내용 없는 통화는 바로 응답합니다."""
+    monkeypatch.setenv('RESULT_CACHE_ENABLED', 'false')
+    responses = []
+
+    class RecordingQueue:
+        def put_response(self, slot_id, response_data):
+            responses.append(slot_id)
+
+    with open('sample/sample_request_4.json', 'r', encoding='utf-8') as f:
+        empty = json.load(f)
+    assert prepare_and_route(RecordingQueue(), 1, empty) is None and responses == [1]
+
+    with open('sample/sample_request_1.json', 'r', encoding='utf-8') as f:
+        call = json.load(f)
+    call[ENQUEUED_AT_KEY] = 123.0
+    prepared = prepare_and_route(RecordingQueue(), 2, call)
+    try:
+        assert prepared['text'] and 'sttResultList' not in prepared
+        assert prepared[ENQUEUED_AT_KEY] == 123.0 and responses == [1]
+    finally:
+        get_single_flight(get_config()).complete(2, {})
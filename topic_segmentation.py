@@ -0,0 +1,175 @@
+import math
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import get_config
+from korean_text import content_words
+
+# 구간 최대 개수 (요약 paragraphs 2~3개)
+MAX_BLOCKS = 3
+
+# 구간 하나가 차지해야 하는 최소 발화 비율
+MIN_BLOCK_RATIO = 0.2
+
+# 프롬프트 대화 내용에 넣는 구간 머리
+BLOCK_MARKER = '[구간 {index}]'
+
+# 발화 길이로 추정하는 말하는 시간 (초/글자, 한국어 초당 약 6~7음절)
+SECONDS_PER_CHAR = 0.15
+
+# 침묵 점수 가중치 (어휘 응집도 깊이 점수는 0~2 범위)
+PAUSE_WEIGHT = 0.5
+
+
+def topic_segmentation_enabled(config: Optional[Dict[str, Any]] = None) -> bool:
+    config = config or get_config()
+    return bool(config.get('TOPIC_SEGMENTATION_ENABLED', False))
+
+
+def turn_start_times(data: Dict[str, Any]) -> Optional[List[int]]:
+    """전처리된 요청의 발화별 시작 시각(ms, preprocess_request_data가 metadata에 기록)"""
+    return ((data or {}).get('metadata') or {}).get('turn_start_times')
+
+
+def _cosine(a: Counter, b: Counter) -> float:
+    if not a or not b:
+        return 0.0
+    dot = sum(count * b[word] for word, count in a.items() if word in b)
+    if not dot:
+        return 0.0
+    return dot / (math.sqrt(sum(v * v for v in a.values())) * math.sqrt(sum(v * v for v in b.values())))
+
+
+def cohesion_scores(word_counts: List[Counter], window: int = 5) -> List[float]:
+    """
+    발화 사이 틈(gap) i(1..n-1)의 어휘 응집도: 앞 window개 발화와 뒤 window개 발화의 내용어 코사인 유사도
+
+    맞장구처럼 내용어가 없는 발화는 window 개수에 세지 않는다.
+
+    Returns:
+        List[float]: 길이 n-1 (index i-1이 발화 i-1과 i 사이)
+    """
+    content = [index for index, counts in enumerate(word_counts) if counts]
+    scores = []
+    for gap in range(1, len(word_counts)):
+        before = [index for index in content if index < gap][-window:]
+        after = [index for index in content if index >= gap][:window]
+        left = sum((word_counts[index] for index in before), Counter())
+        right = sum((word_counts[index] for index in after), Counter())
+        scores.append(_cosine(left, right))
+    return scores
+
+
+def depth_scores(cohesion: List[float]) -> List[float]:
+    """TextTiling 깊이 점수: 양쪽으로 응집도가 오르는 동안의 최고점과 이 틈의 차이 합"""
+    depths = []
+    for index, value in enumerate(cohesion):
+        left = value
+        for previous in reversed(cohesion[:index]):
+            if previous < left:
+                break
+            left = previous
+        right = value
+        for following in cohesion[index + 1:]:
+            if following < right:
+                break
+            right = following
+        depths.append((left - value) + (right - value))
+    return depths
+
+
+def pause_seconds(utterances: List[str], start_times: Optional[List[int]]) -> Optional[List[float]]:
+    """
+    발화 사이 침묵 추정 (초): 시작 시각 차이 - 앞 발화 길이로 추정한 말하는 시간
+
+    시작 시각이 없거나 발화 수와 맞지 않으면(요약 전 중복 제거로 줄이 바뀐 경우) None
+    """
+    if not start_times or len(start_times) != len(utterances):
+        return None
+    if any(not isinstance(value, (int, float)) for value in start_times):
+        return None
+    return [max(0.0, (start_times[i] - start_times[i - 1]) / 1000 - len(utterances[i - 1]) * SECONDS_PER_CHAR)
+            for i in range(1, len(utterances))]
+
+
+def boundary_scores(utterances: List[str], start_times: Optional[List[int]] = None,
+                    config: Optional[Dict[str, Any]] = None) -> List[float]:
+    """틈별 구간 경계 점수 = 어휘 응집도 깊이 점수 + 침묵 점수 (침묵 TOPIC_SEGMENT_PAUSE_SECONDS 이상이면 최대)"""
+    config = config or get_config()
+    window = max(1, int(config.get('TOPIC_SEGMENT_WINDOW', 5)))
+    scores = depth_scores(cohesion_scores([Counter(content_words(utterance)) for utterance in utterances], window))
+    pauses = pause_seconds(utterances, start_times)
+    if pauses is not None:
+        threshold = float(config.get('TOPIC_SEGMENT_PAUSE_SECONDS', 5.0))
+        scores = [score + PAUSE_WEIGHT * (min(1.0, pause / threshold) if threshold > 0 else 0.0)
+                  for score, pause in zip(scores, pauses)]
+    return scores
+
+
+def _even_blocks(total: int, count: int) -> List[Tuple[int, int]]:
+    size = math.ceil(total / count)
+    return [(start, min(total, start + size)) for start in range(0, total, size)]
+
+
+def segment_turns(utterances: List[str], count: Optional[int] = None, start_times: Optional[List[int]] = None,
+                  config: Optional[Dict[str, Any]] = None) -> List[Tuple[int, int]]:
+    """
+    발화 목록을 주제가 이어지는 연속 구간 [(start, end)]으로 나눔 (TextTiling 방식)
+
+    경계 점수가 높은 틈부터, 구간마다 TOPIC_SEGMENT_MIN_TURNS개 이상 발화가 남도록 경계를 고른다.
+    - count가 None이면 2~3개 (짧은 통화는 1개). 두 번째 경계는 점수가 평균 - 표준편차/2 이상일 때만
+    - count를 지정하면 그 개수 (경계를 고를 수 없으면 균등 분할)
+    같은 입력에서 count=None으로 k개가 나오면 count=k로도 같은 구간이 나온다.
+    """
+    config = config or get_config()
+    total = len(utterances)
+    if total == 0:
+        return []
+    if count is not None:
+        count = max(1, min(int(count), total))
+        if count == 1:
+            return [(0, total)]
+    # 구간 최소 발화 수: 설정값과 통화 길이 x MIN_BLOCK_RATIO 중 큰 값 (긴 통화에서 몇 줄짜리 구간 방지)
+    min_turns = max(1, int(config.get('TOPIC_SEGMENT_MIN_TURNS', 3)), math.ceil(total * MIN_BLOCK_RATIO))
+    scores = boundary_scores(utterances, start_times, config)
+    limit = MAX_BLOCKS - 1 if count is None else count - 1
+    cutoff = 0.0
+    if scores:
+        mean = sum(scores) / len(scores)
+        cutoff = mean - math.sqrt(sum((score - mean) ** 2 for score in scores) / len(scores)) / 2
+
+    chosen: List[int] = []
+    for gap in sorted(range(1, total), key=lambda gap: (-scores[gap - 1], gap)):
+        if len(chosen) >= limit:
+            break
+        if gap < min_turns or total - gap < min_turns or any(abs(gap - other) < min_turns for other in chosen):
+            continue
+        if count is None and chosen and scores[gap - 1] < cutoff:
+            break
+        chosen.append(gap)
+
+    if count is not None and len(chosen) < count - 1:
+        return _even_blocks(total, count)
+    bounds = [0] + sorted(chosen) + [total]
+    return list(zip(bounds, bounds[1:]))
+
+
+def mark_topic_blocks(text: str, start_times: Optional[List[int]] = None,
+                      config: Optional[Dict[str, Any]] = None) -> Tuple[str, int]:
+    """
+    대화 내용을 주제 구간으로 나눠 구간마다 '[구간 N]' 머리를 붙임
+
+    Returns:
+        tuple: (구간 머리를 넣은 대화 내용, 구간 수). 구간이 1개 이하면 원문 그대로
+    """
+    from extractive_summarizer import split_turns
+
+    turns = split_turns(text)
+    blocks = segment_turns([utterance for _, utterance in turns], start_times=start_times, config=config)
+    if len(blocks) <= 1:
+        return text, len(blocks)
+    lines = []
+    for index, (start, end) in enumerate(blocks, 1):
+        lines.append(BLOCK_MARKER.format(index=index))
+        lines.extend(f"{speaker} > {utterance}" if speaker else utterance for speaker, utterance in turns[start:end])
+    return '\n'.join(lines), len(blocks)
@@ -0,0 +1,133 @@
+import json
+from typing import Any, Dict, List, Optional
+
+from config import get_config
+from korean_text import content_words, is_filler, tokenize
+from metrics import metrics
+
+# 전처리기가 sttResultList가 비었을 때 넣는 문구
+EMPTY_CONVERSATION_TEXT = '대화 내용이 없습니다.'
+
+# 판정 사유별 템플릿 요약 (명사형, 25자 이내)
+TRIVIAL_SUMMARIES = {
+    'empty': '대화 내용 없는 통화',
+    'no_content': '인사와 응답만 있는 짧은 통화',
+    'short_call': '용건 없이 끝난 짧은 통화',
+    'filler_only': '맞장구 위주의 내용 없는 통화',
+}
+
+TRIVIAL_REASONS = tuple(TRIVIAL_SUMMARIES)
+
+
+def _utterances(text: str) -> List[str]:
+    """'화자 > 발화' 형식의 줄에서 발화만 추출"""
+    utterances = []
+    for line in (text or '').split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        if ' > ' in line:
+            line = line.split(' > ', 1)[1].strip()
+        if line:
+            utterances.append(line)
+    return utterances
+
+
+def analyze_call(text: str) -> Dict[str, Any]:
+    """
+    통화의 내용 밀도 특징 계산
+
+    Returns:
+        dict: turns(발화 수), words(어절 수), filler_ratio(추임새 비율),
+              empty_turn_ratio(내용어 없이 인사/맞장구뿐인 발화 비율),
+              content_words(서로 다른 내용어, 등장 순서)
+    """
+    utterances = _utterances(text)
+    words = [word for utterance in utterances for word in tokenize(utterance)]
+    fillers = sum(1 for word in words if is_filler(word))
+    empty_turns = sum(1 for utterance in utterances if not content_words(utterance))
+    distinct = list(dict.fromkeys(content_words('\n'.join(utterances))))
+    return {
+        'turns': len(utterances),
+        'words': len(words),
+        'filler_ratio': fillers / len(words) if words else 1.0,
+        'empty_turn_ratio': empty_turns / len(utterances) if utterances else 1.0,
+        'content_words': distinct,
+    }
+
+
+def classify_call(text: str, config: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """
+    LLM 없이 응답해도 되는 내용 없는 통화인지 판정
+
+    규칙 (TRIVIAL_* 설정으로 조정):
+    - empty: 발화가 없음
+    - no_content: 서로 다른 내용어가 TRIVIAL_MAX_CONTENT_WORDS개 이하
+    - short_call: 발화 TRIVIAL_MAX_TURNS개 이하, 내용어 TRIVIAL_SHORT_MAX_CONTENT_WORDS개 이하이고
+      내용어 없는 발화(인사/맞장구) 비율이 TRIVIAL_SHORT_MIN_EMPTY_TURN_RATIO 이상
+      (짧아도 '카드 정지해주세요'처럼 용건이 오간 통화는 모델로 요약)
+    - filler_only: 추임새 비율 TRIVIAL_MIN_FILLER_RATIO 이상이고 내용어 TRIVIAL_SHORT_MAX_CONTENT_WORDS개 이하
+
+    Returns:
+        Optional[str]: 판정 사유 (일반 통화면 None)
+    """
+    config = config or get_config()
+    if (text or '').strip() == EMPTY_CONVERSATION_TEXT:
+        return 'empty'
+    features = analyze_call(text)
+    distinct = len(features['content_words'])
+    short_max = int(config.get('TRIVIAL_SHORT_MAX_CONTENT_WORDS', 2))
+    if features['words'] == 0:
+        return 'empty'
+    if distinct <= int(config.get('TRIVIAL_MAX_CONTENT_WORDS', 1)):
+        return 'no_content'
+    if (features['turns'] <= int(config.get('TRIVIAL_MAX_TURNS', 4)) and distinct <= short_max
+            and features['empty_turn_ratio'] >= float(config.get('TRIVIAL_SHORT_MIN_EMPTY_TURN_RATIO', 0.6))):
+        return 'short_call'
+    if features['filler_ratio'] >= float(config.get('TRIVIAL_MIN_FILLER_RATIO', 0.7)) and distinct <= short_max:
+        return 'filler_only'
+    return None
+
+
+def build_trivial_summary(text: str, config: Optional[Dict[str, Any]] = None,
+                          record_miss: bool = True) -> Optional[str]:
+    """
+    내용 없는 통화면 템플릿 요약 JSON을 반환 (일반 통화면 None)
+
+    판정 횟수와 사유별 적중 횟수를 지표(trivial.*)로 기록한다.
+
+    Args:
+        record_miss (bool): 일반 통화 판정을 지표에 기록할지 (process_request가 다시 판정하는 선판정은 False)
+    """
+    config = config or get_config()
+    if not config.get('TRIVIAL_CALL_ENABLED', True):
+        return None
+    reason = classify_call(text, config)
+    if reason is None:
+        if record_miss:
+            metrics.increment('trivial.checked')
+        return None
+    metrics.increment('trivial.checked')
+    metrics.increment('trivial.hit')
+    metrics.increment(f'trivial.hit.{reason}')
+    summary = TRIVIAL_SUMMARIES[reason]
+    found = analyze_call(text)['content_words'][:3] if reason != 'empty' else []
+    keyword = ', '.join(found) if found else '짧은 통화'
+    print(f"내용 없는 통화 감지 ({reason}) - LLM 호출 생략")
+    return json.dumps({
+        'summary': summary,
+        'keyword': keyword,
+        'paragraphs': [{'summary': summary, 'keyword': keyword, 'sentiment': '보통'}],
+    }, ensure_ascii=False)
+
+
+def get_trivial_stats() -> Dict[str, Any]:
+    """내용 없는 통화 판정 적중률"""
+    checked = metrics.get_counter('trivial.checked')
+    hits = metrics.get_counter('trivial.hit')
+    return {
+        'checked': checked,
+        'hits': hits,
+        'hit_rate': hits / checked if checked else 0.0,
+        'by_reason': {reason: metrics.get_counter(f'trivial.hit.{reason}') for reason in TRIVIAL_REASONS},
+    }